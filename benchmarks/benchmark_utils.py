@@ -0,0 +1,126 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+import sys
+import timeit
+import tracemalloc
+
+
+PROJECT = 'benchmark-project'
+
+_REPORT_HEADER = '%-40s %8s %12s %10s %10s %10s' % (
+    'benchmark', 'calls', 'items/sec', 'p50 ms', 'p95 ms', 'p99 ms')
+
+
+class BenchmarkResult(object):
+    """Latencies collected while repeatedly calling an operation.
+
+    :type name: str
+    :param name: Name of the benchmark.
+
+    :type latencies: list
+    :param latencies: Seconds taken by each call.
+
+    :type items_per_call: int
+    :param items_per_call: Number of items (entities, rows, messages, ...)
+                           processed by each call.
+    """
+
+    def __init__(self, name, latencies, items_per_call=1):
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.items_per_call = items_per_call
+
+    @property
+    def total_seconds(self):
+        return sum(self.latencies)
+
+    @property
+    def items_per_second(self):
+        total = self.total_seconds
+        if total == 0:
+            return float('inf')
+        return len(self.latencies) * self.items_per_call / total
+
+    def percentile(self, percent):
+        """Latency (in seconds) below which ``percent`` of calls fall."""
+        index = int(round(percent / 100.0 * (len(self.latencies) - 1)))
+        return self.latencies[index]
+
+    def __str__(self):
+        return '%-40s %8d %12.1f %10.3f %10.3f %10.3f' % (
+            self.name, len(self.latencies), self.items_per_second,
+            1000 * self.percentile(50), 1000 * self.percentile(95),
+            1000 * self.percentile(99))
+
+
+class MemoryResult(object):
+    """Memory held by the objects created by an operation.
+
+    :type name: str
+    :param name: Name of the benchmark.
+
+    :type num_bytes: int
+    :param num_bytes: Bytes allocated, and still held, by the operation.
+
+    :type items: int
+    :param items: Number of items the operation created.
+    """
+
+    def __init__(self, name, num_bytes, items):
+        self.name = name
+        self.num_bytes = num_bytes
+        self.items = items
+
+    @property
+    def bytes_per_item(self):
+        return float(self.num_bytes) / self.items
+
+    def __str__(self):
+        return '%-40s %8d %12s' % (
+            self.name, self.items, '%.1f B/item' % (self.bytes_per_item,))
+
+
+def measure_memory(name, func, items):
+    """Measure the memory held by the result of calling ``func``."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return MemoryResult(name, after - before, items)
+
+
+def measure(name, func, iterations, items_per_call=1, warmup=1):
+    """Time ``iterations`` calls of ``func``, after ``warmup`` calls."""
+    for _ in range(warmup):
+        func()
+    timer = timeit.default_timer
+    latencies = []
+    for _ in range(iterations):
+        start = timer()
+        func()
+        latencies.append(timer() - start)
+    return BenchmarkResult(name, latencies, items_per_call)
+
+
+def print_report(results, stream=sys.stdout):
+    print(_REPORT_HEADER, file=stream)
+    print('-' * len(_REPORT_HEADER), file=stream)
+    for result in results:
+        print(result, file=stream)
@@ -0,0 +1,55 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+from gcloud import bigquery
+from gcloud._helpers import UTC
+from gcloud.bigquery import SchemaField
+from gcloud.testing import BigQueryBackend
+from gcloud.testing import LocalServer
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+BATCH_SIZE = 500
+SCHEMA = [
+    SchemaField('name', 'STRING', mode='REQUIRED'),
+    SchemaField('age', 'INTEGER', mode='REQUIRED'),
+    SchemaField('score', 'FLOAT'),
+    SchemaField('joined', 'TIMESTAMP'),
+]
+
+
+def run(iterations):
+    results = []
+    with LocalServer([BigQueryBackend()]) as server:
+        client = bigquery.Client(project=PROJECT, http=server.http())
+        dataset = client.dataset('benchmark_dataset')
+        dataset.create()
+        table = dataset.table('benchmark_table', SCHEMA)
+        table.create()
+
+        joined = datetime.datetime(2016, 1, 1, tzinfo=UTC)
+        rows = [(u'name-%d' % (index,), index, index / 3.0, joined)
+                for index in range(BATCH_SIZE)]
+        results.append(measure(
+            'bigquery.insert_data', lambda: table.insert_data(rows),
+            iterations, items_per_call=BATCH_SIZE))
+        results.append(measure(
+            'bigquery.fetch_data',
+            lambda: table.fetch_data(max_results=BATCH_SIZE),
+            iterations, items_per_call=BATCH_SIZE))
+    return results
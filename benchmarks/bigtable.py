@@ -0,0 +1,226 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+from gcloud.bigtable._generated_v2 import bigtable_pb2
+from gcloud.bigtable.client import Client
+from gcloud.bigtable.columnar import ColumnarRowsData
+from gcloud.bigtable.happybase import Connection
+from gcloud.bigtable.row_data import PartialRowsData
+from gcloud.environment_vars import BIGTABLE_EMULATOR
+from gcloud.testing.bigtable_server import BigtableServer
+from gcloud.testing.bigtable_server import EmulatorCredentials
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+INSTANCE_ID = 'benchmark-instance'
+TABLE_ID = 'benchmark-table'
+COLUMN_FAMILY = 'cf'
+NUM_ROWS = 1000
+NUM_COLUMNS = 5
+VALUE = b'v' * 100
+LARGE_VALUE = b'L' * (256 * 1024)
+VALUE_CHUNK_SIZE = 64 * 1024
+SPLIT_VALUE_SIZE = 8 * 1024 * 1024
+SPLIT_CHUNK_SIZE = 1024
+COLUMNS = [(COLUMN_FAMILY, b'col%d' % (column,))
+           for column in range(NUM_COLUMNS)]
+
+
+def _row_key(index):
+    return ('row-%06d' % (index,)).encode('ascii')
+
+
+def _consume(partial_rows_data):
+    partial_rows_data.consume_all()
+    return partial_rows_data.rows
+
+
+def run(iterations):
+    results = []
+    with BigtableServer(value_chunk_size=VALUE_CHUNK_SIZE) as server:
+        old_emulator = os.environ.get(BIGTABLE_EMULATOR)
+        os.environ[BIGTABLE_EMULATOR] = server.emulator_host
+        client = Client(project=PROJECT, credentials=EmulatorCredentials())
+        client.start()
+        try:
+            table = client.instance(INSTANCE_ID).table(TABLE_ID)
+            results.extend(_run_table(table, iterations))
+            connection = Connection(instance=client.instance(INSTANCE_ID))
+            results.extend(_run_happybase(connection.table(TABLE_ID),
+                                          iterations))
+        finally:
+            client.stop()
+            if old_emulator is None:
+                del os.environ[BIGTABLE_EMULATOR]
+            else:
+                os.environ[BIGTABLE_EMULATOR] = old_emulator
+    results.extend(_run_parser(iterations))
+    return results
+
+
+def _run_table(table, iterations):
+    results = []
+    counter = [0]
+
+    def _commit_row():
+        row = table.row(_row_key(counter[0] % NUM_ROWS))
+        counter[0] += 1
+        for column in range(NUM_COLUMNS):
+            row.set_cell(COLUMN_FAMILY, b'col%d' % (column,), VALUE)
+        row.commit()
+
+    results.append(measure('bigtable.row.commit', _commit_row,
+                           max(iterations, NUM_ROWS)))
+
+    def _mutate_rows():
+        rows = []
+        for index in range(NUM_ROWS):
+            row = table.row(_row_key(index))
+            for column in range(NUM_COLUMNS):
+                row.set_cell(COLUMN_FAMILY, b'col%d' % (column,), VALUE)
+            rows.append(row)
+        table.mutate_rows(rows)
+
+    results.append(measure('bigtable.mutate_rows', _mutate_rows,
+                           max(iterations // 100, 1),
+                           items_per_call=NUM_ROWS))
+
+    def _batcher():
+        with table.mutations_batcher(flush_count=100) as batcher:
+            for index in range(NUM_ROWS):
+                row = table.row(_row_key(index))
+                for column in range(NUM_COLUMNS):
+                    row.set_cell(COLUMN_FAMILY, b'col%d' % (column,), VALUE)
+                batcher.mutate(row)
+
+    results.append(measure('bigtable.mutations_batcher', _batcher,
+                           max(iterations // 100, 1),
+                           items_per_call=NUM_ROWS))
+    results.append(measure('bigtable.read_row',
+                           lambda: table.read_row(_row_key(0)), iterations))
+    results.append(measure(
+        'bigtable.read_rows[scan]',
+        lambda: _consume(table.read_rows()), max(iterations // 10, 1),
+        items_per_call=NUM_ROWS))
+    results.append(measure(
+        'bigtable.read_rows[stream]',
+        lambda: sum(1 for _ in table.read_rows()), max(iterations // 10, 1),
+        items_per_call=NUM_ROWS))
+    results.append(measure(
+        'bigtable.read_rows[parallel]',
+        lambda: sum(1 for _ in table.read_rows_parallel(ordered=False)),
+        max(iterations // 10, 1), items_per_call=NUM_ROWS))
+    results.append(measure(
+        'bigtable.sample_row_keys',
+        lambda: list(table.sample_row_keys()), iterations))
+
+    large_row = table.row(b'large')
+    large_row.set_cell(COLUMN_FAMILY, b'blob', LARGE_VALUE)
+    large_row.commit()
+    results.append(measure(
+        'bigtable.read_row[256KB,chunked]',
+        lambda: table.read_row(b'large'), iterations))
+    return results
+
+
+def _run_happybase(table, iterations):
+    results = []
+    data = dict(('%s:col%d' % (COLUMN_FAMILY, column), VALUE)
+                for column in range(NUM_COLUMNS))
+    results.append(measure(
+        'happybase.put', lambda: table.put(_row_key(0), data), iterations))
+    results.append(measure(
+        'happybase.row', lambda: table.row(_row_key(0)), iterations))
+    row_keys = [_row_key(index) for index in range(0, NUM_ROWS, 10)]
+    results.append(measure(
+        'happybase.rows', lambda: table.rows(row_keys), iterations,
+        items_per_call=len(row_keys)))
+    results.append(measure(
+        'happybase.scan', lambda: list(table.scan()),
+        max(iterations // 10, 1), items_per_call=NUM_ROWS))
+
+    def _batch_put():
+        with table.batch() as batch:
+            for key in row_keys:
+                batch.put(key, data)
+
+    results.append(measure('happybase.batch[put]', _batch_put,
+                           max(iterations // 10, 1),
+                           items_per_call=len(row_keys)))
+    counter_column = '%s:counter' % (COLUMN_FAMILY,)
+    results.append(measure(
+        'happybase.counter_inc',
+        lambda: table.counter_inc(_row_key(0), counter_column), iterations))
+
+    def _buffered_inc():
+        with table.counter_buffer(flush_interval=None) as counters:
+            for _ in range(NUM_ROWS):
+                counters.counter_inc(_row_key(0), counter_column)
+
+    results.append(measure('happybase.counter_inc[buffered]', _buffered_inc,
+                           max(iterations // 10, 1),
+                           items_per_call=NUM_ROWS))
+    return results
+
+
+def _rows_responses():
+    responses = []
+    for index in range(NUM_ROWS):
+        response = bigtable_pb2.ReadRowsResponse()
+        for column in range(NUM_COLUMNS):
+            chunk = response.chunks.add(timestamp_micros=1000, value=VALUE)
+            if column == 0:
+                chunk.row_key = _row_key(index)
+                chunk.family_name.value = COLUMN_FAMILY
+            chunk.qualifier.value = b'col%d' % (column,)
+        chunk.commit_row = True
+        responses.append(response)
+    return responses
+
+
+def _split_value_responses():
+    response = bigtable_pb2.ReadRowsResponse()
+    num_chunks = SPLIT_VALUE_SIZE // SPLIT_CHUNK_SIZE
+    for index in range(num_chunks):
+        chunk = response.chunks.add(value=b'S' * SPLIT_CHUNK_SIZE)
+        if index == 0:
+            chunk.row_key = b'split'
+            chunk.family_name.value = COLUMN_FAMILY
+            chunk.qualifier.value = b'blob'
+        if index < num_chunks - 1:
+            chunk.value_size = SPLIT_VALUE_SIZE
+    chunk.commit_row = True
+    return [response]
+
+
+def _run_parser(iterations):
+    """Parse canned ``ReadRows`` responses, without a server."""
+    rows_responses = _rows_responses()
+    split_responses = _split_value_responses()
+    return [
+        measure('bigtable.parse_rows',
+                lambda: sum(1 for _ in PartialRowsData(iter(rows_responses))),
+                max(iterations // 10, 1), items_per_call=NUM_ROWS),
+        measure('bigtable.parse_rows[columnar]',
+                lambda: _consume(ColumnarRowsData(iter(rows_responses),
+                                                  COLUMNS)),
+                max(iterations // 10, 1), items_per_call=NUM_ROWS),
+        measure('bigtable.parse_rows[8MB,split]',
+                lambda: list(PartialRowsData(iter(split_responses))),
+                max(iterations // 10, 1)),
+    ]
@@ -0,0 +1,206 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import io
+
+from gcloud import datastore
+from gcloud.datastore.cache import LocalCache
+from gcloud.datastore.export import export_entities
+from gcloud.datastore.export import import_entities
+from gcloud.datastore.grpc_connection import GrpcConnection
+from gcloud.datastore.query import KEYS
+from gcloud.datastore.query import TUPLES
+from gcloud.datastore.splitter import ParallelScan
+from gcloud.datastore.splitter import split_query
+from gcloud.testing import DatastoreBackend
+from gcloud.testing import LocalServer
+from gcloud.testing.datastore_server import DatastoreServer
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+KIND = 'Benchmark'
+NUM_ENTITIES = 500
+BATCH_SIZE = 100
+
+
+def _make_entity(client, index):
+    entity = datastore.Entity(key=client.key(KIND, index + 1))
+    entity.update({
+        'index': index,
+        'name': u'entity-%d' % (index,),
+        'score': index / 7.0,
+        'created': datetime.datetime(2016, 1, 1),
+        'tags': [u'a', u'b', u'c'],
+        'blob': b'x' * 256,
+    })
+    return entity
+
+
+def run(iterations):
+    backend = DatastoreBackend()
+    results = []
+    with LocalServer([backend]) as server:
+        client = datastore.Client(project=PROJECT, http=server.http())
+        entities = [_make_entity(client, index)
+                    for index in range(NUM_ENTITIES)]
+        keys = [entity.key for entity in entities]
+
+        results.append(measure(
+            'datastore.put_multi', lambda: client.put_multi(
+                entities[:BATCH_SIZE]),
+            iterations, items_per_call=BATCH_SIZE))
+        writer = client.bulk_writer(batch_size=BATCH_SIZE, max_workers=4)
+        results.append(measure(
+            'datastore.bulk_writer.put_multi', lambda: writer.put_multi(
+                entities),
+            iterations, items_per_call=NUM_ENTITIES))
+
+        results.append(measure(
+            'datastore.get', lambda: client.get(keys[0]), iterations))
+        results.append(measure(
+            'datastore.get_multi', lambda: client.get_multi(
+                keys[:BATCH_SIZE]),
+            iterations, items_per_call=BATCH_SIZE))
+        cached_client = datastore.Client(project=PROJECT, http=server.http(),
+                                         cache=LocalCache())
+        results.append(measure(
+            'datastore.get_multi[cache]', lambda: cached_client.get_multi(
+                keys[:BATCH_SIZE]),
+            iterations, items_per_call=BATCH_SIZE))
+        results.append(measure(
+            'datastore.get_multi_sharded', lambda: client.get_multi_sharded(
+                keys, shard_size=BATCH_SIZE, max_workers=4),
+            iterations, items_per_call=NUM_ENTITIES))
+
+        def _query():
+            return list(client.query(kind=KIND).fetch())
+
+        results.append(measure('datastore.query', _query, iterations,
+                               items_per_call=NUM_ENTITIES))
+
+        def _lazy_query():
+            return [(entity['index'], entity['name'])
+                    for entity in client.query(kind=KIND).fetch(lazy=True)]
+
+        results.append(measure('datastore.query[lazy]', _lazy_query,
+                               iterations, items_per_call=NUM_ENTITIES))
+
+        def _prefetch_query():
+            return list(client.query(kind=KIND).fetch(prefetch=2))
+
+        results.append(measure('datastore.query[prefetch]', _prefetch_query,
+                               iterations, items_per_call=NUM_ENTITIES))
+
+        def _parallel_scan():
+            query = client.query(kind=KIND)
+            splits = split_query(query, 4)
+            return list(ParallelScan(query, splits, max_workers=4))
+
+        results.append(measure('datastore.query[parallel_scan]',
+                               _parallel_scan, iterations,
+                               items_per_call=NUM_ENTITIES))
+
+        def _export():
+            stream = io.BytesIO()
+            export_entities(client.query(kind=KIND), stream)
+            return stream
+
+        exported = _export().getvalue()
+        results.append(measure('datastore.export_entities', _export,
+                               iterations, items_per_call=NUM_ENTITIES))
+        results.append(measure(
+            'datastore.import_entities', lambda: import_entities(
+                client, io.BytesIO(exported), batch_size=BATCH_SIZE,
+                max_workers=4),
+            iterations, items_per_call=NUM_ENTITIES))
+
+        def _keys_only():
+            query = client.query(kind=KIND)
+            query.keys_only()
+            return list(query.fetch())
+
+        results.append(measure('datastore.query[keys_only]', _keys_only,
+                               iterations, items_per_call=NUM_ENTITIES))
+
+        def _keys():
+            query = client.query(kind=KIND)
+            query.keys_only()
+            return list(query.fetch(result_type=KEYS))
+
+        results.append(measure('datastore.query[keys]', _keys,
+                               iterations, items_per_call=NUM_ENTITIES))
+
+        def _projection():
+            query = client.query(kind=KIND, projection=['index', 'score'])
+            return list(query.fetch())
+
+        results.append(measure('datastore.query[projection]', _projection,
+                               iterations, items_per_call=NUM_ENTITIES))
+
+        def _tuples():
+            query = client.query(kind=KIND, projection=['index', 'score'])
+            return list(query.fetch(result_type=TUPLES))
+
+        results.append(measure('datastore.query[tuples]', _tuples,
+                               iterations, items_per_call=NUM_ENTITIES))
+
+        def _transaction():
+            with client.transaction():
+                entity = client.get(keys[0])
+                entity['index'] += 1
+                client.put(entity)
+
+        results.append(measure('datastore.transaction', _transaction,
+                               iterations))
+
+        def _increment(transaction):
+            entity = client.get(keys[0])
+            entity['index'] += 1
+            client.put(entity)
+
+        results.append(measure(
+            'datastore.run_in_transaction',
+            lambda: client.run_in_transaction(_increment), iterations))
+        results.append(measure(
+            'datastore.run_in_transaction[read_only]',
+            lambda: client.run_in_transaction(
+                lambda transaction: client.get(keys[0]), read_only=True),
+            iterations))
+    results.extend(_run_grpc(backend, keys, iterations))
+    return results
+
+
+def _run_grpc(backend, keys, iterations):
+    """The lookups of :func:`run`, over a pool of gRPC channels."""
+    results = []
+    with DatastoreServer(backend=backend) as server:
+        client = datastore.Client(project=PROJECT, http=object())
+        client.connection = GrpcConnection(
+            host=server.host, port=server.port, secure=False)
+        results.append(measure(
+            'datastore.get[grpc]', lambda: client.get(keys[0]), iterations))
+        results.append(measure(
+            'datastore.get_multi[grpc]', lambda: client.get_multi(
+                keys[:BATCH_SIZE]),
+            iterations, items_per_call=BATCH_SIZE))
+        results.append(measure(
+            'datastore.get_multi_sharded[grpc]',
+            lambda: client.get_multi_sharded(
+                keys, shard_size=BATCH_SIZE, max_workers=4),
+            iterations, items_per_call=len(keys)))
+        client.connection.close()
+    return results
@@ -0,0 +1,69 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory and CPU cost of datastore keys, without any I/O."""
+
+from gcloud.datastore.helpers import key_from_protobuf
+from gcloud.datastore.key import Key
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+from benchmark_utils import measure_memory
+
+
+NUM_KEYS = 20000
+
+
+def _make_keys():
+    return [Key('Parent', index % 100, 'Child', u'child-%d' % (index,),
+                project=PROJECT, namespace=u'ns')
+            for index in range(NUM_KEYS)]
+
+
+def run(iterations):
+    results = []
+    keys = _make_keys()
+    key_pbs = [key.to_protobuf() for key in keys]
+    duplicates = _make_keys()
+
+    results.append(measure_memory('datastore.key[memory]', _make_keys,
+                                  NUM_KEYS))
+    results.append(measure_memory(
+        'datastore.key[memory:from_protobuf]',
+        lambda: [key_from_protobuf(key_pb) for key_pb in key_pbs],
+        NUM_KEYS))
+
+    results.append(measure('datastore.key.__init__', _make_keys,
+                           iterations, items_per_call=NUM_KEYS))
+    results.append(measure(
+        'datastore.key_from_protobuf',
+        lambda: [key_from_protobuf(key_pb) for key_pb in key_pbs],
+        iterations, items_per_call=NUM_KEYS))
+    results.append(measure(
+        'datastore.key.to_protobuf',
+        lambda: [key.to_protobuf() for key in keys],
+        iterations, items_per_call=NUM_KEYS))
+    results.append(measure(
+        'datastore.key[dedupe]', lambda: len(set(keys + duplicates)),
+        iterations, items_per_call=2 * NUM_KEYS))
+    results.append(measure(
+        'datastore.key.__eq__',
+        lambda: sum(1 for key, other in zip(keys, duplicates)
+                    if key == other),
+        iterations, items_per_call=NUM_KEYS))
+    results.append(measure(
+        'datastore.key[attributes]',
+        lambda: [(key.kind, key.id_or_name, key.parent) for key in keys],
+        iterations, items_per_call=NUM_KEYS))
+    return results
@@ -0,0 +1,65 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""CPU cost of building and compiling datastore queries, without any I/O."""
+
+import datetime
+
+from gcloud.datastore.client import Client
+from gcloud.datastore.query import _compiled_pb_from_query
+from gcloud.datastore.query import _pb_from_query
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+NUM_QUERIES = 1000
+
+
+def _make_query(client, owner=u'alice'):
+    query = client.query(kind='Task',
+                         ancestor=client.key('TaskList', u'default'),
+                         order=['-priority', 'created'])
+    query.add_filter('done', '=', False)
+    query.add_filter('priority', '>=', 4)
+    query.add_filter('created', '<', datetime.datetime(2016, 1, 1))
+    query.add_filter('owner', '=', owner)
+    return query
+
+
+def run(iterations):
+    results = []
+    client = Client(project=PROJECT, http=object())
+    query = _make_query(client)
+
+    results.append(measure(
+        'datastore.query[construct]',
+        lambda: [_make_query(client) for _ in range(NUM_QUERIES)],
+        iterations, items_per_call=NUM_QUERIES))
+    results.append(measure(
+        'datastore.query[compile]',
+        lambda: [_pb_from_query(query) for _ in range(NUM_QUERIES)],
+        iterations, items_per_call=NUM_QUERIES))
+    results.append(measure(
+        'datastore.query[compile:cached]',
+        lambda: [_compiled_pb_from_query(query)
+                 for _ in range(NUM_QUERIES)],
+        iterations, items_per_call=NUM_QUERIES))
+    # A new Query object per call, as when running a query per request.
+    results.append(measure(
+        'datastore.query[construct+compile:cached]',
+        lambda: [_compiled_pb_from_query(_make_query(client))
+                 for _ in range(NUM_QUERIES)],
+        iterations, items_per_call=NUM_QUERIES))
+    return results
@@ -0,0 +1,51 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from gcloud import logging
+from gcloud.testing import LocalServer
+from gcloud.testing import LoggingBackend
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+BATCH_SIZE = 100
+
+
+def run(iterations):
+    backend = LoggingBackend()
+    results = []
+    with LocalServer([backend]) as server:
+        client = logging.Client(project=PROJECT, http=server.http())
+        logger = client.logger('benchmark-log')
+
+        results.append(measure(
+            'logging.log_text', lambda: logger.log_text('message'),
+            iterations))
+
+        def _log_batch():
+            with logger.batch() as batch:
+                for index in range(BATCH_SIZE):
+                    batch.log_struct({'index': index, 'message': 'm'})
+
+        results.append(measure('logging.log_struct[batch]', _log_batch,
+                               iterations, items_per_call=BATCH_SIZE))
+
+        def _list_entries():
+            entries, _ = client.list_entries(page_size=BATCH_SIZE)
+            return entries
+
+        results.append(measure('logging.list_entries', _list_entries,
+                               iterations, items_per_call=BATCH_SIZE))
+    return results
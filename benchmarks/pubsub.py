@@ -0,0 +1,55 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from gcloud import pubsub
+from gcloud.testing import LocalServer
+from gcloud.testing import PubsubBackend
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+BATCH_SIZE = 100
+PAYLOAD = b'x' * 512
+
+
+def run(iterations):
+    results = []
+    with LocalServer([PubsubBackend()]) as server:
+        client = pubsub.Client(project=PROJECT, http=server.http())
+        topic = client.topic('benchmark-topic')
+        topic.create()
+        subscription = topic.subscription('benchmark-subscription')
+        subscription.create()
+
+        results.append(measure(
+            'pubsub.publish', lambda: topic.publish(PAYLOAD, attr='value'),
+            iterations))
+
+        def _publish_batch():
+            with topic.batch() as batch:
+                for _ in range(BATCH_SIZE):
+                    batch.publish(PAYLOAD)
+
+        results.append(measure('pubsub.publish[batch]', _publish_batch,
+                               iterations, items_per_call=BATCH_SIZE))
+
+        def _pull_and_ack():
+            pulled = subscription.pull(max_messages=BATCH_SIZE)
+            if pulled:
+                subscription.acknowledge([ack_id for ack_id, _ in pulled])
+
+        results.append(measure('pubsub.pull+acknowledge', _pull_and_ack,
+                               iterations, items_per_call=BATCH_SIZE))
+    return results
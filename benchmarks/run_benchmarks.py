@@ -0,0 +1,71 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Run client benchmarks against the in-process fakes in gcloud.testing.
+
+No credentials or network access are needed: each benchmark module
+starts its own local server, so the numbers measure library overhead
+(serialization, parsing, request handling) plus loopback transport.
+"""
+
+from __future__ import print_function
+import argparse
+
+import benchmark_utils
+import bigquery
+import bigtable
+import datastore
+import datastore_keys
+import datastore_query
+import logging_
+import pubsub
+import storage
+
+
+BENCHMARK_MODULES = {
+    'bigquery': bigquery,
+    'bigtable': bigtable,
+    'datastore': datastore,
+    'datastore_keys': datastore_keys,
+    'datastore_query': datastore_query,
+    'logging': logging_,
+    'pubsub': pubsub,
+    'storage': storage,
+}
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description='GCloud benchmarks against local fake services.')
+    parser.add_argument('--package', dest='packages', action='append',
+                        choices=sorted(BENCHMARK_MODULES.keys()),
+                        help='Package to benchmark (repeatable; '
+                             'defaults to all).')
+    parser.add_argument('--iterations', dest='iterations', type=int,
+                        default=50, help='Timed calls per benchmark.')
+    return parser
+
+
+def main():
+    parser = get_parser()
+    args = parser.parse_args()
+    packages = args.packages or sorted(BENCHMARK_MODULES.keys())
+    results = []
+    for package in packages:
+        results.extend(BENCHMARK_MODULES[package].run(args.iterations))
+    benchmark_utils.print_report(results)
+
+
+if __name__ == '__main__':
+    main()
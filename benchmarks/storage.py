@@ -0,0 +1,77 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+
+from gcloud import storage
+from gcloud.testing import LocalServer
+from gcloud.testing import StorageBackend
+
+from benchmark_utils import PROJECT
+from benchmark_utils import measure
+
+
+BUCKET_NAME = 'benchmark-bucket'
+SMALL_SIZE = 1024
+LARGE_SIZE = 4 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+NUM_BLOBS = 100
+
+
+def run(iterations):
+    results = []
+    with LocalServer([StorageBackend()]) as server:
+        client = storage.Client(project=PROJECT, http=server.http())
+        bucket = client.create_bucket(BUCKET_NAME)
+        small = os.urandom(SMALL_SIZE)
+        large = os.urandom(LARGE_SIZE)
+
+        small_blob = bucket.blob('small')
+        results.append(measure(
+            'storage.upload[1KB]',
+            lambda: small_blob.upload_from_string(small), iterations))
+        results.append(measure(
+            'storage.download[1KB]', small_blob.download_as_string,
+            iterations))
+
+        large_blob = bucket.blob('large')
+        large_blob.chunk_size = CHUNK_SIZE
+
+        def _upload_large():
+            large_blob.upload_from_file(io.BytesIO(large), size=LARGE_SIZE)
+
+        results.append(measure('storage.upload[4MB,resumable]',
+                               _upload_large, max(iterations // 10, 1)))
+        results.append(measure('storage.download[4MB,chunked]',
+                               large_blob.download_as_string,
+                               max(iterations // 10, 1)))
+
+        for index in range(NUM_BLOBS):
+            bucket.blob('listed/%04d' % (index,)).upload_from_string(b'')
+        results.append(measure(
+            'storage.list_blobs',
+            lambda: list(bucket.list_blobs(prefix='listed/')),
+            iterations, items_per_call=NUM_BLOBS))
+
+        def _batch_patch():
+            with client.batch():
+                for index in range(NUM_BLOBS):
+                    blob = bucket.blob('listed/%04d' % (index,))
+                    blob.metadata = {'index': str(index)}
+                    blob.patch()
+
+        results.append(measure('storage.batch[patch]', _batch_patch,
+                               iterations, items_per_call=NUM_BLOBS))
+    return results
@@ -16,6 +16,7 @@
 This module is not part of the public API surface of `gcloud`.
 """
 
+import atexit
 import calendar
 import datetime
 import json
@@ -23,12 +24,15 @@ import os
 import re
 import socket
 import sys
+import threading
 from threading import local as Local
+import weakref
 
 from google.protobuf import timestamp_pb2
 import six
 from six.moves.http_client import HTTPConnection
 from six.moves import configparser
+from six.moves import queue
 
 from gcloud.environment_vars import PROJECT
 from gcloud.environment_vars import CREDENTIALS
@@ -545,6 +549,258 @@ def _name_from_project_path(path, project, template):
     return match.group('name')
 
 
+_CLOSE_AT_EXIT = weakref.WeakSet()  # To be replaced by tests.
+_CLOSE_AT_EXIT_LOCK = threading.Lock()
+
+
+def _close_at_exit(obj):
+    """Call the ``close()`` method of an object when the interpreter exits.
+
+    Only a weak reference is kept: an object collected before then is
+    not closed, and is not kept alive by the exit hook.
+
+    :type obj: object
+    :param obj: An object with a ``close()`` method, which must be a no-op
+                once it was called.
+    """
+    with _CLOSE_AT_EXIT_LOCK:
+        _CLOSE_AT_EXIT.add(obj)
+
+
+def _close_all_at_exit():
+    """Close the objects passed to :func:`_close_at_exit` still alive.
+
+    Every object is closed, even if closing another one fails.
+
+    :raises: the first error raised by a ``close()`` method.
+    """
+    with _CLOSE_AT_EXIT_LOCK:
+        objects = list(_CLOSE_AT_EXIT)
+    exc_info = None
+    for obj in objects:
+        try:
+            obj.close()
+        except Exception:  # pylint: disable=broad-except
+            exc_info = exc_info or sys.exc_info()
+    if exc_info is not None:
+        six.reraise(*exc_info)
+
+
+atexit.register(_close_all_at_exit)
+
+
+def _map_concurrently(func, items, max_workers):
+    """Apply a function to each item using a pool of worker threads.
+
+    Once a call raises, no further calls are started; the exception from
+    the earliest failing item is re-raised after the running calls finish.
+
+    :type func: callable
+    :param func: Function taking a single item.
+
+    :type items: iterable
+    :param items: The items to process.
+
+    :type max_workers: int
+    :param max_workers: Maximum number of concurrent calls. With ``1`` (or
+                        a single item) the calls are made in the current
+                        thread.
+
+    :rtype: list
+    :returns: ``func(item)`` for each item, in the order of ``items``.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    results = [None] * len(items)
+    errors = []
+    pending = queue.Queue()
+    for index_and_item in enumerate(items):
+        pending.put(index_and_item)
+
+    def _worker():
+        while not errors:
+            try:
+                index, item = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = func(item)
+            except Exception:  # pylint: disable=broad-except
+                errors.append((index, sys.exc_info()))
+
+    workers = [threading.Thread(target=_worker)
+               for _ in range(min(max_workers, len(items)))]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    if errors:
+        _, exc_info = min(errors, key=lambda error: error[0])
+        six.reraise(*exc_info)
+    return results
+
+
+_READ_AHEAD_TIMEOUT = 0.1
+"""Seconds between checks for an abandoned read-ahead, while it waits."""
+
+
+def _read_ahead(iterable, max_pending):
+    """Consume an iterable in a background thread, ahead of the caller.
+
+    At most ``max_pending`` items are held waiting for the caller (plus the
+    one being produced).  An exception raised by the iterable is re-raised
+    in the caller once the items preceding it have been yielded.  Closing
+    the returned generator stops the background thread after the item
+    it is producing.
+
+    :type iterable: iterable
+    :param iterable: The items to produce in the background.
+
+    :type max_pending: int
+    :param max_pending: Maximum number of items produced but not yet
+                        consumed.
+
+    :rtype: iterator
+    :returns: The items of ``iterable``, in order.
+    """
+    pending = queue.Queue(maxsize=max_pending)
+    stopped = []
+    finished = object()
+
+    def _put(item):
+        while not stopped:
+            try:
+                pending.put(item, timeout=_READ_AHEAD_TIMEOUT)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _produce():
+        try:
+            for item in iterable:
+                if not _put((item, None)):
+                    return
+        except Exception:  # pylint: disable=broad-except
+            _put((None, sys.exc_info()))
+        else:
+            _put((finished, None))
+
+    producer = threading.Thread(target=_produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            item, exc_info = pending.get()
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            if item is finished:
+                return
+            yield item
+    finally:
+        stopped.append(True)
+
+
+def _merge_concurrently(factories, max_workers, max_pending, ordered=True):
+    """Consume several iterables at once, from a pool of worker threads.
+
+    Each factory is called by a worker once one is free, in order, and its
+    iterable consumed in the background.  An exception raised by a factory
+    or an iterable is re-raised in the caller.  Closing the returned
+    generator stops the workers after the items they are producing, and
+    closes the iterables they were consuming.
+
+    :type factories: list
+    :param factories: Callables returning the iterables to consume.
+
+    :type max_workers: int
+    :param max_workers: Maximum number of iterables consumed at once.
+
+    :type max_pending: int
+    :param max_pending: Maximum number of items produced but not yet
+                        consumed, per worker.
+
+    :type ordered: bool
+    :param ordered: (Optional) If true, yield all the items of the first
+                    iterable, then all those of the second, and so on.
+                    Otherwise, yield the items as they are produced.
+
+    :rtype: iterator
+    :returns: The items of the iterables.
+    """
+    factories = list(factories)
+    if ordered:
+        queues = [queue.Queue(maxsize=max_pending) for _ in factories]
+    else:
+        shared = queue.Queue(maxsize=max_pending * max_workers)
+        queues = [shared] * len(factories)
+    indexes = queue.Queue()
+    for index in range(len(factories)):
+        indexes.put(index)
+    stopped = []
+    finished = object()
+
+    def _put(pending, item):
+        while not stopped:
+            try:
+                pending.put(item, timeout=_READ_AHEAD_TIMEOUT)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _produce(index):
+        pending = queues[index]
+        iterator = None
+        try:
+            iterator = iter(factories[index]())
+            for item in iterator:
+                if not _put(pending, (item, None)):
+                    return False
+        except Exception:  # pylint: disable=broad-except
+            _put(pending, (None, sys.exc_info()))
+            return False
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+        return _put(pending, (finished, None))
+
+    def _work():
+        while not stopped:
+            try:
+                index = indexes.get_nowait()
+            except queue.Empty:
+                return
+            if not _produce(index):
+                return
+
+    for _ in range(min(max_workers, len(factories))):
+        worker = threading.Thread(target=_work)
+        worker.daemon = True
+        worker.start()
+
+    try:
+        remaining = len(factories)
+        current = 0
+        while remaining:
+            item, exc_info = queues[current].get()
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            if item is finished:
+                remaining -= 1
+                if ordered:
+                    current += 1
+                continue
+            yield item
+    finally:
+        stopped.append(True)
+
+
 try:
     from pytz import UTC  # pylint: disable=unused-import,wrong-import-order
 except ImportError:
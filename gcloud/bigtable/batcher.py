@@ -0,0 +1,410 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long-lived batching of row mutations for Google Cloud Bigtable.
+
+A :class:`MutationsBatcher` collects :class:`DirectRow <.row.DirectRow>`
+mutations from any number of threads and commits them in the background
+with :meth:`Table.mutate_rows() <.table.Table.mutate_rows>`:
+
+.. code:: python
+
+    >>> with table.mutations_batcher(on_error=log_failure) as batcher:
+    ...     for key, value in records:
+    ...         row = table.row(key)
+    ...         row.set_cell('cf', b'col', value)
+    ...         batcher.mutate(row)
+"""
+
+import threading
+import time
+
+from concurrent import futures
+from google.rpc import code_pb2
+from google.rpc import status_pb2
+
+from gcloud._helpers import _close_at_exit
+from gcloud.bigtable.row import DirectRow
+from gcloud.bigtable.row import MAX_MUTATIONS
+from gcloud.bigtable.table import BULK_RETRIES
+
+
+FLUSH_COUNT = 1000
+"""Default number of rows which triggers a flush."""
+
+FLUSH_BYTES = 1024 * 1024
+"""Default size of the queued mutations which triggers a flush."""
+
+FLUSH_INTERVAL = 1.0
+"""Default number of seconds a row can wait before it is flushed."""
+
+MAX_OUTSTANDING_BYTES = 16 * 1024 * 1024
+"""Default maximum size of the rows queued or being committed."""
+
+MAX_OUTSTANDING_REQUESTS = 4
+"""Default maximum number of ``MutateRows`` requests in flight."""
+
+_TIME = time.time  # To be replaced by tests.
+
+
+def _row_size(row):
+    """Approximate size of the ``MutateRows`` entry of a row.
+
+    :type row: :class:`DirectRow <.row.DirectRow>`
+    :param row: The row.
+
+    :rtype: int
+    :returns: The size, in bytes, of the key and mutations of the row.
+    """
+    return len(row._row_key) + sum(mutation_pb.ByteSize()
+                                   for mutation_pb in row._pb_mutations)
+
+
+def _all_done(batch_futures):
+    """Combine the futures of batches being committed.
+
+    :type batch_futures: list
+    :param batch_futures: :class:`concurrent.futures.Future` instances
+                          returned by :meth:`MutationsBatcher._commit`.
+
+    :rtype: :class:`concurrent.futures.Future`
+    :returns: A future done once every batch is committed.  Its result is
+              the list of ``(row, status)`` pairs of the rows which failed;
+              it raises the first error raised by a batch.
+    """
+    result = futures.Future()
+    if not batch_futures:
+        result.set_result([])
+        return result
+    remaining = [len(batch_futures)]
+    remaining_lock = threading.Lock()
+
+    def _batch_done(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        failures = []
+        for batch_future in batch_futures:
+            error = batch_future.exception()
+            if error is not None:
+                result.set_exception(error)
+                return
+            failures.extend(batch_future.result())
+        result.set_result(failures)
+
+    for batch_future in batch_futures:
+        batch_future.add_done_callback(_batch_done)
+    return result
+
+
+class _State(object):
+    """State of a :class:`MutationsBatcher`, guarded by its lock.
+
+    :attr:`rows` are queued for the next batch, which is flushed by
+    :attr:`deadline` at the latest.  :attr:`outstanding_bytes` counts
+    both the queued rows and those of the :attr:`pending` batches, which
+    are being committed.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.num_bytes = 0
+        self.deadline = None
+        self.outstanding_bytes = 0
+        self.pending = set()
+        self.closed = False
+
+
+class MutationsBatcher(object):
+    """Commit row mutations in batches, from a background thread pool.
+
+    A batch is flushed as soon as it holds ``flush_count`` rows or
+    ``flush_bytes`` bytes of mutations, or when its oldest row has waited
+    ``flush_interval`` seconds.  Memory stays bounded: :meth:`mutate`
+    blocks while the rows queued or being committed add up to more than
+    ``max_outstanding_bytes``, and at most ``max_outstanding_requests``
+    batches are committed at once.
+
+    :meth:`close` is called when the interpreter exits, if the batcher is
+    still referenced then.  Rows which still fail once retried are passed
+    to ``on_error``, or collected in :attr:`failed` if no callback is
+    given.
+
+    :type table: :class:`Table <.table.Table>`
+    :param table: The table the rows belong to.
+
+    :type flush_count: int
+    :param flush_count: (Optional) Number of rows which triggers a flush.
+
+    :type flush_bytes: int
+    :param flush_bytes: (Optional) Size of the mutations which triggers a
+                        flush.
+
+    :type flush_interval: float
+    :param flush_interval: (Optional) Seconds after which a row is flushed.
+                           If :data:`None`, batches are only flushed by
+                           size or by :meth:`flush`.
+
+    :type max_outstanding_bytes: int
+    :param max_outstanding_bytes: (Optional) Size of the rows queued or
+                                  being committed above which
+                                  :meth:`mutate` blocks.
+
+    :type max_outstanding_requests: int
+    :param max_outstanding_requests: (Optional) Maximum number of batches
+                                     being committed at once.
+
+    :type retries: int
+    :param retries: (Optional) Number of times a row failing with a
+                    retryable status is sent again, if its mutations are
+                    idempotent (see :meth:`.Table.mutate_rows`).
+
+    :type on_error: callable
+    :param on_error: (Optional) Called from a background thread with each
+                     row which could not be committed, and its
+                     :class:`google.rpc.status_pb2.Status`.
+
+    :raises: :class:`ValueError <exceptions.ValueError>` if a limit is not
+             positive.
+    """
+
+    def __init__(self, table, flush_count=FLUSH_COUNT,
+                 flush_bytes=FLUSH_BYTES, flush_interval=FLUSH_INTERVAL,
+                 max_outstanding_bytes=MAX_OUTSTANDING_BYTES,
+                 max_outstanding_requests=MAX_OUTSTANDING_REQUESTS,
+                 retries=BULK_RETRIES, on_error=None):
+        for name, value in (('flush_count', flush_count),
+                            ('flush_bytes', flush_bytes),
+                            ('max_outstanding_bytes', max_outstanding_bytes),
+                            ('max_outstanding_requests',
+                             max_outstanding_requests)):
+            if value < 1:
+                raise ValueError('%s must be positive' % (name,), value)
+        self.table = table
+        self.flush_count = flush_count
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_outstanding_bytes = max_outstanding_bytes
+        self.max_outstanding_requests = max_outstanding_requests
+        self.retries = retries
+        self.on_error = on_error
+        self.failed = []
+
+        self._lock = threading.Condition()
+        self._state = _State()
+        self._executor = futures.ThreadPoolExecutor(max_outstanding_requests)
+        self._timer = None
+        _close_at_exit(self)
+
+    def mutate(self, row):
+        """Queue the mutations of a row.
+
+        The mutations are moved to the batcher: ``row`` is cleared and can
+        be reused at once.  Blocks while too many bytes are outstanding.
+
+        :type row: :class:`DirectRow <.row.DirectRow>`
+        :param row: A row of :attr:`table`.
+
+        :raises: :class:`ValueError <exceptions.ValueError>` if the batcher
+                 is closed, or the row is not a :class:`DirectRow
+                 <.row.DirectRow>` or has more than :data:`MAX_MUTATIONS
+                 <.row.MAX_MUTATIONS>` mutations.  ``row`` keeps its
+                 mutations then.
+        """
+        if not isinstance(row, DirectRow):
+            raise ValueError('Expected type: %s, Received: %s' % (
+                DirectRow, type(row)))
+        num_mutations = len(row._pb_mutations)
+        if num_mutations == 0:
+            return
+        if num_mutations > MAX_MUTATIONS:
+            raise ValueError('%d total mutations exceed the maximum allowable '
+                             '%d.' % (num_mutations, MAX_MUTATIONS))
+        queued = DirectRow(row._row_key, row._table)
+        queued._pb_mutations.extend(row._pb_mutations)
+        size = _row_size(queued)
+
+        with self._lock:
+            self._check_open()
+            while (self._state.outstanding_bytes and
+                   self._state.outstanding_bytes + size >
+                   self.max_outstanding_bytes):
+                # Our own queued rows count too: send them before waiting.
+                self._dispatch()
+                self._lock.wait()
+                self._check_open()
+            if not self._state.rows and self.flush_interval is not None:
+                self._state.deadline = _TIME() + self.flush_interval
+                self._start_timer()
+                self._lock.notify_all()
+            self._state.rows.append(queued)
+            # Only clear the row once it is queued: if the batcher is
+            # closed, the caller keeps its mutations.
+            row.clear()
+            self._state.num_bytes += size
+            self._state.outstanding_bytes += size
+            if (len(self._state.rows) >= self.flush_count or
+                    self._state.num_bytes >= self.flush_bytes):
+                self._dispatch()
+
+    def mutate_rows(self, rows):
+        """Queue the mutations of several rows.
+
+        :type rows: list
+        :param rows: :class:`DirectRow <.row.DirectRow>` instances.
+        """
+        for row in rows:
+            self.mutate(row)
+
+    def flush(self):
+        """Send the queued rows, without waiting for them to be committed.
+
+        :rtype: :class:`concurrent.futures.Future`
+        :returns: A future done once every batch sent so far, including
+                  the queued rows, is committed.  Its result is the list of
+                  ``(row, status)`` pairs of the rows of those batches which
+                  failed; it raises the first error raised by a batch.
+        """
+        with self._lock:
+            self._dispatch()
+            pending = list(self._state.pending)
+        return _all_done(pending)
+
+    def close(self):
+        """Flush the queued rows, wait for them and release the threads.
+
+        :raises: the first error raised while committing a batch.
+        """
+        with self._lock:
+            if self._state.closed:
+                return
+            # Close and send the last rows at once, so that no row can be
+            # queued after the final batch.
+            self._state.closed = True
+            self._dispatch()
+            pending = list(self._state.pending)
+            self._lock.notify_all()
+        try:
+            _all_done(pending).result()
+        finally:
+            self._executor.shutdown(wait=True)
+            if self._timer is not None:
+                self._timer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _check_open(self):
+        """Raise if :meth:`close` was called; the lock must be held."""
+        if self._state.closed:
+            raise ValueError('Batcher is closed.')
+
+    def _dispatch(self):
+        """Hand the queued rows to the thread pool; the lock must be held.
+        """
+        state = self._state
+        if not state.rows:
+            return
+        rows, size = state.rows, state.num_bytes
+        state.rows, state.num_bytes, state.deadline = [], 0, None
+        try:
+            batch_future = self._executor.submit(self._commit, rows, size)
+        except RuntimeError:
+            # The interpreter is exiting and the pool takes no new work:
+            # commit the rows from this thread instead.
+            batch_future = futures.Future()
+            try:
+                batch_future.set_result(self._commit(rows, size))
+            except Exception as exc:  # pylint: disable=broad-except
+                batch_future.set_exception(exc)
+            # Left pending, so that close() raises its error.
+            self._state.pending.add(batch_future)
+            return
+        self._state.pending.add(batch_future)
+        batch_future.add_done_callback(self._batch_done)
+
+    def _batch_done(self, batch_future):
+        """Forget a batch once it is committed."""
+        with self._lock:
+            self._state.pending.discard(batch_future)
+
+    def _commit(self, rows, size):
+        """Commit one batch of rows.
+
+        :type rows: list
+        :param rows: The :class:`DirectRow <.row.DirectRow>` instances.
+
+        :type size: int
+        :param size: The bytes the rows count for in the outstanding total.
+
+        :rtype: list
+        :returns: ``(row, status)`` pairs for the rows which failed.
+        """
+        try:
+            try:
+                statuses = self.table.mutate_rows(
+                    rows, max_workers=1, retries=self.retries)
+            except Exception as exc:
+                status_pb = status_pb2.Status(code=code_pb2.UNKNOWN,
+                                              message=str(exc))
+                self._report([(row, status_pb) for row in rows])
+                raise
+            failures = [(row, status_pb)
+                        for row, status_pb in zip(rows, statuses)
+                        if status_pb.code != code_pb2.OK]
+            self._report(failures)
+            return failures
+        finally:
+            with self._lock:
+                self._state.outstanding_bytes -= size
+                self._lock.notify_all()
+
+    def _report(self, failures):
+        """Pass failed rows to ``on_error``, or keep them in :attr:`failed`.
+
+        :type failures: list
+        :param failures: ``(row, status)`` pairs.
+        """
+        for row, status_pb in failures:
+            if self.on_error is None:
+                with self._lock:
+                    self.failed.append((row, status_pb))
+            else:
+                self.on_error(row, status_pb)
+
+    def _start_timer(self):
+        """Start the thread flushing rows on time; the lock must be held."""
+        if self._timer is not None:
+            return
+        self._timer = threading.Thread(target=self._run_timer,
+                                       name='MutationsBatcher-timer')
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run_timer(self):
+        """Flush the queued rows once the oldest has waited long enough."""
+        with self._lock:
+            while not self._state.closed:
+                if self._state.deadline is None:
+                    self._lock.wait()
+                    continue
+                remaining = self._state.deadline - _TIME()
+                if remaining <= 0:
+                    self._dispatch()
+                else:
+                    self._lock.wait(remaining)
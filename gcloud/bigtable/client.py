@@ -27,6 +27,8 @@ In the hierarchy of API concepts
 """
 
 
+import os
+
 from pkg_resources import get_distribution
 
 from grpc.beta import implementations
@@ -49,6 +51,8 @@ from gcloud.bigtable.instance import _EXISTING_INSTANCE_LOCATION_ID
 from gcloud.client import _ClientFactoryMixin
 from gcloud.client import _ClientProjectMixin
 from gcloud.credentials import get_credentials
+from gcloud.environment_vars import BIGTABLE_EMULATOR
+from gcloud.flow_control import GuardedStub
 
 
 TABLE_STUB_FACTORY_V2 = (
@@ -129,13 +133,19 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
                             passed, defaults to
                             :const:`DEFAULT_TIMEOUT_SECONDS`.
 
+    :type flow_control: :class:`gcloud.flow_control.FlowControl`
+    :param flow_control: (Optional) Circuit breakers and concurrency limits
+                         applied to each API the client calls. Can also be
+                         set later via the ``flow_control`` attribute.
+
     :raises: :class:`ValueError <exceptions.ValueError>` if both ``read_only``
              and ``admin`` are :data:`True`
     """
 
     def __init__(self, project=None, credentials=None,
                  read_only=False, admin=False, user_agent=DEFAULT_USER_AGENT,
-                 timeout_seconds=DEFAULT_TIMEOUT_SECONDS):
+                 timeout_seconds=DEFAULT_TIMEOUT_SECONDS,
+                 flow_control=None):
         _ClientProjectMixin.__init__(self, project=project)
         if credentials is None:
             credentials = get_credentials()
@@ -161,6 +171,7 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
         self._credentials = credentials
         self.user_agent = user_agent
         self.timeout_seconds = timeout_seconds
+        self.flow_control = flow_control
 
         # These will be set in start().
         self._data_stub_internal = None
@@ -186,6 +197,7 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
             self._admin,
             self.user_agent,
             self.timeout_seconds,
+            self.flow_control,
         )
 
     @property
@@ -228,7 +240,7 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
         """
         if self._data_stub_internal is None:
             raise ValueError('Client has not been started.')
-        return self._data_stub_internal
+        return self._guard_stub(self._data_stub_internal, DATA_API_HOST_V2)
 
     @property
     def _instance_stub(self):
@@ -244,7 +256,8 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
             raise ValueError('Client is not an admin client.')
         if self._instance_stub_internal is None:
             raise ValueError('Client has not been started.')
-        return self._instance_stub_internal
+        return self._guard_stub(self._instance_stub_internal,
+                                INSTANCE_ADMIN_HOST_V2)
 
     @property
     def _operations_stub(self):
@@ -260,7 +273,8 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
             raise ValueError('Client is not an admin client.')
         if self._operations_stub_internal is None:
             raise ValueError('Client has not been started.')
-        return self._operations_stub_internal
+        return self._guard_stub(self._operations_stub_internal,
+                                OPERATIONS_API_HOST_V2)
 
     @property
     def _table_stub(self):
@@ -276,7 +290,24 @@ class Client(_ClientFactoryMixin, _ClientProjectMixin):
             raise ValueError('Client is not an admin client.')
         if self._table_stub_internal is None:
             raise ValueError('Client has not been started.')
-        return self._table_stub_internal
+        return self._guard_stub(self._table_stub_internal, TABLE_ADMIN_HOST_V2)
+
+    def _guard_stub(self, stub, host):
+        """Apply the client's flow control (if any) to a stub.
+
+        :type stub: :class:`grpc.beta._stub._AutoIntermediary`
+        :param stub: The stub to guard.
+
+        :type host: str
+        :param host: The API host, used as the flow control endpoint.
+
+        :rtype: :class:`grpc.beta._stub._AutoIntermediary` or
+                :class:`gcloud.flow_control.GuardedStub`
+        :returns: The stub, wrapped if ``flow_control`` is set.
+        """
+        if self.flow_control is None:
+            return stub
+        return GuardedStub(stub, self.flow_control, host)
 
     def _make_data_stub(self):
         """Creates gRPC stub to make requests to the Data API.
@@ -468,6 +499,13 @@ def _make_stub(client, stub_factory, host, port):
     :rtype: :class:`grpc.beta._stub._AutoIntermediary`
     :returns: The stub object used to make gRPC requests to a given API.
     """
+    emulator_host = os.getenv(BIGTABLE_EMULATOR)
+    if emulator_host is not None:
+        # The emulator speaks plaintext and ignores credentials.
+        host, port = _parse_emulator_host(emulator_host)
+        channel = implementations.insecure_channel(host, port)
+        return stub_factory(channel)
+
     # Leaving the first argument to ssl_channel_credentials() as None
     # loads root certificates from `grpc/_adapter/credentials/roots.pem`.
     transport_creds = implementations.ssl_channel_credentials(None, None, None)
@@ -478,3 +516,21 @@ def _make_stub(client, stub_factory, host, port):
         transport_creds, auth_creds)
     channel = implementations.secure_channel(host, port, channel_creds)
     return stub_factory(channel)
+
+
+def _parse_emulator_host(emulator_host):
+    """Split an emulator host value into a host and port.
+
+    :type emulator_host: str
+    :param emulator_host: A ``host:port`` string, e.g. ``localhost:8086``.
+
+    :rtype: tuple
+    :returns: Pair of the host (str) and the port (int).
+    :raises: :class:`ValueError <exceptions.ValueError>` if the value does
+             not contain a port.
+    """
+    host, _, port = emulator_host.rpartition(':')
+    if not host or not port.isdigit():
+        raise ValueError('Emulator host must be of the form host:port',
+                         emulator_host)
+    return host, int(port)
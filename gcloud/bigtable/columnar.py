@@ -0,0 +1,337 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Columnar results of Google Cloud Bigtable scans.
+
+:meth:`Table.read_columns() <.table.Table.read_columns>` reads chosen
+columns of a range of rows straight into one buffer per column, without
+creating a :class:`Cell <.row_data.Cell>` for each value:
+
+.. code:: python
+
+    >>> data = table.read_columns([('stats', b'name'), ('stats', b'visits')],
+    ...                           formats={('stats', b'visits'): '>q'})
+    >>> data.consume_all()
+    >>> data.to_dataframe()  # Requires pandas.
+"""
+
+import re
+import struct
+
+from gcloud._helpers import _to_bytes
+from gcloud.bigtable.row_data import PartialRowsData
+from gcloud.bigtable.row_filters import CellsColumnLimitFilter
+from gcloud.bigtable.row_filters import ColumnQualifierRegexFilter
+from gcloud.bigtable.row_filters import FamilyNameRegexFilter
+from gcloud.bigtable.row_filters import RowFilterChain
+from gcloud.bigtable.row_filters import RowFilterUnion
+
+
+_REGEX_SPECIAL = re.compile(br'([\\.+*?()|\[\]{}^$])')
+
+# Byte orders of :mod:`struct` formats, and their :mod:`numpy` spelling.
+_BYTE_ORDERS = {'@': '=', '=': '=', '<': '<', '>': '>', '!': '>'}
+
+
+def _exact_regex(value):
+    """Build a regular expression matching only ``value``.
+
+    :type value: bytes or str
+    :param value: The exact family name or column qualifier.
+
+    :rtype: bytes
+    :returns: ``value``, with the RE2 special characters escaped.
+    """
+    return _REGEX_SPECIAL.sub(br'\\\1', _to_bytes(value))
+
+
+def _columns_filter(columns, filter_=None):
+    """Build the filter keeping the newest cell of some columns.
+
+    :type columns: list
+    :param columns: ``(column_family_id, column)`` pairs.
+
+    :type filter_: :class:`.RowFilter`
+    :param filter_: (Optional) A filter applied before the columns are
+                    selected.
+
+    :rtype: :class:`.RowFilter`
+    :returns: The filter to send with the ``ReadRows`` request.
+    :raises: :class:`ValueError <exceptions.ValueError>` if no column is
+             given.
+    """
+    if not columns:
+        raise ValueError('At least one column is required.')
+    selected = [RowFilterChain(filters=[
+        FamilyNameRegexFilter(_exact_regex(column_family_id)),
+        ColumnQualifierRegexFilter(_exact_regex(column)),
+    ]) for column_family_id, column in columns]
+    if len(selected) == 1:
+        column_filter = selected[0]
+    else:
+        column_filter = RowFilterUnion(filters=selected)
+    filters = [column_filter, CellsColumnLimitFilter(1)]
+    if filter_ is not None:
+        filters.insert(0, filter_)
+    return RowFilterChain(filters=filters)
+
+
+class _Format(object):
+    """A :mod:`struct` format decoding one fixed-width value.
+
+    :type fmt: str
+    :param fmt: The format, an optional byte order followed by one type
+                code, e.g. ``'>q'``.
+
+    :raises: :class:`ValueError <exceptions.ValueError>` if the format does
+             not decode exactly one value.
+    """
+
+    def __init__(self, fmt):
+        if fmt[:1] in _BYTE_ORDERS:
+            self.byte_order, self.code = fmt[:1], fmt[1:]
+        else:
+            self.byte_order, self.code = '@', fmt
+        if len(self.code) != 1:
+            raise ValueError('Format must decode a single value', fmt)
+        self.size = struct.calcsize(fmt)
+
+    @property
+    def dtype(self):
+        """The equivalent :mod:`numpy` type string.
+
+        :rtype: str
+        :returns: The type code, with the byte order as :mod:`numpy`
+                  spells it.
+        """
+        return _BYTE_ORDERS[self.byte_order] + self.code
+
+    def unpack_all(self, data):
+        """Decode consecutive values.
+
+        :type data: bytes
+        :param data: Values packed back to back.
+
+        :rtype: tuple
+        :returns: The decoded values.
+        """
+        count = len(data) // self.size
+        return struct.unpack(self.byte_order + self.code * count, data)
+
+
+class ColumnarRowsData(PartialRowsData):
+    """Consume a ``ReadRows`` stream into one buffer per column.
+
+    Each row read adds one entry to :attr:`row_keys` and to every column:
+    the value and timestamp of the newest cell of the column, or
+    :data:`None` if the row has no such cell.  Cells of other columns are
+    ignored.
+
+    Values of a column given a ``struct`` format are packed into a
+    :class:`bytearray` (zeros standing for missing cells) and decoded once,
+    by :meth:`to_columns` or :meth:`to_dataframe`.
+
+    :type response_iterator:
+        :class:`grpc.framework.alpha._reexport._CancellableIterator`
+    :param response_iterator: A streaming iterator returned from a
+                              ``ReadRows`` request.
+
+    :type columns: list
+    :param columns: ``(column_family_id, column)`` pairs to collect.
+
+    :type formats: dict
+    :param formats: (Optional) :mod:`struct` formats of fixed-width values,
+                    such as ``'>q'`` for the counters written by
+                    :meth:`increment_cell_value()
+                    <.row.AppendRow.increment_cell_value>`, keyed by
+                    ``(column_family_id, column)``.
+
+    :type resume: callable
+    :param resume: (Optional) Passed to :class:`.PartialRowsData`.
+
+    :raises: :class:`ValueError <exceptions.ValueError>` if no column is
+             given, or a format is given for a column not collected.
+    """
+
+    def __init__(self, response_iterator, columns, formats=None,
+                 resume=None):
+        super(ColumnarRowsData, self).__init__(response_iterator,
+                                               resume=resume)
+        self.columns = [(column_family_id, _to_bytes(column))
+                        for column_family_id, column in columns]
+        if not self.columns:
+            raise ValueError('At least one column is required.')
+        self._column_index = dict(
+            (column, index) for index, column in enumerate(self.columns))
+        self._formats = {}
+        for (column_family_id, column), fmt in (formats or {}).items():
+            column = (column_family_id, _to_bytes(column))
+            if column not in self._column_index:
+                raise ValueError('Format given for unknown column', column)
+            self._formats[column] = _Format(fmt)
+
+        self.row_keys = []
+        self.timestamps = dict((column, []) for column in self.columns)
+        self.values = {}
+        self.missing = {}
+        for column in self.columns:
+            if column in self._formats:
+                self.values[column] = bytearray()
+                self.missing[column] = []
+            else:
+                self.values[column] = []
+        # Newest cell of each column in the row being read, and that row.
+        self._row_cells = [None] * len(self.columns)
+        self._cells_row = None
+
+    def consume_next(self):
+        """Consume the next ``ReadRowsResponse`` from the stream.
+
+        The rows are added to the column buffers, not to :attr:`rows`.
+        """
+        for _ in self._process_response(self._next_response()):
+            pass
+
+    def _save_current_cell(self):
+        """Keep the value of the current cell, if its column is collected.
+        """
+        cell = self._cell
+        if self._cells_row is not self._row:
+            # A new row, or the previous one was reset.
+            self._row_cells = [None] * len(self.columns)
+            self._cells_row = self._row
+        index = self._column_index.get((cell.family_name, cell.qualifier))
+        # Cells of a column arrive newest first.
+        if index is not None and self._row_cells[index] is None:
+            self._row_cells[index] = (cell.timestamp_micros, cell.value)
+        self._cell, self._previous_cell = None, cell
+
+    def _save_current_row(self):
+        """Append the current row to the column buffers.
+
+        :rtype: :class:`.PartialRowData`
+        :returns: The row just completed, without cells.
+        :raises: :class:`ValueError <exceptions.ValueError>` if a value
+                 does not have the size of the format of its column.
+        """
+        row = super(ColumnarRowsData, self)._save_current_row()
+        if self._cells_row is not row:
+            self._row_cells = [None] * len(self.columns)
+        row_index = len(self.row_keys)
+        self.row_keys.append(row.row_key)
+        for column, cell in zip(self.columns, self._row_cells):
+            timestamp_micros, value = cell or (None, None)
+            self.timestamps[column].append(timestamp_micros)
+            fmt = self._formats.get(column)
+            if fmt is None:
+                self.values[column].append(value)
+                continue
+            if value is None:
+                self.missing[column].append(row_index)
+                value = b'\0' * fmt.size
+            elif len(value) != fmt.size:
+                raise ValueError('Value of row %r in column %r has %d bytes, '
+                                 'expected %d' % (row.row_key, column,
+                                                  len(value), fmt.size))
+            self.values[column].extend(value)
+        self._cells_row = None
+        return row
+
+    def to_columns(self):
+        """Decode the collected columns.
+
+        :rtype: dict
+        :returns: Lists of values keyed by ``(column_family_id, column)``.
+                  Values with a format are decoded, with :data:`None` for
+                  missing cells; other values are bytes.
+        """
+        result = {}
+        for column in self.columns:
+            fmt = self._formats.get(column)
+            if fmt is None:
+                result[column] = list(self.values[column])
+                continue
+            decoded = list(fmt.unpack_all(bytes(self.values[column])))
+            for row_index in self.missing[column]:
+                decoded[row_index] = None
+            result[column] = decoded
+        return result
+
+    def to_dataframe(self, timestamps=False):  # pragma: NO COVER
+        """Build a :mod:`pandas` dataframe out of the collected columns.
+
+        .. note::
+
+            Use of this method requires that you have :mod:`pandas`
+            installed.
+
+        Columns with a format are turned into :mod:`numpy` arrays straight
+        from their buffer; missing cells become ``NaN``.
+
+        :type timestamps: bool
+        :param timestamps: (Optional) If true, add a ``timestamp`` column
+                           after each value column.
+
+        :rtype: :class:`pandas.DataFrame`
+        :returns: A dataframe indexed by row key, with one column named
+                  ``family:column`` per collected column.
+        """
+        return _build_dataframe(self, timestamps)
+
+
+def _build_dataframe(rows_data, timestamps):  # pragma: NO COVER
+    """Build a :mod:`pandas` dataframe out of columnar rows.
+
+    :type rows_data: :class:`ColumnarRowsData`
+    :param rows_data: The consumed rows.
+
+    :type timestamps: bool
+    :param timestamps: If true, add a ``timestamp`` column after each value
+                       column.
+
+    :rtype: :class:`pandas.DataFrame`
+    :returns: A dataframe indexed by row key.
+    """
+    import numpy    # pylint: disable=import-error
+    import pandas   # pylint: disable=import-error
+
+    data = []
+    names = []
+    for column in rows_data.columns:
+        column_family_id, qualifier = column
+        name = (_to_bytes(column_family_id) + b':' +
+                qualifier).decode('utf-8', 'replace')
+        fmt = rows_data._formats.get(column)
+        if fmt is None:
+            series = pandas.Series(rows_data.values[column], dtype=object)
+        else:
+            array = numpy.frombuffer(rows_data.values[column],
+                                     dtype=numpy.dtype(fmt.dtype))
+            series = pandas.Series(array)
+            missing = rows_data.missing[column]
+            if missing:
+                mask = numpy.zeros(len(array), dtype=bool)
+                mask[missing] = True
+                series = series.mask(mask)
+        data.append(series)
+        names.append(name)
+        if timestamps:
+            data.append(pandas.to_datetime(
+                pandas.Series(rows_data.timestamps[column], dtype=float),
+                unit='us'))
+            names.append(name + ':timestamp')
+
+    dataframe = pandas.concat(data, axis=1, keys=names)
+    dataframe.index = pandas.Index(rows_data.row_keys, name='row_key')
+    return dataframe
@@ -152,10 +152,18 @@ API Behavior Changes
   because the Cloud Bigtable API uses the ``DeleteFromFamily`` and
   ``DeleteFromRow`` mutations for these deletes, and neither of these
   mutations support a timestamp.
+* :meth:`Batch.send() <gcloud.bigtable.happybase.batch.Batch.send>` commits
+  its rows with bulk ``MutateRows`` requests. Each row is applied
+  atomically, but rows may fail independently of one another; the rows
+  which failed are reported with a
+  :class:`BatchError <gcloud.bigtable.happybase.batch.BatchError>` and kept
+  in the batch.
 """
 
 from gcloud.bigtable.happybase.batch import Batch
+from gcloud.bigtable.happybase.batch import BatchError
 from gcloud.bigtable.happybase.connection import Connection
+from gcloud.bigtable.happybase.counters import CounterBuffer
 from gcloud.bigtable.happybase.connection import DEFAULT_HOST
 from gcloud.bigtable.happybase.connection import DEFAULT_PORT
 from gcloud.bigtable.happybase.pool import ConnectionPool
@@ -19,9 +19,11 @@ import datetime
 import warnings
 
 import six
+from google.rpc import code_pb2
 
 from gcloud._helpers import _datetime_from_microseconds
 from gcloud.bigtable.row_filters import TimestampRange
+from gcloud.bigtable.table import BULK_MAX_WORKERS
 
 
 _WAL_SENTINEL = object()
@@ -32,6 +34,21 @@ _WAL_WARNING = ('The wal argument (Write-Ahead-Log) is not '
                 'supported by Cloud Bigtable.')
 
 
+class BatchError(RuntimeError):
+    """Exception raised when some rows of a batch could not be committed.
+
+    :type failures: list
+    :param failures: ``(row_key, status)`` pairs of the rows which failed,
+                     where ``status`` is a
+                     :class:`google.rpc.status_pb2.Status`.
+    """
+
+    def __init__(self, failures):
+        super(BatchError, self).__init__(
+            '%d row(s) could not be committed' % (len(failures),), failures)
+        self.failures = failures
+
+
 class Batch(object):
     """Batch class for accumulating mutations.
 
@@ -67,6 +84,10 @@ class Batch(object):
                 Provided for compatibility with HappyBase, but irrelevant for
                 Cloud Bigtable since it does not have a Write Ahead Log.
 
+    :type max_workers: int
+    :param max_workers: (Optional) Maximum number of ``MutateRows``
+                        requests sent at once by :meth:`send`.
+
     :raises: :class:`TypeError <exceptions.TypeError>` if ``batch_size``
              is set and ``transaction=True``.
              :class:`ValueError <exceptions.ValueError>` if ``batch_size``
@@ -74,7 +95,8 @@ class Batch(object):
     """
 
     def __init__(self, table, timestamp=None, batch_size=None,
-                 transaction=False, wal=_WAL_SENTINEL):
+                 transaction=False, wal=_WAL_SENTINEL,
+                 max_workers=BULK_MAX_WORKERS):
         if wal is not _WAL_SENTINEL:
             _WARN(_WAL_WARNING)
 
@@ -101,19 +123,39 @@ class Batch(object):
             self._delete_range = TimestampRange(end=next_timestamp)
 
         self._transaction = transaction
+        self._max_workers = max_workers
 
         # Internal state for tracking mutations.
         self._row_map = {}
         self._mutation_count = 0
 
     def send(self):
-        """Send / commit the batch of mutations to the server."""
-        for row in self._row_map.values():
-            # commit() does nothing if row hasn't accumulated any mutations.
-            row.commit()
+        """Send / commit the batch of mutations to the server.
+
+        The rows are committed together, with as few ``MutateRows``
+        requests as possible, up to ``max_workers`` of them at once.  Each
+        row is applied atomically, but independently of the others.
+
+        :raises: :class:`BatchError` if some rows could not be committed.
+                 Those rows keep their mutations and stay in the batch, so
+                 the next call to :meth:`send` tries them again.
+        """
+        row_items = list(self._row_map.items())
+        rows = [row for _, row in row_items]
+        # mutate_rows() skips rows which haven't accumulated any mutations.
+        statuses = self._table._low_level_table.mutate_rows(
+            rows, max_workers=self._max_workers)
 
         self._row_map.clear()
         self._mutation_count = 0
+        failures = []
+        for (row_key, row), status_pb in zip(row_items, statuses):
+            if status_pb.code != code_pb2.OK:
+                self._row_map[row_key] = row
+                self._mutation_count += len(row._pb_mutations)
+                failures.append((row_key, status_pb))
+        if failures:
+            raise BatchError(failures)
 
     def _try_send(self):
         """Send / commit the batch if mutations have exceeded batch size."""
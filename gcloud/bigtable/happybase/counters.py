@@ -0,0 +1,316 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Google Cloud Bigtable HappyBase counter buffer module.
+
+A :class:`CounterBuffer` adds up increments of the same counter in memory
+and applies them with one ``ReadModifyWriteRow`` request per row, so a hot
+counter costs one request per flush rather than one per increment:
+
+.. code:: python
+
+    >>> with table.counter_buffer(flush_interval=0.5) as counters:
+    ...     for page in requests:
+    ...         counters.counter_inc(page, 'stats:views')
+"""
+
+import threading
+import time
+
+import six
+
+from gcloud._helpers import _close_at_exit
+from gcloud._helpers import _map_concurrently
+from gcloud._helpers import _to_bytes
+from gcloud.bigtable.happybase.table import _UNPACK_I64
+from gcloud.bigtable.row import MAX_MUTATIONS
+
+
+FLUSH_INTERVAL = 1.0
+"""Default number of seconds an increment can wait before it is applied."""
+
+FLUSH_COUNT = 1000
+"""Default number of buffered counters which triggers a flush."""
+
+MAX_WORKERS = 4
+"""Default number of ``ReadModifyWriteRow`` requests sent at once."""
+
+_TIME = time.time  # To be replaced by tests.
+
+
+def _column_pair(column):
+    """Split a counter column into its column family and qualifier.
+
+    :type column: str
+    :param column: Column of the form ``fam:col``.
+
+    :rtype: tuple
+    :returns: The column family ID (as a string) and the column qualifier
+              (as bytes).
+    """
+    if isinstance(column, six.binary_type):
+        column = column.decode('utf-8')
+    column_family_id, column_qualifier = column.split(':')
+    return column_family_id, _to_bytes(column_qualifier)
+
+
+class CounterBuffer(object):
+    """Buffer counter increments and apply them in the background.
+
+    Increments of the same ``(row, column)`` are added up and sent
+    together, as one ``ReadModifyWriteRow`` request per row. They are
+    applied at most ``flush_interval`` seconds after the first of them,
+    as soon as ``flush_count`` counters are buffered, or when
+    :meth:`flush` or :meth:`close` is called. :meth:`close` is also called
+    when the interpreter exits, if the buffer is still referenced then.
+
+    Unlike :meth:`Table.counter_inc() <.happybase.table.Table.counter_inc>`,
+    buffered increments don't return the counter value: it is only known
+    once they are flushed.
+
+    Increments which could not be applied are passed to ``on_error``, or
+    collected in :attr:`failed` if no callback is given. They are not
+    retried, since the request may have been applied before it failed.
+
+    :type table: :class:`Table <gcloud.bigtable.happybase.table.Table>`
+    :param table: The table holding the counters.
+
+    :type flush_interval: float
+    :param flush_interval: (Optional) Seconds after which an increment is
+                           applied. If :data:`None`, increments are only
+                           applied by size or by :meth:`flush`.
+
+    :type flush_count: int
+    :param flush_count: (Optional) Number of buffered counters which
+                        triggers a flush.
+
+    :type max_workers: int
+    :param max_workers: (Optional) Maximum number of ``ReadModifyWriteRow``
+                        requests sent at once.
+
+    :type on_error: callable
+    :param on_error: (Optional) Called with the row key, the column (of
+                     the form ``fam:col``), the increment which could not
+                     be applied and the exception raised.
+
+    :raises: :class:`ValueError <exceptions.ValueError>` if a limit is not
+             positive.
+    """
+
+    def __init__(self, table, flush_interval=FLUSH_INTERVAL,
+                 flush_count=FLUSH_COUNT, max_workers=MAX_WORKERS,
+                 on_error=None):
+        for name, value in (('flush_count', flush_count),
+                            ('max_workers', max_workers)):
+            if value < 1:
+                raise ValueError('%s must be positive' % (name,), value)
+        self.table = table
+        self.flush_interval = flush_interval
+        self.flush_count = flush_count
+        self.max_workers = max_workers
+        self.on_error = on_error
+        self.failed = []
+
+        self._lock = threading.Condition()
+        # Buffered increments, keyed by row key then by column pair.
+        self._pending = {}
+        self._count = 0
+        self._deadline = None
+        self._closed = False
+        self._timer = None
+        _close_at_exit(self)
+
+    def counter_inc(self, row, column, value=1):
+        """Buffer the increment of a counter column.
+
+        :type row: str
+        :param row: Row key for the row we are incrementing a counter in.
+
+        :type column: str
+        :param column: Column we are incrementing a value in; of the
+                       form ``fam:col``.
+
+        :type value: int
+        :param value: Amount to increment the counter by. (If negative,
+                      this is equivalent to decrement.)
+
+        :raises: :class:`ValueError <exceptions.ValueError>` if the buffer
+                 is closed.
+        """
+        column = _column_pair(column)
+        with self._lock:
+            self._check_open()
+            columns = self._pending.setdefault(row, {})
+            if column not in columns:
+                columns[column] = 0
+                self._count += 1
+            columns[column] += value
+            if self._deadline is None and self.flush_interval is not None:
+                self._deadline = _TIME() + self.flush_interval
+                self._start_timer()
+                self._lock.notify_all()
+            full = self._count >= self.flush_count
+        if full:
+            self.flush()
+
+    def counter_dec(self, row, column, value=1):
+        """Buffer the decrement of a counter column.
+
+        :type row: str
+        :param row: Row key for the row we are decrementing a counter in.
+
+        :type column: str
+        :param column: Column we are decrementing a value in; of the
+                       form ``fam:col``.
+
+        :type value: int
+        :param value: Amount to decrement the counter by. (If negative,
+                      this is equivalent to increment.)
+        """
+        self.counter_inc(row, column, -value)
+
+    def flush(self):
+        """Apply the buffered increments and wait for them.
+
+        Counters whose increments add up to zero are not sent.
+
+        :rtype: dict
+        :returns: The new value of each counter updated, keyed by
+                  ``(row, column)`` where ``column`` has the form
+                  ``fam:col``.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._count, self._deadline = 0, None
+
+        requests = []
+        for row_key, columns in six.iteritems(pending):
+            increments = sorted((column, value)
+                                for column, value in six.iteritems(columns)
+                                if value)
+            for start in range(0, len(increments), MAX_MUTATIONS):
+                requests.append(
+                    (row_key, increments[start:start + MAX_MUTATIONS]))
+
+        values = {}
+        results = _map_concurrently(self._apply, requests, self.max_workers)
+        for (row_key, increments), (row_values, error) in zip(requests,
+                                                              results):
+            if error is None:
+                values.update(row_values)
+            else:
+                self._report(row_key, increments, error)
+        return values
+
+    def close(self):
+        """Apply the buffered increments and stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._lock.notify_all()
+        try:
+            self.flush()
+        finally:
+            if (self._timer is not None and
+                    self._timer is not threading.current_thread()):
+                self._timer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _check_open(self):
+        """Raise if :meth:`close` was called; the lock must be held."""
+        if self._closed:
+            raise ValueError('Counter buffer is closed.')
+
+    def _apply(self, request):
+        """Send the increments of one row.
+
+        :type request: tuple
+        :param request: The row key and its ``(column, value)`` increments,
+                        where ``column`` is a ``(column_family_id,
+                        column_qualifier)`` pair.
+
+        :rtype: tuple
+        :returns: The new counter values, as returned by :meth:`flush`, and
+                  :data:`None`; or :data:`None` and the exception raised by
+                  the request.
+        """
+        row_key, increments = request
+        row = self.table._low_level_table.row(row_key, append=True)
+        for (column_family_id, column_qualifier), value in increments:
+            row.increment_cell_value(column_family_id, column_qualifier,
+                                     value)
+        try:
+            modified_cells = row.commit()
+        except Exception as exc:  # pylint: disable=broad-except
+            return None, exc
+
+        values = {}
+        for (column_family_id, column_qualifier), _ in increments:
+            column_cells = modified_cells[column_family_id][column_qualifier]
+            int_value, = _UNPACK_I64(column_cells[0][0])
+            column = column_family_id + u':' + column_qualifier.decode('utf-8')
+            values[(row_key, column)] = int_value
+        return values, None
+
+    def _report(self, row_key, increments, error):
+        """Pass increments which failed to ``on_error``, or keep them.
+
+        :type row_key: str
+        :param row_key: The row key of the counters.
+
+        :type increments: list
+        :param increments: ``(column, value)`` pairs.
+
+        :type error: :class:`Exception <exceptions.Exception>`
+        :param error: The exception raised by the request.
+        """
+        for (column_family_id, column_qualifier), value in increments:
+            column = column_family_id + u':' + column_qualifier.decode('utf-8')
+            if self.on_error is None:
+                with self._lock:
+                    self.failed.append((row_key, column, value, error))
+            else:
+                self.on_error(row_key, column, value, error)
+
+    def _start_timer(self):
+        """Start the thread flushing on time; the lock must be held."""
+        if self._timer is not None:
+            return
+        self._timer = threading.Thread(target=self._run_timer,
+                                       name='CounterBuffer-timer')
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run_timer(self):
+        """Flush the buffer once the oldest increment has waited enough."""
+        with self._lock:
+            while not self._closed:
+                if self._deadline is None:
+                    self._lock.wait()
+                    continue
+                remaining = self._deadline - _TIME()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+                self._lock.release()
+                try:
+                    self.flush()
+                finally:
+                    self._lock.acquire()
@@ -15,6 +15,7 @@
 """Google Cloud Bigtable HappyBase table module."""
 
 
+import itertools
 import struct
 import warnings
 
@@ -35,9 +36,10 @@ from gcloud.bigtable.row_filters import ColumnQualifierRegexFilter
 from gcloud.bigtable.row_filters import FamilyNameRegexFilter
 from gcloud.bigtable.row_filters import RowFilterChain
 from gcloud.bigtable.row_filters import RowFilterUnion
-from gcloud.bigtable.row_filters import RowKeyRegexFilter
 from gcloud.bigtable.row_filters import TimestampRange
 from gcloud.bigtable.row_filters import TimestampRangeFilter
+from gcloud.bigtable.table import BULK_MAX_WORKERS
+from gcloud.bigtable.table import SCAN_MAX_WORKERS
 from gcloud.bigtable.table import Table as _LowLevelTable
 
 
@@ -194,12 +196,15 @@ class Table(object):
                                     include_timestamp=include_timestamp)
 
     def rows(self, rows, columns=None, timestamp=None,
-             include_timestamp=False):
+             include_timestamp=False, max_workers=SCAN_MAX_WORKERS):
         """Retrieve multiple rows of data.
 
         All optional arguments behave the same in this method as they do in
         :meth:`row`.
 
+        Only the requested rows are read: the keys are sent as row sets,
+        split into concurrent requests if there are many of them.
+
         :type rows: list
         :param rows: Iterable of the row keys for the rows we are reading from.
 
@@ -219,6 +224,9 @@ class Table(object):
         :param include_timestamp: Flag to indicate if cell timestamps should be
                                   included with the output.
 
+        :type max_workers: int
+        :param max_workers: (Optional) Maximum number of concurrent requests.
+
         :rtype: list
         :returns: A list of pairs, where the first is the row key and the
                   second is a dictionary with the filtered values returned.
@@ -230,21 +238,21 @@ class Table(object):
         filters = []
         if columns is not None:
             filters.append(_columns_filter_helper(columns))
-        filters.append(_row_keys_filter_helper(rows))
         # versions == 1 since we only want the latest.
         filter_ = _filter_chain_helper(versions=1, timestamp=timestamp,
                                        filters=filters)
 
-        partial_rows_data = self._low_level_table.read_rows(filter_=filter_)
-        # NOTE: We could use max_loops = 1000 or some similar value to ensure
-        #       that the stream isn't open too long.
-        partial_rows_data.consume_all()
+        partial_rows = dict(
+            (partial_row_data.row_key, partial_row_data)
+            for partial_row_data in self._low_level_table.read_rows_parallel(
+                row_keys=rows, filter_=filter_, max_workers=max_workers,
+                ordered=False))
 
         result = []
         for row_key in rows:
-            if row_key not in partial_rows_data.rows:
+            curr_row_data = partial_rows.get(_to_bytes(row_key))
+            if curr_row_data is None:
                 continue
-            curr_row_data = partial_rows_data.rows[row_key]
             curr_row_dict = _partial_row_to_dict(
                 curr_row_data, include_timestamp=include_timestamp)
             result.append((row_key, curr_row_dict))
@@ -297,7 +305,8 @@ class Table(object):
 
     def scan(self, row_start=None, row_stop=None, row_prefix=None,
              columns=None, timestamp=None,
-             include_timestamp=False, limit=None, **kwargs):
+             include_timestamp=False, limit=None, max_workers=1,
+             ordered=True, **kwargs):
         """Create a scanner for data in this table.
 
         This method returns a generator that can be used for looping over the
@@ -369,6 +378,18 @@ class Table(object):
         :type limit: int
         :param limit: (Optional) Maximum number of rows to return.
 
+        :type max_workers: int
+        :param max_workers: (Optional) If greater than one, the range is
+                            split on sampled row keys and read by up to
+                            ``max_workers`` concurrent streams, with
+                            :meth:`Table.read_rows_parallel()
+                            <gcloud.bigtable.table.Table.read_rows_parallel>`.
+
+        :type ordered: bool
+        :param ordered: (Optional) Used with ``max_workers``: if false, rows
+                        are returned as soon as they arrive rather than in
+                        key order.
+
         :type kwargs: dict
         :param kwargs: Remaining keyword arguments. Provided for HappyBase
                        compatibility.
@@ -381,23 +402,21 @@ class Table(object):
         row_start, row_stop, filter_chain = _scan_filter_helper(
             row_start, row_stop, row_prefix, columns, timestamp, limit, kwargs)
 
-        partial_rows_data = self._low_level_table.read_rows(
-            start_key=row_start, end_key=row_stop,
-            limit=limit, filter_=filter_chain)
-
-        # Mutable copy of data.
-        rows_dict = partial_rows_data.rows
-        while True:
-            try:
-                partial_rows_data.consume_next()
-                for row_key in sorted(rows_dict):
-                    curr_row_data = rows_dict.pop(row_key)
-                    # NOTE: We expect len(rows_dict) == 0, but don't check it.
-                    curr_row_dict = _partial_row_to_dict(
-                        curr_row_data, include_timestamp=include_timestamp)
-                    yield (row_key, curr_row_dict)
-            except StopIteration:
-                break
+        if max_workers > 1:
+            partial_rows_data = self._low_level_table.read_rows_parallel(
+                start_key=row_start, end_key=row_stop, filter_=filter_chain,
+                max_workers=max_workers, ordered=ordered)
+            if limit is not None:
+                partial_rows_data = itertools.islice(partial_rows_data, limit)
+        else:
+            partial_rows_data = self._low_level_table.read_rows(
+                start_key=row_start, end_key=row_stop,
+                limit=limit, filter_=filter_chain)
+
+        for curr_row_data in partial_rows_data:
+            curr_row_dict = _partial_row_to_dict(
+                curr_row_data, include_timestamp=include_timestamp)
+            yield (curr_row_data.row_key, curr_row_dict)
 
     def put(self, row, data, timestamp=None, wal=_WAL_SENTINEL):
         """Insert data into a row in this table.
@@ -467,7 +486,7 @@ class Table(object):
             batch.delete(row, columns)
 
     def batch(self, timestamp=None, batch_size=None, transaction=False,
-              wal=_WAL_SENTINEL):
+              wal=_WAL_SENTINEL, max_workers=BULK_MAX_WORKERS):
         """Create a new batch operation for this table.
 
         This method returns a new
@@ -497,11 +516,16 @@ class Table(object):
                     for Cloud Bigtable since it does not have a Write Ahead
                     Log.
 
+        :type max_workers: int
+        :param max_workers: (Optional) Maximum number of ``MutateRows``
+                            requests sent at once by the batch.
+
         :rtype: :class:`Batch <gcloud.bigtable.happybase.batch.Batch>`
         :returns: A batch bound to this table.
         """
         return Batch(self, timestamp=timestamp, batch_size=batch_size,
-                     transaction=transaction, wal=wal)
+                     transaction=transaction, wal=wal,
+                     max_workers=max_workers)
 
     def counter_get(self, row, column):
         """Retrieve the current value of a counter column.
@@ -577,6 +601,7 @@ class Table(object):
         if isinstance(column, six.binary_type):
             column = column.decode('utf-8')
         column_family_id, column_qualifier = column.split(':')
+        column_qualifier = _to_bytes(column_qualifier)
         row.increment_cell_value(column_family_id, column_qualifier, value)
         # See AppendRow.commit() will return a dictionary:
         # {
@@ -623,6 +648,24 @@ class Table(object):
         """
         return self.counter_inc(row, column, -value)
 
+    def counter_buffer(self, **kwargs):
+        """Create a buffer adding up counter increments in memory.
+
+        Increments made through the buffer are applied in the background,
+        with one ``ReadModifyWriteRow`` request per row for all the
+        increments buffered in that row, rather than one request per call
+        to :meth:`counter_inc`.
+
+        :type kwargs: dict
+        :param kwargs: Options passed to
+                       :class:`CounterBuffer <.counters.CounterBuffer>`.
+
+        :rtype: :class:`CounterBuffer <.counters.CounterBuffer>`
+        :returns: A buffer, to be closed once every increment is made.
+        """
+        from gcloud.bigtable.happybase.counters import CounterBuffer
+        return CounterBuffer(self, **kwargs)
+
 
 def _gc_rule_to_dict(gc_rule):
     """Converts garbage collection rule to dictionary if possible.
@@ -954,27 +997,3 @@ def _columns_filter_helper(columns):
         return filters[0]
     else:
         return RowFilterUnion(filters=filters)
-
-
-def _row_keys_filter_helper(row_keys):
-    """Creates a union filter for a list of rows.
-
-    :type row_keys: list
-    :param row_keys: Iterable containing row keys (as strings).
-
-    :rtype: :class:`RowFilter <gcloud.bigtable.row.RowFilter>`
-    :returns: The union filter created containing all of the row keys.
-    :raises: :class:`ValueError <exceptions.ValueError>` if there are no
-             filters to union.
-    """
-    filters = []
-    for row_key in row_keys:
-        filters.append(RowKeyRegexFilter(row_key))
-
-    num_filters = len(filters)
-    if num_filters == 0:
-        raise ValueError('Must have at least one filter.')
-    elif num_filters == 1:
-        return filters[0]
-    else:
-        return RowFilterUnion(filters=filters)
@@ -101,8 +101,9 @@ class TestBatch(unittest2.TestCase):
                           transaction=transaction)
 
     def test_send(self):
-        table = object()
-        batch = self._makeOne(table)
+        low_level_table = _MockLowLevelTable()
+        table = _MockTable(low_level_table)
+        batch = self._makeOne(table, max_workers=3)
 
         batch._row_map = row_map = _MockRowMap()
         row_map['row-key1'] = row1 = _MockRow()
@@ -110,18 +111,56 @@ class TestBatch(unittest2.TestCase):
         batch._mutation_count = 1337
 
         self.assertEqual(row_map.clear_count, 0)
-        self.assertEqual(row1.commits, 0)
-        self.assertEqual(row2.commits, 0)
         self.assertNotEqual(batch._mutation_count, 0)
         self.assertNotEqual(row_map, {})
 
         batch.send()
         self.assertEqual(row_map.clear_count, 1)
-        self.assertEqual(row1.commits, 1)
-        self.assertEqual(row2.commits, 1)
+        self.assertEqual(low_level_table.mutate_rows_calls,
+                         [([row1, row2], {'max_workers': 3})])
         self.assertEqual(batch._mutation_count, 0)
         self.assertEqual(row_map, {})
 
+    def test_send_failures(self):
+        from google.rpc import code_pb2
+        from gcloud.bigtable.happybase.batch import BatchError
+
+        low_level_table = _MockLowLevelTable()
+        low_level_table.codes = [code_pb2.OK, code_pb2.INVALID_ARGUMENT]
+        table = _MockTable(low_level_table)
+        batch = self._makeOne(table)
+
+        row1 = _MockRow()
+        row2 = _MockRow()
+        row2._pb_mutations = [object(), object()]
+        batch._row_map = {'row-key1': row1, 'row-key2': row2}
+        batch._mutation_count = 3
+
+        with self.assertRaises(BatchError) as exc_info:
+            batch.send()
+        failures = exc_info.exception.failures
+        self.assertEqual([(row_key, status_pb.code)
+                          for row_key, status_pb in failures],
+                         [('row-key2', code_pb2.INVALID_ARGUMENT)])
+        # The failed row stays in the batch, to be sent again.
+        self.assertEqual(batch._row_map, {'row-key2': row2})
+        self.assertEqual(batch._mutation_count, 2)
+
+    def test_send_error(self):
+        low_level_table = _MockLowLevelTable()
+        low_level_table.error = RuntimeError('boom')
+        table = _MockTable(low_level_table)
+        batch = self._makeOne(table)
+
+        row = _MockRow()
+        batch._row_map = {'row-key': row}
+        batch._mutation_count = 1
+
+        with self.assertRaises(RuntimeError):
+            batch.send()
+        self.assertEqual(batch._row_map, {'row-key': row})
+        self.assertEqual(batch._mutation_count, 1)
+
     def test__try_send_no_batch_size(self):
         klass = self._getTargetClass()
 
@@ -301,7 +340,6 @@ class TestBatch(unittest2.TestCase):
         row_object = _MockRow()
 
         batch._delete_columns(columns, row_object)
-        self.assertEqual(row_object.commits, 0)
 
         cell_deleted_args = (col2_fam, col2_qual)
         cell_deleted_kwargs = {'time_range': time_range}
@@ -527,15 +565,12 @@ class _MockRow(object):
     ALL_COLUMNS = object()
 
     def __init__(self):
-        self.commits = 0
+        self._pb_mutations = []
         self.deletes = 0
         self.set_cell_calls = []
         self.delete_cell_calls = []
         self.delete_cells_calls = []
 
-    def commit(self):
-        self.commits += 1
-
     def delete(self):
         self.deletes += 1
 
@@ -562,7 +597,19 @@ class _MockLowLevelTable(object):
         self.kwargs = kwargs
         self.rows_made = []
         self.mock_row = None
+        self.mutate_rows_calls = []
+        self.codes = None
+        self.error = None
 
     def row(self, row_key):
         self.rows_made.append(row_key)
         return self.mock_row
+
+    def mutate_rows(self, rows, **kwargs):
+        from google.rpc import code_pb2
+        from google.rpc import status_pb2
+        self.mutate_rows_calls.append((rows, kwargs))
+        if self.error is not None:
+            raise self.error
+        codes = self.codes or [code_pb2.OK] * len(rows)
+        return [status_pb2.Status(code=code) for code in codes]
@@ -0,0 +1,222 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+class Test__column_pair(unittest2.TestCase):
+
+    def _callFUT(self, column):
+        from gcloud.bigtable.happybase.counters import _column_pair
+        return _column_pair(column)
+
+    def test_text(self):
+        self.assertEqual(self._callFUT(u'fam:col'), (u'fam', b'col'))
+
+    def test_bytes(self):
+        self.assertEqual(self._callFUT(b'fam:col'), (u'fam', b'col'))
+
+    def test_bad_column(self):
+        self.assertRaises(ValueError, self._callFUT, 'fam')
+
+
+class TestCounterBuffer(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.bigtable.happybase.counters import CounterBuffer
+        return CounterBuffer
+
+    def _makeOne(self, *args, **kwargs):
+        import weakref
+        from gcloud._testing import _Monkey
+        from gcloud import _helpers
+        registered = weakref.WeakSet()
+        with _Monkey(_helpers, _CLOSE_AT_EXIT=registered):
+            counters = self._getTargetClass()(*args, **kwargs)
+        self.assertEqual(list(registered), [counters])
+        self.addCleanup(counters.close)
+        return counters
+
+    def test_constructor_defaults(self):
+        from gcloud.bigtable.happybase import counters as MUT
+        table = _Table()
+        counters = self._makeOne(table)
+        self.assertTrue(counters.table is table)
+        self.assertEqual(counters.flush_interval, MUT.FLUSH_INTERVAL)
+        self.assertEqual(counters.flush_count, MUT.FLUSH_COUNT)
+        self.assertEqual(counters.max_workers, MUT.MAX_WORKERS)
+        self.assertEqual(counters.on_error, None)
+        self.assertEqual(counters.failed, [])
+
+    def test_constructor_invalid(self):
+        table = _Table()
+        self.assertRaises(ValueError, self._getTargetClass(), table,
+                          flush_count=0)
+        self.assertRaises(ValueError, self._getTargetClass(), table,
+                          max_workers=0)
+
+    def test_flush_merges_increments(self):
+        table = _Table()
+        counters = self._makeOne(table, flush_interval=None)
+        counters.counter_inc('row-1', 'fam:views')
+        counters.counter_inc('row-1', b'fam:views', 4)
+        counters.counter_dec('row-1', 'fam:quota', 2)
+        counters.counter_inc('row-2', 'fam:views')
+        # Increments adding up to zero are not sent.
+        counters.counter_inc('row-2', 'fam:clicks', 3)
+        counters.counter_dec('row-2', 'fam:clicks', 3)
+        self.assertEqual(table.commits(), [])
+
+        values = counters.flush()
+        self.assertEqual(values, {
+            ('row-1', u'fam:views'): 5,
+            ('row-1', u'fam:quota'): -2,
+            ('row-2', u'fam:views'): 1,
+        })
+        self.assertEqual(sorted(table.commits()), [
+            ('row-1', [(u'fam', b'quota', -2), (u'fam', b'views', 5)]),
+            ('row-2', [(u'fam', b'views', 1)]),
+        ])
+        self.assertEqual(counters.flush(), {})
+
+        counters.counter_inc('row-1', 'fam:views')
+        self.assertEqual(counters.flush(), {('row-1', u'fam:views'): 6})
+
+    def test_flush_splits_rows(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable.happybase import counters as MUT
+        table = _Table()
+        counters = self._makeOne(table, flush_interval=None, max_workers=1)
+        counters.counter_inc('row', 'fam:a')
+        counters.counter_inc('row', 'fam:b')
+        with _Monkey(MUT, MAX_MUTATIONS=1):
+            counters.flush()
+        self.assertEqual(table.commits(), [
+            ('row', [(u'fam', b'a', 1)]),
+            ('row', [(u'fam', b'b', 1)]),
+        ])
+
+    def test_flush_count(self):
+        table = _Table()
+        counters = self._makeOne(table, flush_interval=None, flush_count=2)
+        counters.counter_inc('row-1', 'fam:views')
+        counters.counter_inc('row-1', 'fam:views')
+        self.assertEqual(table.commits(), [])
+        counters.counter_inc('row-2', 'fam:views')
+        self.assertEqual(sorted(table.commits()), [
+            ('row-1', [(u'fam', b'views', 2)]),
+            ('row-2', [(u'fam', b'views', 1)]),
+        ])
+
+    def test_flush_interval(self):
+        table = _Table()
+        counters = self._makeOne(table, flush_interval=0.01)
+        counters.counter_inc('row', 'fam:views')
+        self.assertEqual(table.wait_for_commits(1),
+                         [('row', [(u'fam', b'views', 1)])])
+        counters.counter_inc('row', 'fam:views', 2)
+        self.assertEqual(table.wait_for_commits(2)[1],
+                         ('row', [(u'fam', b'views', 2)]))
+        counters.close()
+        self.assertFalse(counters._timer.is_alive())
+
+    def test_failures(self):
+        error = RuntimeError('boom')
+        table = _Table(errors={'row-2': error})
+        errors = []
+        counters = self._makeOne(
+            table, flush_interval=None,
+            on_error=lambda *args: errors.append(args))
+        counters.counter_inc('row-1', 'fam:views')
+        counters.counter_inc('row-2', 'fam:views', 3)
+        self.assertEqual(counters.flush(), {('row-1', u'fam:views'): 1})
+        self.assertEqual(errors, [('row-2', u'fam:views', 3, error)])
+        self.assertEqual(counters.failed, [])
+
+    def test_failures_collected(self):
+        error = RuntimeError('boom')
+        table = _Table(errors={'row': error})
+        counters = self._makeOne(table, flush_interval=None)
+        counters.counter_inc('row', 'fam:views')
+        counters.close()
+        self.assertEqual(counters.failed, [('row', u'fam:views', 1, error)])
+
+    def test_close(self):
+        table = _Table()
+        with self._makeOne(table) as counters:
+            counters.counter_inc('row', 'fam:views')
+        self.assertEqual(table.commits(), [('row', [(u'fam', b'views', 1)])])
+        counters.close()  # Already closed: no-op.
+        self.assertRaises(ValueError, counters.counter_inc, 'row',
+                          'fam:views')
+        self.assertEqual(len(table.commits()), 1)
+
+
+class _Table(object):
+
+    def __init__(self, errors=None):
+        self._low_level_table = _LowLevelTable(errors or {})
+
+    def commits(self):
+        return list(self._low_level_table.commits)
+
+    def wait_for_commits(self, count):
+        low_level_table = self._low_level_table
+        with low_level_table.committed:
+            while len(low_level_table.commits) < count:
+                low_level_table.committed.wait(5)
+            return list(low_level_table.commits)
+
+
+class _LowLevelTable(object):
+
+    def __init__(self, errors):
+        import threading
+        self.errors = errors
+        self.values = {}
+        self.commits = []
+        self.committed = threading.Condition()
+
+    def row(self, row_key, append=False):
+        assert append
+        return _AppendRow(self, row_key)
+
+
+class _AppendRow(object):
+
+    def __init__(self, table, row_key):
+        self._table = table
+        self._row_key = row_key
+        self._increments = []
+
+    def increment_cell_value(self, column_family_id, column, int_value):
+        self._increments.append((column_family_id, column, int_value))
+
+    def commit(self):
+        import struct
+        table = self._table
+        error = table.errors.get(self._row_key)
+        if error is not None:
+            raise error
+        result = {}
+        with table.committed:
+            table.commits.append((self._row_key, self._increments))
+            table.committed.notify_all()
+            for column_family_id, column, int_value in self._increments:
+                key = (self._row_key, column_family_id, column)
+                value = table.values.get(key, 0) + int_value
+                table.values[key] = value
+                result.setdefault(column_family_id, {})[column] = [
+                    (struct.pack('>q', value), None)]
+        return result
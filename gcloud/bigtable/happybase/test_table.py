@@ -281,9 +281,7 @@ class TestTable(unittest2.TestCase):
         connection = None
         table = self._makeOne(name, connection)
         table._low_level_table = _MockLowLevelTable()
-        rr_result = _MockPartialRowsData()
-        table._low_level_table.read_rows_result = rr_result
-        self.assertEqual(rr_result.consume_all_calls, 0)
+        table._low_level_table.read_rows_parallel_result = iter([])
 
         # Set-up mocks.
         fake_col_filter = object()
@@ -293,13 +291,6 @@ class TestTable(unittest2.TestCase):
             mock_cols.append(args)
             return fake_col_filter
 
-        fake_rows_filter = object()
-        mock_rows = []
-
-        def mock_row_keys_filter_helper(*args):
-            mock_rows.append(args)
-            return fake_rows_filter
-
         fake_filter = object()
         mock_filters = []
 
@@ -310,24 +301,26 @@ class TestTable(unittest2.TestCase):
         rows = ['row-key']
         columns = object()
         with _Monkey(MUT, _filter_chain_helper=mock_filter_chain_helper,
-                     _row_keys_filter_helper=mock_row_keys_filter_helper,
                      _columns_filter_helper=mock_columns_filter_helper):
-            result = table.rows(rows, columns=columns)
+            result = table.rows(rows, columns=columns, max_workers=2)
 
-        # read_rows_result == Empty PartialRowsData --> No results.
+        # read_rows_parallel_result is empty --> No results.
         self.assertEqual(result, [])
 
-        read_rows_args = ()
-        read_rows_kwargs = {'filter_': fake_filter}
-        self.assertEqual(table._low_level_table.read_rows_calls, [
-            (read_rows_args, read_rows_kwargs),
+        read_rows_kwargs = {
+            'row_keys': rows,
+            'filter_': fake_filter,
+            'max_workers': 2,
+            'ordered': False,
+        }
+        self.assertEqual(table._low_level_table.read_rows_parallel_calls, [
+            ((), read_rows_kwargs),
         ])
-        self.assertEqual(rr_result.consume_all_calls, 1)
+        self.assertEqual(table._low_level_table.read_rows_calls, [])
 
         self.assertEqual(mock_cols, [(columns,)])
-        self.assertEqual(mock_rows, [(rows,)])
         expected_kwargs = {
-            'filters': [fake_col_filter, fake_rows_filter],
+            'filters': [fake_col_filter],
             'versions': 1,
             'timestamp': None,
         }
@@ -337,29 +330,21 @@ class TestTable(unittest2.TestCase):
         from gcloud._testing import _Monkey
         from gcloud.bigtable.happybase import table as MUT
         from gcloud.bigtable.row_data import PartialRowData
+        from gcloud.bigtable.table import SCAN_MAX_WORKERS
 
         row_key1 = 'row-key1'
         row_key2 = 'row-key2'
-        rows = [row_key1, row_key2]
+        rows = [row_key1, row_key2, row_key1]
         name = 'table-name'
         connection = None
         table = self._makeOne(name, connection)
         table._low_level_table = _MockLowLevelTable()
 
-        row1 = PartialRowData(row_key1)
         # Return row1 but not row2
-        rr_result = _MockPartialRowsData(rows={row_key1: row1})
-        table._low_level_table.read_rows_result = rr_result
-        self.assertEqual(rr_result.consume_all_calls, 0)
+        row1 = PartialRowData(row_key1.encode('ascii'))
+        table._low_level_table.read_rows_parallel_result = iter([row1])
 
         # Set-up mocks.
-        fake_rows_filter = object()
-        mock_rows = []
-
-        def mock_row_keys_filter_helper(*args):
-            mock_rows.append(args)
-            return fake_rows_filter
-
         fake_filter = object()
         mock_filters = []
 
@@ -379,32 +364,34 @@ class TestTable(unittest2.TestCase):
         fake_cells = object()
         row1._cells = {col_fam: {qual: fake_cells}}
         include_timestamp = object()
-        with _Monkey(MUT, _row_keys_filter_helper=mock_row_keys_filter_helper,
-                     _filter_chain_helper=mock_filter_chain_helper,
+        with _Monkey(MUT, _filter_chain_helper=mock_filter_chain_helper,
                      _cells_to_pairs=mock_cells_to_pairs):
             result = table.rows(rows, include_timestamp=include_timestamp)
 
-        # read_rows_result == PartialRowsData with row_key1
+        # read_rows_parallel_result == row_key1, requested twice.
         expected_result = {col_fam.encode('ascii') + b':' + qual: fake_pair}
-        self.assertEqual(result, [(row_key1, expected_result)])
+        self.assertEqual(result, [(row_key1, expected_result),
+                                  (row_key1, expected_result)])
 
-        read_rows_args = ()
-        read_rows_kwargs = {'filter_': fake_filter}
-        self.assertEqual(table._low_level_table.read_rows_calls, [
-            (read_rows_args, read_rows_kwargs),
+        read_rows_kwargs = {
+            'row_keys': rows,
+            'filter_': fake_filter,
+            'max_workers': SCAN_MAX_WORKERS,
+            'ordered': False,
+        }
+        self.assertEqual(table._low_level_table.read_rows_parallel_calls, [
+            ((), read_rows_kwargs),
         ])
-        self.assertEqual(rr_result.consume_all_calls, 1)
 
-        self.assertEqual(mock_rows, [(rows,)])
         expected_kwargs = {
-            'filters': [fake_rows_filter],
+            'filters': [],
             'versions': 1,
             'timestamp': None,
         }
         self.assertEqual(mock_filters, [expected_kwargs])
         to_pairs_kwargs = {'include_timestamp': include_timestamp}
         self.assertEqual(mock_cells,
-                         [((fake_cells,), to_pairs_kwargs)])
+                         [((fake_cells,), to_pairs_kwargs)] * 2)
 
     def test_cells_empty_row(self):
         from gcloud._testing import _Monkey
@@ -705,10 +692,31 @@ class TestTable(unittest2.TestCase):
                                rr_result=rr_result,
                                expected_result=expected_result)
 
+    def test_scan_parallel(self):
+        from gcloud.bigtable.row_data import PartialRowData
+
+        table = self._makeOne('table-name', None)
+        table._low_level_table = _MockLowLevelTable()
+        table._low_level_table.read_rows_parallel_result = iter(
+            [PartialRowData(b'a'), PartialRowData(b'b'),
+             PartialRowData(b'c')])
+        result = table.scan(row_start=b'a', limit=2, max_workers=3,
+                            ordered=False)
+        self.assertEqual(list(result), [(b'a', {}), (b'b', {})])
+
+        self.assertEqual(table._low_level_table.read_rows_calls, [])
+        (args, kwargs), = table._low_level_table.read_rows_parallel_calls
+        self.assertEqual(args, ())
+        self.assertEqual(kwargs['start_key'], b'a')
+        self.assertEqual(kwargs['end_key'], None)
+        self.assertEqual(kwargs['max_workers'], 3)
+        self.assertFalse(kwargs['ordered'])
+
     def test_put(self):
         from gcloud._testing import _Monkey
         from gcloud.bigtable.happybase import table as MUT
         from gcloud.bigtable.happybase.table import _WAL_SENTINEL
+        from gcloud.bigtable.table import BULK_MAX_WORKERS
 
         name = 'table-name'
         connection = None
@@ -738,6 +746,7 @@ class TestTable(unittest2.TestCase):
             'batch_size': None,
             'transaction': False,
             'wal': _WAL_SENTINEL,
+            'max_workers': BULK_MAX_WORKERS,
         }
         self.assertEqual(batch.kwargs, expected_kwargs)
         # Make sure it was a successful context manager
@@ -749,6 +758,7 @@ class TestTable(unittest2.TestCase):
         from gcloud._testing import _Monkey
         from gcloud.bigtable.happybase import table as MUT
         from gcloud.bigtable.happybase.table import _WAL_SENTINEL
+        from gcloud.bigtable.table import BULK_MAX_WORKERS
 
         name = 'table-name'
         connection = None
@@ -778,6 +788,7 @@ class TestTable(unittest2.TestCase):
             'batch_size': None,
             'transaction': False,
             'wal': _WAL_SENTINEL,
+            'max_workers': BULK_MAX_WORKERS,
         }
         self.assertEqual(batch.kwargs, expected_kwargs)
         # Make sure it was a successful context manager
@@ -800,7 +811,8 @@ class TestTable(unittest2.TestCase):
 
         with _Monkey(MUT, Batch=_MockBatch):
             result = table.batch(timestamp=timestamp, batch_size=batch_size,
-                                 transaction=transaction, wal=wal)
+                                 transaction=transaction, wal=wal,
+                                 max_workers=2)
 
         self.assertTrue(isinstance(result, _MockBatch))
         self.assertEqual(result.args, (table,))
@@ -809,6 +821,7 @@ class TestTable(unittest2.TestCase):
             'batch_size': batch_size,
             'transaction': transaction,
             'wal': wal,
+            'max_workers': 2,
         }
         self.assertEqual(result.kwargs, expected_kwargs)
 
@@ -885,8 +898,22 @@ class TestTable(unittest2.TestCase):
         row_obj = table._low_level_table.row_values[row]
         if isinstance(column, six.binary_type):
             column = column.decode('utf-8')
+        col_fam, col_qual = column.split(':')
         self.assertEqual(row_obj.counts,
-                         {tuple(column.split(':')): incremented_value})
+                         {(col_fam, col_qual.encode('utf-8')):
+                          incremented_value})
+
+    def test_counter_buffer(self):
+        from gcloud.bigtable.happybase import counters as MUT
+
+        name = 'table-name'
+        connection = None
+        table = self._makeOne(name, connection)
+        counters = table.counter_buffer(flush_interval=None, max_workers=2)
+        self.assertTrue(isinstance(counters, MUT.CounterBuffer))
+        self.assertTrue(counters.table is table)
+        self.assertEqual(counters.flush_interval, None)
+        self.assertEqual(counters.max_workers, 2)
 
     def test_counter_set(self):
         name = 'table-name'
@@ -911,7 +938,7 @@ class TestTable(unittest2.TestCase):
         fake_timestamp = None
         commit_result = {
             col_fam: {
-                col_qual: [(packed_value, fake_timestamp)],
+                col_qual.encode('utf-8'): [(packed_value, fake_timestamp)],
             }
         }
         self._counter_inc_helper(row, column, value, commit_result)
@@ -928,7 +955,7 @@ class TestTable(unittest2.TestCase):
         fake_timestamp = None
         commit_result = {
             col_fam.decode('utf-8'): {
-                col_qual.decode('utf-8'): [(packed_value, fake_timestamp)],
+                col_qual: [(packed_value, fake_timestamp)],
             }
         }
         self._counter_inc_helper(row, column, value, commit_result)
@@ -973,7 +1000,7 @@ class TestTable(unittest2.TestCase):
         packed_value = None
         commit_result = {
             col_fam: {
-                col_qual: [
+                col_qual.encode('utf-8'): [
                     (packed_value, fake_timestamp),
                     (packed_value, fake_timestamp),
                 ],
@@ -1366,43 +1393,6 @@ class Test__columns_filter_helper(unittest2.TestCase):
         self.assertEqual(filter2b.regex, col_qual2.encode('utf-8'))
 
 
-class Test__row_keys_filter_helper(unittest2.TestCase):
-
-    def _callFUT(self, *args, **kwargs):
-        from gcloud.bigtable.happybase.table import _row_keys_filter_helper
-        return _row_keys_filter_helper(*args, **kwargs)
-
-    def test_no_rows(self):
-        row_keys = []
-        with self.assertRaises(ValueError):
-            self._callFUT(row_keys)
-
-    def test_single_row(self):
-        from gcloud.bigtable.row_filters import RowKeyRegexFilter
-
-        row_key = b'row-key'
-        row_keys = [row_key]
-        result = self._callFUT(row_keys)
-        expected_result = RowKeyRegexFilter(row_key)
-        self.assertEqual(result, expected_result)
-
-    def test_many_rows(self):
-        from gcloud.bigtable.row_filters import RowFilterUnion
-        from gcloud.bigtable.row_filters import RowKeyRegexFilter
-
-        row_key1 = b'row-key1'
-        row_key2 = b'row-key2'
-        row_key3 = b'row-key3'
-        row_keys = [row_key1, row_key2, row_key3]
-        result = self._callFUT(row_keys)
-
-        filter1 = RowKeyRegexFilter(row_key1)
-        filter2 = RowKeyRegexFilter(row_key2)
-        filter3 = RowKeyRegexFilter(row_key3)
-        expected_result = RowFilterUnion(filters=[filter1, filter2, filter3])
-        self.assertEqual(result, expected_result)
-
-
 class _Connection(object):
 
     def __init__(self, instance):
@@ -1428,6 +1418,8 @@ class _MockLowLevelTable(object):
         self.read_row_result = None
         self.read_rows_calls = []
         self.read_rows_result = None
+        self.read_rows_parallel_calls = []
+        self.read_rows_parallel_result = None
 
     def list_column_families(self):
         self.list_column_families_calls += 1
@@ -1446,6 +1438,10 @@ class _MockLowLevelTable(object):
         self.read_rows_calls.append((args, kwargs))
         return self.read_rows_result
 
+    def read_rows_parallel(self, *args, **kwargs):
+        self.read_rows_parallel_calls.append((args, kwargs))
+        return self.read_rows_parallel_result
+
 
 class _MockLowLevelRow(object):
 
@@ -1503,3 +1499,12 @@ class _MockPartialRowsData(object):
         self.consume_next_calls += 1
         if self.consume_next_calls > self.iterations:
             raise StopIteration
+
+    def __iter__(self):
+        while True:
+            try:
+                self.consume_next()
+            except StopIteration:
+                return
+            for row_key in sorted(self.rows):
+                yield self.rows.pop(row_key)
@@ -15,7 +15,6 @@
 """Container for Google Cloud Bigtable Cells and Streaming Row Contents."""
 
 
-import copy
 import six
 
 from gcloud._helpers import _datetime_from_microseconds
@@ -35,6 +34,8 @@ class Cell(object):
     :param labels: (Optional) List of strings. Labels applied to the cell.
     """
 
+    __slots__ = ('value', 'timestamp', 'labels')
+
     def __init__(self, value, timestamp, labels=()):
         self.value = value
         self.timestamp = timestamp
@@ -73,6 +74,9 @@ class PartialCellData(object):
     These are expected to be updated directly from a
     :class:`._generated.bigtable_service_messages_pb2.ReadRowsResponse`
 
+    The chunks of a split value are kept in a list and joined once, when
+    :attr:`value` is read, so assembling a large value takes linear time.
+
     :type row_key: bytes
     :param row_key: The key for the row holding the (partial) cell.
 
@@ -92,6 +96,10 @@ class PartialCellData(object):
     :type value: bytes
     :param value: The (accumulated) value of the (partial) cell.
     """
+
+    __slots__ = ('row_key', 'family_name', 'qualifier', 'timestamp_micros',
+                 'labels', '_value_chunks')
+
     def __init__(self, row_key, family_name, qualifier, timestamp_micros,
                  labels=(), value=b''):
         self.row_key = row_key
@@ -99,7 +107,7 @@ class PartialCellData(object):
         self.qualifier = qualifier
         self.timestamp_micros = timestamp_micros
         self.labels = labels
-        self.value = value
+        self._value_chunks = [value]
 
     def append_value(self, value):
         """Append bytes from a new chunk to value.
@@ -107,7 +115,19 @@ class PartialCellData(object):
         :type value: bytes
         :param value: bytes to append
         """
-        self.value += value
+        self._value_chunks.append(value)
+
+    @property
+    def value(self):
+        """The value accumulated so far.
+
+        :rtype: bytes
+        :returns: The chunks appended so far, joined.
+        """
+        chunks = self._value_chunks
+        if len(chunks) > 1:
+            chunks[:] = [b''.join(chunks)]
+        return chunks[0]
 
 
 class PartialRowData(object):
@@ -120,6 +140,8 @@ class PartialRowData(object):
     :param row_key: The key for the row holding the (partial) data.
     """
 
+    __slots__ = ('_row_key', '_cells')
+
     def __init__(self, row_key):
         self._row_key = row_key
         self._cells = {}
@@ -159,8 +181,14 @@ class PartialRowData(object):
                   dictionary has two-levels of keys (first for column families
                   and second for column names/qualifiers within a family). For
                   a given column, a list of :class:`Cell` objects is stored.
+                  The dictionaries and lists are copies, but the
+                  :class:`Cell` objects are those of the row.
         """
-        return copy.deepcopy(self._cells)
+        return dict(
+            (column_family_id, dict((column_qual, list(cells))
+                                    for column_qual, cells
+                                    in six.iteritems(columns)))
+            for column_family_id, columns in six.iteritems(self._cells))
 
     @property
     def row_key(self):
@@ -187,16 +215,30 @@ class PartialRowsData(object):
         :class:`grpc.framework.alpha._reexport._CancellableIterator`
     :param response_iterator: A streaming iterator returned from a
                               ``ReadRows`` request.
+
+    :type resume: callable
+    :param resume: (Optional) Called as ``resume(error, last_key,
+                   rows_read)`` when the stream raises ``error``, with the
+                   greatest row key the stream went past (:data:`None` if
+                   none) and the number of rows completed so far.  It
+                   returns a new stream, picking up after ``last_key``, or
+                   :data:`None` if no rows are left; or it raises to give
+                   up.  The row in progress, if any, is dropped and read
+                   again from the new stream.
     """
     START = "Start"                         # No responses yet processed.
     NEW_ROW = "New row"                     # No cells yet complete for row
     ROW_IN_PROGRESS = "Row in progress"     # Some cells complete for row
     CELL_IN_PROGRESS = "Cell in progress"   # Incomplete cell for row
 
-    def __init__(self, response_iterator):
+    def __init__(self, response_iterator, resume=None):
         self._response_iterator = response_iterator
+        self._resume = resume
         # Fully-processed rows, keyed by `row_key`
         self._rows = {}
+        # Number of rows completed, and greatest row key scanned or completed
+        self._rows_read = 0
+        self._last_key = None
         # Counter for responses pulled from iterator
         self._counter = 0
         # Maybe cached from previous response
@@ -242,6 +284,8 @@ class PartialRowsData(object):
     def rows(self):
         """Property returning all rows accumulated from the stream.
 
+        Rows read by iterating over this object are not accumulated.
+
         :rtype: dict
         :returns: row_key -> :class:`PartialRowData`.
         """
@@ -259,7 +303,77 @@ class PartialRowsData(object):
         Parse the response and its chunks into a new/existing row in
         :attr:`_rows`
         """
-        response = six.next(self._response_iterator)
+        response = self._next_response()
+        for row in self._process_response(response):
+            self._rows[row.row_key] = row
+
+    def __iter__(self):
+        """Yield each row as soon as its ``commit_row`` chunk arrives.
+
+        Unlike :meth:`consume_all`, rows are not kept in :attr:`rows`, so
+        only the row being read is held in memory.  Leaving the loop early
+        (or closing the generator) cancels the stream.
+
+        .. code:: python
+
+            >>> for row in table.read_rows():
+            ...     if row.row_key > b'stop':
+            ...         break
+
+        :rtype: :class:`PartialRowData`
+        :returns: Each row, in the order of the stream.
+        :raises: :class:`ValueError <exceptions.ValueError>` if the stream
+                 ends in the middle of a row.
+        """
+        try:
+            while True:
+                try:
+                    response = self._next_response()
+                except StopIteration:
+                    break
+                for row in self._process_response(response):
+                    yield row
+        except GeneratorExit:
+            if hasattr(self._response_iterator, 'cancel'):
+                self.cancel()
+            raise
+        if self.state not in (self.NEW_ROW, self.START):
+            raise ValueError('The row remains partial / is not committed.')
+
+    def _next_response(self):
+        """Pull the next response, resuming the stream if it fails.
+
+        :rtype: :class:`.bigtable_pb2.ReadRowsResponse`
+        :returns: The next response.
+        :raises: :class:`StopIteration <exceptions.StopIteration>` once
+                 the stream is exhausted.
+        """
+        while True:
+            try:
+                return six.next(self._response_iterator)
+            except StopIteration:
+                raise
+            except Exception as exc:  # pylint: disable=broad-except
+                if self._resume is None:
+                    raise
+                response_iterator = self._resume(
+                    exc, self._last_key, self._rows_read)
+                # Cells of the row in progress will be sent again.
+                self._row = self._cell = self._previous_cell = None
+                if response_iterator is None:
+                    raise StopIteration
+                self._response_iterator = response_iterator
+
+    def _process_response(self, response):
+        """Parse the chunks of a ``ReadRowsResponse``.
+
+        :type response: :class:`.bigtable_pb2.ReadRowsResponse`
+        :param response: The next response of the stream.
+
+        :rtype: :class:`PartialRowData`
+        :returns: Each row completed by the response, as soon as its
+                  ``commit_row`` chunk is parsed.
+        """
         self._counter += 1
 
         if self._last_scanned_row_key is None:  # first response
@@ -267,17 +381,27 @@ class PartialRowsData(object):
                 raise InvalidReadRowsResponse()
 
         self._last_scanned_row_key = response.last_scanned_row_key
+        if self._last_scanned_row_key and (
+                self._last_key is None or
+                self._last_scanned_row_key > self._last_key):
+            self._last_key = self._last_scanned_row_key
 
         row = self._row
         cell = self._cell
 
         for chunk in response.chunks:
-
-            self._validate_chunk(chunk)
+            # The state is tracked in locals: checking ``self.state`` for
+            # each chunk costs more than parsing it.
+            if cell is not None:
+                self._validate_chunk_status(chunk)
+            elif row is not None and self._previous_cell is not None:
+                self._validate_chunk_row_in_progress(chunk)
+            else:
+                self._validate_chunk_new_row(chunk)
 
             if chunk.reset_row:
-                row = self._row = None
-                cell = self._cell = self._previous_cell = None
+                self._reset_row()
+                row = cell = None
                 continue
 
             if row is None:
@@ -295,14 +419,10 @@ class PartialRowsData(object):
             else:
                 cell.append_value(chunk.value)
 
-            if chunk.commit_row:
-                self._save_current_row()
-                row = cell = None
-                continue
-
-            if chunk.value_size == 0:
-                self._save_current_cell()
-                cell = None
+            completed = self._finish_chunk(chunk)
+            row, cell = self._row, self._cell
+            if completed is not None:
+                yield completed
 
     def consume_all(self, max_loops=None):
         """Consume the streamed responses until there are no more.
@@ -343,29 +463,19 @@ class PartialRowsData(object):
         _raise_if(chunk.value_size < 0)
 
     def _validate_chunk_new_row(self, chunk):
-        """Helper for :meth:`_validate_chunk`."""
-        assert self.state == self.NEW_ROW
+        """Helper for :meth:`_process_response`, in state :attr:`NEW_ROW`."""
         _raise_if(chunk.reset_row)
         _raise_if(not chunk.row_key)
-        _raise_if(not chunk.family_name)
-        _raise_if(not chunk.qualifier)
         # This constraint is not enforced in the Go example.
-        _raise_if(chunk.value_size > 0 and chunk.commit_row is not False)
+        _raise_if(chunk.value_size > 0 and chunk.commit_row)
         # This constraint is from the Go example, not the spec.
         _raise_if(self._previous_row is not None and
                   chunk.row_key <= self._previous_row.row_key)
 
-    def _same_as_previous(self, chunk):
-        """Helper for :meth:`_validate_chunk_row_in_progress`"""
-        previous = self._previous_cell
-        return (chunk.row_key == previous.row_key and
-                chunk.family_name == previous.family_name and
-                chunk.qualifier == previous.qualifier and
-                chunk.labels == previous.labels)
-
     def _validate_chunk_row_in_progress(self, chunk):
-        """Helper for :meth:`_validate_chunk`"""
-        assert self.state == self.ROW_IN_PROGRESS
+        """Helper for :meth:`_process_response`, in state
+        :attr:`ROW_IN_PROGRESS`.
+        """
         self._validate_chunk_status(chunk)
         if not chunk.HasField('commit_row') and not chunk.reset_row:
             _raise_if(not chunk.timestamp_micros or not chunk.value)
@@ -373,24 +483,26 @@ class PartialRowsData(object):
                   chunk.row_key != self._row.row_key)
         _raise_if(chunk.HasField('family_name') and
                   not chunk.HasField('qualifier'))
-        previous = self._previous_cell
-        _raise_if(self._same_as_previous(chunk) and
-                  chunk.timestamp_micros <= previous.timestamp_micros)
 
-    def _validate_chunk_cell_in_progress(self, chunk):
-        """Helper for :meth:`_validate_chunk`"""
-        assert self.state == self.CELL_IN_PROGRESS
-        self._validate_chunk_status(chunk)
-        self._copy_from_current(chunk)
+    def _reset_row(self):
+        """Helper for :meth:`_process_response`: drop the row in progress.
+        """
+        self._row = self._cell = self._previous_cell = None
 
-    def _validate_chunk(self, chunk):
-        """Helper for :meth:`consume_next`."""
-        if self.state == self.NEW_ROW:
-            self._validate_chunk_new_row(chunk)
-        if self.state == self.ROW_IN_PROGRESS:
-            self._validate_chunk_row_in_progress(chunk)
-        if self.state == self.CELL_IN_PROGRESS:
-            self._validate_chunk_cell_in_progress(chunk)
+    def _finish_chunk(self, chunk):
+        """Helper for :meth:`_process_response`: save what a chunk ends.
+
+        :type chunk: :class:`.bigtable_pb2.ReadRowsResponse.CellChunk`
+        :param chunk: A chunk just parsed.
+
+        :rtype: :class:`PartialRowData`
+        :returns: The row, if ``chunk`` commits it, else ``None``.
+        """
+        if chunk.commit_row:
+            return self._save_current_row()
+        if chunk.value_size == 0:
+            self._save_current_cell()
+        return None
 
     def _save_current_cell(self):
         """Helper for :meth:`consume_next`."""
@@ -401,21 +513,6 @@ class PartialRowsData(object):
         qualified.append(complete)
         self._cell, self._previous_cell = None, cell
 
-    def _copy_from_current(self, chunk):
-        """Helper for :meth:`consume_next`."""
-        current = self._cell
-        if current is not None:
-            if not chunk.row_key:
-                chunk.row_key = current.row_key
-            if not chunk.HasField('family_name'):
-                chunk.family_name.value = current.family_name
-            if not chunk.HasField('qualifier'):
-                chunk.qualifier.value = current.qualifier
-            if not chunk.timestamp_micros:
-                chunk.timestamp_micros = current.timestamp_micros
-            if not chunk.labels:
-                chunk.labels.extend(current.labels)
-
     def _copy_from_previous(self, cell):
         """Helper for :meth:`consume_next`."""
         previous = self._previous_cell
@@ -428,12 +525,19 @@ class PartialRowsData(object):
                 cell.qualifier = previous.qualifier
 
     def _save_current_row(self):
-        """Helper for :meth:`consume_next`."""
+        """Helper for :meth:`consume_next`.
+
+        :rtype: :class:`PartialRowData`
+        :returns: The row just completed.
+        """
         if self._cell:
             self._save_current_cell()
-        self._rows[self._row.row_key] = self._row
-        self._row, self._previous_row = None, self._row
+        row = self._row
+        self._row, self._previous_row = None, row
         self._previous_cell = None
+        self._rows_read += 1
+        self._last_key = row.row_key
+        return row
 
 
 def _raise_if(predicate, *args):
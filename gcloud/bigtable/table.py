@@ -14,19 +14,79 @@
 
 """User friendly container for Google Cloud Bigtable Table."""
 
+import random
+import time
+
+from google.rpc import code_pb2
+from google.rpc import status_pb2
+from grpc.framework.interfaces.face import face
+
+from gcloud._helpers import _map_concurrently
+from gcloud._helpers import _merge_concurrently
 from gcloud._helpers import _to_bytes
 from gcloud.bigtable._generated_v2 import (
     bigtable_pb2 as data_messages_v2_pb2)
 from gcloud.bigtable._generated_v2 import (
     bigtable_table_admin_pb2 as table_admin_messages_v2_pb2)
+from gcloud.bigtable._generated_v2 import data_pb2 as data_v2_pb2
 from gcloud.bigtable.column_family import _gc_rule_from_pb
+from gcloud.bigtable.columnar import _columns_filter
+from gcloud.bigtable.columnar import ColumnarRowsData
 from gcloud.bigtable.column_family import ColumnFamily
 from gcloud.bigtable.row import AppendRow
 from gcloud.bigtable.row import ConditionalRow
 from gcloud.bigtable.row import DirectRow
+from gcloud.bigtable.row import MAX_MUTATIONS
 from gcloud.bigtable.row_data import PartialRowsData
 
 
+BULK_MAX_ENTRIES = 1000
+"""Default maximum number of rows sent in one ``MutateRows`` request."""
+
+BULK_MAX_BYTES = 2 * 1024 * 1024
+"""Default maximum size of the rows sent in one ``MutateRows`` request.
+
+Kept well below the 4MB message limit of gRPC servers.
+"""
+
+BULK_MAX_WORKERS = 4
+"""Default number of ``MutateRows`` requests in flight at once."""
+
+BULK_RETRIES = 3
+"""Default number of times a row failing with a retryable status is resent.
+"""
+
+READ_ROWS_RETRIES = 5
+"""Default number of times a failed ``ReadRows`` stream is resumed in a row.
+
+The count starts over whenever the stream makes progress.
+"""
+
+SCAN_MAX_WORKERS = 8
+"""Default number of ``ReadRows`` streams of a parallel scan read at once."""
+
+SCAN_MAX_PENDING = 1000
+"""Default number of rows each stream of a parallel scan reads ahead."""
+
+ROW_KEYS_PER_REQUEST = 1000
+"""Number of row keys sent in each request of a parallel multi-get."""
+
+_RETRYABLE_CODES = frozenset([
+    code_pb2.DEADLINE_EXCEEDED,
+    code_pb2.ABORTED,
+    code_pb2.UNAVAILABLE,
+])
+"""Status codes after which a request can be sent again.
+
+A write failing this way may still have been applied, so only rows whose
+mutations are idempotent (see :func:`_is_idempotent`) are sent again.
+"""
+
+_INITIAL_BACKOFF = 0.1
+_MAX_BACKOFF = 5.0
+_SLEEP = time.sleep  # To be replaced by tests.
+
+
 class Table(object):
     """Representation of a Google Cloud Bigtable Table.
 
@@ -211,7 +271,7 @@ class Table(object):
             result[column_family_id] = column_family
         return result
 
-    def read_row(self, row_key, filter_=None):
+    def read_row(self, row_key, filter_=None, retries=READ_ROWS_RETRIES):
         """Read a single row from this table.
 
         :type row_key: bytes
@@ -221,6 +281,10 @@ class Table(object):
         :param filter_: (Optional) The filter to apply to the contents of the
                         row. If unset, returns the entire row.
 
+        :type retries: int
+        :param retries: (Optional) Number of times the request is retried if
+                        it fails with a retryable status.
+
         :rtype: :class:`.PartialRowData`, :data:`NoneType <types.NoneType>`
         :returns: The contents of the row if any chunks were returned in
                   the response, otherwise :data:`None`.
@@ -232,7 +296,9 @@ class Table(object):
         client = self._instance._client
         response_iterator = client._data_stub.ReadRows(request_pb,
                                                        client.timeout_seconds)
-        rows_data = PartialRowsData(response_iterator)
+        rows_data = PartialRowsData(
+            response_iterator,
+            resume=_ReadRowsResumer(self, request_pb, retries))
         rows_data.consume_all()
         if rows_data.state not in (rows_data.NEW_ROW, rows_data.START):
             raise ValueError('The row remains partial / is not committed.')
@@ -243,9 +309,14 @@ class Table(object):
         return rows_data.rows[row_key]
 
     def read_rows(self, start_key=None, end_key=None, limit=None,
-                  filter_=None):
+                  filter_=None, retries=READ_ROWS_RETRIES, row_keys=None,
+                  row_ranges=None):
         """Read rows from this table.
 
+        Either a single range (``start_key`` and ``end_key``) or a row set
+        (``row_keys`` and ``row_ranges``) can be read.  A row set only
+        reads the rows it names, however large the table.
+
         :type start_key: bytes
         :param start_key: (Optional) The beginning of a range of row keys to
                           read from. The range will include ``start_key``. If
@@ -266,18 +337,90 @@ class Table(object):
                         specified row(s). If unset, reads every column in
                         each row.
 
+        :type retries: int
+        :param retries: (Optional) Number of times in a row a stream failing
+                        with a retryable status is resumed, after the last
+                        row received and with jittered backoff.
+
+        :type row_keys: list
+        :param row_keys: (Optional) Keys of the rows to read.
+
+        :type row_ranges: list
+        :param row_ranges: (Optional) ``(start_key, end_key)`` pairs of
+                           ranges of rows to read, each including
+                           ``start_key`` and excluding ``end_key``;
+                           :data:`None` stands for the start or end of the
+                           table.
+
         :rtype: :class:`.PartialRowsData`
         :returns: A :class:`.PartialRowsData` convenience wrapper for consuming
-                  the streamed results.
+                  the streamed results.  Iterate over it to get each row as
+                  it arrives, without keeping the rows already read.
         """
         request_pb = _create_row_request(
             self.name, start_key=start_key, end_key=end_key, filter_=filter_,
-            limit=limit)
+            limit=limit, row_keys=row_keys, row_ranges=row_ranges)
         client = self._instance._client
         response_iterator = client._data_stub.ReadRows(request_pb,
                                                        client.timeout_seconds)
         # We expect an iterator of `data_messages_v2_pb2.ReadRowsResponse`
-        return PartialRowsData(response_iterator)
+        return PartialRowsData(
+            response_iterator,
+            resume=_ReadRowsResumer(self, request_pb, retries))
+
+    def read_columns(self, columns, start_key=None, end_key=None, limit=None,
+                     filter_=None, formats=None, retries=READ_ROWS_RETRIES):
+        """Read chosen columns of a range of rows into columnar buffers.
+
+        Only the newest cell of each column is requested.  The values are
+        appended to one buffer per column as the rows arrive, rather than
+        to a :class:`.PartialRowData` per row, so large scans can be turned
+        into arrays or a dataframe at once:
+
+        .. code:: python
+
+            >>> data = table.read_columns(
+            ...     [('stats', b'name'), ('stats', b'visits')],
+            ...     formats={('stats', b'visits'): '>q'})
+            >>> data.consume_all()
+            >>> dataframe = data.to_dataframe()
+
+        :type columns: list
+        :param columns: ``(column_family_id, column)`` pairs to read.
+
+        :type start_key: bytes
+        :param start_key: (Optional) The first row key of the range.
+
+        :type end_key: bytes
+        :param end_key: (Optional) The row key ending the range, excluded.
+
+        :type limit: int
+        :param limit: (Optional) Maximum number of rows to read.
+
+        :type filter_: :class:`.RowFilter`
+        :param filter_: (Optional) A filter applied to the cells before the
+                        columns are selected, e.g. a timestamp range.
+
+        :type formats: dict
+        :param formats: (Optional) :mod:`struct` formats decoding
+                        fixed-width values, keyed by column.  See
+                        :class:`.ColumnarRowsData`.
+
+        :type retries: int
+        :param retries: (Optional) Passed to :meth:`read_rows`.
+
+        :rtype: :class:`.ColumnarRowsData`
+        :returns: The columnar buffers, filled by consuming the stream.
+        """
+        request_pb = _create_row_request(
+            self.name, start_key=start_key, end_key=end_key,
+            filter_=_columns_filter(columns, filter_), limit=limit)
+        client = self._instance._client
+        response_iterator = client._data_stub.ReadRows(request_pb,
+                                                       client.timeout_seconds)
+        return ColumnarRowsData(
+            response_iterator, columns, formats=formats,
+            resume=_ReadRowsResumer(self, request_pb, retries))
 
     def sample_row_keys(self):
         """Read a sample of row keys in the table.
@@ -317,9 +460,487 @@ class Table(object):
             request_pb, client.timeout_seconds)
         return response_iterator
 
+    def read_rows_parallel(self, start_key=None, end_key=None, filter_=None,
+                           max_workers=SCAN_MAX_WORKERS, ordered=True,
+                           max_pending=SCAN_MAX_PENDING,
+                           retries=READ_ROWS_RETRIES, row_keys=None):
+        """Read a range of rows with several concurrent streams.
+
+        The range is split on the keys returned by :meth:`sample_row_keys`
+        and each part is read by its own ``ReadRows`` request, up to
+        ``max_workers`` at once, from a pool of threads.
+
+        If ``row_keys`` is given, those rows are read instead: the sorted
+        keys are sent :data:`ROW_KEYS_PER_REQUEST` at a time, so a
+        multi-get costs requests in proportion to the number of keys.
+
+        .. code:: python
+
+            >>> for row in table.read_rows_parallel(ordered=False):
+            ...     process(row)
+
+        :type start_key: bytes
+        :param start_key: (Optional) The first row key of the range.
+
+        :type end_key: bytes
+        :param end_key: (Optional) The row key ending the range, excluded.
+
+        :type filter_: :class:`.RowFilter`
+        :param filter_: (Optional) The filter to apply to the contents of
+                        each row.
+
+        :type max_workers: int
+        :param max_workers: (Optional) Maximum number of concurrent streams.
+
+        :type ordered: bool
+        :param ordered: (Optional) If true, rows are returned in key order;
+                        otherwise as soon as they arrive, which keeps every
+                        stream busy.
+
+        :type max_pending: int
+        :param max_pending: (Optional) Maximum number of rows read ahead of
+                            the caller by each stream.
+
+        :type retries: int
+        :param retries: (Optional) Passed to :meth:`read_rows`.
+
+        :type row_keys: list
+        :param row_keys: (Optional) Keys of the rows to read, rather than a
+                         range.  Rows which do not exist are skipped.
+
+        :rtype: iterator
+        :returns: The :class:`.PartialRowData` of each row.  Closing the
+                  iterator cancels the streams.
+        :raises: :class:`ValueError <exceptions.ValueError>` if both
+                 ``row_keys`` and one of ``start_key`` and ``end_key`` are
+                 set.
+        """
+        if row_keys is not None:
+            if start_key is not None or end_key is not None:
+                raise ValueError('Row keys and row range cannot be '
+                                 'set simultaneously')
+            row_keys = sorted(set(_to_bytes(row_key) for row_key in row_keys))
+            factories = [
+                _reader(self, filter_, retries, row_keys=row_keys[
+                    index:index + ROW_KEYS_PER_REQUEST])
+                for index in range(0, len(row_keys), ROW_KEYS_PER_REQUEST)]
+        else:
+            sample_keys = [response.row_key
+                           for response in self.sample_row_keys()]
+            factories = [
+                _reader(self, filter_, retries, start_key=segment_start,
+                        end_key=segment_end)
+                for segment_start, segment_end in _split_key_range(
+                    sample_keys, start_key, end_key)]
+        return _merge_concurrently(factories, max_workers, max_pending,
+                                   ordered=ordered)
+
+    def mutate_rows(self, rows, max_entries=BULK_MAX_ENTRIES,
+                    max_bytes=BULK_MAX_BYTES, max_workers=BULK_MAX_WORKERS,
+                    retries=BULK_RETRIES):
+        """Commit the mutations of many rows with ``MutateRows`` requests.
+
+        The rows are split into requests of at most ``max_entries`` rows and
+        ``max_bytes`` bytes, and up to ``max_workers`` requests are sent at
+        once.  Each row is applied atomically, but independently of the
+        others: rows failing with a retryable status (``DEADLINE_EXCEEDED``,
+        ``ABORTED`` or ``UNAVAILABLE``) are sent again, alone with the other
+        failed rows of their request, up to ``retries`` times.  Since a
+        row failing this way may have been applied anyway, only rows whose
+        mutations are all deletions or cells set with an explicit
+        timestamp are retried: resending a cell with a server-assigned
+        timestamp would write a second version of it.
+
+        A request failing with an error other than a gRPC status (e.g.
+        :class:`CircuitOpen <gcloud.flow_control.CircuitOpen>`) fails its
+        rows with ``UNKNOWN``; the rows of the other requests are still
+        committed and cleared.
+
+        As with :meth:`DirectRow.commit() <.row.DirectRow.commit>`, the
+        mutations of each row which is committed are cleared.  Rows without
+        mutations are not sent.
+
+        :type rows: list
+        :param rows: :class:`DirectRow <.row.DirectRow>` instances of this
+                     table.
+
+        :type max_entries: int
+        :param max_entries: (Optional) Maximum number of rows per request.
+
+        :type max_bytes: int
+        :param max_bytes: (Optional) Maximum size of the rows of a request.
+                          A larger row is sent alone.
+
+        :type max_workers: int
+        :param max_workers: (Optional) Maximum number of concurrent requests.
+
+        :type retries: int
+        :param retries: (Optional) Number of times a row is retried.
+
+        :rtype: list
+        :returns: A :class:`google.rpc.status_pb2.Status` for each row, in
+                  the order of ``rows``; the ``code`` of the rows committed
+                  is ``OK`` (``0``).
+        :raises: :class:`ValueError <exceptions.ValueError>` if a row is not
+                 a :class:`DirectRow <.row.DirectRow>` or has more than
+                 :data:`MAX_MUTATIONS <.row.MAX_MUTATIONS>` mutations.  No
+                 request is sent then.
+        """
+        rows = list(rows)
+        statuses = [status_pb2.Status(code=code_pb2.OK) for _ in rows]
+        entries = []
+        for index, row in enumerate(rows):
+            if not isinstance(row, DirectRow):
+                raise ValueError('Expected type: %s, Received: %s' % (
+                    DirectRow, type(row)))
+            mutations_list = row._get_mutations(None)
+            if len(mutations_list) > MAX_MUTATIONS:
+                raise ValueError('%d total mutations exceed the maximum '
+                                 'allowable %d.' % (len(mutations_list),
+                                                    MAX_MUTATIONS))
+            if mutations_list:
+                entry_pb = data_messages_v2_pb2.MutateRowsRequest.Entry(
+                    row_key=row._row_key, mutations=mutations_list)
+                entries.append((index, entry_pb))
+
+        batches = _bulk_batches(entries, max_entries, max_bytes)
+        results = _map_concurrently(
+            lambda batch: self._mutate_rows_batch(batch, retries),
+            batches, max_workers)
+        for batch_statuses in results:
+            for index, status_pb in batch_statuses.items():
+                statuses[index] = status_pb
+                if status_pb.code == code_pb2.OK:
+                    rows[index].clear()
+        return statuses
+
+    def mutations_batcher(self, **kwargs):
+        """Create a batcher committing rows of this table in the background.
+
+        :type kwargs: dict
+        :param kwargs: Options passed to
+                       :class:`MutationsBatcher <.batcher.MutationsBatcher>`.
+
+        :rtype: :class:`MutationsBatcher <.batcher.MutationsBatcher>`
+        :returns: A batcher, to be closed once every row is queued.
+        """
+        from gcloud.bigtable.batcher import MutationsBatcher
+        return MutationsBatcher(self, **kwargs)
+
+    def _mutate_rows_batch(self, batch, retries):
+        """Send one ``MutateRows`` request, retrying the rows which failed.
+
+        :type batch: list
+        :param batch: Pairs of the index of a row and its
+                      ``MutateRowsRequest.Entry``.
+
+        :type retries: int
+        :param retries: Number of times a row is retried.
+
+        :rtype: dict
+        :returns: The final status of each row, keyed by its index.
+        """
+        client = self._instance._client
+        statuses = {}
+        pending = batch
+        attempt = 0
+        while True:
+            request_pb = data_messages_v2_pb2.MutateRowsRequest(
+                table_name=self.name,
+                entries=[entry_pb for _, entry_pb in pending])
+            received = {}
+            error_pb = None
+            try:
+                for response_pb in client._data_stub.MutateRows(
+                        request_pb, client.timeout_seconds):
+                    for entry_pb in response_pb.entries:
+                        received[entry_pb.index] = entry_pb.status
+            except face.AbortionError as exc:
+                # The whole request failed: every row without a status
+                # fails the same way.
+                error_pb = status_pb2.Status(code=exc.code.value[0],
+                                             message=exc.details or '')
+            except Exception as exc:  # pylint: disable=broad-except
+                # Not a gRPC status (e.g. the circuit is open): fail the
+                # rows left rather than lose the statuses of the others.
+                error_pb = status_pb2.Status(code=code_pb2.UNKNOWN,
+                                             message=str(exc))
+
+            failed = []
+            for position, (index, entry_pb) in enumerate(pending):
+                status_pb = received.get(position, error_pb)
+                if status_pb is None:
+                    status_pb = status_pb2.Status(
+                        code=code_pb2.UNKNOWN,
+                        message='No status returned for the row.')
+                if (status_pb.code in _RETRYABLE_CODES and
+                        attempt < retries and _is_idempotent(entry_pb)):
+                    failed.append((index, entry_pb))
+                else:
+                    statuses[index] = status_pb
+            if not failed:
+                return statuses
+            attempt += 1
+            _SLEEP(_backoff(attempt))
+            pending = failed
+
+
+def _reader(table, filter_, retries, **kwargs):
+    """Build a function reading some rows of a table.
+
+    :type table: :class:`Table`
+    :param table: The table to read from.
+
+    :type filter_: :class:`.RowFilter`
+    :param filter_: The filter to apply to the contents of each row.
+
+    :type retries: int
+    :param retries: Passed to :meth:`Table.read_rows`.
+
+    :type kwargs: dict
+    :param kwargs: The rows to read, passed to :meth:`Table.read_rows`.
+
+    :rtype: callable
+    :returns: A function without arguments returning the
+              :class:`.PartialRowsData` of the rows.
+    """
+    return lambda: table.read_rows(filter_=filter_, retries=retries,
+                                   **kwargs)
+
+
+def _split_key_range(sample_keys, start_key=None, end_key=None):
+    """Split a range of row keys on sampled keys.
+
+    :type sample_keys: list
+    :param sample_keys: Row keys returned by ``SampleRowKeys``; the empty
+                        key marking the end of the table is ignored.
+
+    :type start_key: bytes
+    :param start_key: (Optional) The first row key of the range.
+
+    :type end_key: bytes
+    :param end_key: (Optional) The row key ending the range, excluded.
+
+    :rtype: list
+    :returns: ``(start_key, end_key)`` pairs covering the range, in order;
+              :data:`None` stands for the start or end of the table.
+    """
+    if start_key is not None:
+        start_key = _to_bytes(start_key)
+    if end_key is not None:
+        end_key = _to_bytes(end_key)
+    boundaries = sorted(set(
+        row_key for row_key in sample_keys
+        if row_key and
+        (start_key is None or row_key > start_key) and
+        (end_key is None or row_key < end_key)))
+    starts = [start_key] + boundaries
+    ends = boundaries + [end_key]
+    return list(zip(starts, ends))
+
+
+class _ReadRowsResumer(object):
+    """Re-issue a failed ``ReadRows`` request after the rows already read.
+
+    Used as the ``resume`` callback of :class:`.PartialRowsData`.
+
+    :type table: :class:`Table`
+    :param table: The table being read.
+
+    :type request_pb: :class:`.bigtable_pb2.ReadRowsRequest`
+    :param request_pb: The original request.
+
+    :type retries: int
+    :param retries: Number of consecutive failures to retry.
+    """
+
+    def __init__(self, table, request_pb, retries):
+        self._table = table
+        self._request_pb = request_pb
+        self._retries = retries
+        self._attempts = 0
+        self._progress = None
+
+    def __call__(self, error, last_key, rows_read):
+        """Open a new stream, or re-raise ``error``.
+
+        :type error: :class:`Exception`
+        :param error: The error raised by the stream.
+
+        :type last_key: bytes
+        :param last_key: The greatest row key read or scanned, if any.
+
+        :type rows_read: int
+        :param rows_read: The number of rows read so far.
+
+        :rtype: :class:`grpc.framework.alpha._reexport._CancellableIterator`
+        :returns: The new stream, or :data:`None` if no rows are left.
+        :raises: ``error`` if it is not retryable or too many attempts
+                 failed without progress.
+        """
+        if not (isinstance(error, face.AbortionError) and
+                error.code.value[0] in _RETRYABLE_CODES):
+            raise error
+        if (last_key, rows_read) != self._progress:
+            self._progress = (last_key, rows_read)
+            self._attempts = 0
+        self._attempts += 1
+        if self._attempts > self._retries:
+            raise error
+
+        request_pb = _resume_row_request(self._request_pb, last_key,
+                                         rows_read)
+        if request_pb is None:
+            return None
+        _SLEEP(_backoff(self._attempts))
+        client = self._table._instance._client
+        return client._data_stub.ReadRows(request_pb, client.timeout_seconds)
+
+
+def _resume_row_request(request_pb, last_key, rows_read):
+    """Narrow a ``ReadRows`` request to the rows not read yet.
+
+    :type request_pb: :class:`.bigtable_pb2.ReadRowsRequest`
+    :param request_pb: The original request.
+
+    :type last_key: bytes
+    :param last_key: The greatest row key read or scanned, if any: only
+                     greater keys are requested.
+
+    :type rows_read: int
+    :param rows_read: The number of rows already read, deducted from the
+                      limit.
+
+    :rtype: :class:`.bigtable_pb2.ReadRowsRequest`
+    :returns: A new request, or :data:`None` if no rows are left to read.
+    """
+    rows_limit = 0
+    if request_pb.rows_limit:
+        rows_limit = request_pb.rows_limit - rows_read
+        if rows_limit <= 0:
+            return None
+    result = data_messages_v2_pb2.ReadRowsRequest()
+    result.CopyFrom(request_pb)
+    result.rows_limit = rows_limit
+    if last_key is None:
+        return result
+
+    row_set = request_pb.rows
+    if not row_set.row_keys and not row_set.row_ranges:
+        # The whole table.
+        result.rows.row_ranges.add(start_key_open=last_key)
+        return result
+
+    rows_left = _rows_after(row_set, last_key)
+    if not rows_left.row_keys and not rows_left.row_ranges:
+        return None
+    result.rows.CopyFrom(rows_left)
+    return result
+
+
+def _rows_after(row_set, last_key):
+    """Trim a row set to the rows after a key.
+
+    :type row_set: :class:`.data_pb2.RowSet`
+    :param row_set: The row keys and ranges.
+
+    :type last_key: bytes
+    :param last_key: Only greater keys are kept.
+
+    :rtype: :class:`.data_pb2.RowSet`
+    :returns: A new row set, empty if no rows of ``row_set`` are left.
+    """
+    result = data_v2_pb2.RowSet()
+    result.row_keys.extend(
+        row_key for row_key in row_set.row_keys if row_key > last_key)
+    for range_pb in row_set.row_ranges:
+        end_type = range_pb.WhichOneof('end_key')
+        if end_type is not None and getattr(range_pb, end_type) <= last_key:
+            continue
+        new_range = result.row_ranges.add()
+        new_range.CopyFrom(range_pb)
+        start_type = range_pb.WhichOneof('start_key')
+        if (start_type is None or
+                getattr(range_pb, start_type) <= last_key):
+            new_range.start_key_open = last_key
+    return result
+
+
+def _is_idempotent(entry_pb):
+    """Check if the mutations of a row can safely be applied twice.
+
+    Deletions and cells set with an explicit timestamp are idempotent; a
+    cell set with a server-assigned timestamp (``-1``) is not, since each
+    application writes a new version of the cell.
+
+    :type entry_pb: :class:`.data_messages_v2_pb2.MutateRowsRequest.Entry`
+    :param entry_pb: The entry of a row in a ``MutateRows`` request.
+
+    :rtype: bool
+    :returns: Flag indicating if the row can be sent again.
+    """
+    for mutation_pb in entry_pb.mutations:
+        if (mutation_pb.WhichOneof('mutation') == 'set_cell' and
+                mutation_pb.set_cell.timestamp_micros == -1):
+            return False
+    return True
+
+
+def _bulk_batches(entries, max_entries, max_bytes):
+    """Split ``MutateRows`` entries into requests.
+
+    Besides the limits given, a request never holds more than
+    :data:`MAX_MUTATIONS <.row.MAX_MUTATIONS>` mutations.
+
+    :type entries: list
+    :param entries: Pairs of the index of a row and its
+                    ``MutateRowsRequest.Entry``.
+
+    :type max_entries: int
+    :param max_entries: Maximum number of entries per request.
+
+    :type max_bytes: int
+    :param max_bytes: Maximum size of the entries of a request.
+
+    :rtype: list
+    :returns: Lists of pairs, one per request.
+    """
+    batches = []
+    batch = []
+    batch_bytes = batch_mutations = 0
+    for index, entry_pb in entries:
+        entry_bytes = entry_pb.ByteSize()
+        entry_mutations = len(entry_pb.mutations)
+        if batch and (len(batch) >= max_entries or
+                      batch_bytes + entry_bytes > max_bytes or
+                      batch_mutations + entry_mutations > MAX_MUTATIONS):
+            batches.append(batch)
+            batch = []
+            batch_bytes = batch_mutations = 0
+        batch.append((index, entry_pb))
+        batch_bytes += entry_bytes
+        batch_mutations += entry_mutations
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _backoff(attempt):
+    """Jittered exponential delay before resending failed rows.
+
+    :type attempt: int
+    :param attempt: The number of the retry about to be made.
+
+    :rtype: float
+    :returns: Seconds to wait.
+    """
+    delay = min(_MAX_BACKOFF, _INITIAL_BACKOFF * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
 
 def _create_row_request(table_name, row_key=None, start_key=None, end_key=None,
-                        filter_=None, limit=None):
+                        filter_=None, limit=None, row_keys=None,
+                        row_ranges=None):
     """Creates a request to read rows in a table.
 
     :type table_name: str
@@ -347,22 +968,35 @@ def _create_row_request(table_name, row_key=None, start_key=None, end_key=None,
                   rows' worth of results. The default (zero) is to return
                   all results.
 
+    :type row_keys: list
+    :param row_keys: (Optional) Keys of rows to read.
+
+    :type row_ranges: list
+    :param row_ranges: (Optional) ``(start_key, end_key)`` pairs of ranges
+                       of rows to read, including ``start_key`` and
+                       excluding ``end_key``; :data:`None` stands for the
+                       start or end of the table.
+
     :rtype: :class:`data_messages_v2_pb2.ReadRowsRequest`
     :returns: The ``ReadRowsRequest`` protobuf corresponding to the inputs.
     :raises: :class:`ValueError <exceptions.ValueError>` if both
-             ``row_key`` and one of ``start_key`` and ``end_key`` are set
+             ``row_key`` and one of ``start_key`` and ``end_key`` are set,
+             if a row set is given with ``start_key`` or ``end_key``, or
+             if the row set is empty (an empty set would read every row)
     """
     request_kwargs = {'table_name': table_name}
     if (row_key is not None and
             (start_key is not None or end_key is not None)):
         raise ValueError('Row key and row range cannot be '
                          'set simultaneously')
-    range_kwargs = {}
-    if start_key is not None or end_key is not None:
-        if start_key is not None:
-            range_kwargs['start_key_closed'] = _to_bytes(start_key)
-        if end_key is not None:
-            range_kwargs['end_key_open'] = _to_bytes(end_key)
+    if row_keys is not None or row_ranges is not None:
+        if start_key is not None or end_key is not None:
+            raise ValueError('Row set and row range cannot be '
+                             'set simultaneously')
+        row_keys = list(row_keys or ())
+        row_ranges = list(row_ranges or ())
+        if not row_keys and not row_ranges and row_key is None:
+            raise ValueError('Row set is empty')
     if filter_ is not None:
         request_kwargs['filter'] = filter_.to_pb()
     if limit is not None:
@@ -373,7 +1007,35 @@ def _create_row_request(table_name, row_key=None, start_key=None, end_key=None,
     if row_key is not None:
         message.rows.row_keys.append(_to_bytes(row_key))
 
-    if range_kwargs:
-        message.rows.row_ranges.add(**range_kwargs)
+    if start_key is not None or end_key is not None:
+        _add_row_range(message.rows, start_key, end_key)
+
+    if row_keys:
+        message.rows.row_keys.extend(
+            _to_bytes(each_key) for each_key in row_keys)
+
+    for range_start, range_end in row_ranges or ():
+        _add_row_range(message.rows, range_start, range_end)
 
     return message
+
+
+def _add_row_range(row_set, start_key, end_key):
+    """Add a range of rows to a row set.
+
+    :type row_set: :class:`.data_pb2.RowSet`
+    :param row_set: The row set, modified in place.
+
+    :type start_key: bytes
+    :param start_key: The first row key of the range, or :data:`None` for
+                      the start of the table.
+
+    :type end_key: bytes
+    :param end_key: The row key ending the range, excluded, or
+                    :data:`None` for the end of the table.
+    """
+    row_range = row_set.row_ranges.add()
+    if start_key is not None:
+        row_range.start_key_closed = _to_bytes(start_key)
+    if end_key is not None:
+        row_range.end_key_open = _to_bytes(end_key)
@@ -0,0 +1,290 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+class TestMutationsBatcher(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.bigtable.batcher import MutationsBatcher
+        return MutationsBatcher
+
+    def _makeOne(self, *args, **kwargs):
+        import weakref
+        from gcloud._testing import _Monkey
+        from gcloud import _helpers
+        registered = weakref.WeakSet()
+        with _Monkey(_helpers, _CLOSE_AT_EXIT=registered):
+            batcher = self._getTargetClass()(*args, **kwargs)
+        self.assertEqual(list(registered), [batcher])
+        self.addCleanup(batcher._executor.shutdown)
+        return batcher
+
+    def _makeRow(self, table, row_key, value=b'value'):
+        from gcloud.bigtable.row import DirectRow
+        row = DirectRow(row_key, table)
+        row.set_cell(u'family', b'qualifier', value)
+        return row
+
+    def test_constructor_defaults(self):
+        from gcloud.bigtable import batcher as MUT
+        from gcloud.bigtable.table import BULK_RETRIES
+        table = _Table()
+        batcher = self._makeOne(table)
+        self.assertTrue(batcher.table is table)
+        self.assertEqual(batcher.flush_count, MUT.FLUSH_COUNT)
+        self.assertEqual(batcher.flush_bytes, MUT.FLUSH_BYTES)
+        self.assertEqual(batcher.flush_interval, MUT.FLUSH_INTERVAL)
+        self.assertEqual(batcher.max_outstanding_bytes,
+                         MUT.MAX_OUTSTANDING_BYTES)
+        self.assertEqual(batcher.max_outstanding_requests,
+                         MUT.MAX_OUTSTANDING_REQUESTS)
+        self.assertEqual(batcher.retries, BULK_RETRIES)
+        self.assertEqual(batcher.on_error, None)
+        self.assertEqual(batcher.failed, [])
+
+    def test_constructor_invalid(self):
+        table = _Table()
+        self.assertRaises(ValueError, self._getTargetClass(), table,
+                          flush_count=0)
+        self.assertRaises(ValueError, self._getTargetClass(), table,
+                          max_outstanding_requests=0)
+
+    def test_flush_count(self):
+        table = _Table()
+        with self._makeOne(table, flush_count=2, flush_interval=None,
+                           retries=5) as batcher:
+            for row_key in (b'a', b'b', b'c'):
+                batcher.mutate(self._makeRow(table, row_key))
+            # The first two rows are sent as soon as they are queued.
+            self.assertEqual(table.wait_for_calls(1), [[b'a', b'b']])
+        self.assertEqual(table.calls, [[b'a', b'b'], [b'c']])
+        self.assertEqual(table.max_workers, [1, 1])
+        self.assertEqual(table.retries, [5, 5])
+
+    def test_flush_bytes(self):
+        table = _Table()
+        batcher = self._makeOne(table, flush_bytes=100, flush_interval=None)
+        batcher.mutate_rows([self._makeRow(table, b'a', b'x' * 60),
+                             self._makeRow(table, b'b', b'x' * 60),
+                             self._makeRow(table, b'c')])
+        batcher.close()
+        self.assertEqual(table.calls, [[b'a', b'b'], [b'c']])
+
+    def test_flush_interval(self):
+        table = _Table()
+        batcher = self._makeOne(table, flush_interval=0.01)
+        batcher.mutate(self._makeRow(table, b'a'))
+        self.assertEqual(table.wait_for_calls(1), [[b'a']])
+        batcher.mutate(self._makeRow(table, b'b'))
+        self.assertEqual(table.wait_for_calls(2), [[b'a'], [b'b']])
+        batcher.close()
+        self.assertFalse(batcher._timer.is_alive())
+
+    def test_mutate_moves_mutations(self):
+        table = _Table()
+        batcher = self._makeOne(table, flush_interval=None)
+        row = self._makeRow(table, b'a')
+        batcher.mutate(row)
+        self.assertEqual(row._pb_mutations, [])
+        # A row without mutations is ignored.
+        batcher.mutate(row)
+        batcher.close()
+        self.assertEqual(table.calls, [[b'a']])
+
+    def test_mutate_invalid(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import batcher as MUT
+        from gcloud.bigtable.row import AppendRow
+        table = _Table()
+        batcher = self._makeOne(table)
+        self.assertRaises(ValueError, batcher.mutate, AppendRow(b'a', table))
+        row = self._makeRow(table, b'a')
+        row.delete()
+        with _Monkey(MUT, MAX_MUTATIONS=1):
+            self.assertRaises(ValueError, batcher.mutate, row)
+        batcher.close()
+        batcher.close()  # Already closed: no-op.
+        self.assertRaises(ValueError, batcher.mutate,
+                          self._makeRow(table, b'a'))
+        self.assertEqual(table.calls, [])
+
+    def test_mutate_closed_keeps_mutations(self):
+        table = _Table()
+        batcher = self._makeOne(table)
+        batcher.close()
+        row = self._makeRow(table, b'a')
+        self.assertRaises(ValueError, batcher.mutate, row)
+        self.assertEqual(len(row._pb_mutations), 1)
+
+    def test_close_sends_queued_rows(self):
+        table = _Table()
+        batcher = self._makeOne(table, flush_interval=None)
+        batcher.mutate(self._makeRow(table, b'a'))
+        batcher.close()
+        self.assertTrue(batcher._state.closed)
+        self.assertEqual(batcher._state.rows, [])
+        self.assertEqual(table.calls, [[b'a']])
+
+    def test_close_while_waiting(self):
+        import threading
+        table = _Table(blocked=True)
+        batcher = self._makeOne(table, flush_count=1, flush_interval=None,
+                                max_outstanding_bytes=150)
+        batcher.mutate(self._makeRow(table, b'a', b'x' * 100))
+        table.wait_for_calls(1)
+
+        row = self._makeRow(table, b'b', b'x' * 100)
+        errors = []
+
+        def _mutate():
+            try:
+                batcher.mutate(row)
+            except ValueError as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=_mutate)
+        thread.start()
+        thread.join(0.05)
+        self.assertTrue(thread.is_alive())
+        closer = threading.Thread(target=batcher.close)
+        closer.start()
+        thread.join()
+        table.release()
+        closer.join()
+        # The waiting row is rejected, not dropped.
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(row._pb_mutations), 1)
+        self.assertEqual(table.calls, [[b'a']])
+
+    def test_close_after_pool_shutdown(self):
+        table = _Table(error=RuntimeError('boom'))
+        batcher = self._makeOne(table, flush_interval=None)
+        batcher.mutate(self._makeRow(table, b'a'))
+        # As when the interpreter exits before the batcher is closed.
+        batcher._executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            batcher.close()
+        self.assertEqual(table.calls, [[b'a']])
+        self.assertEqual(len(batcher.failed), 1)
+
+    def test_failures(self):
+        from google.rpc import code_pb2
+        table = _Table(codes={b'b': code_pb2.INVALID_ARGUMENT})
+        errors = []
+        batcher = self._makeOne(table, flush_interval=None,
+                                on_error=lambda *args: errors.append(args))
+        batcher.mutate_rows([self._makeRow(table, b'a'),
+                             self._makeRow(table, b'b')])
+        failures = batcher.flush().result()
+        self.assertEqual([(row._row_key, status.code)
+                          for row, status in failures],
+                         [(b'b', code_pb2.INVALID_ARGUMENT)])
+        self.assertEqual(errors, failures)
+        # The failed row keeps its mutations, to be retried by the caller.
+        self.assertEqual(len(failures[0][0]._pb_mutations), 1)
+        self.assertEqual(batcher.failed, [])
+        batcher.close()
+
+    def test_failures_collected(self):
+        from google.rpc import code_pb2
+        table = _Table(codes={b'a': code_pb2.UNAVAILABLE})
+        batcher = self._makeOne(table, flush_interval=None)
+        batcher.mutate(self._makeRow(table, b'a'))
+        batcher.close()
+        self.assertEqual([(row._row_key, status.code)
+                          for row, status in batcher.failed],
+                         [(b'a', code_pb2.UNAVAILABLE)])
+
+    def test_error(self):
+        from google.rpc import code_pb2
+        error = RuntimeError('boom')
+        table = _Table(error=error)
+        batcher = self._makeOne(table, flush_interval=None)
+        batcher.mutate(self._makeRow(table, b'a'))
+        flushed = batcher.flush()
+        self.assertTrue(flushed.exception() is error)
+        self.assertEqual([(row._row_key, status.code, status.message)
+                          for row, status in batcher.failed],
+                         [(b'a', code_pb2.UNKNOWN, 'boom')])
+        batcher.mutate(self._makeRow(table, b'b'))
+        with self.assertRaises(RuntimeError):
+            batcher.close()
+
+    def test_flush_empty(self):
+        batcher = self._makeOne(_Table())
+        self.assertEqual(batcher.flush().result(), [])
+        batcher.close()
+
+    def test_max_outstanding_bytes(self):
+        import threading
+        from gcloud.bigtable.batcher import _row_size
+        table = _Table(blocked=True)
+        row_a = self._makeRow(table, b'a', b'x' * 100)
+        row_b = self._makeRow(table, b'b', b'x' * 100)
+        size = _row_size(row_a)
+        batcher = self._makeOne(table, flush_count=1, flush_interval=None,
+                                max_outstanding_bytes=150)
+        batcher.mutate(row_a)
+        table.wait_for_calls(1)
+
+        thread = threading.Thread(target=batcher.mutate, args=(row_b,))
+        thread.start()
+        # The second row waits for the first one to be committed.
+        thread.join(0.05)
+        self.assertTrue(thread.is_alive())
+        self.assertEqual(batcher._state.outstanding_bytes, size)
+        table.release()
+        thread.join()
+        batcher.close()
+        self.assertEqual(table.calls, [[b'a'], [b'b']])
+        self.assertEqual(batcher._state.outstanding_bytes, 0)
+
+
+class _Table(object):
+
+    def __init__(self, codes=None, error=None, blocked=False):
+        import threading
+        self.codes = codes or {}
+        self.error = error
+        self.calls = []
+        self.max_workers = []
+        self.retries = []
+        self._called = threading.Condition()
+        self._released = threading.Event()
+        if not blocked:
+            self._released.set()
+
+    def release(self):
+        self._released.set()
+
+    def wait_for_calls(self, count):
+        with self._called:
+            while len(self.calls) < count:
+                self._called.wait(5)
+            return list(self.calls)
+
+    def mutate_rows(self, rows, max_workers, retries):
+        from google.rpc import status_pb2
+        with self._called:
+            self.calls.append([row._row_key for row in rows])
+            self.max_workers.append(max_workers)
+            self.retries.append(retries)
+            self._called.notify_all()
+        self._released.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [status_pb2.Status(code=self.codes.get(row._row_key, 0))
+                for row in rows]
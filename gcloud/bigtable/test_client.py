@@ -161,7 +161,8 @@ class TestClient(unittest2.TestCase):
             read_only=read_only,
             admin=admin,
             timeout_seconds=self.TIMEOUT_SECONDS,
-            user_agent=self.USER_AGENT)
+            user_agent=self.USER_AGENT,
+            flow_control=object())
         # Put some fake stubs in place so that we can verify they
         # don't get copied.
         client._data_stub_internal = object()
@@ -175,6 +176,7 @@ class TestClient(unittest2.TestCase):
         self.assertEqual(new_client.project, client.project)
         self.assertEqual(new_client.user_agent, client.user_agent)
         self.assertEqual(new_client.timeout_seconds, client.timeout_seconds)
+        self.assertTrue(new_client.flow_control is client.flow_control)
         # Make sure stubs are not preserved.
         self.assertEqual(new_client._data_stub_internal, None)
         self.assertEqual(new_client._instance_stub_internal, None)
@@ -210,6 +212,21 @@ class TestClient(unittest2.TestCase):
         client._data_stub_internal = object()
         self.assertTrue(client._data_stub is client._data_stub_internal)
 
+    def test_data_stub_getter_w_flow_control(self):
+        from gcloud.bigtable.client import DATA_API_HOST_V2
+        from gcloud.flow_control import GuardedStub
+        credentials = _Credentials()
+        project = 'PROJECT'
+        flow_control = object()
+        client = self._makeOne(project=project, credentials=credentials,
+                               flow_control=flow_control)
+        client._data_stub_internal = object()
+        stub = client._data_stub
+        self.assertTrue(isinstance(stub, GuardedStub))
+        self.assertTrue(stub.stub is client._data_stub_internal)
+        self.assertTrue(stub.flow_control is flow_control)
+        self.assertEqual(stub.endpoint, DATA_API_HOST_V2)
+
     def test_data_stub_failure(self):
         credentials = _Credentials()
         project = 'PROJECT'
@@ -760,6 +777,72 @@ class Test__make_stub(unittest2.TestCase):
         self.assertEqual(implementations_mod.secure_channel_args,
                          (host, port, COMPOSITE_CREDS))
 
+    def test_w_emulator(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as MUT
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+
+        mock_result = object()
+        stub_inputs = []
+        CHANNEL = object()
+
+        class _ImplementationsModule(object):
+
+            def __init__(self):
+                self.insecure_channel_args = None
+
+            def insecure_channel(self, *args):
+                self.insecure_channel_args = args
+                return CHANNEL
+
+        implementations_mod = _ImplementationsModule()
+
+        def mock_stub_factory(channel):
+            stub_inputs.append(channel)
+            return mock_result
+
+        def mock_getenv(name):
+            self.assertEqual(name, BIGTABLE_EMULATOR)
+            return 'localhost:8086'
+
+        fake_os = _OS(mock_getenv)
+        with _Monkey(MUT, implementations=implementations_mod, os=fake_os):
+            result = self._callFUT(object(), mock_stub_factory,
+                                   'HOST', 1025)
+
+        self.assertTrue(result is mock_result)
+        self.assertEqual(stub_inputs, [CHANNEL])
+        self.assertEqual(implementations_mod.insecure_channel_args,
+                         ('localhost', 8086))
+
+
+class Test__parse_emulator_host(unittest2.TestCase):
+
+    def _callFUT(self, *args, **kwargs):
+        from gcloud.bigtable.client import _parse_emulator_host
+        return _parse_emulator_host(*args, **kwargs)
+
+    def test_it(self):
+        self.assertEqual(self._callFUT('localhost:8086'),
+                         ('localhost', 8086))
+
+    def test_w_ipv6(self):
+        self.assertEqual(self._callFUT('[::1]:8086'), ('[::1]', 8086))
+
+    def test_missing_port(self):
+        with self.assertRaises(ValueError):
+            self._callFUT('localhost')
+
+    def test_bad_port(self):
+        with self.assertRaises(ValueError):
+            self._callFUT('localhost:port')
+
+
+class _OS(object):
+
+    def __init__(self, getenv):
+        self.getenv = getenv
+
 
 class _Credentials(object):
 
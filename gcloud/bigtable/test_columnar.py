@@ -0,0 +1,242 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    import pandas
+except ImportError:
+    HAVE_PANDAS = False
+else:
+    HAVE_PANDAS = True  # pragma: NO COVER
+
+import unittest2
+
+
+NAME = ('stats', b'name')
+VISITS = ('stats', b'visits')
+
+
+class Test__exact_regex(unittest2.TestCase):
+
+    def _callFUT(self, value):
+        from gcloud.bigtable.columnar import _exact_regex
+        return _exact_regex(value)
+
+    def test_plain(self):
+        self.assertEqual(self._callFUT(u'stats'), b'stats')
+
+    def test_special_characters(self):
+        import re
+        value = b'a.b*c[d]\\e$'
+        regex = self._callFUT(value)
+        self.assertEqual(regex, b'a\\.b\\*c\\[d\\]\\\\e\\$')
+        self.assertTrue(re.match(regex + b'\\Z', value))
+        self.assertFalse(re.match(regex + b'\\Z', b'aXb*c[d]\\e$'))
+
+
+class Test__columns_filter(unittest2.TestCase):
+
+    def _callFUT(self, columns, filter_=None):
+        from gcloud.bigtable.columnar import _columns_filter
+        return _columns_filter(columns, filter_)
+
+    def _columnFilter(self, column_family_id, column):
+        from gcloud.bigtable.row_filters import ColumnQualifierRegexFilter
+        from gcloud.bigtable.row_filters import FamilyNameRegexFilter
+        from gcloud.bigtable.row_filters import RowFilterChain
+        return RowFilterChain(filters=[
+            FamilyNameRegexFilter(column_family_id),
+            ColumnQualifierRegexFilter(column),
+        ])
+
+    def test_one_column(self):
+        from gcloud.bigtable.row_filters import CellsColumnLimitFilter
+        from gcloud.bigtable.row_filters import RowFilterChain
+        result = self._callFUT([('stats', b'a.b')])
+        self.assertEqual(result, RowFilterChain(filters=[
+            self._columnFilter('stats', b'a\\.b'),
+            CellsColumnLimitFilter(1),
+        ]))
+
+    def test_columns_and_filter(self):
+        from gcloud.bigtable.row_filters import CellsColumnLimitFilter
+        from gcloud.bigtable.row_filters import RowFilterChain
+        from gcloud.bigtable.row_filters import RowFilterUnion
+        filter_ = object()
+        result = self._callFUT([NAME, VISITS], filter_)
+        self.assertEqual(result.filters[0], filter_)
+        self.assertEqual(result, RowFilterChain(filters=[
+            filter_,
+            RowFilterUnion(filters=[
+                self._columnFilter('stats', b'name'),
+                self._columnFilter('stats', b'visits'),
+            ]),
+            CellsColumnLimitFilter(1),
+        ]))
+
+    def test_no_columns(self):
+        self.assertRaises(ValueError, self._callFUT, [])
+
+
+class Test_Format(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.bigtable.columnar import _Format
+        return _Format
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_byte_order(self):
+        fmt = self._makeOne('!d')
+        self.assertEqual(fmt.size, 8)
+        self.assertEqual(fmt.dtype, '>d')
+        self.assertEqual(fmt.unpack_all(b'?\xf0\x00\x00\x00\x00\x00\x00' * 2),
+                         (1.0, 1.0))
+
+    def test_native(self):
+        import struct
+        fmt = self._makeOne('i')
+        self.assertEqual(fmt.size, struct.calcsize('i'))
+        self.assertEqual(fmt.dtype, '=i')
+        self.assertEqual(fmt.unpack_all(struct.pack('3i', 1, 2, 3)),
+                         (1, 2, 3))
+
+    def test_several_values(self):
+        self.assertRaises(ValueError, self._makeOne, '>2q')
+        self.assertRaises(ValueError, self._makeOne, '>')
+
+
+class TestColumnarRowsData(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.bigtable.columnar import ColumnarRowsData
+        return ColumnarRowsData
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def _consume(self, responses, columns=(NAME, VISITS), formats=None):
+        rows_data = self._makeOne(iter(responses), columns, formats=formats)
+        rows_data.consume_all()
+        return rows_data
+
+    def test_constructor(self):
+        rows_data = self._makeOne(iter([]), [('stats', u'name'), VISITS],
+                                  formats={('stats', u'visits'): '>q'})
+        self.assertEqual(rows_data.columns, [NAME, VISITS])
+        self.assertEqual(rows_data.row_keys, [])
+        self.assertEqual(rows_data.values, {NAME: [], VISITS: bytearray()})
+        self.assertEqual(rows_data.timestamps, {NAME: [], VISITS: []})
+        self.assertEqual(rows_data.missing, {VISITS: []})
+
+    def test_constructor_invalid(self):
+        self.assertRaises(ValueError, self._makeOne, iter([]), [])
+        self.assertRaises(ValueError, self._makeOne, iter([]), [NAME],
+                          formats={VISITS: '>q'})
+
+    def test_consume_all(self):
+        import struct
+        responses = [
+            _Response(
+                _Chunk(b'row-1', NAME, b'one', timestamp_micros=2000),
+                # An older cell of the same column is ignored.
+                _Chunk(qualifier=b'name', value=b'old',
+                       timestamp_micros=1000),
+                _Chunk(qualifier=b'visits', value=struct.pack('>q', 7),
+                       timestamp_micros=3000, commit_row=True)),
+            _Response(
+                _Chunk(b'row-2', VISITS, struct.pack('>q', 12)[:3],
+                       value_size=8),
+                _Chunk(value=struct.pack('>q', 12)[3:]),
+                # Cells of other columns are ignored.
+                _Chunk(family_name='other', qualifier=b'name', value=b'x',
+                       commit_row=True)),
+            _Response(_Chunk(b'row-3', NAME, b'three', commit_row=True)),
+        ]
+        rows_data = self._consume(responses, formats={VISITS: '>q'})
+
+        self.assertEqual(rows_data.rows, {})
+        self.assertEqual(rows_data.row_keys, [b'row-1', b'row-2', b'row-3'])
+        self.assertEqual(rows_data.values[NAME], [b'one', None, b'three'])
+        self.assertEqual(rows_data.timestamps[NAME], [2000, None, 0])
+        self.assertEqual(rows_data.timestamps[VISITS], [3000, 0, None])
+        self.assertEqual(rows_data.missing[VISITS], [2])
+        self.assertEqual(rows_data.to_columns(), {
+            NAME: [b'one', None, b'three'],
+            VISITS: [7, 12, None],
+        })
+
+    def test_reset_row(self):
+        responses = [
+            _Response(_Chunk(b'row-1', NAME, b'stale'),
+                      _Chunk(reset_row=True),
+                      _Chunk(b'row-1', VISITS, b'fresh', commit_row=True)),
+            _Response(_Chunk(b'row-2', NAME, b'stale'),
+                      _Chunk(reset_row=True),
+                      _Chunk(b'row-2', commit_row=True)),
+        ]
+        rows_data = self._consume(responses)
+        self.assertEqual(rows_data.row_keys, [b'row-1', b'row-2'])
+        self.assertEqual(rows_data.values, {
+            NAME: [None, None],
+            VISITS: [b'fresh', None],
+        })
+
+    def test_value_size_mismatch(self):
+        responses = [_Response(_Chunk(b'row-1', VISITS, b'short',
+                                      commit_row=True))]
+        with self.assertRaises(ValueError):
+            self._consume(responses, formats={VISITS: '>q'})
+
+    @unittest2.skipUnless(HAVE_PANDAS, 'No pandas')
+    def test_to_dataframe(self):  # pragma: NO COVER
+        import struct
+        responses = [
+            _Response(_Chunk(b'row-1', NAME, b'one', timestamp_micros=1000),
+                      _Chunk(qualifier=b'visits',
+                             value=struct.pack('>q', 7), commit_row=True)),
+            _Response(_Chunk(b'row-2', NAME, b'two', commit_row=True)),
+        ]
+        rows_data = self._consume(responses, formats={VISITS: '>q'})
+        dataframe = rows_data.to_dataframe(timestamps=True)
+        self.assertEqual(list(dataframe.columns), [
+            'stats:name', 'stats:name:timestamp',
+            'stats:visits', 'stats:visits:timestamp'])
+        self.assertEqual(list(dataframe.index), [b'row-1', b'row-2'])
+        self.assertEqual(list(dataframe['stats:name']), [b'one', b'two'])
+        self.assertEqual(dataframe['stats:visits'][b'row-1'], 7)
+        self.assertTrue(pandas.isnull(dataframe['stats:visits'][b'row-2']))
+        self.assertEqual(dataframe['stats:name:timestamp'][b'row-1'],
+                         pandas.Timestamp(1000, unit='us'))
+
+
+def _Chunk(row_key=None, column=None, value=b'', **kw):
+    from gcloud.bigtable._generated_v2 import bigtable_pb2
+    family_name = kw.pop('family_name', None)
+    qualifier = kw.pop('qualifier', None)
+    if column is not None:
+        family_name, qualifier = column
+    chunk = bigtable_pb2.ReadRowsResponse.CellChunk(value=value, **kw)
+    if row_key is not None:
+        chunk.row_key = row_key
+    if family_name is not None:
+        chunk.family_name.value = family_name
+    if qualifier is not None:
+        chunk.qualifier.value = qualifier
+    return chunk
+
+
+def _Response(*chunks):
+    from gcloud.bigtable._generated_v2 import bigtable_pb2
+    return bigtable_pb2.ReadRowsResponse(chunks=chunks)
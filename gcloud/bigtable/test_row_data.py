@@ -91,6 +91,35 @@ class TestCell(unittest2.TestCase):
         self.assertNotEqual(cell1, cell2)
 
 
+class TestPartialCellData(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.bigtable.row_data import PartialCellData
+        return PartialCellData
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_constructor(self):
+        cell = self._makeOne(b'row', u'fam', b'col', 1000, [u'label'], b'v')
+        self.assertEqual(cell.row_key, b'row')
+        self.assertEqual(cell.family_name, u'fam')
+        self.assertEqual(cell.qualifier, b'col')
+        self.assertEqual(cell.timestamp_micros, 1000)
+        self.assertEqual(cell.labels, [u'label'])
+        self.assertEqual(cell.value, b'v')
+
+    def test_append_value(self):
+        cell = self._makeOne(b'row', u'fam', b'col', 1000, value=b'a')
+        cell.append_value(b'b')
+        cell.append_value(b'c')
+        self.assertEqual(cell.value, b'abc')
+        # The chunks are joined only once.
+        self.assertEqual(cell._value_chunks, [b'abc'])
+        cell.append_value(b'd')
+        self.assertEqual(cell.value, b'abcd')
+
+
 class TestPartialRowData(unittest2.TestCase):
 
     def _getTargetClass(self):
@@ -170,11 +199,17 @@ class TestPartialRowData(unittest2.TestCase):
 
     def test_cells_property(self):
         partial_row_data = self._makeOne(None)
-        cells = {1: 2}
+        cell = object()
+        cells = {u'fam': {b'col': [cell]}}
         partial_row_data._cells = cells
         # Make sure we get a copy, not the original.
-        self.assertFalse(partial_row_data.cells is cells)
-        self.assertEqual(partial_row_data.cells, cells)
+        result = partial_row_data.cells
+        self.assertEqual(result, cells)
+        self.assertFalse(result is cells)
+        self.assertFalse(result[u'fam'] is cells[u'fam'])
+        self.assertFalse(result[u'fam'][b'col'] is cells[u'fam'][b'col'])
+        # The cells themselves are shared.
+        self.assertTrue(result[u'fam'][b'col'][0] is cell)
 
     def test_row_key_getter(self):
         row_key = object()
@@ -263,6 +298,98 @@ class TestPartialRowsData(unittest2.TestCase):
 
     # 'consume_nest' tested via 'TestPartialRowsData_JSON_acceptance_tests'
 
+    def _makeRowsResponse(self, *row_keys):
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        response = bigtable_pb2.ReadRowsResponse()
+        for row_key in row_keys:
+            chunk = response.chunks.add(row_key=row_key, value=b'value',
+                                        commit_row=True)
+            chunk.family_name.value = u'family'
+            chunk.qualifier.value = b'qualifier'
+        return response
+
+    def test___iter__(self):
+        response_iterator = _MockCancellableIterator(
+            self._makeRowsResponse(b'a', b'b'),
+            self._makeRowsResponse(b'c'))
+        prd = self._makeOne(response_iterator)
+        self.assertEqual([row.row_key for row in prd], [b'a', b'b', b'c'])
+        self.assertEqual(prd.rows, {})
+        self.assertEqual(response_iterator.cancel_calls, 0)
+
+    def test___iter__early_exit_cancels(self):
+        response_iterator = _MockCancellableIterator(
+            self._makeRowsResponse(b'a', b'b'),
+            self._makeRowsResponse(b'c'))
+        prd = self._makeOne(response_iterator)
+        for row in prd:
+            break
+        self.assertEqual(row.row_key, b'a')
+        self.assertEqual(response_iterator.cancel_calls, 1)
+        # The stream is not read past the row which was returned.
+        self.assertEqual(len(list(response_iterator.iter_values)), 1)
+
+    def test___iter__early_exit_wo_cancel(self):
+        rows = self._makeOne(iter([self._makeRowsResponse(b'a', b'b')]))
+        iterator = iter(rows)
+        self.assertEqual(next(iterator).row_key, b'a')
+        iterator.close()
+
+    def test___iter__resume(self):
+        partial = self._makeRowsResponse(b'b')
+        partial.chunks[0].commit_row = False
+        partial.chunks[0].value_size = 10
+        partial.last_scanned_row_key = b'a0'
+        error = RuntimeError('reset')
+        response_iterator = _MockCancellableIterator(
+            self._makeRowsResponse(b'a'), partial, error)
+        resumed = _MockCancellableIterator(self._makeRowsResponse(b'b', b'c'))
+        calls = []
+
+        def resume(*args):
+            calls.append(args)
+            return resumed
+
+        prd = self._makeOne(response_iterator, resume=resume)
+        rows = list(prd)
+        self.assertEqual([row.row_key for row in rows], [b'a', b'b', b'c'])
+        self.assertEqual(calls, [(error, b'a0', 1)])
+        # The partial cell of row 'b' was dropped, not merged.
+        cells = rows[1].cells[u'family'][b'qualifier']
+        self.assertEqual([cell.value for cell in cells], [b'value'])
+
+    def test_consume_all_resume_nothing_left(self):
+        error = RuntimeError('reset')
+        response_iterator = _MockCancellableIterator(
+            self._makeRowsResponse(b'a'), error)
+        prd = self._makeOne(response_iterator,
+                            resume=lambda *args: None)
+        prd.consume_all()
+        self.assertEqual(list(prd.rows), [b'a'])
+        self.assertEqual(prd.state, prd.NEW_ROW)
+
+    def test_resume_gives_up(self):
+        error = RuntimeError('reset')
+
+        def resume(exc, last_key, rows_read):
+            raise exc
+
+        prd = self._makeOne(_MockCancellableIterator(error), resume=resume)
+        with self.assertRaises(RuntimeError):
+            prd.consume_next()
+
+    def test_error_wo_resume(self):
+        prd = self._makeOne(_MockCancellableIterator(RuntimeError('reset')))
+        with self.assertRaises(RuntimeError):
+            list(prd)
+
+    def test___iter__incomplete_row(self):
+        response = self._makeRowsResponse(b'a')
+        response.chunks[0].commit_row = False
+        prd = self._makeOne(_MockCancellableIterator(response))
+        with self.assertRaises(ValueError):
+            list(prd)
+
     def test_consume_all(self):
         klass = self._getDoNothingClass()
 
@@ -287,39 +414,6 @@ class TestPartialRowsData(unittest2.TestCase):
         self.assertEqual(
             list(response_iterator.iter_values), [value2, value3])
 
-    def test__copy_from_current_unset(self):
-        prd = self._makeOne([])
-        chunks = _generate_cell_chunks([''])
-        chunk = chunks[0]
-        prd._copy_from_current(chunk)
-        self.assertEqual(chunk.row_key, b'')
-        self.assertEqual(chunk.family_name.value, u'')
-        self.assertEqual(chunk.qualifier.value, b'')
-        self.assertEqual(chunk.timestamp_micros, 0)
-        self.assertEqual(chunk.labels, [])
-
-    def test__copy_from_current_blank(self):
-        ROW_KEY = b'RK'
-        FAMILY_NAME = u'A'
-        QUALIFIER = b'C'
-        TIMESTAMP_MICROS = 100
-        LABELS = ['L1', 'L2']
-        prd = self._makeOne([])
-        prd._cell = _PartialCellData()
-        chunks = _generate_cell_chunks([''])
-        chunk = chunks[0]
-        chunk.row_key = ROW_KEY
-        chunk.family_name.value = FAMILY_NAME
-        chunk.qualifier.value = QUALIFIER
-        chunk.timestamp_micros = TIMESTAMP_MICROS
-        chunk.labels.extend(LABELS)
-        prd._copy_from_current(chunk)
-        self.assertEqual(chunk.row_key, ROW_KEY)
-        self.assertEqual(chunk.family_name.value, FAMILY_NAME)
-        self.assertEqual(chunk.qualifier.value, QUALIFIER)
-        self.assertEqual(chunk.timestamp_micros, TIMESTAMP_MICROS)
-        self.assertEqual(chunk.labels, LABELS)
-
     def test__copy_from_previous_unset(self):
         prd = self._makeOne([])
         cell = _PartialCellData()
@@ -379,8 +473,9 @@ class TestPartialRowsData(unittest2.TestCase):
         prd = self._makeOne([])
         row = prd._row = _Dummy(row_key=ROW_KEY)
         prd._cell = None
-        prd._save_current_row()
-        self.assertTrue(prd._rows[ROW_KEY] is row)
+        self.assertTrue(prd._save_current_row() is row)
+        self.assertTrue(prd._previous_row is row)
+        self.assertEqual(prd._row, None)
 
     def test_invalid_last_scanned_row_key_on_start(self):
         from gcloud.bigtable.row_data import InvalidReadRowsResponse
@@ -536,6 +631,15 @@ class TestPartialRowsData_JSON_acceptance_tests(unittest2.TestCase):
             expected_result = self._sort_flattend_cells(results)
         self.assertEqual(flattened, expected_result)
 
+        # Parsing leaves the chunks untouched: stream them again.
+        iterator = _MockCancellableIterator(_ReadRowsResponseV2(chunks))
+        streamed = self._makeOne(iterator)
+        rows = dict((row.row_key, row) for row in streamed)
+        self.assertEqual(streamed.rows, {})
+        flattened = self._sort_flattend_cells(
+            _flatten_cells(_Dummy(rows=rows)))
+        self.assertEqual(flattened, expected_result)
+
     def test_bare_commit_implies_ts_zero(self):
         self._match_results('bare commit implies ts=0')
 
@@ -665,7 +769,10 @@ class _MockCancellableIterator(object):
         self.cancel_calls += 1
 
     def next(self):
-        return next(self.iter_values)
+        value = next(self.iter_values)
+        if isinstance(value, Exception):
+            raise value
+        return value
 
     def __next__(self):  # pragma: NO COVER Py3k
         return self.next()
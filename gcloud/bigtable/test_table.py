@@ -371,8 +371,69 @@ class TestTable(unittest2.TestCase):
             'end_key': end_key,
             'filter_': filter_obj,
             'limit': limit,
+            'row_keys': None,
+            'row_ranges': None,
         }
         self.assertEqual(mock_created, [(table.name, created_kwargs)])
+        self.assertTrue(result._resume._request_pb is request_pb)
+
+    def test_read_rows_resumes(self):
+        import grpc
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable._testing import _FakeStub
+        from gcloud.bigtable import table as MUT
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        chunk = _ReadRowsResponseCellChunkPB(
+            row_key=self.ROW_KEY, family_name=self.FAMILY_NAME,
+            qualifier=self.QUALIFIER, timestamp_micros=self.TIMESTAMP_MICROS,
+            value=self.VALUE, commit_row=True)
+        first = _FailingIterator([_ReadRowsResponsePB(chunks=[chunk])],
+                                 grpc.StatusCode.UNAVAILABLE)
+        client._data_stub = stub = _FakeStub(first, iter([]))
+
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            rows = list(table.read_rows(limit=10))
+
+        self.assertEqual([row.row_key for row in rows], [self.ROW_KEY])
+        self.assertEqual(len(sleeps), 1)
+        _, (request_pb, _), _ = stub.method_calls[1]
+        self.assertEqual(request_pb.rows_limit, 9)
+        self.assertEqual(request_pb.rows.row_ranges[0].start_key_open,
+                         self.ROW_KEY)
+
+    def test_read_columns(self):
+        from gcloud.bigtable._testing import _FakeStub
+        from gcloud.bigtable.columnar import _columns_filter
+        from gcloud.bigtable.columnar import ColumnarRowsData
+        from gcloud.bigtable.table import _create_row_request
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        response_iterator = iter([])
+        client._data_stub = stub = _FakeStub(response_iterator)
+
+        columns = [(self.FAMILY_NAME, self.QUALIFIER)]
+        result = table.read_columns(columns, start_key=b'a', limit=5,
+                                    formats={columns[0]: '>q'})
+
+        self.assertTrue(isinstance(result, ColumnarRowsData))
+        self.assertTrue(result._response_iterator is response_iterator)
+        self.assertEqual(result.columns, columns)
+        request_pb = _create_row_request(
+            table.name, start_key=b'a', filter_=_columns_filter(columns),
+            limit=5)
+        self.assertEqual(stub.method_calls, [(
+            'ReadRows',
+            (request_pb, self.TIMEOUT_SECONDS),
+            {},
+        )])
+        self.assertTrue(result._resume._request_pb is
+                        stub.method_calls[0][1][0])
 
     def test_sample_row_keys(self):
         from gcloud.bigtable._testing import _FakeStub
@@ -402,15 +463,487 @@ class TestTable(unittest2.TestCase):
             {},
         )])
 
+    def test_read_rows_parallel(self):
+        from gcloud.bigtable._testing import _FakeStub
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        client._data_stub = _FakeStub([
+            _SampleRowKeysResponsePB(row_key=b'm'),
+            _SampleRowKeysResponsePB(row_key=b'c'),
+            _SampleRowKeysResponsePB(row_key=b''),
+        ])
+        segments = {
+            (b'a', b'c'): [b'a', b'b'],
+            (b'c', b'm'): [b'c', b'd'],
+            (b'm', None): [b'm'],
+            (None, None): [b'a', b'b'],
+        }
+        read_rows_calls = []
+
+        def mock_read_rows(start_key, end_key, filter_, retries):
+            read_rows_calls.append((start_key, end_key, filter_, retries))
+            return iter(segments[(start_key, end_key)])
+
+        table.read_rows = mock_read_rows
+        filter_obj = object()
+        result = table.read_rows_parallel(start_key=b'a', filter_=filter_obj,
+                                          max_workers=2, retries=1)
+        self.assertEqual(list(result), [b'a', b'b', b'c', b'd', b'm'])
+        self.assertEqual(sorted(read_rows_calls, key=repr), [
+            (b'a', b'c', filter_obj, 1),
+            (b'c', b'm', filter_obj, 1),
+            (b'm', None, filter_obj, 1),
+        ])
+
+        client._data_stub = _FakeStub([])
+        result = table.read_rows_parallel(ordered=False)
+        self.assertEqual(sorted(result), [b'a', b'b'])
+
+    def test_read_rows_parallel_row_keys(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import table as MUT
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        read_rows_calls = []
+
+        def mock_read_rows(filter_, retries, row_keys):
+            read_rows_calls.append((filter_, retries, row_keys))
+            # The second key of each batch does not exist.
+            return iter(row_keys[:1])
+
+        table.read_rows = mock_read_rows
+        filter_obj = object()
+        with _Monkey(MUT, ROW_KEYS_PER_REQUEST=2):
+            result = table.read_rows_parallel(
+                row_keys=[b'e', u'a', b'c', b'b', b'd', b'a'],
+                filter_=filter_obj, retries=1)
+            self.assertEqual(list(result), [b'a', b'c', b'e'])
+        self.assertEqual(sorted(read_rows_calls, key=repr), [
+            (filter_obj, 1, [b'a', b'b']),
+            (filter_obj, 1, [b'c', b'd']),
+            (filter_obj, 1, [b'e']),
+        ])
+
+        self.assertEqual(list(table.read_rows_parallel(row_keys=[])), [])
+        with self.assertRaises(ValueError):
+            table.read_rows_parallel(row_keys=[b'a'], end_key=b'z')
+
+    def _makeRows(self, table, count, idempotent=True):
+        import datetime
+        from gcloud._helpers import UTC
+        timestamp = None
+        if idempotent:
+            # An explicit timestamp makes the rows safe to retry.
+            timestamp = datetime.datetime(2016, 1, 1, tzinfo=UTC)
+        rows = []
+        for index in range(count):
+            row = table.row(('row-%d' % (index,)).encode('ascii'))
+            row.set_cell(self.FAMILY_NAME, self.QUALIFIER, self.VALUE,
+                         timestamp=timestamp)
+            rows.append(row)
+        return rows
+
+    def test_mutate_rows(self):
+        from google.rpc import code_pb2
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable._testing import _FakeStub
+        from gcloud.bigtable import table as MUT
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        rows = self._makeRows(table, 3)
+        empty_row = table.row(b'empty')
+        entries = [_MutateRowsRequestEntryPB(
+            row_key=row._row_key, mutations=row._get_mutations(None))
+            for row in rows]
+
+        first = _MutateRowsResponsePB(entries=[
+            _MutateRowsResponseEntryPB(index=0),
+            _MutateRowsResponseEntryPB(index=2, status=_StatusPB(
+                code=code_pb2.INVALID_ARGUMENT, message='bad')),
+        ])
+        first.entries.add(index=1).status.code = code_pb2.UNAVAILABLE
+        second = _MutateRowsResponsePB(entries=[
+            _MutateRowsResponseEntryPB(index=0)])
+        client._data_stub = stub = _FakeStub(iter([first]), iter([second]))
+
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            statuses = table.mutate_rows(rows + [empty_row])
+
+        self.assertEqual([status.code for status in statuses], [
+            code_pb2.OK, code_pb2.OK, code_pb2.INVALID_ARGUMENT,
+            code_pb2.OK])
+        self.assertEqual(statuses[2].message, 'bad')
+        self.assertEqual(len(sleeps), 1)
+        self.assertEqual(stub.method_calls, [
+            ('MutateRows',
+             (_MutateRowsRequestPB(table_name=self.TABLE_NAME,
+                                   entries=entries),
+              self.TIMEOUT_SECONDS),
+             {}),
+            ('MutateRows',
+             (_MutateRowsRequestPB(table_name=self.TABLE_NAME,
+                                   entries=entries[1:2]),
+              self.TIMEOUT_SECONDS),
+             {}),
+        ])
+        # Only the committed rows are cleared.
+        self.assertEqual([len(row._get_mutations(None)) for row in rows],
+                         [0, 0, 1])
+
+    def test_mutate_rows_request_failure(self):
+        import grpc
+        from google.rpc import code_pb2
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable._testing import _FakeStub
+        from gcloud.bigtable import table as MUT
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        rows = self._makeRows(table, 2)
+        partial = _MutateRowsResponsePB(entries=[
+            _MutateRowsResponseEntryPB(index=0)])
+        client._data_stub = _FakeStub(
+            _FailingIterator([partial], grpc.StatusCode.UNAVAILABLE),
+            _FailingIterator([], grpc.StatusCode.UNAVAILABLE, 'gone'))
+
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            statuses = table.mutate_rows(rows, retries=1)
+
+        self.assertEqual([status.code for status in statuses],
+                         [code_pb2.OK, code_pb2.UNAVAILABLE])
+        self.assertEqual(statuses[1].message, 'gone')
+        self.assertEqual(len(sleeps), 1)
+        self.assertEqual(len(rows[1]._get_mutations(None)), 1)
+
+    def test_mutate_rows_not_idempotent(self):
+        from google.rpc import code_pb2
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable._testing import _FakeStub
+        from gcloud.bigtable import table as MUT
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        # Cells with a server-assigned timestamp are not sent again.
+        rows = self._makeRows(table, 1, idempotent=False)
+        response = _MutateRowsResponsePB()
+        response.entries.add(index=0).status.code = code_pb2.UNAVAILABLE
+        client._data_stub = stub = _FakeStub(iter([response]))
+
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            statuses = table.mutate_rows(rows)
+
+        self.assertEqual(statuses[0].code, code_pb2.UNAVAILABLE)
+        self.assertEqual(sleeps, [])
+        self.assertEqual(len(stub.method_calls), 1)
+        self.assertEqual(len(rows[0]._get_mutations(None)), 1)
+
+    def test_mutate_rows_batch_error(self):
+        from google.rpc import code_pb2
+        from gcloud.bigtable._testing import _FakeStub
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        rows = self._makeRows(table, 2)
+        response = _MutateRowsResponsePB(entries=[
+            _MutateRowsResponseEntryPB(index=0)])
+        client._data_stub = _FakeStub(iter([response]),
+                                      _RaisingIterator(ValueError('open')))
+
+        statuses = table.mutate_rows(rows, max_entries=1, max_workers=1)
+
+        self.assertEqual([status.code for status in statuses],
+                         [code_pb2.OK, code_pb2.UNKNOWN])
+        self.assertEqual(statuses[1].message, 'open')
+        # The committed row is still cleared.
+        self.assertEqual([len(row._get_mutations(None)) for row in rows],
+                         [0, 1])
+
+    def test_mutate_rows_missing_status(self):
+        from google.rpc import code_pb2
+        from gcloud.bigtable._testing import _FakeStub
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        client._data_stub = _FakeStub(iter([]))
+        statuses = table.mutate_rows(self._makeRows(table, 1))
+        self.assertEqual(statuses[0].code, code_pb2.UNKNOWN)
+
+    def test_mutate_rows_batches(self):
+        from gcloud.bigtable._testing import _FakeStub
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        client._data_stub = stub = _FakeStub(iter([]), iter([]), iter([]))
+        table.mutate_rows(self._makeRows(table, 5), max_entries=2,
+                          max_workers=1, retries=0)
+        self.assertEqual(
+            [[entry.row_key for entry in args[0].entries]
+             for _, args, _ in stub.method_calls],
+            [[b'row-0', b'row-1'], [b'row-2', b'row-3'], [b'row-4']])
+
+    def test_mutate_rows_invalid(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import table as MUT
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        conditional_row = table.row(self.ROW_KEY, filter_=object())
+        with self.assertRaises(ValueError):
+            table.mutate_rows([conditional_row])
+
+        rows = self._makeRows(table, 1)
+        rows[0].delete()
+        with _Monkey(MUT, MAX_MUTATIONS=1):
+            with self.assertRaises(ValueError):
+                table.mutate_rows(rows)
+
+    def test_mutations_batcher(self):
+        from gcloud.bigtable.batcher import MutationsBatcher
+
+        client = _Client(timeout_seconds=self.TIMEOUT_SECONDS)
+        instance = _Instance(self.INSTANCE_NAME, client=client)
+        table = self._makeOne(self.TABLE_ID, instance)
+        batcher = table.mutations_batcher(flush_count=10)
+        self.addCleanup(batcher.close)
+        self.assertTrue(isinstance(batcher, MutationsBatcher))
+        self.assertTrue(batcher.table is table)
+        self.assertEqual(batcher.flush_count, 10)
+
+
+class Test_ReadRowsResumer(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.bigtable.table import _ReadRowsResumer
+        return _ReadRowsResumer
+
+    def _makeOne(self, retries=2, stub=None):
+        from gcloud.bigtable._testing import _FakeStub
+        client = _Client(timeout_seconds=10)
+        client._data_stub = stub or _FakeStub()
+        table = _Table('projects/p/instances/i/tables/t', client)
+        request_pb = _ReadRowsRequestPB(table_name=table.name)
+        return self._getTargetClass()(table, request_pb, retries)
+
+    def _makeError(self, code):
+        from grpc.framework.interfaces.face import face
+        return face.AbortionError(None, None, code, 'details')
+
+    def test_not_retryable(self):
+        import grpc
+        resumer = self._makeOne()
+        error = self._makeError(grpc.StatusCode.INVALID_ARGUMENT)
+        with self.assertRaises(type(error)):
+            resumer(error, None, 0)
+        with self.assertRaises(RuntimeError):
+            resumer(RuntimeError(), None, 0)
+
+    def test_retries_reset_on_progress(self):
+        import grpc
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable._testing import _FakeStub
+        from gcloud.bigtable import table as MUT
+        streams = [object() for _ in range(4)]
+        stub = _FakeStub(*streams)
+        resumer = self._makeOne(retries=2, stub=stub)
+        error = self._makeError(grpc.StatusCode.UNAVAILABLE)
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            self.assertTrue(resumer(error, None, 0) is streams[0])
+            self.assertTrue(resumer(error, None, 0) is streams[1])
+            # Progress was made: the count starts over.
+            self.assertTrue(resumer(error, b'a', 1) is streams[2])
+            self.assertTrue(resumer(error, b'a', 1) is streams[3])
+            with self.assertRaises(type(error)):
+                resumer(error, b'a', 1)
+        self.assertEqual(len(sleeps), 4)
+        _, (request_pb, timeout), _ = stub.method_calls[2]
+        self.assertEqual(request_pb.rows.row_ranges[0].start_key_open, b'a')
+        self.assertEqual(timeout, 10)
+
+    def test_nothing_left(self):
+        import grpc
+        resumer = self._makeOne()
+        resumer._request_pb.rows.row_keys.append(b'a')
+        error = self._makeError(grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(resumer(error, b'a', 1), None)
+
+
+class Test__resume_row_request(unittest2.TestCase):
+
+    def _callFUT(self, request_pb, last_key, rows_read):
+        from gcloud.bigtable.table import _resume_row_request
+        return _resume_row_request(request_pb, last_key, rows_read)
+
+    def test_nothing_read(self):
+        request_pb = _ReadRowsRequestPB(table_name='name', rows_limit=5)
+        result = self._callFUT(request_pb, None, 0)
+        self.assertEqual(result, request_pb)
+        self.assertFalse(result is request_pb)
+
+    def test_whole_table(self):
+        request_pb = _ReadRowsRequestPB(table_name='name', rows_limit=5)
+        result = self._callFUT(request_pb, b'k', 2)
+        self.assertEqual(result.table_name, 'name')
+        self.assertEqual(result.rows_limit, 3)
+        self.assertEqual(list(result.rows.row_ranges),
+                         [_RowRangePB(start_key_open=b'k')])
+
+    def test_limit_reached(self):
+        request_pb = _ReadRowsRequestPB(table_name='name', rows_limit=2)
+        self.assertEqual(self._callFUT(request_pb, b'k', 2), None)
+
+    def test_row_set(self):
+        request_pb = _ReadRowsRequestPB(table_name='name')
+        request_pb.rows.row_keys.extend([b'a', b'k', b'm'])
+        request_pb.rows.row_ranges.extend([
+            _RowRangePB(start_key_closed=b'a', end_key_open=b'k'),
+            _RowRangePB(start_key_closed=b'b', end_key_closed=b'z'),
+            _RowRangePB(end_key_open=b'x'),
+            _RowRangePB(start_key_open=b'p'),
+        ])
+        result = self._callFUT(request_pb, b'k', 0)
+        self.assertEqual(list(result.rows.row_keys), [b'm'])
+        self.assertEqual(list(result.rows.row_ranges), [
+            _RowRangePB(start_key_open=b'k', end_key_closed=b'z'),
+            _RowRangePB(start_key_open=b'k', end_key_open=b'x'),
+            _RowRangePB(start_key_open=b'p'),
+        ])
+        self.assertEqual(result.rows_limit, 0)
+
+    def test_row_set_exhausted(self):
+        request_pb = _ReadRowsRequestPB(table_name='name')
+        request_pb.rows.row_keys.append(b'a')
+        request_pb.rows.row_ranges.add(start_key_closed=b'a',
+                                       end_key_closed=b'k')
+        self.assertEqual(self._callFUT(request_pb, b'k', 1), None)
+
+
+class Test__split_key_range(unittest2.TestCase):
+
+    def _callFUT(self, sample_keys, start_key=None, end_key=None):
+        from gcloud.bigtable.table import _split_key_range
+        return _split_key_range(sample_keys, start_key, end_key)
+
+    def test_no_samples(self):
+        self.assertEqual(self._callFUT([]), [(None, None)])
+        self.assertEqual(self._callFUT([b''], b'a', b'z'), [(b'a', b'z')])
+
+    def test_whole_table(self):
+        self.assertEqual(self._callFUT([b'k', b'c', b'k', b'']), [
+            (None, b'c'),
+            (b'c', b'k'),
+            (b'k', None),
+        ])
+
+    def test_range(self):
+        result = self._callFUT([b'a', b'c', b'k', b'x'], u'c', b'x')
+        self.assertEqual(result, [(b'c', b'k'), (b'k', b'x')])
+
+
+class Test__bulk_batches(unittest2.TestCase):
+
+    def _callFUT(self, entries, max_entries, max_bytes):
+        from gcloud.bigtable.table import _bulk_batches
+        return _bulk_batches(entries, max_entries, max_bytes)
+
+    def _makeEntries(self, *mutation_counts):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        entries = []
+        for index, count in enumerate(mutation_counts):
+            entry_pb = _MutateRowsRequestEntryPB(
+                row_key=('row-%d' % (index,)).encode('ascii'), mutations=[
+                    data_pb2.Mutation(delete_from_row=(
+                        data_pb2.Mutation.DeleteFromRow()))] * count)
+            entries.append((index, entry_pb))
+        return entries
+
+    def _indices(self, batches):
+        return [[index for index, _ in batch] for batch in batches]
+
+    def test_empty(self):
+        self.assertEqual(self._callFUT([], 10, 100), [])
+
+    def test_max_entries(self):
+        batches = self._callFUT(self._makeEntries(1, 1, 1), 2, 1000)
+        self.assertEqual(self._indices(batches), [[0, 1], [2]])
+
+    def test_max_bytes(self):
+        entries = self._makeEntries(1, 1, 1)
+        size = entries[0][1].ByteSize()
+        batches = self._callFUT(entries, 10, 2 * size)
+        self.assertEqual(self._indices(batches), [[0, 1], [2]])
+        # An entry larger than the limit goes alone.
+        batches = self._callFUT(entries, 10, 1)
+        self.assertEqual(self._indices(batches), [[0], [1], [2]])
+
+    def test_max_mutations(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import table as MUT
+        with _Monkey(MUT, MAX_MUTATIONS=4):
+            batches = self._callFUT(self._makeEntries(2, 2, 1), 10, 1000)
+        self.assertEqual(self._indices(batches), [[0, 1], [2]])
+
+
+class Test__is_idempotent(unittest2.TestCase):
+
+    def _callFUT(self, entry_pb):
+        from gcloud.bigtable.table import _is_idempotent
+        return _is_idempotent(entry_pb)
+
+    def _makeEntry(self, timestamp_micros):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        entry_pb = _MutateRowsRequestEntryPB(row_key=b'row')
+        entry_pb.mutations.add().delete_from_row.SetInParent()
+        entry_pb.mutations.add(set_cell=data_pb2.Mutation.SetCell(
+            family_name=u'fam', column_qualifier=b'col', value=b'value',
+            timestamp_micros=timestamp_micros))
+        return entry_pb
+
+    def test_explicit_timestamp(self):
+        self.assertTrue(self._callFUT(self._makeEntry(1000)))
+
+    def test_server_timestamp(self):
+        self.assertFalse(self._callFUT(self._makeEntry(-1)))
+
+
+class Test__backoff(unittest2.TestCase):
+
+    def _callFUT(self, attempt):
+        from gcloud.bigtable.table import _backoff
+        return _backoff(attempt)
+
+    def test_growth_and_cap(self):
+        from gcloud.bigtable.table import _INITIAL_BACKOFF
+        from gcloud.bigtable.table import _MAX_BACKOFF
+        delay = self._callFUT(2)
+        self.assertTrue(_INITIAL_BACKOFF <= delay <= 2 * _INITIAL_BACKOFF)
+        self.assertTrue(self._callFUT(100) <= _MAX_BACKOFF)
+
 
 class Test__create_row_request(unittest2.TestCase):
 
     def _callFUT(self, table_name, row_key=None, start_key=None, end_key=None,
-                 filter_=None, limit=None):
+                 filter_=None, limit=None, row_keys=None, row_ranges=None):
         from gcloud.bigtable.table import _create_row_request
         return _create_row_request(
             table_name, row_key=row_key, start_key=start_key, end_key=end_key,
-            filter_=filter_, limit=limit)
+            filter_=filter_, limit=limit, row_keys=row_keys,
+            row_ranges=row_ranges)
 
     def test_table_name_only(self):
         table_name = 'table_name'
@@ -460,6 +993,27 @@ class Test__create_row_request(unittest2.TestCase):
             start_key_closed=start_key, end_key_open=end_key)
         self.assertEqual(result, expected_result)
 
+    def test_row_set(self):
+        table_name = 'table_name'
+        result = self._callFUT(table_name, row_keys=[b'a', u'b'],
+                               row_ranges=[(b'c', b'e'), (u'x', None),
+                                           (None, b'0')])
+        expected_result = _ReadRowsRequestPB(table_name=table_name)
+        expected_result.rows.row_keys.extend([b'a', b'b'])
+        expected_result.rows.row_ranges.add(start_key_closed=b'c',
+                                            end_key_open=b'e')
+        expected_result.rows.row_ranges.add(start_key_closed=b'x')
+        expected_result.rows.row_ranges.add(end_key_open=b'0')
+        self.assertEqual(result, expected_result)
+
+    def test_row_set_row_range_conflict(self):
+        with self.assertRaises(ValueError):
+            self._callFUT(None, row_keys=[b'a'], start_key=b'a')
+
+    def test_empty_row_set(self):
+        with self.assertRaises(ValueError):
+            self._callFUT(None, row_keys=[], row_ranges=[])
+
     def test_with_filter(self):
         from gcloud.bigtable.row_filters import RowSampleFilter
         table_name = 'table_name'
@@ -512,6 +1066,11 @@ def _ReadRowsRequestPB(*args, **kw):
     return messages_v2_pb2.ReadRowsRequest(*args, **kw)
 
 
+def _RowRangePB(*args, **kw):
+    from gcloud.bigtable._generated_v2 import data_pb2
+    return data_pb2.RowRange(*args, **kw)
+
+
 def _ReadRowsResponseCellChunkPB(*args, **kw):
     from gcloud.bigtable._generated_v2 import (
         bigtable_pb2 as messages_v2_pb2)
@@ -535,6 +1094,41 @@ def _SampleRowKeysRequestPB(*args, **kw):
     return messages_v2_pb2.SampleRowKeysRequest(*args, **kw)
 
 
+def _SampleRowKeysResponsePB(*args, **kw):
+    from gcloud.bigtable._generated_v2 import (
+        bigtable_pb2 as messages_v2_pb2)
+    return messages_v2_pb2.SampleRowKeysResponse(*args, **kw)
+
+
+def _MutateRowsRequestPB(*args, **kw):
+    from gcloud.bigtable._generated_v2 import (
+        bigtable_pb2 as messages_v2_pb2)
+    return messages_v2_pb2.MutateRowsRequest(*args, **kw)
+
+
+def _MutateRowsRequestEntryPB(*args, **kw):
+    from gcloud.bigtable._generated_v2 import (
+        bigtable_pb2 as messages_v2_pb2)
+    return messages_v2_pb2.MutateRowsRequest.Entry(*args, **kw)
+
+
+def _MutateRowsResponsePB(*args, **kw):
+    from gcloud.bigtable._generated_v2 import (
+        bigtable_pb2 as messages_v2_pb2)
+    return messages_v2_pb2.MutateRowsResponse(*args, **kw)
+
+
+def _MutateRowsResponseEntryPB(*args, **kw):
+    from gcloud.bigtable._generated_v2 import (
+        bigtable_pb2 as messages_v2_pb2)
+    return messages_v2_pb2.MutateRowsResponse.Entry(*args, **kw)
+
+
+def _StatusPB(*args, **kw):
+    from google.rpc import status_pb2
+    return status_pb2.Status(*args, **kw)
+
+
 def _TablePB(*args, **kw):
     from gcloud.bigtable._generated_v2 import (
         table_pb2 as table_v2_pb2)
@@ -558,6 +1152,48 @@ class _Client(object):
         self.timeout_seconds = timeout_seconds
 
 
+class _FailingIterator(object):
+    """Response stream which fails after yielding some responses."""
+
+    def __init__(self, responses, code, details=None):
+        self._responses = list(responses)
+        self._code = code
+        self._details = details
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        from grpc.framework.interfaces.face import face
+        if self._responses:
+            return self._responses.pop(0)
+        raise face.AbortionError(None, None, self._code, self._details)
+
+    next = __next__
+
+
+class _RaisingIterator(object):
+    """Response stream raising an error which is not a gRPC status."""
+
+    def __init__(self, error):
+        self._error = error
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raise self._error
+
+    next = __next__
+
+
+class _Table(object):
+
+    def __init__(self, name, client):
+        self.name = name
+        self._instance = _Instance(name, client=client)
+
+
 class _Instance(object):
 
     def __init__(self, name, client=None):
@@ -123,6 +123,27 @@ class Client(_ClientFactoryMixin):
         self.connection = self._connection_class(
             credentials=credentials, http=http)
 
+    @property
+    def flow_control(self):
+        """Load shedding applied to this client's requests.
+
+        :rtype: :class:`gcloud.flow_control.FlowControl` or
+                :class:`NoneType`
+        :returns: The flow control, if one has been set.
+        """
+        return self.connection.flow_control
+
+    @flow_control.setter
+    def flow_control(self, value):
+        """Update the load shedding applied to this client's requests.
+
+        :type value: :class:`gcloud.flow_control.FlowControl` or
+                     :class:`NoneType`
+        :param value: The flow control to apply, or :data:`None` to send
+                      requests unguarded.
+        """
+        self.connection.flow_control = value
+
 
 class _ClientProjectMixin(object):
     """Mixin to allow setting the project on the client.
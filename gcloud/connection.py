@@ -15,13 +15,16 @@
 """Shared implementation of connections to API servers."""
 
 import json
+import threading
 from pkg_resources import get_distribution
+
 import six
 from six.moves.urllib.parse import urlencode
 
 import httplib2
 
 from gcloud.exceptions import make_exception
+from gcloud.flow_control import GuardedHttp
 
 
 API_BASE_URL = 'https://www.googleapis.com'
@@ -51,6 +54,9 @@ class Connection(object):
 
     In addition, ``redirections`` and ``connection_type`` may be used.
 
+    :class:`gcloud.http2.HTTP2Http` is such an object: it multiplexes
+    concurrent requests over one HTTP/2 connection per host.
+
     Without the use of ``credentials.authorize(http)``, a custom ``http``
     object will also need to be able to add a bearer token to API
     requests and handle token refresh on 401 errors.
@@ -72,8 +78,13 @@ class Connection(object):
     Needs to be set by subclasses.
     """
 
+    flow_control = None
+    """Optional :class:`gcloud.flow_control.FlowControl` guarding requests."""
+
     def __init__(self, credentials=None, http=None):
         self._http = http
+        self._local = threading.local()
+        self._idle_http = []
         self._credentials = self._create_scoped_credentials(
             credentials, self.SCOPE)
 
@@ -91,14 +102,58 @@ class Connection(object):
     def http(self):
         """A getter for the HTTP transport used in talking to the API.
 
+        If no ``http`` object was passed to the constructor, each thread
+        gets its own, since :class:`httplib2.Http` is not thread-safe.
+        Those given back with :meth:`release_http` are handed to the
+        threads which need one next.
+        If :attr:`flow_control` is set, the transport is wrapped in a
+        :class:`gcloud.flow_control.GuardedHttp`.
+
         :rtype: :class:`httplib2.Http`
         :returns: A Http object used to transport data.
         """
-        if self._http is None:
-            self._http = httplib2.Http()
-            if self._credentials:
-                self._http = self._credentials.authorize(self._http)
-        return self._http
+        http = self._http
+        if http is None:
+            http = getattr(self._local, 'http', None)
+            if http is None:
+                try:
+                    http = self._idle_http.pop()
+                except IndexError:
+                    http = httplib2.Http()
+                    if self._credentials:
+                        http = self._credentials.authorize(http)
+                self._local.http = http
+        if self.flow_control is not None:
+            http = GuardedHttp(http, self.flow_control)
+        return http
+
+    def release_http(self):
+        """Give back the transport of the calling thread.
+
+        Worker threads call this once their requests are done, so that
+        the threads started later reuse its open (TLS) connections rather
+        than each opening new ones.  The calling thread gets a transport
+        again the next time it uses :attr:`http`.
+        """
+        http = getattr(self._local, 'http', None)
+        if http is not None:
+            del self._local.http
+            self._idle_http.append(http)
+
+    @property
+    def http_is_shared(self):
+        """Whether all threads send requests through the same transport.
+
+        This is the case when an ``http`` object was passed to the
+        constructor:  it must then not be used by concurrent threads,
+        unless it has a true ``thread_safe`` attribute.
+
+        :rtype: bool
+        :returns: True if :attr:`http` is the same in every thread and
+                  not known to be thread-safe.
+        """
+        return (self._http is not None and
+                not getattr(self._http, 'thread_safe', False))
 
     @staticmethod
     def _create_scoped_credentials(credentials, scope):
@@ -218,6 +218,37 @@ class Batch(object):
         key_pb = key.to_protobuf()
         self._add_delete_key_pb().CopyFrom(key_pb)
 
+    def put_entity_pb(self, entity_pb):
+        """Remember an entity protobuf to be saved during :meth:`commit`.
+
+        Unlike with :meth:`put`, the protobuf is sent as it is, so its key
+        must be complete.
+
+        :type entity_pb: :class:`gcloud.datastore._generated.entity_pb2.Entity`
+        :param entity_pb: the entity to be saved.
+
+        :raises: ValueError if the entity's key is not complete, or if the
+                 key's ``project`` does not match ours.
+        """
+        path = entity_pb.key.path
+        if not path or path[-1].WhichOneof('id_type') is None:
+            raise ValueError("Key must be complete")
+
+        if self.project != entity_pb.key.partition_id.project_id:
+            raise ValueError("Key must be from same project as batch")
+
+        self._add_complete_key_entity_pb().CopyFrom(entity_pb)
+
+    @property
+    def has_partial_keys(self):
+        """Whether the batch inserts entities with partial keys.
+
+        :rtype: bool
+        :returns: True if :meth:`put` was passed an entity with a partial
+                  key, which is completed during :meth:`commit`.
+        """
+        return bool(self._partial_key_entities)
+
     def begin(self):
         """Begins a batch.
 
@@ -238,9 +269,17 @@ class Batch(object):
 
         This is called by :meth:`commit`.
         """
-        # NOTE: ``self._commit_request`` will be modified.
-        _, updated_keys = self.connection.commit(
-            self.project, self._commit_request, self._id)
+        cache = self._client.cache
+        if cache is not None:
+            written_keys = self._written_keys()
+        try:
+            # NOTE: ``self._commit_request`` will be modified.
+            _, updated_keys = self.connection.commit(
+                self.project, self._commit_request, self._id)
+        finally:
+            # Even a failed commit may have been applied.
+            if cache is not None:
+                cache.delete_multi(written_keys)
         # If the back-end returns without error, we are guaranteed that
         # :meth:`Connection.commit` will return keys that match (length and
         # order) directly ``_partial_key_entities``.
@@ -249,6 +288,21 @@ class Batch(object):
             new_id = new_key_pb.path[-1].id
             entity.key = entity.key.completed_key(new_id)
 
+    def _written_keys(self):
+        """Keys of the existing entities updated or deleted by the batch.
+
+        :rtype: list of :class:`gcloud.datastore.key.Key`
+        :returns: The keys, excluding those of inserted entities.
+        """
+        keys = []
+        for mutation_pb in self.mutations:
+            op_type = mutation_pb.WhichOneof('operation')
+            if op_type == 'upsert':
+                keys.append(helpers.key_from_protobuf(mutation_pb.upsert.key))
+            elif op_type == 'delete':
+                keys.append(helpers.key_from_protobuf(mutation_pb.delete))
+        return keys
+
     def commit(self):
         """Commits the batch.
 
@@ -0,0 +1,317 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Write large numbers of entities as concurrent, size-limited commits.
+
+:meth:`Client.put_multi <gcloud.datastore.client.Client.put_multi>` sends
+every mutation in a single commit, which the backend rejects beyond
+:data:`MAX_MUTATIONS`.  A :class:`BulkWriter` instead splits the work into
+compliant non-transactional commits and sends them concurrently:
+
+.. code:: python
+
+    >>> from gcloud import datastore
+    >>> client = datastore.Client()
+    >>> writer = client.bulk_writer(max_workers=8)
+    >>> result = writer.put_multi(entities)
+    >>> result.errors
+    []
+
+Each commit is independent: if some fail, the others are still applied.
+The returned :class:`BulkWriteResult` lists the keys written and the
+failed chunks.
+"""
+
+import random
+import threading
+import time
+
+from six.moves import queue
+
+from gcloud._helpers import _map_concurrently
+from gcloud.datastore.batch import Batch
+from gcloud.datastore.entity import Entity
+from gcloud.exceptions import Conflict
+from gcloud.exceptions import ServiceUnavailable
+from gcloud.exceptions import TooManyRequests
+
+
+_SLEEP = time.sleep  # To be replaced by tests.
+
+MAX_MUTATIONS = 500
+"""Maximum number of mutations the backend accepts in one commit."""
+
+_RETRYABLE_ERRORS = (Conflict, TooManyRequests, ServiceUnavailable)
+"""Errors signalling contention or overload, after which a retry is safe."""
+
+
+class BulkWriteResult(object):
+    """Outcome of a :class:`BulkWriter` operation.
+
+    :type written: list of :class:`gcloud.datastore.key.Key`
+    :param written: Keys of the entities stored (with IDs allocated for
+                    partial keys) or deleted.
+
+    :type errors: list of tuple
+    :param errors: ``(keys, exception)`` pairs for the chunks which could
+                   not be committed.
+    """
+
+    def __init__(self, written, errors):
+        self.written = written
+        self.errors = errors
+
+    @property
+    def failed(self):
+        """Keys of the chunks which could not be committed.
+
+        For entities with partial keys, these are the (still partial)
+        keys passed in.
+
+        :rtype: list of :class:`gcloud.datastore.key.Key`
+        :returns: The keys not written.
+        """
+        return [key for keys, _ in self.errors for key in keys]
+
+
+class BulkWriter(object):
+    """Split puts / deletes into concurrent non-transactional commits.
+
+    Commits which fail with contention or overload errors (``409``,
+    ``429``, ``503``) are retried with jittered exponential backoff.
+    Chunks inserting entities with partial keys are not retried after a
+    ``503``, since their IDs might already have been allocated.
+
+    :type client: :class:`gcloud.datastore.client.Client`
+    :param client: The client used to connect to datastore.
+
+    :type batch_size: int
+    :param batch_size: (Optional) Maximum number of mutations per commit.
+
+    :type max_workers: int
+    :param max_workers: (Optional) Maximum number of concurrent commits.
+                        Commits are sequential if the client's connection
+                        shares one ``http`` object between threads.
+
+    :type max_attempts: int
+    :param max_attempts: (Optional) Attempts per commit, including the
+                         first.
+
+    :type initial_backoff: float
+    :param initial_backoff: (Optional) Seconds to wait before the first
+                            retry; doubled for each further retry.
+
+    :type max_backoff: float
+    :param max_backoff: (Optional) Longest wait between retries, in seconds.
+
+    :raises: :class:`ValueError` if ``batch_size`` is not between 1 and
+             :data:`MAX_MUTATIONS`, or ``max_attempts`` is not positive.
+    """
+
+    def __init__(self, client, batch_size=MAX_MUTATIONS, max_workers=8,
+                 max_attempts=5, initial_backoff=0.1, max_backoff=10.0):
+        if not 1 <= batch_size <= MAX_MUTATIONS:
+            raise ValueError('batch_size must be between 1 and %d' % (
+                MAX_MUTATIONS,))
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be positive')
+        self._client = client
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+    def put_multi(self, entities):
+        """Save entities in chunked, concurrent commits.
+
+        Entities with partial keys have them completed, as with
+        :meth:`gcloud.datastore.batch.Batch.put`.  If several entities
+        have the same complete key, only the last one is saved.
+
+        :type entities: list of :class:`gcloud.datastore.entity.Entity`
+        :param entities: The entities to be saved to the datastore.
+
+        :rtype: :class:`BulkWriteResult`
+        :returns: The keys written and the chunks which failed.
+        :raises: :class:`ValueError` if ``entities`` is a single entity, if
+                 any entity is invalid for :meth:`Batch.put
+                 <gcloud.datastore.batch.Batch.put>` (nothing is written
+                 then), or if a batch or transaction is in progress.
+        """
+        if isinstance(entities, Entity):
+            raise ValueError('Pass a sequence of entities')
+        return self._write(entities, Batch.put, lambda entity: entity.key)
+
+    def delete_multi(self, keys):
+        """Delete keys in chunked, concurrent commits.
+
+        Repeated keys are deleted once.
+
+        :type keys: list of :class:`gcloud.datastore.key.Key`
+        :param keys: The keys to be deleted from the datastore.
+
+        :rtype: :class:`BulkWriteResult`
+        :returns: The keys deleted and the chunks which failed.
+        :raises: :class:`ValueError` if any key is invalid for
+                 :meth:`Batch.delete <gcloud.datastore.batch.Batch.delete>`
+                 (nothing is deleted then), or if a batch or transaction is
+                 in progress.
+        """
+        return self._write(keys, Batch.delete, lambda key: key)
+
+    def _write(self, items, add_to_batch, key_of):
+        """Build one batch per chunk, then commit them concurrently.
+
+        :type items: list
+        :param items: Entities or keys.
+
+        :type add_to_batch: callable
+        :param add_to_batch: Unbound :class:`Batch` method adding an item.
+
+        :type key_of: callable
+        :param key_of: Returns the key of an item.
+
+        :rtype: :class:`BulkWriteResult`
+        :returns: The combined outcome of the commits.
+        """
+        if self._client.current_batch is not None:
+            raise ValueError(
+                'Bulk writes cannot be part of a batch or transaction')
+
+        # The same key in two concurrent commits would make the outcome
+        # depend on their order:  keep the last item for each key.
+        items = list(items)
+        last_index = dict(
+            (key_of(item), index) for index, item in enumerate(items))
+        items = [item for index, item in enumerate(items)
+                 if last_index[key_of(item)] == index]
+
+        chunks = []
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            batch = Batch(self._client)
+            for item in chunk:
+                add_to_batch(batch, item)
+            chunks.append((batch, chunk))
+
+        written = []
+        errors = []
+        outcomes = _map_concurrently(
+            lambda batch_and_chunk: self.commit_batch(batch_and_chunk[0]),
+            chunks, self._concurrency())
+        for (_, chunk), error in zip(chunks, outcomes):
+            # Read the keys only now: commits complete the partial ones.
+            keys = [key_of(item) for item in chunk]
+            if error is None:
+                written.extend(keys)
+            else:
+                errors.append((keys, error))
+        return BulkWriteResult(written, errors)
+
+    def _concurrency(self):
+        """Number of commits to run at once.
+
+        :rtype: int
+        :returns: :attr:`max_workers`, or ``1`` if the client's connection
+                  shares one ``http`` object between threads.
+        """
+        if self._client.connection.http_is_shared:
+            return 1
+        return self.max_workers
+
+    def commit_batches(self, batches, callback):
+        """Commit batches built by the caller, as they are produced.
+
+        At most as many batches as there are concurrent commits wait for
+        one, so that a lazy ``batches`` iterable is not read far ahead of
+        the commits.
+
+        :type batches: iterable of :class:`gcloud.datastore.batch.Batch`
+        :param batches: Batches which were not begun, each holding at most
+                        :attr:`batch_size` mutations.
+
+        :type callback: callable
+        :param callback: Called, possibly from a worker thread, with each
+                         batch and the error which made its commit fail
+                         (``None`` if it succeeded).  It must not raise.
+        """
+        max_workers = self._concurrency()
+        if max_workers <= 1:
+            for batch in batches:
+                callback(batch, self.commit_batch(batch))
+            return
+
+        pending = queue.Queue(maxsize=max_workers)
+
+        def _worker():
+            while True:
+                batch = pending.get()
+                if batch is None:
+                    return
+                callback(batch, self.commit_batch(batch))
+
+        workers = [threading.Thread(target=_worker)
+                   for _ in range(max_workers)]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        try:
+            for batch in batches:
+                pending.put(batch)
+        finally:
+            for _ in workers:
+                pending.put(None)
+            for worker in workers:
+                worker.join()
+
+    def commit_batch(self, batch):
+        """Commit a batch built by the caller, retrying as for other chunks.
+
+        :type batch: :class:`gcloud.datastore.batch.Batch`
+        :param batch: A batch which was not begun, holding at most
+                      :attr:`batch_size` mutations.
+
+        :rtype: :class:`Exception` or ``NoneType``
+        :returns: The error which made the commit fail, if any.
+        """
+        has_partial_keys = batch.has_partial_keys
+        attempt = 1
+        while True:
+            try:
+                batch.commit()
+            except _RETRYABLE_ERRORS as exc:
+                if attempt >= self.max_attempts or (
+                        has_partial_keys and
+                        isinstance(exc, ServiceUnavailable)):
+                    return exc
+                _SLEEP(self._backoff(attempt))
+                attempt += 1
+            except Exception as exc:  # pylint: disable=broad-except
+                return exc
+            else:
+                return None
+
+    def _backoff(self, attempt):
+        """Jittered exponential delay before a retry.
+
+        :type attempt: int
+        :param attempt: The number of the attempt which just failed.
+
+        :rtype: float
+        :returns: Seconds to wait.
+        """
+        delay = min(self.max_backoff,
+                    self.initial_backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
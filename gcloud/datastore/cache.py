@@ -0,0 +1,528 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Read-through entity caches for the datastore client.
+
+A cache passed to :class:`gcloud.datastore.client.Client` serves
+:meth:`~gcloud.datastore.client.Client.get` and
+:meth:`~gcloud.datastore.client.Client.get_multi` for keys it holds, and
+only looks up the others:
+
+.. code:: python
+
+    >>> from gcloud import datastore
+    >>> from gcloud.datastore.cache import LocalCache
+    >>> client = datastore.Client(cache=LocalCache(max_size=10000, ttl=60))
+    >>> entity = client.get(client.key('Person', 1234))  # looked up
+    >>> entity = client.get(client.key('Person', 1234))  # cached
+    >>> client.cache.stats.hits
+    1
+
+Entities written or deleted through the client (or any of its batches
+and transactions) are evicted once the commit returns.  Reads inside a
+transaction bypass the cache.  Writes made by other clients are not
+seen until the cached entities expire, so pick a ``ttl`` accordingly.
+
+An entity looked up while it is being written could be stored after the
+write evicted it.  The client guards against this with
+:attr:`EntityCache.generation`: a lookup is not cached if an entity was
+evicted from the same cache object since it started.  Writes evicting
+entities through another cache object, e.g. from another process sharing
+a :class:`MemcacheCache`, are not detected: a stale entity can then stay
+cached until it expires.  For this reason entities expire after
+:data:`DEFAULT_TTL` seconds unless another ``ttl`` is given.
+
+:class:`LocalCache` lives in the current process;  :class:`MemcacheCache`
+is shared by all processes talking to the same ``memcached`` server.
+"""
+
+import hashlib
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+import six
+
+from gcloud.datastore._generated import entity_pb2 as _entity_pb2
+from gcloud.datastore.key import Key
+
+
+DEFAULT_TTL = 300
+"""Default number of seconds an entity stays in a cache."""
+
+_NOW = time.time  # To be replaced by tests.
+
+
+def _cache_key(key):
+    """Identify a key in a cache.
+
+    :type key: :class:`gcloud.datastore.key.Key`
+    :param key: A complete key.
+
+    :rtype: tuple
+    :returns: A hashable value equal for keys naming the same entity.
+    """
+    return (key.project, key.namespace or None, key.flat_path)
+
+
+class CacheStats(object):
+    """Counters describing the use of an :class:`EntityCache`.
+
+    :type hits: int
+    :param hits: Keys served from the cache.
+
+    :type misses: int
+    :param misses: Keys not found in the cache.
+
+    :type sets: int
+    :param sets: Entities stored in the cache.
+
+    :type invalidations: int
+    :param invalidations: Keys evicted after a write.
+
+    :type evictions: int
+    :param evictions: Entities dropped because they expired or to make
+                      room for others.
+
+    :type errors: int
+    :param errors: Failed requests to a shared cache.
+    """
+
+    def __init__(self, hits=0, misses=0, sets=0, invalidations=0,
+                 evictions=0, errors=0):
+        self.hits = hits
+        self.misses = misses
+        self.sets = sets
+        self.invalidations = invalidations
+        self.evictions = evictions
+        self.errors = errors
+
+    def __repr__(self):
+        return ('<CacheStats hits=%d misses=%d sets=%d invalidations=%d '
+                'evictions=%d errors=%d>' % (
+                    self.hits, self.misses, self.sets, self.invalidations,
+                    self.evictions, self.errors))
+
+    @property
+    def hit_ratio(self):
+        """Fraction of the keys requested which were served by the cache.
+
+        :rtype: float
+        :returns: The ratio, or ``0.0`` if nothing was requested yet.
+        """
+        requests = self.hits + self.misses
+        if not requests:
+            return 0.0
+        return self.hits / float(requests)
+
+
+class EntityCache(object):
+    """Base class for entity caches.
+
+    Subclasses implement :meth:`_get`, :meth:`_set`, :meth:`_delete` and
+    :meth:`clear`;  this class maps keys and keeps the :attr:`stats`.
+    """
+
+    def __init__(self):
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+        # Orders evictions with the generation checks of set_multi().
+        self._write_lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        """Number of evictions through :meth:`delete_multi` so far.
+
+        Read it before looking entities up, and pass it to
+        :meth:`set_multi` to store them only if nothing was evicted since.
+
+        :rtype: int
+        :returns: The current generation.
+        """
+        return self._generation
+
+    def _record(self, **counts):
+        """Add to the counters in :attr:`stats`.
+
+        :type counts: dict
+        :param counts: Increments, by counter name.
+        """
+        with self._stats_lock:
+            for name, count in counts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + count)
+
+    def get_multi(self, keys):
+        """Retrieve cached entities.
+
+        :type keys: list of :class:`gcloud.datastore.key.Key`
+        :param keys: Complete keys to retrieve.
+
+        :rtype: dict
+        :returns: The cached ``Entity`` protobufs, by key, for the keys
+                  found in the cache.
+        """
+        cache_keys = dict((_cache_key(key), key) for key in keys)
+        found = self._get(list(cache_keys))
+        self._record(hits=len(found), misses=len(cache_keys) - len(found))
+        return dict((cache_keys[cache_key], entity_pb)
+                    for cache_key, entity_pb in found.items())
+
+    def set_multi(self, items, generation=None):
+        """Store entities in the cache.
+
+        :type items: list of tuples
+        :param items: ``(key, entity_pb)`` pairs, ``key`` being the
+                      :class:`gcloud.datastore.key.Key` of the
+                      ``Entity`` protobuf ``entity_pb``.  The protobufs
+                      must not be modified afterwards.
+
+        :type generation: int
+        :param generation: (Optional) The :attr:`generation` read before
+                           the entities were looked up.  If entities were
+                           evicted since, the lookup may predate a write:
+                           nothing is stored.
+        """
+        mapping = dict((_cache_key(key), entity_pb)
+                       for key, entity_pb in items)
+        if not mapping:
+            return
+        with self._write_lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._set(mapping)
+        self._record(sets=len(mapping))
+
+    def delete_multi(self, keys):
+        """Evict entities from the cache.
+
+        :type keys: list of :class:`gcloud.datastore.key.Key`
+        :param keys: Complete keys to evict.
+        """
+        cache_keys = set(_cache_key(key) for key in keys)
+        if cache_keys:
+            with self._write_lock:
+                self._generation += 1
+                self._delete(list(cache_keys))
+            self._record(invalidations=len(cache_keys))
+
+    def clear(self):
+        """Evict all entities from the cache."""
+        raise NotImplementedError
+
+    def _get(self, cache_keys):
+        """Retrieve cached entities.
+
+        :type cache_keys: list of tuple
+        :param cache_keys: Keys, as returned by :func:`_cache_key`.
+
+        :rtype: dict
+        :returns: ``Entity`` protobufs by cache key, for those found.
+        """
+        raise NotImplementedError
+
+    def _set(self, mapping):
+        """Store entities.
+
+        :type mapping: dict
+        :param mapping: ``Entity`` protobufs by cache key.
+        """
+        raise NotImplementedError
+
+    def _delete(self, cache_keys):
+        """Evict entities.
+
+        :type cache_keys: list of tuple
+        :param cache_keys: Keys, as returned by :func:`_cache_key`.
+        """
+        raise NotImplementedError
+
+
+class LocalCache(EntityCache):
+    """In-process cache, evicting the least recently used entities.
+
+    :type max_size: int
+    :param max_size: (Optional) Maximum number of entities held.
+
+    :type ttl: float
+    :param ttl: (Optional) Seconds an entity stays in the cache.  If
+                :data:`None`, entities stay until evicted.
+    """
+
+    def __init__(self, max_size=10000, ttl=DEFAULT_TTL):
+        if max_size < 1:
+            raise ValueError('max_size must be positive')
+        super(LocalCache, self).__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Evict all entities from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, cache_keys):
+        """Retrieve cached entities, refreshing their recency.
+
+        :type cache_keys: list of tuple
+        :param cache_keys: Keys, as returned by :func:`_cache_key`.
+
+        :rtype: dict
+        :returns: ``Entity`` protobufs by cache key, for those found.
+        """
+        now = _NOW()
+        found = {}
+        expired = 0
+        with self._lock:
+            for cache_key in cache_keys:
+                entry = self._entries.pop(cache_key, None)
+                if entry is None:
+                    continue
+                expires, entity_pb = entry
+                if expires is not None and expires <= now:
+                    expired += 1
+                    continue
+                # Re-inserting moves the entry to the most recent end.
+                self._entries[cache_key] = entry
+                found[cache_key] = entity_pb
+        if expired:
+            self._record(evictions=expired)
+        return found
+
+    def _set(self, mapping):
+        """Store entities, evicting the least recently used if full.
+
+        :type mapping: dict
+        :param mapping: ``Entity`` protobufs by cache key.
+        """
+        expires = None
+        if self.ttl is not None:
+            expires = _NOW() + self.ttl
+        evicted = 0
+        with self._lock:
+            for cache_key, entity_pb in mapping.items():
+                self._entries.pop(cache_key, None)
+                self._entries[cache_key] = (expires, entity_pb)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._record(evictions=evicted)
+
+    def _delete(self, cache_keys):
+        """Evict entities.
+
+        :type cache_keys: list of tuple
+        :param cache_keys: Keys, as returned by :func:`_cache_key`.
+        """
+        with self._lock:
+            for cache_key in cache_keys:
+                self._entries.pop(cache_key, None)
+
+
+class MemcacheCache(EntityCache):
+    """Cache shared through a ``memcached`` server, e.g. on the local host.
+
+    Speaks the ``memcached`` text protocol over a TCP or Unix domain
+    socket, with one connection per thread.  A cache which cannot be
+    reached is treated as empty, and failures are counted in
+    ``stats.errors``.
+
+    :type address: tuple or string
+    :param address: (Optional) ``(host, port)`` of the server, or the path
+                    of its Unix domain socket.
+
+    :type ttl: int
+    :param ttl: (Optional) Seconds an entity stays in the cache.  If
+                :data:`None`, entities stay until ``memcached`` evicts
+                them.
+
+    :type prefix: string
+    :param prefix: (Optional) Prefix of the keys used in ``memcached``,
+                   separating these entries from others in the server.
+
+    :type timeout: float
+    :param timeout: (Optional) Socket timeout, in seconds.
+    """
+
+    def __init__(self, address=('127.0.0.1', 11211), ttl=DEFAULT_TTL,
+                 prefix='gcloud-datastore:', timeout=1.0):
+        super(MemcacheCache, self).__init__()
+        self.address = address
+        self.ttl = ttl
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _memcache_key(self, cache_key):
+        """Map a cache key onto a ``memcached`` key.
+
+        :type cache_key: tuple
+        :param cache_key: A key, as returned by :func:`_cache_key`.
+
+        :rtype: bytes
+        :returns: A key without spaces or control characters.
+        """
+        project, namespace, flat_path = cache_key
+        # The serialized protobuf is the same on Python 2 and 3, for text
+        # and bytes names alike: unlike repr(), it can be shared.
+        key_pb = Key(*flat_path, project=project,
+                     namespace=namespace).to_protobuf()
+        digest = hashlib.sha1(key_pb.SerializeToString()).hexdigest()
+        return (self.prefix + digest).encode('ascii')
+
+    def _connection(self):
+        """Connection of the current thread, opened on first use.
+
+        :rtype: tuple
+        :returns: The socket and a file reading from it.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if isinstance(self.address, six.string_types):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except Exception:
+                sock.close()
+                raise
+            connection = self._local.connection = (sock, sock.makefile('rb'))
+        return connection
+
+    def _close(self):
+        """Drop the connection of the current thread, e.g. after errors."""
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            sock, reader = connection
+            reader.close()
+            sock.close()
+
+    def _request(self, command, read_reply):
+        """Send a command, then read its reply.
+
+        :type command: bytes
+        :param command: One or more complete commands.
+
+        :type read_reply: callable
+        :param read_reply: Reads the reply from a file-like object.
+
+        :rtype: object
+        :returns: The value returned by ``read_reply``, or ``None`` if the
+                  server could not be reached.
+        """
+        try:
+            sock, reader = self._connection()
+            sock.sendall(command)
+            return read_reply(reader)
+        except (socket.error, ValueError):
+            # Includes timeouts; the state of the stream is unknown.
+            self._close()
+            self._record(errors=1)
+
+    def clear(self):
+        """Evict all entities from the cache.
+
+        .. note::
+
+           This flushes the whole ``memcached`` server, including entries
+           stored under other prefixes.
+        """
+        self._request(b'flush_all\r\n', lambda reader: reader.readline())
+
+    def _get(self, cache_keys):
+        """Retrieve cached entities.
+
+        :type cache_keys: list of tuple
+        :param cache_keys: Keys, as returned by :func:`_cache_key`.
+
+        :rtype: dict
+        :returns: ``Entity`` protobufs by cache key, for those found.
+        """
+        by_memcache_key = dict(
+            (self._memcache_key(cache_key), cache_key)
+            for cache_key in cache_keys)
+        command = b'get ' + b' '.join(by_memcache_key) + b'\r\n'
+        values = self._request(command, _read_values) or {}
+        found = {}
+        for memcache_key, value in values.items():
+            cache_key = by_memcache_key.get(memcache_key)
+            if cache_key is not None:
+                found[cache_key] = _entity_pb2.Entity.FromString(value)
+        return found
+
+    def _set(self, mapping):
+        """Store entities.
+
+        :type mapping: dict
+        :param mapping: ``Entity`` protobufs by cache key.
+        """
+        exptime = int(self.ttl or 0)
+        commands = []
+        for cache_key, entity_pb in mapping.items():
+            value = entity_pb.SerializeToString()
+            commands.append(b'set ' + self._memcache_key(cache_key) +
+                            (' 0 %d %d noreply\r\n' % (
+                                exptime, len(value))).encode('ascii') +
+                            value + b'\r\n')
+        self._request(b''.join(commands), lambda reader: None)
+
+    def _delete(self, cache_keys):
+        """Evict entities.
+
+        Waits for the server to acknowledge the last deletion, so that
+        later reads cannot see the evicted entities.
+
+        :type cache_keys: list of tuple
+        :param cache_keys: Keys, as returned by :func:`_cache_key`.
+        """
+        commands = [b'delete ' + self._memcache_key(cache_key) +
+                    b' noreply\r\n' for cache_key in cache_keys]
+        # Any reply to a final, acknowledged command follows the others.
+        commands.append(b'version\r\n')
+        self._request(b''.join(commands), lambda reader: reader.readline())
+
+
+def _read_values(reader):
+    """Read the reply to a ``get`` command.
+
+    :type reader: file-like object
+    :param reader: Reads the reply.
+
+    :rtype: dict
+    :returns: Values by ``memcached`` key.
+    :raises: :class:`ValueError` if the reply is malformed.
+    """
+    values = {}
+    while True:
+        line = reader.readline()
+        if line == b'END\r\n':
+            return values
+        parts = line.split()
+        if len(parts) != 4 or parts[0] != b'VALUE':
+            raise ValueError('Unexpected memcached reply', line)
+        size = int(parts[3])
+        data = reader.read(size + 2)
+        if len(data) != size + 2:
+            raise ValueError('Truncated memcached reply')
+        values[parts[1]] = data[:size]
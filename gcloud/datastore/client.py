@@ -14,24 +14,39 @@
 """Convenience wrapper for invoking APIs/factories w/ a project."""
 
 import os
+import random
+import time
 
 from gcloud._helpers import _LocalStack
+from gcloud._helpers import _map_concurrently
 from gcloud._helpers import _determine_default_project as _base_default_project
 from gcloud.client import _ClientProjectMixin
 from gcloud.client import Client as _BaseClient
 from gcloud.datastore import helpers
 from gcloud.datastore.connection import Connection
 from gcloud.datastore.batch import Batch
+from gcloud.datastore.bulk import BulkWriter
 from gcloud.datastore.entity import Entity
 from gcloud.datastore.key import Key
 from gcloud.datastore.query import Query
+from gcloud.datastore.transaction import ContentionStats
 from gcloud.datastore.transaction import Transaction
 from gcloud.environment_vars import GCD_DATASET
+from gcloud.exceptions import Conflict
+from gcloud.exceptions import ServiceUnavailable
 
 
 _MAX_LOOPS = 128
 """Maximum number of iterations to wait for deferred keys."""
 
+_MAX_LOOKUP_KEYS = 1000
+"""Maximum number of keys the backend accepts in one ``lookup`` request."""
+
+_DEFAULT_MAX_WORKERS = 8
+"""Default number of concurrent requests for sharded operations."""
+
+_SLEEP = time.sleep  # To be replaced by tests.
+
 
 def _get_gcd_project():
     """Gets the GCD application ID if it can be inferred."""
@@ -142,6 +157,77 @@ def _extended_lookup(connection, project, key_pbs,
     return results
 
 
+def _sharded_lookup(connection, project, key_pbs, shard_size, max_workers,
+                    eventual=False, transaction_id=None):
+    """Look up keys in concurrent shards until none are deferred.
+
+    Helper function for :meth:`Client.get_multi_sharded`.
+
+    :type connection: :class:`gcloud.datastore.connection.Connection`
+    :param connection: The connection used to connect to datastore.
+
+    :type project: string
+    :param project: The project to make the request for.
+
+    :type key_pbs: list of :class:`gcloud.datastore._generated.entity_pb2.Key`
+    :param key_pbs: The keys to retrieve from the datastore.
+
+    :type shard_size: int
+    :param shard_size: Maximum number of keys in each ``lookup`` request.
+
+    :type max_workers: int
+    :param max_workers: Maximum number of concurrent requests.
+
+    :type eventual: bool
+    :param eventual: If False (the default), request ``STRONG`` read
+                     consistency.  If True, request ``EVENTUAL`` read
+                     consistency.
+
+    :type transaction_id: string
+    :param transaction_id: If passed, make the request in the scope of
+                           the given transaction.  Incompatible with
+                           ``eventual==True``.
+
+    :rtype: tuple
+    :returns: The entities found (a list of
+              :class:`gcloud.datastore._generated.entity_pb2.Entity`), and
+              the key protobufs still deferred after :data:`_MAX_LOOPS`
+              rounds.
+    :raises: :class:`ValueError` if ``shard_size`` is not positive.
+    """
+    if shard_size < 1:
+        raise ValueError('shard_size must be positive')
+
+    def _lookup(shard):
+        try:
+            return connection.lookup(
+                project=project,
+                key_pbs=shard,
+                eventual=eventual,
+                transaction_id=transaction_id,
+            )
+        finally:
+            # The next shard, maybe read by another worker, can reuse
+            # the transport and its open connections.
+            connection.release_http()
+
+    results = []
+
+    loop_num = 0
+    while key_pbs and loop_num < _MAX_LOOPS:
+        loop_num += 1
+        shards = [key_pbs[start:start + shard_size]
+                  for start in range(0, len(key_pbs), shard_size)]
+        key_pbs = []
+        for results_found, _, deferred_found in _map_concurrently(
+                _lookup, shards, max_workers):
+            results.extend(results_found)
+            # Retry only the deferred keys, re-sharded across workers.
+            key_pbs.extend(deferred_found)
+
+    return results, key_pbs
+
+
 class Client(_BaseClient, _ClientProjectMixin):
     """Convenience wrapper for invoking APIs/factories w/ a project.
 
@@ -162,14 +248,29 @@ class Client(_BaseClient, _ClientProjectMixin):
     :param http: An optional HTTP object to make requests. If not passed, an
                  ``http`` object is created that is bound to the
                  ``credentials`` for the current object.
+
+    :type cache: :class:`gcloud.datastore.cache.EntityCache`
+    :param cache: (optional) Cache serving :meth:`get` and :meth:`get_multi`
+                  outside of transactions.  Entities written through this
+                  client are evicted from it.
+
+    :type use_grpc: bool
+    :param use_grpc: (optional) If True, talk to the API over gRPC, with a
+                     :class:`gcloud.datastore.grpc_connection.GrpcConnection`
+                     (requires ``grpcio``).  ``http`` is then ignored.
     """
     _connection_class = Connection
 
     def __init__(self, project=None, namespace=None,
-                 credentials=None, http=None):
+                 credentials=None, http=None, cache=None, use_grpc=False):
         _ClientProjectMixin.__init__(self, project=project)
         self.namespace = namespace
+        self.cache = cache
+        self.contention_stats = ContentionStats()
         self._batch_stack = _LocalStack()
+        if use_grpc:
+            from gcloud.datastore.grpc_connection import GrpcConnection
+            self._connection_class = GrpcConnection
         super(Client, self).__init__(credentials, http)
 
     @staticmethod
@@ -277,7 +378,8 @@ class Client(_BaseClient, _ClientProjectMixin):
                             If not passed, uses current transaction, if set.
 
         :rtype: list of :class:`gcloud.datastore.entity.Entity`
-        :returns: The requested entities.
+        :returns: The requested entities.  With a :attr:`cache`, those
+                  served from it come first.
         :raises: :class:`ValueError` if one or more of ``keys`` has a project
                  which does not match our project.
         """
@@ -292,6 +394,18 @@ class Client(_BaseClient, _ClientProjectMixin):
         if transaction is None:
             transaction = self.current_transaction
 
+        cached_pbs = []
+        use_cache = self.cache is not None and transaction is None
+        if use_cache:
+            # Read first: entities evicted from now on are not cached.
+            generation = self.cache.generation
+            cached = self.cache.get_multi(keys)
+            cached_pbs = list(cached.values())
+            keys = [key for key in keys if key not in cached]
+            if not keys:
+                return [helpers.entity_from_protobuf(entity_pb)
+                        for entity_pb in cached_pbs]
+
         entity_pbs = _extended_lookup(
             connection=self.connection,
             project=self.project,
@@ -311,8 +425,108 @@ class Client(_BaseClient, _ClientProjectMixin):
                 helpers.key_from_protobuf(deferred_pb)
                 for deferred_pb in deferred]
 
-        return [helpers.entity_from_protobuf(entity_pb)
-                for entity_pb in entity_pbs]
+        entities = [helpers.entity_from_protobuf(entity_pb)
+                    for entity_pb in cached_pbs + entity_pbs]
+        if use_cache:
+            self.cache.set_multi(
+                ((entity.key, entity_pb) for entity, entity_pb in
+                 zip(entities[len(cached_pbs):], entity_pbs)),
+                generation=generation)
+        return entities
+
+    def get_multi_sharded(self, keys, shard_size=_MAX_LOOKUP_KEYS,
+                          max_workers=_DEFAULT_MAX_WORKERS, transaction=None,
+                          deferred=None):
+        """Retrieve entities concurrently, in the order of the keys.
+
+        Splits ``keys`` into shards of at most ``shard_size`` keys and
+        issues up to ``max_workers`` ``lookup`` requests at once.  Keys the
+        backend defers are re-sharded and retried in parallel until all
+        are resolved, or until :data:`_MAX_LOOPS` rounds were made.
+
+        Each worker thread sends its requests with its own ``http``
+        object.  An ``http`` object passed to the client cannot be copied
+        and is not thread-safe, so the requests are then sent one at a
+        time.
+
+        :type keys: list of :class:`gcloud.datastore.key.Key`
+        :param keys: The keys to be retrieved from the datastore.
+
+        :type shard_size: int
+        :param shard_size: (Optional) Maximum number of keys in each
+                           ``lookup`` request.
+
+        :type max_workers: int
+        :param max_workers: (Optional) Maximum number of concurrent
+                            requests.
+
+        :type transaction: :class:`gcloud.datastore.transaction.Transaction`
+        :param transaction: (Optional) Transaction to use for read consistency.
+                            If not passed, uses current transaction, if set.
+
+        :type deferred: list
+        :param deferred: (Optional) If a list is passed, the keys which the
+                         backend still defers after retrying are copied
+                         into it, and are ``None`` in the result.
+
+        :rtype: list
+        :returns: For each key in ``keys``, the
+                  :class:`gcloud.datastore.entity.Entity` retrieved, or
+                  ``None`` if it is missing.
+        :raises: :class:`ValueError` if one or more of ``keys`` has a project
+                 which does not match our project, or if ``deferred`` is
+                 not null or an empty list.
+                 :class:`gcloud.exceptions.ServiceUnavailable` if keys are
+                 still deferred after retrying and ``deferred`` is not
+                 passed.
+        """
+        if deferred is not None and deferred != []:
+            raise ValueError('deferred must be None or an empty list')
+
+        if not keys:
+            return []
+
+        ids = set(key.project for key in keys)
+        for current_id in ids:
+            if current_id != self.project:
+                raise ValueError('Keys do not match project')
+
+        if transaction is None:
+            transaction = self.current_transaction
+
+        key_pbs = [key.to_protobuf() for key in keys]
+        positions = {}
+        for index, key_pb in enumerate(key_pbs):
+            # Round-trip so keys compare equal to those in the response.
+            key = helpers.key_from_protobuf(key_pb)
+            positions.setdefault(key, []).append(index)
+
+        if self.connection.http_is_shared:
+            max_workers = 1
+
+        entity_pbs, deferred_pbs = _sharded_lookup(
+            connection=self.connection,
+            project=self.project,
+            key_pbs=key_pbs,
+            shard_size=shard_size,
+            max_workers=max_workers,
+            transaction_id=transaction and transaction.id,
+        )
+
+        if deferred_pbs:
+            if deferred is None:
+                raise ServiceUnavailable(
+                    '%d keys still deferred after %d lookups' % (
+                        len(deferred_pbs), _MAX_LOOPS))
+            deferred.extend(helpers.key_from_protobuf(deferred_pb)
+                            for deferred_pb in deferred_pbs)
+
+        results = [None] * len(keys)
+        for entity_pb in entity_pbs:
+            entity = helpers.entity_from_protobuf(entity_pb)
+            for index in positions.get(entity.key, ()):
+                results[index] = entity
+        return results
 
     def put(self, entity):
         """Save an entity in the Cloud Datastore.
@@ -435,9 +649,87 @@ class Client(_BaseClient, _ClientProjectMixin):
         """Proxy to :class:`gcloud.datastore.batch.Batch`."""
         return Batch(self)
 
-    def transaction(self):
-        """Proxy to :class:`gcloud.datastore.transaction.Transaction`."""
-        return Transaction(self)
+    def transaction(self, *args, **kwargs):
+        """Proxy to :class:`gcloud.datastore.transaction.Transaction`.
+
+        Passes our ``client`` and ``args`` / ``kwargs`` on to the
+        transaction.
+        """
+        return Transaction(self, *args, **kwargs)
+
+    def run_in_transaction(self, func, retries=3, read_only=False,
+                           initial_backoff=0.1, max_backoff=10.0):
+        """Call a function in a transaction, retrying it on contention.
+
+        ``func`` is called with the transaction, inside of which the
+        client's reads and writes run.  If the transaction aborts
+        because of contention, the function is called again in a new
+        transaction after a jittered, exponentially growing delay:
+
+        .. code:: python
+
+          >>> def transfer(transaction):
+          ...     source, target = client.get_multi([source_key, target_key])
+          ...     source['balance'] -= 10
+          ...     target['balance'] += 10
+          ...     client.put_multi([source, target])
+          >>> client.run_in_transaction(transfer)
+
+        Since it may run several times, ``func`` should have no other side
+        effects.  Aborted attempts are counted in
+        :attr:`contention_stats`.
+
+        :type func: callable
+        :param func: Called with the
+                     :class:`gcloud.datastore.transaction.Transaction`.
+
+        :type retries: int
+        :param retries: (Optional) Number of times ``func`` is re-run after
+                        an aborted transaction.
+
+        :type read_only: bool
+        :param read_only: (Optional) Use a read-only transaction, which
+                          cannot abort on commit.
+
+        :type initial_backoff: float
+        :param initial_backoff: (Optional) Seconds to wait before the first
+                                retry, doubled for each further one.
+
+        :type max_backoff: float
+        :param max_backoff: (Optional) Upper bound on the wait, in seconds.
+
+        :rtype: object
+        :returns: The value returned by ``func``.
+        :raises: :class:`ValueError` if a transaction is already active;
+                 :class:`gcloud.exceptions.Conflict` if the last attempt
+                 aborted.
+        """
+        if self.current_transaction is not None:
+            raise ValueError('Transactions cannot be nested')
+
+        attempt = 0
+        while True:
+            transaction = self.transaction(read_only=read_only)
+            try:
+                with transaction:
+                    result = func(transaction)
+            except Conflict:
+                self.contention_stats.record_abort(transaction)
+                if attempt >= retries:
+                    raise
+                delay = min(max_backoff, initial_backoff * 2 ** attempt)
+                _SLEEP(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+            else:
+                self.contention_stats.record_commit()
+                return result
+
+    def bulk_writer(self, *args, **kwargs):
+        """Proxy to :class:`gcloud.datastore.bulk.BulkWriter`.
+
+        Passes our ``client`` and ``args`` / ``kwargs`` on to the writer.
+        """
+        return BulkWriter(self, *args, **kwargs)
 
     def query(self, **kwargs):
         """Proxy to :class:`gcloud.datastore.query.Query`.
@@ -15,9 +15,21 @@
 """Class for representing a single entity in the Cloud Datastore."""
 
 
+import six
+
 from gcloud._helpers import _ensure_tuple_or_list
 
 
+_LAZY = not six.PY2
+"""Whether :class:`LazyEntity` can defer converting its properties.
+
+On Python 2, ``dict(entity)``, ``dict.update(entity)`` and ``**entity``
+copy the storage of a ``dict`` subclass directly, bypassing
+``__getitem__``: placeholders for unconverted values would leak out, so
+the properties are converted up front there.
+"""
+
+
 class Entity(dict):
     """Entities are akin to rows in a relational database
 
@@ -140,3 +152,181 @@ class Entity(dict):
                                       super(Entity, self).__repr__())
         else:
             return '<Entity %s>' % (super(Entity, self).__repr__())
+
+
+class LazyEntity(Entity):
+    """An entity converting its properties from protobuf on first access.
+
+    Returned by :func:`gcloud.datastore.helpers.entity_from_protobuf` (and
+    by queries) when asked to be ``lazy``.  It behaves like an
+    :class:`Entity`, but a property value is only converted when it is
+    read; methods reading all values (``items()``, ``values()``, ``==``,
+    ``dict(entity)``, ...) convert them all.  When saved, properties which
+    were never read are copied back from their original protobufs.
+
+    .. note::
+
+        On Python 2 all properties are converted when the entity is
+        created, since ``dict(entity)`` and ``**entity`` read the
+        ``dict`` storage directly there.
+
+    :type key: :class:`gcloud.datastore.key.Key`
+    :param key: Optional key to be set on entity.
+
+    :type value_pbs: iterable of (string, ``Value``) pairs
+    :param value_pbs: Names and
+                      :class:`gcloud.datastore._generated.entity_pb2.Value`
+                      protobufs of the entity's properties.
+    """
+
+    def __init__(self, key=None, value_pbs=()):
+        super(LazyEntity, self).__init__(key=key)
+        self._value_pbs = dict(value_pbs)
+        for name in self._value_pbs:
+            dict.__setitem__(self, name, None)
+        if not _LAZY:
+            self._decode_all()
+
+    def _decode(self, name):
+        """Convert a property from its protobuf and store it.
+
+        :type name: string
+        :param name: The name of a property not yet converted.
+
+        :rtype: object
+        :returns: The converted value.
+        """
+        # ``helpers`` imports this module.
+        from gcloud.datastore.helpers import _decode_property
+        value, meaning, excluded = _decode_property(self._value_pbs[name])
+        del self._value_pbs[name]
+        if meaning is not None:
+            self._meanings[name] = (meaning, value)
+        if excluded:
+            self._exclude_from_indexes.add(name)
+        dict.__setitem__(self, name, value)
+        return value
+
+    def _forget(self, name):
+        """Drop the protobuf of a property being replaced or removed.
+
+        Its index exclusion is kept, as for a converted property.
+
+        :type name: string
+        :param name: The name of a property.
+        """
+        value_pb = self._value_pbs.pop(name, None)
+        if value_pb is not None:
+            from gcloud.datastore.helpers import _is_excluded_from_indexes
+            if _is_excluded_from_indexes(value_pb):
+                self._exclude_from_indexes.add(name)
+
+    def _decode_all(self):
+        """Convert all properties not yet converted."""
+        for name in list(self._value_pbs):
+            self._decode(name)
+
+    @property
+    def exclude_from_indexes(self):
+        """Names of fields which are *not* to be indexed for this entity.
+
+        :rtype: sequence of field names
+        """
+        # Check the protobufs without converting their values.
+        from gcloud.datastore.helpers import _is_excluded_from_indexes
+        return frozenset(self._exclude_from_indexes).union(
+            name for name, value_pb in self._value_pbs.items()
+            if _is_excluded_from_indexes(value_pb))
+
+    def __getitem__(self, name):
+        if name in self._value_pbs:
+            return self._decode(name)
+        return super(LazyEntity, self).__getitem__(name)
+
+    def __setitem__(self, name, value):
+        self._forget(name)
+        super(LazyEntity, self).__setitem__(name, value)
+
+    def __delitem__(self, name):
+        self._forget(name)
+        super(LazyEntity, self).__delitem__(name)
+
+    def __iter__(self):  # pylint: disable=useless-super-delegation
+        # On Python 3, overriding ``__iter__`` makes ``dict(entity)`` and
+        # ``**entity`` go through ``__getitem__`` rather than reading the
+        # raw storage.  Python 2 ignores it: see :data:`_LAZY`.
+        return super(LazyEntity, self).__iter__()
+
+    def __eq__(self, other):
+        self._decode_all()
+        if isinstance(other, LazyEntity):
+            other._decode_all()
+        return super(LazyEntity, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        self._decode_all()
+        return super(LazyEntity, self).__repr__()
+
+    def get(self, name, default=None):
+        """Get a property value, or ``default`` if it is not set."""
+        if name in self:
+            return self[name]
+        return default
+
+    def setdefault(self, name, default=None):
+        """Get a property value, setting it to ``default`` if not set."""
+        if name in self:
+            return self[name]
+        self[name] = default
+        return default
+
+    def pop(self, name, *default):
+        """Remove a property, returning its value."""
+        if name in self._value_pbs:
+            self._decode(name)
+        return super(LazyEntity, self).pop(name, *default)
+
+    def update(self, *args, **kwargs):
+        """Set properties from a mapping / iterable and keyword arguments."""
+        for name, value in six.iteritems(dict(*args, **kwargs)):
+            self[name] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        """Remove all properties."""
+        for name in list(self._value_pbs):
+            self._forget(name)
+        super(LazyEntity, self).clear()
+
+
+def _decoding(method_name):
+    """Wrap a method of :class:`Entity` to convert all properties first.
+
+    :type method_name: string
+    :param method_name: The name of the method.
+
+    :rtype: callable
+    :returns: The wrapped method.
+    """
+    method = getattr(Entity, method_name)
+
+    def _method(self, *args, **kwargs):
+        self._decode_all()
+        return method(self, *args, **kwargs)
+
+    _method.__name__ = method_name
+    _method.__doc__ = method.__doc__
+    return _method
+
+
+for _method_name in ('items', 'values', 'copy', 'popitem', 'iteritems',
+                     'itervalues', 'viewitems', 'viewvalues', '__or__',
+                     '__ror__'):
+    if hasattr(Entity, _method_name):
+        setattr(LazyEntity, _method_name, _decoding(_method_name))
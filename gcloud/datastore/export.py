@@ -0,0 +1,424 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Stream entities between the datastore and local files.
+
+:func:`export_entities` writes the results of a query to a file, and
+:func:`import_entities` writes them back to the datastore:
+
+.. code:: python
+
+    >>> from gcloud import datastore
+    >>> from gcloud.datastore.export import export_entities, import_entities
+    >>> client = datastore.Client()
+    >>> export_entities(client.query(kind='Person'), 'people.pb.gz',
+    ...                 compression='gzip')
+    1234
+    >>> result = import_entities(client, 'people.pb.gz', compression='gzip')
+    >>> result.imported
+    1234
+
+Entities are copied as ``Entity`` protobufs, without being converted to
+:class:`gcloud.datastore.entity.Entity` objects, and only a few pages or
+chunks of them are held in memory at once, however large the kind.
+
+Two formats are supported:
+
+* :data:`PROTOBUF`: each serialized protobuf, prefixed by its length as
+  a varint (as with ``writeDelimitedTo`` in the Java protobuf library).
+* :data:`JSONL`: one protobuf per line, in the protobuf JSON mapping.
+"""
+
+import bz2
+import gzip
+import io
+import json
+import threading
+
+from google.protobuf import json_format
+import six
+
+from gcloud.datastore import helpers
+from gcloud.datastore._generated import entity_pb2 as _entity_pb2
+from gcloud.datastore.batch import Batch
+from gcloud.datastore.query import Iterator
+
+
+PROTOBUF = 'protobuf'
+"""Format of length-delimited, serialized ``Entity`` protobufs."""
+
+JSONL = 'jsonl'
+"""Format of ``Entity`` protobufs as JSON, one per line."""
+
+_COMPRESSIONS = (None, 'gzip', 'bz2')
+
+
+class ImportResult(object):
+    """Outcome of :func:`import_entities`.
+
+    :type imported: int
+    :param imported: Number of entities written.
+
+    :type errors: list of tuple
+    :param errors: ``(keys, exception)`` pairs for the chunks which could
+                   not be committed.
+    """
+
+    def __init__(self, imported, errors):
+        self.imported = imported
+        self.errors = errors
+
+    @property
+    def failed(self):
+        """Keys of the chunks which could not be committed.
+
+        :rtype: list of :class:`gcloud.datastore.key.Key`
+        :returns: The keys not written.
+        """
+        return [key for keys, _ in self.errors for key in keys]
+
+
+class _ProtobufIterator(Iterator):
+    """Query iterator yielding ``Entity`` protobufs, as returned."""
+
+    def _decode_page(self, entity_pbs):
+        """Leave the entity protobufs of a page as they are.
+
+        :type entity_pbs: list of :class:`._generated.entity_pb2.Entity`
+        :param entity_pbs: The entities returned by the backend.
+
+        :rtype: list of :class:`._generated.entity_pb2.Entity`
+        :returns: ``entity_pbs``.
+        """
+        return entity_pbs
+
+
+def _open(path_or_file, mode, compression):
+    """Open a file, (de)compressing it as requested.
+
+    :type path_or_file: string or file-like object
+    :param path_or_file: A path, or a file opened in binary mode.
+
+    :type mode: string
+    :param mode: ``'rb'`` or ``'wb'``.
+
+    :type compression: string or ``NoneType``
+    :param compression: ``None``, ``'gzip'`` or ``'bz2'``.
+
+    :rtype: tuple
+    :returns: The file-like object to use, and whether it should be closed
+              once done.
+    :raises: :class:`ValueError` if ``compression`` is not supported.
+    """
+    if compression not in _COMPRESSIONS:
+        raise ValueError('Unsupported compression: %r' % (compression,))
+    if isinstance(path_or_file, six.string_types):
+        if compression == 'gzip':
+            return gzip.open(path_or_file, mode), True
+        if compression == 'bz2':
+            return bz2.BZ2File(path_or_file, mode), True
+        return io.open(path_or_file, mode), True
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=path_or_file, mode=mode), True
+    if compression == 'bz2':
+        # Closing the wrapper flushes it, leaving ``path_or_file`` open.
+        return bz2.BZ2File(path_or_file, mode), True
+    return path_or_file, False
+
+
+def _encode_varint(value):
+    """Encode a non-negative integer as a protobuf varint.
+
+    :type value: int
+    :param value: The integer to encode.
+
+    :rtype: bytes
+    :returns: The encoded integer.
+    """
+    encoded = bytearray()
+    while value > 0x7f:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _read_varint(stream):
+    """Read a protobuf varint.
+
+    :type stream: file-like object
+    :param stream: A file opened in binary mode.
+
+    :rtype: int or ``NoneType``
+    :returns: The decoded integer, or ``None`` at the end of the file.
+    :raises: :class:`ValueError` if the file ends inside the varint.
+    """
+    value = shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise ValueError('Truncated length prefix')
+            return None
+        byte = six.indexbytes(byte, 0)
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value
+        shift += 7
+
+
+def _write_entities(entity_pbs, stream, file_format):
+    """Write entity protobufs to a file.
+
+    :type entity_pbs: iterable of :class:`._generated.entity_pb2.Entity`
+    :param entity_pbs: The entities to write.
+
+    :type stream: file-like object
+    :param stream: A file opened in binary mode.
+
+    :type file_format: string
+    :param file_format: :data:`PROTOBUF` or :data:`JSONL`.
+
+    :rtype: int
+    :returns: The number of entities written.
+    """
+    count = 0
+    for entity_pb in entity_pbs:
+        if file_format == PROTOBUF:
+            data = entity_pb.SerializeToString()
+            stream.write(_encode_varint(len(data)) + data)
+        else:
+            line = json.dumps(json_format.MessageToDict(entity_pb),
+                              separators=(',', ':'))
+            stream.write(line.encode('utf-8') + b'\n')
+        count += 1
+    return count
+
+
+def _read_entities(stream, file_format):
+    """Read entity protobufs from a file.
+
+    :type stream: file-like object
+    :param stream: A file opened in binary mode.
+
+    :type file_format: string
+    :param file_format: :data:`PROTOBUF` or :data:`JSONL`.
+
+    :rtype: iterator of :class:`._generated.entity_pb2.Entity`
+    :returns: The entities, as they are read.
+    :raises: :class:`ValueError` if the file is truncated.
+    """
+    if file_format == PROTOBUF:
+        while True:
+            size = _read_varint(stream)
+            if size is None:
+                return
+            data = stream.read(size)
+            if len(data) != size:
+                raise ValueError('Truncated entity')
+            yield _entity_pb2.Entity.FromString(data)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json_format.ParseDict(json.loads(line.decode('utf-8')),
+                                            _entity_pb2.Entity())
+
+
+def _check_format(file_format):
+    """Validate a file format.
+
+    :type file_format: string
+    :param file_format: The format to check.
+
+    :raises: :class:`ValueError` if ``file_format`` is not supported.
+    """
+    if file_format not in (PROTOBUF, JSONL):
+        raise ValueError('Unsupported format: %r' % (file_format,))
+
+
+def export_entities(query, destination, file_format=PROTOBUF,
+                    compression=None, client=None, prefetch=1):
+    """Write the results of a query to a file.
+
+    :type query: :class:`gcloud.datastore.query.Query`
+    :param query: The query whose results are exported.
+
+    :type destination: string or file-like object
+    :param destination: A path, or a file opened for writing in binary
+                        mode (left open).
+
+    :type file_format: string
+    :param file_format: (Optional) :data:`PROTOBUF` or :data:`JSONL`.
+
+    :type compression: string
+    :param compression: (Optional) ``'gzip'`` or ``'bz2'``.
+
+    :type client: :class:`gcloud.datastore.client.Client`
+    :param client: (Optional) Client used to run the query.  If not
+                   supplied, uses the query's value.
+
+    :type prefetch: int
+    :param prefetch: (Optional) Number of pages fetched in the background
+                     while others are written, as for
+                     :meth:`gcloud.datastore.query.Query.fetch`.
+
+    :rtype: int
+    :returns: The number of entities exported.
+    :raises: :class:`ValueError` if ``file_format`` or ``compression`` is not
+             supported.
+    """
+    _check_format(file_format)
+    if client is None:
+        client = query._client
+    stream, close = _open(destination, 'wb', compression)
+    try:
+        return _write_entities(
+            _ProtobufIterator(query, client, prefetch=prefetch), stream,
+            file_format)
+    finally:
+        if close:
+            stream.close()
+
+
+def _failed_keys(batch):
+    """Keys of the entities of a batch which could not be committed.
+
+    :type batch: :class:`gcloud.datastore.batch.Batch`
+    :param batch: The batch.
+
+    :rtype: list of :class:`gcloud.datastore.key.Key`
+    :returns: The keys, in the order of the batch's mutations.
+    """
+    return [helpers.key_from_protobuf(mutation_pb.upsert.key)
+            for mutation_pb in batch.mutations]
+
+
+def import_entities(client, source, file_format=PROTOBUF, compression=None,
+                    **kwargs):
+    """Write entities read from a file to the datastore.
+
+    Entities are upserted, in chunks committed concurrently by a
+    :class:`gcloud.datastore.bulk.BulkWriter`.  Their keys are moved into
+    the client's project, keeping their namespace, and so are the keys
+    they hold in properties (including in arrays and embedded entities)
+    which were in the same project as the entity.  Keys of other projects
+    are left as they are.
+
+    :type client: :class:`gcloud.datastore.client.Client`
+    :param client: The client used to write the entities.
+
+    :type source: string or file-like object
+    :param source: A path, or a file opened for reading in binary mode
+                   (left open).
+
+    :type file_format: string
+    :param file_format: (Optional) :data:`PROTOBUF` or :data:`JSONL`.
+
+    :type compression: string
+    :param compression: (Optional) ``'gzip'`` or ``'bz2'``.
+
+    :type kwargs: dict
+    :param kwargs: (Optional) Passed to
+                   :meth:`gcloud.datastore.client.Client.bulk_writer`, e.g.
+                   ``batch_size``, ``max_workers`` or ``max_attempts``.
+
+    :rtype: :class:`ImportResult`
+    :returns: The number of entities written and the chunks which failed.
+    :raises: :class:`ValueError` if ``file_format`` or ``compression`` is not
+             supported, if the file is malformed (after the chunks read
+             until then are committed), or if a batch or transaction is in
+             progress.
+    """
+    _check_format(file_format)
+    if client.current_batch is not None:
+        raise ValueError('Imports cannot be part of a batch or transaction')
+    writer = client.bulk_writer(**kwargs)
+
+    lock = threading.Lock()
+    outcome = ImportResult(0, [])
+
+    def _record(batch, error):
+        with lock:
+            if error is None:
+                outcome.imported += len(batch.mutations)
+            else:
+                outcome.errors.append((_failed_keys(batch), error))
+
+    stream, close = _open(source, 'rb', compression)
+    try:
+        batches = _batches(client, _read_entities(stream, file_format),
+                           writer.batch_size)
+        writer.commit_batches(batches, _record)
+    finally:
+        if close:
+            stream.close()
+    return outcome
+
+
+def _batches(client, entity_pbs, batch_size):
+    """Group entity protobufs into batches upserting them.
+
+    :type client: :class:`gcloud.datastore.client.Client`
+    :param client: The client whose project the entities are moved into.
+
+    :type entity_pbs: iterable of :class:`._generated.entity_pb2.Entity`
+    :param entity_pbs: The entities.
+
+    :type batch_size: int
+    :param batch_size: Maximum number of entities in each batch.
+
+    :rtype: iterator of :class:`gcloud.datastore.batch.Batch`
+    :returns: The batches, built as they are consumed.
+    """
+    batch = None
+    for entity_pb in entity_pbs:
+        if batch is None:
+            batch = Batch(client)
+        _move_keys(entity_pb, entity_pb.key.partition_id.project_id,
+                   client.project)
+        batch.put_entity_pb(entity_pb)
+        if len(batch.mutations) >= batch_size:
+            yield batch
+            batch = None
+    if batch is not None:
+        yield batch
+
+
+def _move_keys(entity_pb, source_project, project):
+    """Move the key of an entity and the keys it holds to another project.
+
+    :type entity_pb: :class:`._generated.entity_pb2.Entity`
+    :param entity_pb: The entity, modified in place.
+
+    :type source_project: string
+    :param source_project: The project whose keys are moved.
+
+    :type project: string
+    :param project: The project the keys are moved into.
+    """
+    if (entity_pb.HasField('key') and
+            entity_pb.key.partition_id.project_id == source_project):
+        entity_pb.key.partition_id.project_id = project
+    pending = list(entity_pb.properties.values())
+    while pending:
+        value_pb = pending.pop()
+        value_type = value_pb.WhichOneof('value_type')
+        if value_type == 'key_value':
+            partition_id = value_pb.key_value.partition_id
+            if partition_id.project_id == source_project:
+                partition_id.project_id = project
+        elif value_type == 'entity_value':
+            _move_keys(value_pb.entity_value, source_project, project)
+        elif value_type == 'array_value':
+            pending.extend(value_pb.array_value.values)
@@ -0,0 +1,353 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""gRPC transport for the Cloud Datastore API.
+
+:class:`GrpcConnection` sends the same protobufs as
+:class:`gcloud.datastore.connection.Connection`, over a pool of HTTP/2
+channels rather than one HTTP/1.1 socket per request:
+
+.. code:: python
+
+    >>> from gcloud import datastore
+    >>> client = datastore.Client(use_grpc=True)
+
+or, to tune the pool and deadlines:
+
+.. code:: python
+
+    >>> from gcloud.datastore.grpc_connection import GrpcConnection
+    >>> client.connection = GrpcConnection(
+    ...     credentials=client.connection.credentials, pool_size=8,
+    ...     timeouts={'runQuery': 300})
+
+If ``DATASTORE_HOST`` is set, the connection talks plaintext to the
+emulator at that address instead, without credentials.
+
+.. note::
+
+    Requires the ``grpcio`` package, version 1.19.0 or later (``pip
+    install gcloud[grpc]``):  earlier versions have no
+    ``grpc.use_local_subchannel_pool`` option, so the channels of the
+    pool would share one connection.
+"""
+
+import itertools
+import os
+import threading
+
+import grpc
+import httplib2
+from six.moves.urllib.parse import urlsplit
+
+from gcloud.datastore._generated import datastore_pb2 as _datastore_pb2
+from gcloud.datastore.connection import Connection
+from gcloud.environment_vars import GCD_HOST
+from gcloud.exceptions import make_exception
+from gcloud.flow_control import GuardedStub
+
+
+SERVICE_NAME = 'google.datastore.v1beta3.Datastore'
+"""Fully-qualified name of the Cloud Datastore gRPC service."""
+
+DATASTORE_API_HOST = 'datastore.googleapis.com'
+"""Cloud Datastore gRPC API host."""
+
+DATASTORE_API_PORT = 443
+"""Cloud Datastore gRPC API port."""
+
+DEFAULT_POOL_SIZE = 4
+"""Number of channels a connection opens, each with its own HTTP/2 link."""
+
+DEFAULT_TIMEOUT_SECONDS = 60.0
+"""Default deadline of each RPC, counted from when it is sent."""
+
+_METHODS = {
+    'lookup': ('Lookup', _datastore_pb2.LookupRequest,
+               _datastore_pb2.LookupResponse),
+    'runQuery': ('RunQuery', _datastore_pb2.RunQueryRequest,
+                 _datastore_pb2.RunQueryResponse),
+    'beginTransaction': ('BeginTransaction',
+                         _datastore_pb2.BeginTransactionRequest,
+                         _datastore_pb2.BeginTransactionResponse),
+    'commit': ('Commit', _datastore_pb2.CommitRequest,
+               _datastore_pb2.CommitResponse),
+    'rollback': ('Rollback', _datastore_pb2.RollbackRequest,
+                 _datastore_pb2.RollbackResponse),
+    'allocateIds': ('AllocateIds', _datastore_pb2.AllocateIdsRequest,
+                    _datastore_pb2.AllocateIdsResponse),
+}
+"""Map of the HTTP API method names to the gRPC ones and their messages."""
+
+_STATUS_CODE_TO_HTTP = {
+    grpc.StatusCode.CANCELLED: 499,
+    grpc.StatusCode.UNKNOWN: 500,
+    grpc.StatusCode.INVALID_ARGUMENT: 400,
+    grpc.StatusCode.DEADLINE_EXCEEDED: 504,
+    grpc.StatusCode.NOT_FOUND: 404,
+    grpc.StatusCode.ALREADY_EXISTS: 409,
+    grpc.StatusCode.PERMISSION_DENIED: 403,
+    grpc.StatusCode.UNAUTHENTICATED: 401,
+    grpc.StatusCode.RESOURCE_EXHAUSTED: 429,
+    grpc.StatusCode.FAILED_PRECONDITION: 400,
+    grpc.StatusCode.ABORTED: 409,
+    grpc.StatusCode.OUT_OF_RANGE: 400,
+    grpc.StatusCode.UNIMPLEMENTED: 501,
+    grpc.StatusCode.INTERNAL: 500,
+    grpc.StatusCode.UNAVAILABLE: 503,
+    grpc.StatusCode.DATA_LOSS: 500,
+}
+"""HTTP status returned by the JSON API for each gRPC status code."""
+
+
+class _MetadataPlugin(object):
+    """Callable class adding authorization to gRPC request metadata.
+
+    :type connection: :class:`GrpcConnection`
+    :param connection: The connection providing credentials and user agent.
+    """
+
+    def __init__(self, connection):
+        self._credentials = connection.credentials
+        self._user_agent = connection.USER_AGENT
+
+    def __call__(self, unused_context, callback):
+        """Adds authorization header to request metadata."""
+        access_token = self._credentials.get_access_token().access_token
+        headers = [
+            ('authorization', 'Bearer ' + access_token),
+            ('user-agent', self._user_agent),
+        ]
+        callback(headers, None)
+
+
+class _DatastoreStub(object):
+    """Stub with one callable per RPC of the Datastore service.
+
+    :type channel: :class:`grpc.Channel`
+    :param channel: The channel carrying the RPCs.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        for name, request_class, response_class in _METHODS.values():
+            setattr(self, name, channel.unary_unary(
+                '/%s/%s' % (SERVICE_NAME, name),
+                request_serializer=request_class.SerializeToString,
+                response_deserializer=response_class.FromString))
+
+
+def _parse_emulator_host(emulator_host):
+    """Split the value of ``DATASTORE_HOST`` into a host and port.
+
+    :type emulator_host: str
+    :param emulator_host: The emulator address, either a URL such as
+                          ``http://localhost:8471`` or ``host:port``.
+
+    :rtype: tuple
+    :returns: Pair of the host (str) and the port (int).
+    :raises: :class:`ValueError <exceptions.ValueError>` if the value does
+             not contain a port.
+    """
+    if '//' not in emulator_host:
+        emulator_host = '//' + emulator_host
+    parts = urlsplit(emulator_host)
+    if not parts.hostname or parts.port is None:
+        raise ValueError('Emulator host must contain a host and port',
+                         emulator_host)
+    return parts.hostname, parts.port
+
+
+def _make_exception(error):
+    """Convert a failed RPC into the exception the HTTP API would raise.
+
+    :type error: :class:`grpc.RpcError`
+    :param error: The error raised by the stub, also a :class:`grpc.Call`.
+
+    :rtype: :class:`gcloud.exceptions.GCloudError`
+    :returns: The exception matching the status code of the RPC, e.g.
+              :class:`gcloud.exceptions.Conflict` for ``ABORTED``.
+    """
+    status = _STATUS_CODE_TO_HTTP.get(error.code(), 500)
+    response = httplib2.Response({'status': status})
+    return make_exception(response, error.details() or '', use_json=False)
+
+
+class GrpcConnection(Connection):
+    """A connection to the Google Cloud Datastore via its gRPC API.
+
+    RPCs are spread round-robin over ``pool_size`` channels, created on
+    first use.  Each channel multiplexes concurrent RPCs on one HTTP/2
+    connection, so the pool is shared by all threads.
+
+    :type credentials: :class:`oauth2client.client.OAuth2Credentials`
+    :param credentials: The OAuth2 Credentials to use for this connection.
+
+    :type http: :class:`httplib2.Http` or class that defines ``request()``.
+    :param http: Unused, accepted for compatibility with
+                 :class:`gcloud.datastore.connection.Connection`.
+
+    :type host: str
+    :param host: (Optional) The host to connect to.  Defaults to the
+                 emulator if ``DATASTORE_HOST`` is set, otherwise to
+                 :data:`DATASTORE_API_HOST`.
+
+    :type port: int
+    :param port: (Optional) The port to connect to.
+
+    :type secure: bool
+    :param secure: (Optional) Whether to use TLS and send credentials.
+                   Defaults to True, except for the emulator.
+
+    :type pool_size: int
+    :param pool_size: (Optional) The number of channels.
+
+    :type timeout: float
+    :param timeout: (Optional) Deadline of each RPC, in seconds.  A query
+                    iterator gets a fresh deadline for each page.
+
+    :type timeouts: dict
+    :param timeouts: (Optional) Deadlines overriding ``timeout`` for some
+                     methods, keyed by the HTTP API name of the method,
+                     e.g. ``{'runQuery': 300}``.
+
+    :type metadata: sequence of (str, str) tuples
+    :param metadata: (Optional) Extra metadata sent with every RPC.
+
+    :raises: :class:`ValueError <exceptions.ValueError>` if ``pool_size``
+             is not positive or ``timeouts`` names an unknown method.
+    """
+
+    def __init__(self, credentials=None, http=None, host=None, port=None,
+                 secure=None, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT_SECONDS, timeouts=None,
+                 metadata=()):
+        super(GrpcConnection, self).__init__(
+            credentials=credentials, http=http)
+        if pool_size < 1:
+            raise ValueError('pool_size must be positive', pool_size)
+        timeouts = dict(timeouts or {})
+        unknown = set(timeouts) - set(_METHODS)
+        if unknown:
+            raise ValueError('Unknown methods', sorted(unknown))
+
+        if host is None:
+            emulator_host = os.getenv(GCD_HOST)
+            if emulator_host is not None:
+                # The emulator speaks plaintext and ignores credentials.
+                host, port = _parse_emulator_host(emulator_host)
+                if secure is None:
+                    secure = False
+            else:
+                host = DATASTORE_API_HOST
+        if port is None:
+            port = DATASTORE_API_PORT
+        if secure is None:
+            secure = True
+        self.host = host
+        self.port = port
+        self.secure = secure
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.timeouts = timeouts
+        self.metadata = tuple(metadata)
+        self._stubs = []
+        self._stubs_lock = threading.Lock()
+        self._stub_index = itertools.count()
+
+    @property
+    def http_is_shared(self):
+        """Whether all threads send requests through the same transport.
+
+        ``http`` is not used, and channels are thread-safe.
+
+        :rtype: bool
+        :returns: False.
+        """
+        return False
+
+    def _make_channel(self):
+        """Create one channel of the pool.
+
+        :rtype: :class:`grpc.Channel`
+        :returns: A channel to :attr:`host`, with its own connection.
+        """
+        target = '%s:%d' % (self.host, self.port)
+        # Without a local subchannel pool, channels to the same target
+        # share a single connection.
+        options = [('grpc.use_local_subchannel_pool', 1)]
+        if not self.secure:
+            return grpc.insecure_channel(target, options=options)
+        auth_creds = grpc.metadata_call_credentials(
+            _MetadataPlugin(self), name='google_creds')
+        channel_creds = grpc.composite_channel_credentials(
+            grpc.ssl_channel_credentials(), auth_creds)
+        return grpc.secure_channel(target, channel_creds, options=options)
+
+    def _stub(self):
+        """The stub of the next channel of the pool.
+
+        :rtype: :class:`_DatastoreStub` or
+                :class:`gcloud.flow_control.GuardedStub`
+        :returns: The stub, wrapped if ``flow_control`` is set.
+        """
+        if len(self._stubs) < self.pool_size:
+            with self._stubs_lock:
+                while len(self._stubs) < self.pool_size:
+                    self._stubs.append(_DatastoreStub(self._make_channel()))
+        stub = self._stubs[next(self._stub_index) % self.pool_size]
+        if self.flow_control is not None:
+            return GuardedStub(stub, self.flow_control, self.host)
+        return stub
+
+    def _rpc(self, project, method, request_pb, response_pb_cls):
+        """Make a protobuf RPC request over gRPC.
+
+        :type project: string
+        :param project: The project to connect to. This is
+                        usually your project name in the cloud console.
+
+        :type method: string
+        :param method: The HTTP API name of the method to invoke.
+
+        :type request_pb: :class:`google.protobuf.message.Message` instance
+        :param request_pb: the protobuf instance representing the request.
+
+        :type response_pb_cls: A :class:`google.protobuf.message.Message'
+                               subclass.
+        :param response_pb_cls: Unused:  the stub decodes the response.
+
+        :raises: :class:`gcloud.exceptions.GCloudError` matching the status
+                 code of a failed RPC.
+        """
+        grpc_method = _METHODS[method][0]
+        request_pb.project_id = project
+        metadata = (('google-cloud-resource-prefix', 'projects/' + project),)
+        metadata += self.metadata
+        timeout = self.timeouts.get(method, self.timeout)
+        try:
+            return getattr(self._stub(), grpc_method)(
+                request_pb, timeout=timeout, metadata=metadata)
+        except grpc.RpcError as error:
+            raise _make_exception(error)
+
+    def close(self):
+        """Close the channels of the pool.
+
+        The connection opens new channels if it is used again.
+        """
+        with self._stubs_lock:
+            stubs, self._stubs = self._stubs, []
+        for stub in stubs:
+            stub.channel.close()
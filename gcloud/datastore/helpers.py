@@ -28,6 +28,7 @@ from gcloud._helpers import _datetime_to_pb_timestamp
 from gcloud._helpers import _pb_timestamp_to_datetime
 from gcloud.datastore._generated import entity_pb2 as _entity_pb2
 from gcloud.datastore.entity import Entity
+from gcloud.datastore.entity import LazyEntity
 from gcloud.datastore.key import Key
 
 __all__ = ('entity_from_protobuf', 'key_from_protobuf')
@@ -102,7 +103,46 @@ def _property_tuples(entity_pb):
     return six.iteritems(entity_pb.properties)
 
 
-def entity_from_protobuf(pb):
+def _is_excluded_from_indexes(value_pb):
+    """Check whether a protobuf value is excluded from indexes.
+
+    :type value_pb: :class:`gcloud.datastore._generated.entity_pb2.Value`
+    :param value_pb: The protobuf value of a property.
+
+    :rtype: bool
+    :returns: Whether the value (or, for an array, all of its values) is
+              excluded from indexes.
+    :raises: :class:`ValueError` if the values of an array disagree.
+    """
+    # Lists need to be special-cased and we require all
+    # ``exclude_from_indexes`` values in a list agree.
+    if value_pb.WhichOneof('value_type') == 'array_value':
+        exclude_values = set(sub_value_pb.exclude_from_indexes
+                             for sub_value_pb in value_pb.array_value.values)
+        if len(exclude_values) != 1:
+            raise ValueError('For an array_value, subvalues must either '
+                             'all be indexed or all excluded from '
+                             'indexes.')
+        return exclude_values.pop()
+    return value_pb.exclude_from_indexes
+
+
+def _decode_property(value_pb):
+    """Convert the protobuf value of an entity property.
+
+    :type value_pb: :class:`gcloud.datastore._generated.entity_pb2.Value`
+    :param value_pb: The protobuf value of a property.
+
+    :rtype: tuple
+    :returns: The native value, its meaning (or :data:`None`) and whether
+              it is excluded from indexes.
+    """
+    value = _get_value_from_value_pb(value_pb)
+    meaning = _get_meaning(value_pb, is_list=isinstance(value, list))
+    return value, meaning, _is_excluded_from_indexes(value_pb)
+
+
+def entity_from_protobuf(pb, lazy=False):
     """Factory method for creating an entity based on a protobuf.
 
     The protobuf should be one returned from the Cloud Datastore
@@ -111,6 +151,11 @@ def entity_from_protobuf(pb):
     :type pb: :class:`gcloud.datastore._generated.entity_pb2.Entity`
     :param pb: The Protobuf representing the entity.
 
+    :type lazy: bool
+    :param lazy: (Optional) If True, return a
+                 :class:`gcloud.datastore.entity.LazyEntity`, converting
+                 each property only when it is first accessed.
+
     :rtype: :class:`gcloud.datastore.entity.Entity`
     :returns: The entity derived from the protobuf.
     """
@@ -118,36 +163,23 @@ def entity_from_protobuf(pb):
     if pb.HasField('key'):  # Message field (Key)
         key = key_from_protobuf(pb.key)
 
+    if lazy:
+        return LazyEntity(key=key, value_pbs=_property_tuples(pb))
+
     entity_props = {}
     entity_meanings = {}
     exclude_from_indexes = []
 
     for prop_name, value_pb in _property_tuples(pb):
-        value = _get_value_from_value_pb(value_pb)
+        value, meaning, excluded = _decode_property(value_pb)
         entity_props[prop_name] = value
 
         # Check if the property has an associated meaning.
-        is_list = isinstance(value, list)
-        meaning = _get_meaning(value_pb, is_list=is_list)
         if meaning is not None:
             entity_meanings[prop_name] = (meaning, value)
 
-        # Check if ``value_pb`` was excluded from index. Lists need to be
-        # special-cased and we require all ``exclude_from_indexes`` values
-        # in a list agree.
-        if is_list:
-            exclude_values = set(value_pb.exclude_from_indexes
-                                 for value_pb in value_pb.array_value.values)
-            if len(exclude_values) != 1:
-                raise ValueError('For an array_value, subvalues must either '
-                                 'all be indexed or all excluded from '
-                                 'indexes.')
-
-            if exclude_values.pop():
-                exclude_from_indexes.append(prop_name)
-        else:
-            if value_pb.exclude_from_indexes:
-                exclude_from_indexes.append(prop_name)
+        if excluded:
+            exclude_from_indexes.append(prop_name)
 
     entity = Entity(key=key, exclude_from_indexes=exclude_from_indexes)
     entity.update(entity_props)
@@ -200,6 +232,9 @@ def _set_pb_meaning_from_entity(entity, name, value, value_pb,
 def entity_to_protobuf(entity):
     """Converts an entity into a protobuf.
 
+    Properties of a :class:`gcloud.datastore.entity.LazyEntity` which
+    were never accessed are copied from the protobuf it was read from.
+
     :type entity: :class:`gcloud.datastore.entity.Entity`
     :param entity: The entity to be turned into a protobuf.
 
@@ -211,7 +246,19 @@ def entity_to_protobuf(entity):
         key_pb = entity.key.to_protobuf()
         entity_pb.key.CopyFrom(key_pb)
 
-    for name, value in entity.items():
+    undecoded = {}
+    if isinstance(entity, LazyEntity):
+        undecoded = entity._value_pbs
+
+    for name in entity:
+        if name in undecoded:
+            original_pb = undecoded[name]
+            if (original_pb.WhichOneof('value_type') != 'array_value' or
+                    original_pb.array_value.values):
+                _new_value_pb(entity_pb, name).CopyFrom(original_pb)
+            continue
+
+        value = entity[name]
         value_is_list = isinstance(value, list)
         if value_is_list and len(value) == 0:
             continue
@@ -221,7 +268,13 @@ def entity_to_protobuf(entity):
         _set_protobuf_value(value_pb, value)
 
         # Add index information to protobuf.
-        if name in entity.exclude_from_indexes:
+        if undecoded:
+            # Converted properties have their exclusion recorded, and
+            # this avoids checking the protobufs of the others.
+            excluded = name in entity._exclude_from_indexes
+        else:
+            excluded = name in entity.exclude_from_indexes
+        if excluded:
             if not value_is_list:
                 value_pb.exclude_from_indexes = True
 
@@ -250,21 +303,18 @@ def key_from_protobuf(pb):
     path_args = []
     for element in pb.path:
         path_args.append(element.kind)
-        if element.id:  # Simple field (int64)
-            path_args.append(element.id)
         # This is safe: we expect proto objects returned will only have
         # one of `name` or `id` set.
-        if element.name:  # Simple field (string)
-            path_args.append(element.name)
-
-    project = None
-    if pb.partition_id.project_id:  # Simple field (string)
-        project = pb.partition_id.project_id
-    namespace = None
-    if pb.partition_id.namespace_id:  # Simple field (string)
-        namespace = pb.partition_id.namespace_id
-
-    return Key(*path_args, namespace=namespace, project=project)
+        id_type = element.WhichOneof('id_type')
+        if id_type is not None:
+            id_or_name = getattr(element, id_type)
+            if id_or_name:
+                path_args.append(id_or_name)
+
+    partition_id = pb.partition_id
+    project = partition_id.project_id or None
+    namespace = partition_id.namespace_id or None
+    return Key._from_parts(path_args, project, namespace)
 
 
 def _pb_attr_value(val):
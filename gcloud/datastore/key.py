@@ -14,15 +14,27 @@
 
 """Create / interact with gcloud datastore keys."""
 
-import copy
 import six
 
 from gcloud.datastore._generated import entity_pb2 as _entity_pb2
 
 
+_ID_OR_NAME_TYPES = six.string_types + six.integer_types
+
+_INTERNED = {}
+"""Interned kinds, projects and namespaces, see :func:`_intern`."""
+
+_MAX_INTERNED = 10000
+"""Size above which :func:`_intern` stops adding new strings."""
+
+
 class Key(object):
     """An immutable representation of a datastore Key.
 
+    Keys are compact: the path is held as a tuple (the ``path`` dicts are
+    built on demand), the kind, project and namespace strings are shared
+    between keys, and the hash is computed only once.
+
     To create a basic key:
 
       >>> Key('EntityKind', 1234)
@@ -58,15 +70,83 @@ class Key(object):
     The project argument is required unless it has been set implicitly.
     """
 
+    __slots__ = ('_flat_path', '_project', '_namespace', '_parent', '_hash')
+
     def __init__(self, *path_args, **kwargs):
-        self._flat_path = path_args
-        parent = self._parent = kwargs.get('parent')
-        self._namespace = kwargs.get('namespace')
-        project = kwargs.get('project')
-        self._project = _validate_project(project, parent)
-        # _flat_path, _parent, _namespace and _project must be set before
-        # _combine_args() is called.
-        self._path = self._combine_args()
+        flat_path = _check_flat_path(path_args)
+        parent = kwargs.get('parent')
+        namespace = kwargs.get('namespace')
+        project = _validate_project(kwargs.get('project'), parent)
+
+        if parent is not None:
+            if parent.is_partial:
+                raise ValueError('Parent key must be complete.')
+
+            flat_path = parent.flat_path + flat_path
+            if namespace is not None and namespace != parent.namespace:
+                raise ValueError('Child namespace must agree with parent\'s.')
+            namespace = parent.namespace
+            if project is not None and project != parent.project:
+                raise ValueError('Child project must agree with parent\'s.')
+            project = parent.project
+
+        self._flat_path = flat_path
+        self._project = _intern(project)
+        self._namespace = _intern(namespace)
+        self._parent = parent
+        self._hash = None
+
+    @classmethod
+    def _from_parts(cls, flat_path, project, namespace):
+        """Build a key from parts which are already known to be valid.
+
+        Skips the validation done by the constructor, e.g. for keys decoded
+        from protobufs, whose fields are typed.
+
+        :type flat_path: list
+        :param flat_path: Alternating kinds (string) and IDs (int) or names
+                          (string).
+
+        :type project: string
+        :param project: The project of the key.
+
+        :type namespace: string or ``NoneType``
+        :param namespace: The namespace of the key.
+
+        :rtype: :class:`gcloud.datastore.key.Key`
+        :returns: The new key.
+        :raises: :class:`ValueError` if ``flat_path`` is empty or if
+                 ``project`` is not set.
+        """
+        if not flat_path:
+            raise ValueError('Key path must not be empty.')
+        if project is None:
+            raise ValueError('A Key must have a project set.')
+        for index in range(0, len(flat_path), 2):
+            flat_path[index] = _intern(flat_path[index])
+        key = cls.__new__(cls)
+        key._flat_path = tuple(flat_path)
+        key._project = _intern(project)
+        key._namespace = _intern(namespace)
+        key._parent = None
+        key._hash = None
+        return key
+
+    def __getstate__(self):
+        # The cached hash is only valid in this process: string hashes are
+        # randomized per interpreter.
+        return dict((name, getattr(self, name)) for name in self.__slots__
+                    if name != '_hash')
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            if name in ('_project', '_namespace'):
+                value = _intern(value)
+            elif name == '_flat_path':
+                value = tuple(_intern(part) if index % 2 == 0 else part
+                              for index, part in enumerate(value))
+            setattr(self, name, value)
+        self._hash = None
 
     def __eq__(self, other):
         """Compare two keys for equality.
@@ -85,9 +165,9 @@ class Key(object):
         if self.is_partial or other.is_partial:
             return False
 
-        return (self.flat_path == other.flat_path and
-                self.project == other.project and
-                self.namespace == other.namespace)
+        return (self._flat_path == other._flat_path and
+                self._project == other._project and
+                self._namespace == other._namespace)
 
     def __ne__(self, other):
         """Compare two keys for inequality.
@@ -105,87 +185,15 @@ class Key(object):
     def __hash__(self):
         """Hash a keys for use in a dictionary lookp.
 
+        The hash is computed once, then cached.
+
         :rtype: integer
         :returns: a hash of the key's state.
         """
-        return (hash(self.flat_path) +
-                hash(self.project) +
-                hash(self.namespace))
-
-    @staticmethod
-    def _parse_path(path_args):
-        """Parses positional arguments into key path with kinds and IDs.
-
-        :type path_args: tuple
-        :param path_args: A tuple from positional arguments. Should be
-                          alternating list of kinds (string) and ID/name
-                          parts (int or string).
-
-        :rtype: :class:`list` of :class:`dict`
-        :returns: A list of key parts with kind and ID or name set.
-        :raises: :class:`ValueError` if there are no ``path_args``, if one of
-                 the kinds is not a string or if one of the IDs/names is not
-                 a string or an integer.
-        """
-        if len(path_args) == 0:
-            raise ValueError('Key path must not be empty.')
-
-        kind_list = path_args[::2]
-        id_or_name_list = path_args[1::2]
-        # Dummy sentinel value to pad incomplete key to even length path.
-        partial_ending = object()
-        if len(path_args) % 2 == 1:
-            id_or_name_list += (partial_ending,)
-
-        result = []
-        for kind, id_or_name in zip(kind_list, id_or_name_list):
-            curr_key_part = {}
-            if isinstance(kind, six.string_types):
-                curr_key_part['kind'] = kind
-            else:
-                raise ValueError(kind, 'Kind was not a string.')
-
-            if isinstance(id_or_name, six.string_types):
-                curr_key_part['name'] = id_or_name
-            elif isinstance(id_or_name, six.integer_types):
-                curr_key_part['id'] = id_or_name
-            elif id_or_name is not partial_ending:
-                raise ValueError(id_or_name,
-                                 'ID/name was not a string or integer.')
-
-            result.append(curr_key_part)
-
-        return result
-
-    def _combine_args(self):
-        """Sets protected data by combining raw data set from the constructor.
-
-        If a ``_parent`` is set, updates the ``_flat_path`` and sets the
-        ``_namespace`` and ``_project`` if not already set.
-
-        :rtype: :class:`list` of :class:`dict`
-        :returns: A list of key parts with kind and ID or name set.
-        :raises: :class:`ValueError` if the parent key is not complete.
-        """
-        child_path = self._parse_path(self._flat_path)
-
-        if self._parent is not None:
-            if self._parent.is_partial:
-                raise ValueError('Parent key must be complete.')
-
-            # We know that _parent.path() will return a copy.
-            child_path = self._parent.path + child_path
-            self._flat_path = self._parent.flat_path + self._flat_path
-            if (self._namespace is not None and
-                    self._namespace != self._parent.namespace):
-                raise ValueError('Child namespace must agree with parent\'s.')
-            self._namespace = self._parent.namespace
-            if (self._project is not None and
-                    self._project != self._parent.project):
-                raise ValueError('Child project must agree with parent\'s.')
-            self._project = self._parent.project
-
-        return child_path
+        if self._hash is None:
+            self._hash = hash(
+                (self._flat_path, self._project, self._namespace))
+        return self._hash
 
     def _clone(self):
         """Duplicates the Key.
@@ -219,17 +227,11 @@ class Key(object):
         if not self.is_partial:
             raise ValueError('Only a partial key can be completed.')
 
-        id_or_name_key = None
-        if isinstance(id_or_name, six.string_types):
-            id_or_name_key = 'name'
-        elif isinstance(id_or_name, six.integer_types):
-            id_or_name_key = 'id'
-        else:
+        if not isinstance(id_or_name, _ID_OR_NAME_TYPES):
             raise ValueError(id_or_name,
                              'ID/name was not a string or integer.')
 
         new_key = self._clone()
-        new_key._path[-1][id_or_name_key] = id_or_name
         new_key._flat_path += (id_or_name,)
         return new_key
 
@@ -245,14 +247,16 @@ class Key(object):
         if self.namespace:
             key.partition_id.namespace_id = self.namespace
 
-        for item in self.path:
+        flat_path = self._flat_path
+        for index in range(0, len(flat_path), 2):
             element = key.path.add()
-            if 'kind' in item:
-                element.kind = item['kind']
-            if 'id' in item:
-                element.id = item['id']
-            if 'name' in item:
-                element.name = item['name']
+            element.kind = flat_path[index]
+            if index + 1 < len(flat_path):
+                id_or_name = flat_path[index + 1]
+                if isinstance(id_or_name, six.string_types):
+                    element.name = id_or_name
+                else:
+                    element.id = id_or_name
 
         return key
 
@@ -279,12 +283,24 @@ class Key(object):
     def path(self):
         """Path getter.
 
-        Returns a copy so that the key remains immutable.
+        Built from :attr:`flat_path` on each access, so that the key
+        remains immutable.
 
         :rtype: :class:`list` of :class:`dict`
         :returns: The (key) path of the current key.
         """
-        return copy.deepcopy(self._path)
+        flat_path = self._flat_path
+        path = []
+        for index in range(0, len(flat_path), 2):
+            element = {'kind': flat_path[index]}
+            if index + 1 < len(flat_path):
+                id_or_name = flat_path[index + 1]
+                if isinstance(id_or_name, six.string_types):
+                    element['name'] = id_or_name
+                else:
+                    element['id'] = id_or_name
+            path.append(element)
+        return path
 
     @property
     def flat_path(self):
@@ -302,7 +318,10 @@ class Key(object):
         :rtype: string
         :returns: The kind of the current key.
         """
-        return self.path[-1]['kind']
+        flat_path = self._flat_path
+        if len(flat_path) % 2:
+            return flat_path[-1]
+        return flat_path[-2]
 
     @property
     def id(self):
@@ -311,7 +330,10 @@ class Key(object):
         :rtype: integer
         :returns: The (integer) ID of the key.
         """
-        return self.path[-1].get('id')
+        flat_path = self._flat_path
+        if (len(flat_path) % 2 == 0 and
+                not isinstance(flat_path[-1], six.string_types)):
+            return flat_path[-1]
 
     @property
     def name(self):
@@ -320,7 +342,10 @@ class Key(object):
         :rtype: string
         :returns: The (string) name of the key.
         """
-        return self.path[-1].get('name')
+        flat_path = self._flat_path
+        if (len(flat_path) % 2 == 0 and
+                isinstance(flat_path[-1], six.string_types)):
+            return flat_path[-1]
 
     @property
     def id_or_name(self):
@@ -378,6 +403,64 @@ class Key(object):
         return '<Key%s, project=%s>' % (self.path, self.project)
 
 
+def _check_flat_path(path_args):
+    """Validate the positional arguments of a key.
+
+    :type path_args: tuple
+    :param path_args: A tuple from positional arguments. Should be
+                      alternating list of kinds (string) and ID/name
+                      parts (int or string).
+
+    :rtype: tuple
+    :returns: The path, with its kinds interned.
+    :raises: :class:`ValueError` if there are no ``path_args``, if one of
+             the kinds is not a string or if one of the IDs/names is not
+             a string or an integer.
+    """
+    if len(path_args) == 0:
+        raise ValueError('Key path must not be empty.')
+
+    flat_path = list(path_args)
+    for index in range(0, len(flat_path), 2):
+        kind = flat_path[index]
+        if not isinstance(kind, six.string_types):
+            raise ValueError(kind, 'Kind was not a string.')
+        flat_path[index] = _intern(kind)
+
+    for index in range(1, len(flat_path), 2):
+        id_or_name = flat_path[index]
+        if not isinstance(id_or_name, _ID_OR_NAME_TYPES):
+            raise ValueError(id_or_name,
+                             'ID/name was not a string or integer.')
+
+    return tuple(flat_path)
+
+
+def _intern(value):
+    """Share a single copy of equal, frequently repeated strings.
+
+    Used for kinds, projects and namespaces, of which there are few
+    distinct values however many keys are held.  Once
+    :data:`_MAX_INTERNED` strings are interned, new ones are returned
+    as is, so an application using many namespaces can't grow the table
+    without bound.
+
+    :type value: string or ``NoneType``
+    :param value: The value to intern.
+
+    :rtype: string or ``NoneType``
+    :returns: The interned value.
+    """
+    if value is None:
+        return None
+    interned = _INTERNED.get(value)
+    if interned is not None:
+        return interned
+    if len(_INTERNED) >= _MAX_INTERNED:
+        return value
+    return _INTERNED.setdefault(value, value)
+
+
 def _validate_project(project, parent):
     """Ensure the project is set appropriately.
 
@@ -15,13 +15,34 @@
 """Create / interact with gcloud datastore queries."""
 
 import base64
+import threading
+from collections import OrderedDict
 
 from gcloud._helpers import _ensure_tuple_or_list
+from gcloud._helpers import _read_ahead
 from gcloud.datastore._generated import query_pb2 as _query_pb2
 from gcloud.datastore import helpers
 from gcloud.datastore.key import Key
 
 
+ENTITIES = 'entities'
+"""Result type of :class:`gcloud.datastore.entity.Entity` objects."""
+
+KEYS = 'keys'
+"""Result type of the bare :class:`gcloud.datastore.key.Key` of each result."""
+
+TUPLES = 'tuples'
+"""Result type of tuples of the projected values of each result."""
+
+_RESULT_TYPES = (ENTITIES, KEYS, TUPLES)
+
+_COMPILED_CACHE_SIZE = 1000
+"""Maximum number of compiled query protobufs kept by the process."""
+
+_COMPILED = OrderedDict()
+_COMPILED_LOCK = threading.Lock()
+
+
 class Query(object):
     """A Query against the Cloud Datastore.
 
@@ -307,7 +328,7 @@ class Query(object):
         self._distinct_on[:] = value
 
     def fetch(self, limit=None, offset=0, start_cursor=None, end_cursor=None,
-              client=None):
+              client=None, prefetch=0, lazy=False, result_type=ENTITIES):
         """Execute the Query; return an iterator for the matching entities.
 
         For example::
@@ -337,6 +358,20 @@ class Query(object):
         :param client: client used to connect to datastore.
                        If not supplied, uses the query's value.
 
+        :type prefetch: integer
+        :param prefetch: An optional number of pages to fetch ahead while
+                         iterating, passed through to the iterator.
+
+        :type lazy: bool
+        :param lazy: If True, the iterator returns
+                     :class:`gcloud.datastore.entity.LazyEntity` objects.
+
+        :type result_type: string
+        :param result_type: What the iterator returns for each result:
+                            :data:`ENTITIES` (the default), :data:`KEYS`
+                            or :data:`TUPLES`, passed through to the
+                            iterator.
+
         :rtype: :class:`Iterator`
         :raises: ValueError if ``connection`` is not passed and no implicit
                  default has been set.
@@ -345,7 +380,8 @@ class Query(object):
             client = self._client
 
         return Iterator(
-            self, client, limit, offset, start_cursor, end_cursor)
+            self, client, limit, offset, start_cursor, end_cursor, prefetch,
+            lazy, result_type)
 
 
 class Iterator(object):
@@ -372,6 +408,38 @@ class Iterator(object):
     :type end_cursor: bytes
     :param end_cursor: (Optional) Cursor to end paging through
                        query results.
+
+    :type prefetch: integer
+    :param prefetch: (Optional) When iterating, the number of pages to
+                     fetch in a background thread while the current one is
+                     consumed.  At most ``prefetch`` pages wait to be
+                     consumed, with one more being fetched.  Defaults to
+                     ``0``, fetching each page only once the previous one
+                     has been consumed.  Ignored if the client's connection
+                     shares one ``http`` object between threads.
+
+    :type lazy: bool
+    :param lazy: (Optional) If True, return
+                 :class:`gcloud.datastore.entity.LazyEntity` objects, which
+                 convert each property only when it is first accessed.
+
+    :type result_type: string
+    :param result_type: (Optional) What is returned for each result:
+
+                        * :data:`ENTITIES` (the default):
+                          :class:`gcloud.datastore.entity.Entity` objects.
+                        * :data:`KEYS`: the bare keys, e.g. with
+                          :meth:`Query.keys_only`.
+                        * :data:`TUPLES`: for projection queries, tuples of
+                          the values in the order of the projection
+                          (``None`` for missing properties, the key for
+                          ``__key__``).
+
+                        Keys and tuples are built straight from the
+                        protobufs, skipping the ``Entity`` objects.
+
+    :raises: :class:`ValueError` if ``result_type`` is unknown, or if it is
+             :data:`TUPLES` for a query without projection.
     """
 
     _NOT_FINISHED = _query_pb2.QueryResultBatch.NOT_FINISHED
@@ -383,13 +451,21 @@ class Iterator(object):
     )
 
     def __init__(self, query, client, limit=None, offset=None,
-                 start_cursor=None, end_cursor=None):
+                 start_cursor=None, end_cursor=None, prefetch=0,
+                 lazy=False, result_type=ENTITIES):
+        if result_type not in _RESULT_TYPES:
+            raise ValueError('Unknown result type: %r' % (result_type,))
+        if result_type == TUPLES and not query.projection:
+            raise ValueError('Tuple results require a projection')
         self._query = query
         self._client = client
         self._limit = limit
         self._offset = offset
         self._start_cursor = start_cursor
         self._end_cursor = end_cursor
+        self._prefetch = prefetch
+        self._lazy = lazy
+        self._result_type = result_type
         self._page = self._more_results = None
         self._skipped_results = None
 
@@ -401,29 +477,47 @@ class Iterator(object):
 
         :rtype: tuple, (entities, more_results, cursor)
         """
-        pb = _pb_from_query(self._query)
+        transaction = self._client.current_transaction
+        return self._next_page(transaction and transaction.id)
 
-        start_cursor = self._start_cursor
-        if start_cursor is not None:
-            pb.start_cursor = base64.urlsafe_b64decode(start_cursor)
+    def _next_page(self, transaction_id):
+        """Fetch a single "page" of query results.
+
+        Helper for :meth:`next_page`, taking the transaction explicitly so
+        that pages can be fetched outside of the thread running it.
+
+        :type transaction_id: bytes or ``NoneType``
+        :param transaction_id: The transaction in which to run the query.
 
+        :rtype: tuple, (entities, more_results, cursor)
+        """
+        pb = _compiled_pb_from_query(self._query)
+
+        start_cursor = self._start_cursor
         end_cursor = self._end_cursor
-        if end_cursor is not None:
-            pb.end_cursor = base64.urlsafe_b64decode(end_cursor)
+        if (start_cursor is not None or end_cursor is not None or
+                self._limit is not None or self._offset):
+            # The compiled protobuf is shared:  patch a copy of it.
+            compiled, pb = pb, _query_pb2.Query()
+            pb.CopyFrom(compiled)
 
-        if self._limit is not None:
-            pb.limit.value = self._limit
+            if start_cursor is not None:
+                pb.start_cursor = base64.urlsafe_b64decode(start_cursor)
 
-        if self._offset is not None:
-            pb.offset = self._offset
+            if end_cursor is not None:
+                pb.end_cursor = base64.urlsafe_b64decode(end_cursor)
 
-        transaction = self._client.current_transaction
+            if self._limit is not None:
+                pb.limit.value = self._limit
+
+            if self._offset is not None:
+                pb.offset = self._offset
 
         query_results = self._client.connection.run_query(
             query_pb=pb,
             project=self._query.project,
             namespace=self._query.namespace,
-            transaction_id=transaction and transaction.id,
+            transaction_id=transaction_id,
             )
         (entity_pbs, cursor_as_bytes,
          more_results_enum, self._skipped_results) = query_results
@@ -441,20 +535,38 @@ class Iterator(object):
         else:
             raise ValueError('Unexpected value returned for `more_results`.')
 
-        self._page = [
-            helpers.entity_from_protobuf(entity)
-            for entity in entity_pbs]
+        self._page = self._decode_page(entity_pbs)
         return self._page, self._more_results, self._start_cursor
 
-    def __iter__(self):
-        """Generator yielding all results matching our query.
+    def _decode_page(self, entity_pbs):
+        """Convert the entity protobufs of a page.
 
-        :rtype: sequence of :class:`gcloud.datastore.entity.Entity`
+        :type entity_pbs: list of :class:`._generated.entity_pb2.Entity`
+        :param entity_pbs: The entities returned by the backend.
+
+        :rtype: list
+        :returns: The results of the page, as requested by ``result_type``.
+        """
+        if self._result_type == KEYS:
+            return [helpers.key_from_protobuf(entity.key)
+                    for entity in entity_pbs]
+        if self._result_type == TUPLES:
+            return [_projected_values(entity, self._query.projection)
+                    for entity in entity_pbs]
+        return [helpers.entity_from_protobuf(entity, lazy=self._lazy)
+                for entity in entity_pbs]
+
+    def _pages(self, transaction_id):
+        """Generator fetching all pages of results, one at a time.
+
+        :type transaction_id: bytes or ``NoneType``
+        :param transaction_id: The transaction in which to run the query.
+
+        :rtype: sequence of lists of :class:`gcloud.datastore.entity.Entity`
         """
         while True:
-            self.next_page()
-            for entity in self._page:
-                yield entity
+            self._next_page(transaction_id)
+            yield self._page
             if not self._more_results:
                 break
             num_results = len(self._page)
@@ -465,6 +577,104 @@ class Iterator(object):
                 #       because we are updating the cursor each time.
                 self._offset -= self._skipped_results
 
+    def __iter__(self):
+        """Generator yielding all results matching our query.
+
+        If ``prefetch`` was passed, pages are fetched ahead in a background
+        thread, so that the cursor and ``more_results`` state of the
+        iterator may be ahead of the entities yielded so far.
+
+        :rtype: sequence of :class:`gcloud.datastore.entity.Entity`
+        """
+        transaction = self._client.current_transaction
+        pages = self._pages(transaction and transaction.id)
+        if self._prefetch > 0 and not self._client.connection.http_is_shared:
+            pages = _read_ahead(pages, self._prefetch)
+        for page in pages:
+            for entity in page:
+                yield entity
+
+
+def _projected_values(entity_pb, projection):
+    """Values of the projected properties of a query result.
+
+    :type entity_pb: :class:`._generated.entity_pb2.Entity`
+    :param entity_pb: A result of a projection query.
+
+    :type projection: list of string
+    :param projection: The projected property names.
+
+    :rtype: tuple
+    :returns: The value of each property, or ``None`` if missing.  For
+              ``__key__``, the :class:`gcloud.datastore.key.Key`.
+    """
+    properties = entity_pb.properties
+    values = []
+    for name in projection:
+        if name == '__key__':
+            values.append(helpers.key_from_protobuf(entity_pb.key))
+        elif name in properties:
+            values.append(
+                helpers._get_value_from_value_pb(properties[name]))
+        else:
+            values.append(None)
+    return tuple(values)
+
+
+def _query_state(query):
+    """Snapshot of the parts of a query compiled into its protobuf.
+
+    :type query: :class:`Query`
+    :param query: The source query.
+
+    :rtype: tuple
+    :returns: A value comparing equal only for queries compiling to the
+              same protobuf.  Filter values are paired with their type,
+              e.g. so that ``1`` and ``True`` differ.  It is unhashable
+              if a filter value is, e.g. a list.
+    """
+    filters = tuple(
+        (property_name, query.OPERATORS.get(operator), type(value), value)
+        for property_name, operator, value in query.filters)
+    return (query.kind, query.ancestor, filters, tuple(query.projection),
+            tuple(query.order), tuple(query.distinct_on))
+
+
+def _compiled_pb_from_query(query):
+    """Convert a Query instance to its protobuf, reusing earlier results.
+
+    Compiled protobufs are cached for the process, keyed on a snapshot of
+    the query state, so that running the same query again (e.g. for each
+    page of results, or as a new :class:`Query` with the same parameters)
+    skips building the protobuf.
+
+    :type query: :class:`Query`
+    :param query: The source query.
+
+    :rtype: :class:`gcloud.datastore._generated.query_pb2.Query`
+    :returns: A protobuf shared with other callers, which must not be
+              modified:  copy it to set cursors, offset or limit.  See
+              :func:`_pb_from_query`.
+    """
+    state = _query_state(query)
+    try:
+        hash(state)
+    except TypeError:
+        return _pb_from_query(query)
+
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.get(state)
+        if compiled is not None:
+            _COMPILED[state] = _COMPILED.pop(state)
+
+    if compiled is None:
+        compiled = _pb_from_query(query)
+        with _COMPILED_LOCK:
+            _COMPILED[state] = compiled
+            while len(_COMPILED) > _COMPILED_CACHE_SIZE:
+                _COMPILED.popitem(last=False)
+    return compiled
+
 
 def _pb_from_query(query):
     """Convert a Query instance to the corresponding protobuf.
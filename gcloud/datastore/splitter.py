@@ -0,0 +1,269 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Split a datastore query into key ranges and scan them in parallel.
+
+:func:`split_query` samples the ``__scatter__`` property of a kind to cut
+a query into key-range :class:`QuerySplit` objects of similar size, and a
+:class:`ParallelScan` runs them concurrently:
+
+.. code:: python
+
+    >>> from gcloud import datastore
+    >>> from gcloud.datastore.splitter import ParallelScan, split_query
+    >>> client = datastore.Client()
+    >>> query = client.query(kind='Person')
+    >>> scan = ParallelScan(query, split_query(query, 16), max_workers=16)
+    >>> for entity in scan:
+    ...     process(entity)
+
+Entities are yielded in no particular order.  Each split records in
+:attr:`QuerySplit.cursor` how far it has been consumed, so that a
+scan can be resumed by passing the (pickled) splits to a new
+:class:`ParallelScan`.  Since splits only hold keys and cursors, they
+can also be handed out to other processes, each applying them to its
+own query via :meth:`QuerySplit.apply`.
+"""
+
+import functools
+
+from gcloud._helpers import _merge_concurrently
+from gcloud.datastore.query import Query
+
+
+KEYS_PER_SPLIT = 32
+"""Number of ``__scatter__`` samples drawn per requested split."""
+
+
+def _key_order(key):
+    """Sort key giving the order of datastore keys.
+
+    Path elements are compared in turn, by kind then identifier, with
+    numeric IDs sorting before names.
+
+    :type key: :class:`gcloud.datastore.key.Key`
+    :param key: A complete key.
+
+    :rtype: tuple
+    :returns: A value ordering like ``key`` does in the datastore.
+    """
+    return tuple(
+        (element['kind'], 0, element['id']) if 'id' in element else
+        (element['kind'], 1, element['name'])
+        for element in key.path)
+
+
+class QuerySplit(object):
+    """A key range of a query, plus how far it has been read.
+
+    :type start_key: :class:`gcloud.datastore.key.Key` or ``NoneType``
+    :param start_key: (Optional) First key (inclusive) in the range.
+
+    :type end_key: :class:`gcloud.datastore.key.Key` or ``NoneType``
+    :param end_key: (Optional) Key (exclusive) ending the range.
+
+    :type cursor: bytes
+    :param cursor: (Optional) Cursor after the last consumed result.
+
+    :type done: bool
+    :param done: (Optional) Whether the whole range has been consumed.
+    """
+
+    def __init__(self, start_key=None, end_key=None, cursor=None,
+                 done=False):
+        self.start_key = start_key
+        self.end_key = end_key
+        self.cursor = cursor
+        self.done = done
+
+    def __repr__(self):
+        return '<QuerySplit [%r, %r) cursor=%r done=%r>' % (
+            self.start_key, self.end_key, self.cursor, self.done)
+
+    def apply(self, query):
+        """Restrict a query to the key range of this split.
+
+        :type query: :class:`gcloud.datastore.query.Query`
+        :param query: The query which was split.
+
+        :rtype: :class:`gcloud.datastore.query.Query`
+        :returns: A new query, with ``__key__`` filters for the range.
+        """
+        filters = query.filters
+        if self.start_key is not None:
+            filters.append(('__key__', '>=', self.start_key))
+        if self.end_key is not None:
+            filters.append(('__key__', '<', self.end_key))
+        return Query(query._client, kind=query.kind, project=query.project,
+                     namespace=query.namespace, ancestor=query.ancestor,
+                     filters=filters, projection=query.projection,
+                     order=query.order, distinct_on=query.distinct_on)
+
+
+def split_query(query, num_splits, client=None):
+    """Split a query into key ranges of roughly equal size.
+
+    Samples ``num_splits * KEYS_PER_SPLIT`` keys of the query's kind,
+    ordered on the ``__scatter__`` property, and picks evenly spaced
+    boundaries among them.  Fewer splits are returned if the kind has too
+    few sampled entities.
+
+    :type query: :class:`gcloud.datastore.query.Query`
+    :param query: The query to split.  It must have a kind, and neither
+                  sort orders nor inequality filters.
+
+    :type num_splits: int
+    :param num_splits: The desired number of splits.
+
+    :type client: :class:`gcloud.datastore.client.Client`
+    :param client: (Optional) Client used for the sampling query.  If not
+                   supplied, uses the query's value.
+
+    :rtype: list of :class:`QuerySplit`
+    :returns: Splits covering all keys, in key order.
+    :raises: :class:`ValueError` if ``num_splits`` is not positive or if
+             the query cannot be split.
+    """
+    if num_splits < 1:
+        raise ValueError('num_splits must be positive')
+    if not query.kind:
+        raise ValueError('Only queries with a kind can be split')
+    if query.order:
+        raise ValueError('Queries with sort orders cannot be split')
+    for property_name, operator, _ in query.filters:
+        if operator != '=' or property_name == '__key__':
+            raise ValueError(
+                'Queries with inequality or key filters cannot be split')
+    if num_splits == 1:
+        return [QuerySplit()]
+
+    if client is None:
+        client = query._client
+    sample_query = Query(client, kind=query.kind, project=query.project,
+                         namespace=query.namespace, order=['__scatter__'])
+    sample_query.keys_only()
+    keys = sorted(
+        (entity.key for entity in sample_query.fetch(
+            limit=num_splits * KEYS_PER_SPLIT, client=client)),
+        key=_key_order)
+
+    boundaries = []
+    step = len(keys) / float(num_splits)
+    for index in range(1, num_splits):
+        if not keys:
+            break
+        key = keys[int(index * step)]
+        # With fewer samples than splits, the same key can come up again.
+        if not boundaries or key is not boundaries[-1]:
+            boundaries.append(key)
+
+    starts = [None] + boundaries
+    ends = boundaries + [None]
+    return [QuerySplit(start, end) for start, end in zip(starts, ends)]
+
+
+class ParallelScan(object):
+    """Run the splits of a query concurrently, merging their results.
+
+    :type query: :class:`gcloud.datastore.query.Query`
+    :param query: The query which was split.
+
+    :type splits: list of :class:`QuerySplit`
+    :param splits: Splits returned by :func:`split_query`, possibly
+                   restored from an earlier, interrupted scan.  They are
+                   updated as results are consumed.
+
+    :type max_workers: int
+    :param max_workers: (Optional) Maximum number of splits read at once.
+                        With ``1``, or if the client's connection shares
+                        one ``http`` object between threads, the splits
+                        are read one after another, in the current thread.
+
+    :type client: :class:`gcloud.datastore.client.Client`
+    :param client: (Optional) Client used to run the splits.  If not
+                   supplied, uses the query's value.
+    """
+
+    def __init__(self, query, splits, max_workers=8, client=None):
+        self._query = query
+        self.splits = splits
+        self.max_workers = max_workers
+        self._client = client or query._client
+
+    def _pages(self, split):
+        """Read the pages of a split, from its cursor onwards.
+
+        :type split: :class:`QuerySplit`
+        :param split: The split to read.
+
+        :rtype: iterator
+        :returns: ``(entities, cursor, finished)`` for each page.
+        """
+        iterator = split.apply(self._query).fetch(
+            start_cursor=split.cursor, client=self._client)
+        while True:
+            entities, more_results, cursor = iterator.next_page()
+            yield entities, cursor, not more_results
+            if not more_results:
+                return
+
+    def __iter__(self):
+        """Yield the entities of all unfinished splits.
+
+        A split's :attr:`~QuerySplit.cursor` is advanced once every
+        entity of a page has been yielded; resuming a scan can thus
+        repeat the entities of a partially consumed page.
+
+        :rtype: iterator of :class:`gcloud.datastore.entity.Entity`
+        """
+        splits = [split for split in self.splits if not split.done]
+        if (self.max_workers <= 1 or len(splits) <= 1 or
+                self._client.connection.http_is_shared):
+            pages = ((split, page) for split in splits
+                     for page in self._pages(split))
+        else:
+            pages = self._concurrent_pages(splits)
+
+        for split, (entities, cursor, finished) in pages:
+            for entity in entities:
+                yield entity
+            split.cursor = cursor
+            split.done = finished
+
+    def _split_pages(self, split):
+        """Read the pages of a split, tagged with the split.
+
+        :type split: :class:`QuerySplit`
+        :param split: The split to read.
+
+        :rtype: iterator
+        :returns: ``(split, page)`` pairs, ``page`` as from :meth:`_pages`.
+        """
+        for page in self._pages(split):
+            yield split, page
+
+    def _concurrent_pages(self, splits):
+        """Read splits in worker threads, yielding pages as they arrive.
+
+        :type splits: list of :class:`QuerySplit`
+        :param splits: The splits to read.
+
+        :rtype: iterator
+        :returns: ``(split, page)`` pairs, ``page`` as from :meth:`_pages`.
+        """
+        # At most two pages per worker wait for the consumer, so that the
+        # workers cannot run far ahead of it.
+        return _merge_concurrently(
+            [functools.partial(self._split_pages, split) for split in splits],
+            self.max_workers, max_pending=2, ordered=False)
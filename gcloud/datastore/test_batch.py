@@ -160,6 +160,43 @@ class TestBatch(unittest2.TestCase):
         mutated_key = _mutated_pb(self, batch.mutations, 'delete')
         self.assertEqual(mutated_key, key._key)
 
+    def test_put_entity_pb_w_partial_key(self):
+        _PROJECT = 'PROJECT'
+        client = _Client(_PROJECT, _Connection())
+        batch = self._makeOne(client)
+        entity_pb = _make_entity_pb(_PROJECT, None)
+        self.assertRaises(ValueError, batch.put_entity_pb, entity_pb)
+
+    def test_put_entity_pb_w_key_wrong_project(self):
+        client = _Client('PROJECT', _Connection())
+        batch = self._makeOne(client)
+        entity_pb = _make_entity_pb('OTHER')
+        self.assertRaises(ValueError, batch.put_entity_pb, entity_pb)
+
+    def test_put_entity_pb_w_completed_key(self):
+        _PROJECT = 'PROJECT'
+        client = _Client(_PROJECT, _Connection())
+        batch = self._makeOne(client)
+        entity_pb = _make_entity_pb(_PROJECT)
+        entity_pb.properties['foo'].string_value = u'bar'
+
+        batch.put_entity_pb(entity_pb)
+
+        mutated_entity = _mutated_pb(self, batch.mutations, 'upsert')
+        self.assertEqual(mutated_entity, entity_pb)
+        self.assertFalse(batch.has_partial_keys)
+
+    def test_has_partial_keys(self):
+        _PROJECT = 'PROJECT'
+        client = _Client(_PROJECT, _Connection())
+        batch = self._makeOne(client)
+        self.assertFalse(batch.has_partial_keys)
+        entity = _Entity()
+        key = entity.key = _Key(_PROJECT)
+        key._id = None
+        batch.put(entity)
+        self.assertTrue(batch.has_partial_keys)
+
     def test_begin(self):
         _PROJECT = 'PROJECT'
         client = _Client(_PROJECT, None)
@@ -197,6 +234,38 @@ class TestBatch(unittest2.TestCase):
         self.assertEqual(connection._committed,
                          [(_PROJECT, batch._commit_request, None)])
 
+    def test_commit_w_cache(self):
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.key import Key
+        _PROJECT = 'PROJECT'
+        connection = _Connection(1234)
+        client = _Client(_PROJECT, connection)
+        client.cache = _Cache()
+        batch = self._makeOne(client)
+        updated = Entity(key=Key('Kind', 1, project=_PROJECT))
+        inserted = Entity(key=Key('Kind', project=_PROJECT))
+        deleted = Key('Kind', 'name', project=_PROJECT)
+        batch.put(updated)
+        batch.put(inserted)
+        batch.delete(deleted)
+
+        batch.commit()
+        self.assertEqual(client.cache._deleted, [[updated.key, deleted]])
+
+    def test_commit_failure_w_cache(self):
+        from gcloud.datastore.key import Key
+        _PROJECT = 'PROJECT'
+        connection = _Connection()
+        connection.commit = None  # Not callable: the commit fails.
+        client = _Client(_PROJECT, connection)
+        client.cache = _Cache()
+        batch = self._makeOne(client)
+        key = Key('Kind', 1, project=_PROJECT)
+        batch.delete(key)
+
+        self.assertRaises(TypeError, batch.commit)
+        self.assertEqual(client.cache._deleted, [[key]])
+
     def test_commit_w_partial_key_entities(self):
         _PROJECT = 'PROJECT'
         _NEW_ID = 1234
@@ -322,6 +391,15 @@ class _Connection(object):
         return self._index_updates, self._completed_keys
 
 
+class _Cache(object):
+
+    def __init__(self):
+        self._deleted = []
+
+    def delete_multi(self, keys):
+        self._deleted.append(keys)
+
+
 class _Entity(dict):
     key = None
     exclude_from_indexes = ()
@@ -369,6 +447,7 @@ class _Client(object):
         self.project = project
         self.connection = connection
         self.namespace = namespace
+        self.cache = None
         self._batches = []
 
     def _push_batch(self, batch):
@@ -398,3 +477,14 @@ def _mutated_pb(test_case, mutation_pb_list, mutation_type):
                           mutation_type)
 
     return getattr(mutated_pb, mutation_type)
+
+
+def _make_entity_pb(project, id_=1234):
+    from gcloud.datastore._generated import entity_pb2
+    entity_pb = entity_pb2.Entity()
+    entity_pb.key.partition_id.project_id = project
+    element = entity_pb.key.path.add()
+    element.kind = 'KIND'
+    if id_ is not None:
+        element.id = id_
+    return entity_pb
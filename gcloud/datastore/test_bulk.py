@@ -0,0 +1,415 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+class TestBulkWriteResult(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.bulk import BulkWriteResult
+        return BulkWriteResult
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_failed(self):
+        error = ValueError()
+        result = self._makeOne(['a'], [(['b', 'c'], error), (['d'], error)])
+        self.assertEqual(result.written, ['a'])
+        self.assertEqual(result.failed, ['b', 'c', 'd'])
+
+
+class TestBulkWriter(unittest2.TestCase):
+
+    PROJECT = 'PROJECT'
+
+    def _getTargetClass(self):
+        from gcloud.datastore.bulk import BulkWriter
+        return BulkWriter
+
+    def _makeOne(self, client, *args, **kw):
+        return self._getTargetClass()(client, *args, **kw)
+
+    def _makeClient(self, connection=None):
+        return _Client(self.PROJECT, connection or _Connection())
+
+    def _makeEntities(self, count, partial=False):
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.key import Key
+        entities = []
+        for index in range(count):
+            if partial:
+                key = Key('Kind', project=self.PROJECT)
+            else:
+                key = Key('Kind', index + 1, project=self.PROJECT)
+            entity = Entity(key=key)
+            entity['index'] = index
+            entities.append(entity)
+        return entities
+
+    def _runPatched(self, func, *args):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import bulk as MUT
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            result = func(*args)
+        return result, sleeps
+
+    def test_ctor_defaults(self):
+        from gcloud.datastore.bulk import MAX_MUTATIONS
+        client = self._makeClient()
+        writer = self._makeOne(client)
+        self.assertTrue(writer._client is client)
+        self.assertEqual(writer.batch_size, MAX_MUTATIONS)
+        self.assertEqual(writer.max_workers, 8)
+        self.assertEqual(writer.max_attempts, 5)
+        self.assertEqual(writer.initial_backoff, 0.1)
+        self.assertEqual(writer.max_backoff, 10.0)
+
+    def test_ctor_invalid(self):
+        from gcloud.datastore.bulk import MAX_MUTATIONS
+        client = self._makeClient()
+        self.assertRaises(ValueError, self._makeOne, client, batch_size=0)
+        self.assertRaises(ValueError, self._makeOne, client,
+                          batch_size=MAX_MUTATIONS + 1)
+        self.assertRaises(ValueError, self._makeOne, client,
+                          max_attempts=0)
+
+    def test_put_multi_empty(self):
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection))
+        result = writer.put_multi([])
+        self.assertEqual(result.written, [])
+        self.assertEqual(result.errors, [])
+        self.assertEqual(connection._committed, [])
+
+    def test_put_multi_w_single_entity(self):
+        writer = self._makeOne(self._makeClient())
+        entity, = self._makeEntities(1)
+        self.assertRaises(ValueError, writer.put_multi, entity)
+
+    def test_put_multi_in_batch(self):
+        client = self._makeClient()
+        client._batches.append(object())
+        writer = self._makeOne(client)
+        self.assertRaises(ValueError, writer.put_multi, self._makeEntities(1))
+
+    def test_put_multi_wrong_project_writes_nothing(self):
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.key import Key
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=1)
+        entities = self._makeEntities(2)
+        entities.append(Entity(key=Key('Kind', 1, project='OTHER')))
+        self.assertRaises(ValueError, writer.put_multi, entities)
+        self.assertEqual(connection._committed, [])
+
+    def test_put_multi_chunks(self):
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=2,
+                               max_workers=1)
+        entities = self._makeEntities(5)
+        result = writer.put_multi(entities)
+        self.assertEqual(result.written, [entity.key for entity in entities])
+        self.assertEqual(result.errors, [])
+        self.assertEqual([len(request.mutations)
+                          for _, request, _ in connection._committed],
+                         [2, 2, 1])
+        for project, request, transaction_id in connection._committed:
+            self.assertEqual(project, self.PROJECT)
+            self.assertEqual(transaction_id, None)
+            for mutation in request.mutations:
+                self.assertEqual(mutation.WhichOneof('operation'), 'upsert')
+
+    def test_put_multi_concurrent(self):
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=10,
+                               max_workers=4)
+        entities = self._makeEntities(95)
+        result = writer.put_multi(entities)
+        self.assertEqual(result.written, [entity.key for entity in entities])
+        self.assertEqual(len(connection._committed), 10)
+        committed = sorted(
+            mutation.upsert.key.path[0].id
+            for _, request, _ in connection._committed
+            for mutation in request.mutations)
+        self.assertEqual(committed, list(range(1, 96)))
+
+    def test_put_multi_shared_http_sequential(self):
+        import threading
+        connection = _Connection()
+        connection.http_is_shared = True
+        writer = self._makeOne(self._makeClient(connection), batch_size=10,
+                               max_workers=4)
+        entities = self._makeEntities(35)
+        result = writer.put_multi(entities)
+        self.assertEqual(result.written, [entity.key for entity in entities])
+        self.assertEqual(len(connection._committed), 4)
+        self.assertEqual(connection._threads,
+                         set([threading.current_thread()]))
+
+    def test_put_multi_partial_keys_completed(self):
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=2)
+        entities = self._makeEntities(3, partial=True)
+        result = writer.put_multi(entities)
+        for entity in entities:
+            self.assertFalse(entity.key.is_partial)
+        self.assertEqual(result.written, [entity.key for entity in entities])
+        self.assertEqual(len(set(key.id for key in result.written)), 3)
+        for _, request, _ in connection._committed:
+            for mutation in request.mutations:
+                self.assertEqual(mutation.WhichOneof('operation'), 'insert')
+
+    def test_put_multi_repeated_key_last_wins(self):
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=2,
+                               max_workers=4)
+        entities = self._makeEntities(3) + self._makeEntities(2)
+        entities[3]['index'] = 'LAST'
+        result = writer.put_multi(entities)
+        self.assertEqual(result.written,
+                         [entities[2].key, entities[3].key, entities[4].key])
+        upserts = sorted(
+            (mutation.upsert.key.path[0].id,
+             mutation.upsert.properties['index'].WhichOneof('value_type'))
+            for _, request, _ in connection._committed
+            for mutation in request.mutations)
+        self.assertEqual(upserts, [(1, 'string_value'),
+                                   (2, 'integer_value'),
+                                   (3, 'integer_value')])
+
+    def test_put_multi_partial_keys_not_deduplicated(self):
+        writer = self._makeOne(self._makeClient(), batch_size=2)
+        entities = self._makeEntities(3, partial=True)
+        result = writer.put_multi(entities)
+        self.assertEqual(len(result.written), 3)
+        self.assertEqual(len(set(key.id for key in result.written)), 3)
+
+    def test_put_multi_retries_conflict(self):
+        from gcloud.exceptions import Conflict
+        connection = _Connection(Conflict('contention'), Conflict('again'))
+        writer = self._makeOne(self._makeClient(connection),
+                               initial_backoff=1.0)
+        entities = self._makeEntities(2)
+        result, sleeps = self._runPatched(writer.put_multi, entities)
+        self.assertEqual(result.written, [entity.key for entity in entities])
+        self.assertEqual(result.errors, [])
+        self.assertEqual(connection._attempts, 3)
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(0.5 <= sleeps[0] <= 1.0)
+        self.assertTrue(1.0 <= sleeps[1] <= 2.0)
+
+    def test_put_multi_gives_up_after_max_attempts(self):
+        from gcloud.exceptions import TooManyRequests
+        errors = [TooManyRequests('slow down') for _ in range(3)]
+        connection = _Connection(*errors)
+        writer = self._makeOne(self._makeClient(connection), max_attempts=3,
+                               initial_backoff=4.0, max_backoff=5.0)
+        entities = self._makeEntities(2)
+        result, sleeps = self._runPatched(writer.put_multi, entities)
+        self.assertEqual(result.written, [])
+        self.assertEqual(result.failed, [entity.key for entity in entities])
+        self.assertTrue(result.errors[0][1] is errors[2])
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(max(sleeps) <= 5.0)
+
+    def test_put_multi_partial_keys_not_retried_on_unavailable(self):
+        from gcloud.exceptions import ServiceUnavailable
+        error = ServiceUnavailable('unavailable')
+        connection = _Connection(error)
+        writer = self._makeOne(self._makeClient(connection))
+        entities = self._makeEntities(1, partial=True)
+        result, sleeps = self._runPatched(writer.put_multi, entities)
+        self.assertEqual(result.errors, [([entities[0].key], error)])
+        self.assertTrue(entities[0].key.is_partial)
+        self.assertEqual(connection._attempts, 1)
+        self.assertEqual(sleeps, [])
+
+    def test_put_multi_other_error_not_retried(self):
+        from gcloud.exceptions import BadRequest
+        error = BadRequest('bad')
+        connection = _Connection(error)
+        writer = self._makeOne(self._makeClient(connection), batch_size=2,
+                               max_workers=1)
+        entities = self._makeEntities(4)
+        result, sleeps = self._runPatched(writer.put_multi, entities)
+        # The first chunk fails, the second one is still written.
+        self.assertEqual(result.written, [entities[2].key, entities[3].key])
+        self.assertEqual(result.errors,
+                         [([entities[0].key, entities[1].key], error)])
+        self.assertEqual(sleeps, [])
+
+    def test_commit_batch(self):
+        from gcloud.datastore.batch import Batch
+        from gcloud.exceptions import Conflict
+        connection = _Connection(Conflict('contention'))
+        client = self._makeClient(connection)
+        writer = self._makeOne(client)
+        batch = Batch(client)
+        batch.put(self._makeEntities(1)[0])
+        error, sleeps = self._runPatched(writer.commit_batch, batch)
+        self.assertEqual(error, None)
+        self.assertEqual(connection._attempts, 2)
+        self.assertEqual(len(sleeps), 1)
+
+    def _makeBatches(self, client, count, size):
+        from gcloud.datastore.batch import Batch
+        entities = self._makeEntities(count * size)
+        batches = []
+        for start in range(0, len(entities), size):
+            batch = Batch(client)
+            for entity in entities[start:start + size]:
+                batch.put(entity)
+            batches.append(batch)
+        return batches
+
+    def test_commit_batches_sequential(self):
+        connection = _Connection()
+        client = self._makeClient(connection)
+        writer = self._makeOne(client, max_workers=1)
+        batches = self._makeBatches(client, 3, 2)
+        outcomes = []
+        writer.commit_batches(
+            iter(batches), lambda batch, error: outcomes.append(
+                (batch, error)))
+        self.assertEqual(outcomes, [(batch, None) for batch in batches])
+        self.assertEqual(len(connection._committed), 3)
+
+    def test_commit_batches_concurrent(self):
+        import threading
+        from gcloud.exceptions import BadRequest
+        connection = _Connection(BadRequest('invalid'))
+        client = self._makeClient(connection)
+        writer = self._makeOne(client, max_workers=4)
+        batches = self._makeBatches(client, 10, 3)
+        lock = threading.Lock()
+        outcomes = []
+
+        def _callback(batch, error):
+            with lock:
+                outcomes.append((batch, error))
+
+        writer.commit_batches(iter(batches), _callback)
+        self.assertEqual(len(outcomes), 10)
+        self.assertEqual(set(batch for batch, _ in outcomes), set(batches))
+        errors = [error for _, error in outcomes if error is not None]
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], BadRequest))
+        self.assertEqual(len(connection._committed), 9)
+
+    def test_commit_batches_shared_http_sequential(self):
+        import threading
+        connection = _Connection()
+        connection.http_is_shared = True
+        client = self._makeClient(connection)
+        writer = self._makeOne(client, max_workers=4)
+        outcomes = []
+        writer.commit_batches(
+            self._makeBatches(client, 3, 2),
+            lambda batch, error: outcomes.append(error))
+        self.assertEqual(outcomes, [None, None, None])
+        self.assertEqual(connection._threads,
+                         set([threading.current_thread()]))
+
+    def test_delete_multi(self):
+        from gcloud.datastore.key import Key
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=2)
+        keys = [Key('Kind', index, project=self.PROJECT)
+                for index in range(1, 4)]
+        result = writer.delete_multi(keys)
+        self.assertEqual(result.written, keys)
+        deleted = sorted(
+            mutation.delete.path[0].id
+            for _, request, _ in connection._committed
+            for mutation in request.mutations)
+        self.assertEqual(deleted, [1, 2, 3])
+
+    def test_delete_multi_repeated_key(self):
+        from gcloud.datastore.key import Key
+        connection = _Connection()
+        writer = self._makeOne(self._makeClient(connection), batch_size=2)
+        keys = [Key('Kind', index, project=self.PROJECT)
+                for index in (1, 2, 1, 3, 2)]
+        result = writer.delete_multi(keys)
+        self.assertEqual(result.written, [keys[2], keys[3], keys[4]])
+        deleted = sorted(
+            mutation.delete.path[0].id
+            for _, request, _ in connection._committed
+            for mutation in request.mutations)
+        self.assertEqual(deleted, [1, 2, 3])
+
+    def test_delete_multi_partial_key(self):
+        from gcloud.datastore.key import Key
+        writer = self._makeOne(self._makeClient())
+        self.assertRaises(ValueError, writer.delete_multi,
+                          [Key('Kind', project=self.PROJECT)])
+
+
+class _PathElementPB(object):
+
+    def __init__(self, id_):
+        self.id = id_
+
+
+class _KeyPB(object):
+
+    def __init__(self, id_):
+        self.path = [_PathElementPB(id_)]
+
+
+class _Connection(object):
+
+    http_is_shared = False
+
+    def __init__(self, *errors):
+        import threading
+        self._errors = list(errors)
+        self._lock = threading.Lock()
+        self._attempts = 0
+        self._next_id = 1000
+        self._committed = []
+        self._threads = set()
+
+    def commit(self, project, commit_request, transaction_id):
+        import threading
+        with self._lock:
+            self._attempts += 1
+            self._threads.add(threading.current_thread())
+            if self._errors:
+                raise self._errors.pop(0)
+            self._committed.append((project, commit_request, transaction_id))
+            completed = []
+            for mutation in commit_request.mutations:
+                if mutation.WhichOneof('operation') == 'insert':
+                    self._next_id += 1
+                    completed.append(_KeyPB(self._next_id))
+            return 0, completed
+
+
+class _Client(object):
+
+    def __init__(self, project, connection, namespace=None):
+        self.project = project
+        self.connection = connection
+        self.namespace = namespace
+        self.cache = None
+        self._batches = []
+
+    @property
+    def current_batch(self):
+        if self._batches:
+            return self._batches[0]
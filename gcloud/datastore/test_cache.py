@@ -0,0 +1,322 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+_PROJECT = 'PROJECT'
+
+
+def _make_key(id_or_name, namespace=None):
+    from gcloud.datastore.key import Key
+    return Key('Kind', id_or_name, project=_PROJECT, namespace=namespace)
+
+
+def _make_entity_pb(key, value):
+    from gcloud.datastore._generated import entity_pb2
+    from gcloud.datastore.helpers import _new_value_pb
+    entity_pb = entity_pb2.Entity()
+    entity_pb.key.CopyFrom(key.to_protobuf())
+    _new_value_pb(entity_pb, 'value').string_value = value
+    return entity_pb
+
+
+class TestCacheStats(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.cache import CacheStats
+        return CacheStats
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_hit_ratio(self):
+        self.assertEqual(self._makeOne().hit_ratio, 0.0)
+        self.assertEqual(self._makeOne(hits=3, misses=1).hit_ratio, 0.75)
+
+    def test___repr__(self):
+        stats = self._makeOne(hits=1, misses=2)
+        self.assertEqual(repr(stats),
+                         '<CacheStats hits=1 misses=2 sets=0 invalidations=0 '
+                         'evictions=0 errors=0>')
+
+
+class TestEntityCache(unittest2.TestCase):
+
+    def _makeOne(self):
+        from gcloud.datastore.cache import EntityCache
+        return EntityCache()
+
+    def test_generation(self):
+        from gcloud.datastore.cache import LocalCache
+        cache = LocalCache()
+        key1, key2 = _make_key(1), _make_key(2)
+        generation = cache.generation
+        cache.set_multi([(key1, _make_entity_pb(key1, u'a'))],
+                        generation=generation)
+        self.assertEqual(len(cache), 1)
+        cache.delete_multi([key2])
+        self.assertEqual(cache.generation, generation + 1)
+        # Entities looked up before an eviction are not stored.
+        cache.set_multi([(key2, _make_entity_pb(key2, u'b'))],
+                        generation=generation)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats.sets, 1)
+        cache.set_multi([(key2, _make_entity_pb(key2, u'b'))],
+                        generation=cache.generation)
+        self.assertEqual(len(cache), 2)
+
+    def test_abstract(self):
+        cache = self._makeOne()
+        key = _make_key(1)
+        self.assertRaises(NotImplementedError, cache.get_multi, [key])
+        self.assertRaises(NotImplementedError, cache.set_multi,
+                          [(key, _make_entity_pb(key, u'a'))])
+        self.assertRaises(NotImplementedError, cache.delete_multi, [key])
+        self.assertRaises(NotImplementedError, cache.clear)
+
+
+class TestLocalCache(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.cache import LocalCache
+        return LocalCache
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_ctor_defaults(self):
+        from gcloud.datastore.cache import DEFAULT_TTL
+        cache = self._makeOne()
+        self.assertEqual(cache.max_size, 10000)
+        self.assertEqual(cache.ttl, DEFAULT_TTL)
+
+    def test_ctor_invalid(self):
+        self.assertRaises(ValueError, self._makeOne, max_size=0)
+
+    def test_get_set_delete(self):
+        from gcloud.datastore.key import Key
+        cache = self._makeOne()
+        key1, key2 = _make_key(1), _make_key(2)
+        entity_pb = _make_entity_pb(key1, u'a')
+        cache.set_multi([(key1, entity_pb)])
+        self.assertEqual(len(cache), 1)
+
+        # An equal key, e.g. decoded from a protobuf, hits.
+        same_key = Key('Kind', 1, project=_PROJECT, namespace='')
+        found = cache.get_multi([same_key, key2])
+        self.assertEqual(list(found), [same_key])
+        self.assertTrue(found[same_key] is entity_pb)
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.sets, 1)
+
+        cache.delete_multi([key1, key2])
+        self.assertEqual(cache.get_multi([key1]), {})
+        self.assertEqual(cache.stats.invalidations, 2)
+
+    def test_namespaces_distinct(self):
+        cache = self._makeOne()
+        key = _make_key(1)
+        cache.set_multi([(key, _make_entity_pb(key, u'a'))])
+        self.assertEqual(cache.get_multi([_make_key(1, 'NS')]), {})
+
+    def test_lru_eviction(self):
+        cache = self._makeOne(max_size=2)
+        keys = [_make_key(index) for index in range(1, 4)]
+        cache.set_multi([(key, _make_entity_pb(key, u'a'))
+                         for key in keys[:2]])
+        # Reading the first key makes the second one least recently used.
+        cache.get_multi([keys[0]])
+        cache.set_multi([(keys[2], _make_entity_pb(keys[2], u'c'))])
+        self.assertEqual(sorted(cache.get_multi(keys).keys(),
+                                key=lambda key: key.id),
+                         [keys[0], keys[2]])
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_ttl(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import cache as MUT
+        cache = self._makeOne(ttl=10)
+        key = _make_key(1)
+        with _Monkey(MUT, _NOW=lambda: 100.0):
+            cache.set_multi([(key, _make_entity_pb(key, u'a'))])
+        with _Monkey(MUT, _NOW=lambda: 109.0):
+            self.assertEqual(list(cache.get_multi([key])), [key])
+        with _Monkey(MUT, _NOW=lambda: 110.0):
+            self.assertEqual(cache.get_multi([key]), {})
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_clear(self):
+        cache = self._makeOne()
+        key = _make_key(1)
+        cache.set_multi([(key, _make_entity_pb(key, u'a'))])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestMemcacheCache(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.cache import MemcacheCache
+        return MemcacheCache
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def _makeServer(self):
+        server = _MemcacheServer()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_get_set_delete(self):
+        server = self._makeServer()
+        cache = self._makeOne(server.address, ttl=30)
+        self.addCleanup(cache._close)
+        key1, key2 = _make_key(1), _make_key(u'name')
+        entity_pb = _make_entity_pb(key1, u'a')
+        cache.set_multi([(key1, entity_pb)])
+
+        found = cache.get_multi([key1, key2])
+        self.assertEqual(list(found), [key1])
+        self.assertEqual(found[key1], entity_pb)
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+        memcache_key, = server.values
+        self.assertTrue(memcache_key.startswith(b'gcloud-datastore:'))
+        self.assertEqual(server.exptimes, [b'30'])
+
+        cache.delete_multi([key1])
+        self.assertEqual(cache.get_multi([key1]), {})
+        self.assertEqual(server.values, {})
+
+    def test_memcache_key(self):
+        import hashlib
+        from gcloud.datastore.cache import _cache_key
+        from gcloud.datastore.cache import DEFAULT_TTL
+        cache = self._makeOne()
+        self.assertEqual(cache.ttl, DEFAULT_TTL)
+        key = _make_key(u'name', namespace='NS')
+        digest = hashlib.sha1(
+            key.to_protobuf().SerializeToString()).hexdigest()
+        self.assertEqual(cache._memcache_key(_cache_key(key)),
+                         b'gcloud-datastore:' + digest.encode('ascii'))
+        # An empty namespace is the default one.
+        self.assertEqual(cache._memcache_key(_cache_key(_make_key(1, ''))),
+                         cache._memcache_key(_cache_key(_make_key(1))))
+
+    def test_shared_between_instances(self):
+        server = self._makeServer()
+        writer = self._makeOne(server.address)
+        reader = self._makeOne(server.address)
+        self.addCleanup(writer._close)
+        self.addCleanup(reader._close)
+        key = _make_key(1)
+        writer.set_multi([(key, _make_entity_pb(key, u'a'))])
+        self.assertEqual(list(reader.get_multi([key])), [key])
+
+    def test_clear(self):
+        server = self._makeServer()
+        cache = self._makeOne(server.address)
+        self.addCleanup(cache._close)
+        key = _make_key(1)
+        cache.set_multi([(key, _make_entity_pb(key, u'a'))])
+        cache.clear()
+        self.assertEqual(server.values, {})
+
+    def test_unreachable(self):
+        server = self._makeServer()
+        address = server.address
+        server.stop()
+        cache = self._makeOne(address, timeout=0.5)
+        key = _make_key(1)
+        self.assertEqual(cache.get_multi([key]), {})
+        cache.set_multi([(key, _make_entity_pb(key, u'a'))])
+        cache.delete_multi([key])
+        self.assertEqual(cache.stats.errors, 3)
+        self.assertEqual(cache.stats.misses, 1)
+
+    def test_malformed_reply(self):
+        server = self._makeServer()
+        server.get_reply = b'SERVER_ERROR oops\r\n'
+        cache = self._makeOne(server.address)
+        self.addCleanup(cache._close)
+        self.assertEqual(cache.get_multi([_make_key(1)]), {})
+        self.assertEqual(cache.stats.errors, 1)
+
+
+class _MemcacheServer(object):
+    """Minimal ``memcached``, speaking the commands used by the cache."""
+
+    get_reply = None
+
+    def __init__(self):
+        import threading
+        from six.moves import socketserver
+        self.values = {}
+        self.exptimes = []
+        server = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+
+            def handle(self):
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    self.wfile.write(server._handle(line.split(), self.rfile))
+
+        self._server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _handle(self, parts, rfile):
+        command = parts[0]
+        if command == b'get':
+            if self.get_reply is not None:
+                return self.get_reply
+            reply = []
+            for key in parts[1:]:
+                if key in self.values:
+                    value = self.values[key]
+                    reply.append(b'VALUE ' + key + b' 0 ' +
+                                 str(len(value)).encode('ascii') + b'\r\n' +
+                                 value + b'\r\n')
+            return b''.join(reply) + b'END\r\n'
+        if command == b'set':
+            value = rfile.read(int(parts[4]) + 2)[:-2]
+            self.values[parts[1]] = value
+            self.exptimes.append(parts[3])
+            return b''
+        if command == b'delete':
+            self.values.pop(parts[1], None)
+            return b''
+        if command == b'flush_all':
+            self.values.clear()
+            return b'OK\r\n'
+        if command == b'version':
+            return b'VERSION 1.4\r\n'
+        return b'ERROR\r\n'
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread = None
@@ -15,6 +15,16 @@
 import unittest2
 
 
+try:
+    # pylint: disable=unused-import
+    import gcloud.datastore.grpc_connection
+    # pylint: enable=unused-import
+except ImportError:  # pragma: NO COVER
+    _HAVE_GRPC = False
+else:
+    _HAVE_GRPC = True
+
+
 def _make_entity_pb(project, kind, integer_id, name=None, str_val=None):
     from gcloud.datastore._generated import entity_pb2
     from gcloud.datastore.helpers import _new_value_pb
@@ -133,11 +143,12 @@ class TestClient(unittest2.TestCase):
         return Client
 
     def _makeOne(self, project=PROJECT, namespace=None,
-                 credentials=None, http=None):
+                 credentials=None, http=None, cache=None):
         return self._getTargetClass()(project=project,
                                       namespace=namespace,
                                       credentials=credentials,
-                                      http=http)
+                                      http=http,
+                                      cache=cache)
 
     def test_ctor_w_project_no_environ(self):
         from gcloud._testing import _Monkey
@@ -192,6 +203,24 @@ class TestClient(unittest2.TestCase):
         self.assertTrue(client.connection.http is http)
         self.assertTrue(client.current_batch is None)
         self.assertEqual(list(client._batch_stack), [])
+        self.assertEqual(client.cache, None)
+
+    def test_ctor_w_cache(self):
+        cache = object()
+        client = self._makeOne(credentials=object(), cache=cache)
+        self.assertTrue(client.cache is cache)
+
+    @unittest2.skipUnless(_HAVE_GRPC, 'No grpcio')
+    def test_ctor_w_use_grpc(self):
+        from gcloud.datastore.grpc_connection import GrpcConnection
+        creds = object()
+        client = self._getTargetClass()(project=self.PROJECT,
+                                        credentials=creds, use_grpc=True)
+        self.assertTrue(isinstance(client.connection, GrpcConnection))
+        self.assertTrue(client.connection.credentials is creds)
+        # The choice does not leak to other clients.
+        client = self._makeOne(credentials=object())
+        self.assertFalse(isinstance(client.connection, GrpcConnection))
 
     def test__push_batch_and__pop_batch(self):
         creds = object()
@@ -449,6 +478,101 @@ class TestClient(unittest2.TestCase):
         _, _, _, transaction_id = cw[0]
         self.assertEqual(transaction_id, TXN_ID)
 
+    def test_get_multi_w_cache(self):
+        from gcloud.datastore.cache import LocalCache
+        from gcloud.datastore.key import Key
+
+        found_pb = _make_entity_pb(self.PROJECT, 'Kind', 1, 'foo', 'Foo')
+        missed_pb = _make_entity_pb(self.PROJECT, 'Kind', 2)
+        cache = LocalCache()
+        client = self._makeOne(credentials=object(), cache=cache)
+        client.connection._add_lookup_result([found_pb], [missed_pb])
+        client.connection._add_lookup_result([], [missed_pb])
+        key1 = Key('Kind', 1, project=self.PROJECT)
+        key2 = Key('Kind', 2, project=self.PROJECT)
+
+        missing = []
+        entity, = client.get_multi([key1, key2], missing=missing)
+        self.assertEqual(entity.key, key1)
+        self.assertEqual([missed.key for missed in missing], [key2])
+        self.assertEqual(len(cache), 1)
+
+        # The cached entity is not looked up again, and is decoded anew.
+        missing = []
+        cached, = client.get_multi([key2, key1], missing=missing)
+        self.assertFalse(cached is entity)
+        self.assertEqual(cached, entity)
+        self.assertEqual([missed.key for missed in missing], [key2])
+        _, key_pbs, _, _ = client.connection._lookup_cw[1]
+        self.assertEqual(key_pbs, [key2.to_protobuf()])
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 3)
+
+        # All keys hit: no lookup at all.
+        self.assertEqual(client.get(key1), entity)
+        self.assertEqual(len(client.connection._lookup_cw), 2)
+
+    def test_get_multi_w_cache_write_during_lookup(self):
+        from gcloud.datastore.cache import LocalCache
+        from gcloud.datastore.key import Key
+
+        found_pb = _make_entity_pb(self.PROJECT, 'Kind', 1, 'foo', 'Foo')
+        cache = LocalCache()
+        client = self._makeOne(credentials=object(), cache=cache)
+        client.connection._add_lookup_result([found_pb])
+        key = Key('Kind', 1, project=self.PROJECT)
+        lookup = client.connection.lookup
+
+        def _lookup_then_write(*args, **kwargs):
+            result = lookup(*args, **kwargs)
+            # A concurrent write evicts the key before the lookup returns.
+            cache.delete_multi([key])
+            return result
+
+        client.connection.lookup = _lookup_then_write
+        self.assertEqual(client.get(key).key, key)
+        # The entity looked up may predate the write: it is not cached.
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats.sets, 0)
+
+    def test_get_multi_w_cache_in_transaction(self):
+        from gcloud.datastore.cache import LocalCache
+        from gcloud.datastore.key import Key
+
+        entity_pb = _make_entity_pb(self.PROJECT, 'Kind', 1)
+        cache = LocalCache()
+        client = self._makeOne(credentials=object(), cache=cache)
+        client.connection._add_lookup_result([entity_pb])
+        key = Key('Kind', 1, project=self.PROJECT)
+        cache.set_multi([(key, entity_pb)])
+
+        with _NoCommitTransaction(client, 'TXN'):
+            self.assertEqual(client.get(key).key, key)
+
+        _, _, _, transaction_id = client.connection._lookup_cw[0]
+        self.assertEqual(transaction_id, 'TXN')
+        self.assertEqual(cache.stats.hits, 0)
+
+    def test_put_multi_w_cache_invalidates(self):
+        from gcloud.datastore.cache import LocalCache
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.key import Key
+
+        entity_pb = _make_entity_pb(self.PROJECT, 'Kind', 1)
+        cache = LocalCache()
+        client = self._makeOne(credentials=object(), cache=cache)
+        client.connection._commit.append([])
+        client.connection._commit.append([])
+        key = Key('Kind', 1, project=self.PROJECT)
+        cache.set_multi([(key, entity_pb)])
+
+        client.put(Entity(key=key))
+        self.assertEqual(len(cache), 0)
+        cache.set_multi([(key, entity_pb)])
+        client.delete(key)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats.invalidations, 2)
+
     def test_get_multi_hit_multiple_keys_same_project(self):
         from gcloud.datastore.key import Key
 
@@ -522,6 +646,183 @@ class TestClient(unittest2.TestCase):
         self.assertEqual(missing, [])
         self.assertEqual(deferred, [])
 
+    def test_get_multi_sharded_no_keys(self):
+        creds = object()
+        client = self._makeOne(credentials=creds)
+        self.assertEqual(client.get_multi_sharded([]), [])
+
+    def test_get_multi_sharded_different_project(self):
+        from gcloud.datastore.key import Key
+
+        creds = object()
+        client = self._makeOne(credentials=creds)
+        key = Key('KIND', 1234, project='OTHER')
+        with self.assertRaises(ValueError):
+            client.get_multi_sharded([key])
+
+    def test_get_multi_sharded_invalid_shard_size(self):
+        from gcloud.datastore.key import Key
+
+        creds = object()
+        client = self._makeOne(credentials=creds)
+        key = Key('KIND', 1234, project=self.PROJECT)
+        with self.assertRaises(ValueError):
+            client.get_multi_sharded([key], shard_size=0)
+
+    def test_get_multi_sharded_input_order_w_missing(self):
+        from gcloud.datastore.key import Key
+
+        KIND = 'Kind'
+        entity_pb1 = _make_entity_pb(self.PROJECT, KIND, 1, 'foo', 'Foo')
+        entity_pb3 = _make_entity_pb(self.PROJECT, KIND, 3)
+        entity_pb4 = _make_entity_pb(self.PROJECT, KIND, 4)
+
+        creds = object()
+        client = self._makeOne(credentials=creds)
+        # Shard [1, 2]: 2 is missing; shard [3, 1]: results out of order.
+        client.connection._add_lookup_result(
+            [entity_pb1], missing=[_make_entity_pb(self.PROJECT, KIND, 2)])
+        client.connection._add_lookup_result([entity_pb4, entity_pb3])
+
+        keys = [Key(KIND, 1, project=self.PROJECT),
+                Key(KIND, 2, project=self.PROJECT),
+                Key(KIND, 3, project=self.PROJECT),
+                Key(KIND, 4, project=self.PROJECT)]
+        found = client.get_multi_sharded(keys, shard_size=2, max_workers=1)
+
+        self.assertEqual(len(found), 4)
+        self.assertEqual(found[0].key, keys[0])
+        self.assertEqual(found[0]['foo'], 'Foo')
+        self.assertEqual(found[1], None)
+        self.assertEqual(found[2].key, keys[2])
+        self.assertEqual(found[3].key, keys[3])
+
+        cw = client.connection._lookup_cw
+        self.assertEqual(len(cw), 2)
+        self.assertEqual(cw[0][1], [keys[0].to_protobuf(),
+                                    keys[1].to_protobuf()])
+        self.assertEqual(cw[1][1], [keys[2].to_protobuf(),
+                                    keys[3].to_protobuf()])
+
+    def test_get_multi_sharded_w_deferred_and_transaction(self):
+        from gcloud.datastore.key import Key
+
+        KIND = 'Kind'
+        TXN_ID = '123'
+        entity_pb1 = _make_entity_pb(self.PROJECT, KIND, 1)
+        entity_pb2 = _make_entity_pb(self.PROJECT, KIND, 2)
+        key1 = Key(KIND, 1, project=self.PROJECT)
+        key2 = Key(KIND, 2, project=self.PROJECT)
+
+        creds = object()
+        client = self._makeOne(credentials=creds)
+        client.connection._add_lookup_result(
+            [entity_pb1], deferred=[key2.to_protobuf()])
+        client.connection._add_lookup_result([entity_pb2])
+
+        with _NoCommitTransaction(client, TXN_ID):
+            found = client.get_multi_sharded([key2, key1, key2],
+                                             max_workers=1)
+
+        self.assertEqual([entity.key for entity in found],
+                         [key2, key1, key2])
+        cw = client.connection._lookup_cw
+        self.assertEqual(len(cw), 2)
+        self.assertEqual(cw[1][1], [key2.to_protobuf()])
+        self.assertEqual([call[3] for call in cw], [TXN_ID, TXN_ID])
+
+    def test_get_multi_sharded_w_deferred_non_empty(self):
+        from gcloud.datastore.key import Key
+
+        client = self._makeOne(credentials=object())
+        key = Key('Kind', 1, project=self.PROJECT)
+        with self.assertRaises(ValueError):
+            client.get_multi_sharded([key], deferred=['this', 'list'])
+
+    def test_get_multi_sharded_still_deferred(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import client as MUT
+        from gcloud.datastore.key import Key
+        from gcloud.exceptions import ServiceUnavailable
+
+        KIND = 'Kind'
+        client = self._makeOne(credentials=object())
+        client.connection = _LookupConnection({})
+        keys = [Key(KIND, index, project=self.PROJECT)
+                for index in range(1, 21)]
+        with _Monkey(MUT, _MAX_LOOPS=1):
+            with self.assertRaises(ServiceUnavailable):
+                client.get_multi_sharded(keys, shard_size=7, max_workers=2)
+
+    def test_get_multi_sharded_still_deferred_w_deferred(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import client as MUT
+        from gcloud.datastore.key import Key
+
+        KIND = 'Kind'
+        client = self._makeOne(credentials=object())
+        client.connection = _LookupConnection(
+            dict((index, _make_entity_pb(self.PROJECT, KIND, index))
+                 for index in range(1, 21)))
+        keys = [Key(KIND, index, project=self.PROJECT)
+                for index in range(1, 21)]
+        deferred = []
+        with _Monkey(MUT, _MAX_LOOPS=1):
+            found = client.get_multi_sharded(keys, shard_size=7,
+                                             max_workers=2, deferred=deferred)
+
+        self.assertEqual(deferred, [keys[9], keys[19]])
+        for key, entity in zip(keys, found):
+            if key in deferred:
+                self.assertEqual(entity, None)
+            else:
+                self.assertEqual(entity.key, key)
+
+    def test_get_multi_sharded_concurrent(self):
+        from gcloud.datastore.key import Key
+
+        KIND = 'Kind'
+        creds = object()
+        client = self._makeOne(credentials=creds)
+        connection = client.connection = _LookupConnection(
+            dict((index, _make_entity_pb(self.PROJECT, KIND, index))
+                 for index in range(1, 100, 2)))
+
+        keys = [Key(KIND, index, project=self.PROJECT)
+                for index in range(1, 101)]
+        found = client.get_multi_sharded(keys, shard_size=7, max_workers=4)
+
+        self.assertEqual(len(found), 100)
+        for key, entity in zip(keys, found):
+            if key.id % 2:
+                self.assertEqual(entity.key, key)
+            else:
+                self.assertEqual(entity, None)
+        # 15 shards, and the deferred keys re-sharded into a second round.
+        self.assertEqual(len(connection._shard_sizes), 15 + 2)
+        self.assertEqual(max(connection._shard_sizes), 7)
+        # Each worker gives back its transport after every shard.
+        self.assertEqual(connection._released, 15 + 2)
+
+    def test_get_multi_sharded_w_shared_http(self):
+        import threading
+        from gcloud.datastore.key import Key
+
+        KIND = 'Kind'
+        client = self._makeOne(credentials=object())
+        connection = client.connection = _LookupConnection(
+            {1: _make_entity_pb(self.PROJECT, KIND, 1)},
+            http_is_shared=True)
+
+        keys = [Key(KIND, index, project=self.PROJECT)
+                for index in range(1, 21)]
+        found = client.get_multi_sharded(keys, shard_size=7, max_workers=4)
+
+        self.assertEqual(found[0].key, keys[0])
+        # The caller's http object is never used from another thread.
+        self.assertEqual(connection._threads,
+                         set([threading.current_thread()]))
+
     def test_put(self):
         _called_with = []
 
@@ -798,6 +1099,20 @@ class TestClient(unittest2.TestCase):
         self.assertEqual(batch.args, (client,))
         self.assertEqual(batch.kwargs, {})
 
+    def test_bulk_writer(self):
+        from gcloud.datastore import client as MUT
+        from gcloud._testing import _Monkey
+
+        creds = object()
+        client = self._makeOne(credentials=creds)
+
+        with _Monkey(MUT, BulkWriter=_Dummy):
+            writer = client.bulk_writer(batch_size=100, max_workers=2)
+
+        self.assertTrue(isinstance(writer, _Dummy))
+        self.assertEqual(writer.args, (client,))
+        self.assertEqual(writer.kwargs, {'batch_size': 100, 'max_workers': 2})
+
     def test_transaction_defaults(self):
         from gcloud.datastore import client as MUT
         from gcloud._testing import _Monkey
@@ -812,6 +1127,111 @@ class TestClient(unittest2.TestCase):
         self.assertEqual(xact.args, (client,))
         self.assertEqual(xact.kwargs, {})
 
+    def test_transaction_w_read_only(self):
+        from gcloud.datastore import client as MUT
+        from gcloud._testing import _Monkey
+
+        client = self._makeOne(credentials=object())
+
+        with _Monkey(MUT, Transaction=_Dummy):
+            xact = client.transaction(read_only=True)
+
+        self.assertEqual(xact.args, (client,))
+        self.assertEqual(xact.kwargs, {'read_only': True})
+
+    def _runInTransaction(self, client, *args, **kw):
+        from gcloud.datastore import client as MUT
+        from gcloud._testing import _Monkey
+        sleeps = []
+        with _Monkey(MUT, _SLEEP=sleeps.append):
+            result = client.run_in_transaction(*args, **kw)
+        return result, sleeps
+
+    def test_run_in_transaction(self):
+        from gcloud.datastore.entity import Entity
+        client = self._makeOne(credentials=object())
+        client.connection._commit.append([])
+        key = client.key('Kind', 1)
+        transactions = []
+
+        def _func(transaction):
+            transactions.append(transaction)
+            self.assertTrue(client.current_transaction is transaction)
+            client.put(Entity(key=key))
+            return 'RESULT'
+
+        result, sleeps = self._runInTransaction(client, _func)
+        self.assertEqual(result, 'RESULT')
+        self.assertEqual(sleeps, [])
+        self.assertFalse(transactions[0].read_only)
+        self.assertEqual(client.connection._commit_cw[0][2], 'TXN1')
+        self.assertEqual(client.contention_stats.commits, 1)
+        self.assertEqual(client.contention_stats.aborts, 0)
+
+    def test_run_in_transaction_retries_conflict(self):
+        from gcloud.datastore.entity import Entity
+        from gcloud.exceptions import Conflict
+        client = self._makeOne(credentials=object())
+        connection = client.connection
+        connection._commit.extend([Conflict('aborted'), Conflict('again'),
+                                   []])
+        key = client.key('Kind', 1)
+        calls = []
+
+        def _func(transaction):
+            calls.append(transaction.id)
+            client.put(Entity(key=key))
+
+        _, sleeps = self._runInTransaction(client, _func,
+                                           initial_backoff=1.0)
+        self.assertEqual(calls, ['TXN1', 'TXN2', 'TXN3'])
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(0.5 <= sleeps[0] <= 1.0)
+        self.assertTrue(1.0 <= sleeps[1] <= 2.0)
+        stats = client.contention_stats
+        self.assertEqual(stats.commits, 1)
+        self.assertEqual(stats.aborts, 2)
+        self.assertEqual(stats.most_contended(), [(key, 2)])
+
+    def test_run_in_transaction_gives_up(self):
+        from gcloud.exceptions import Conflict
+        client = self._makeOne(credentials=object())
+        errors = [Conflict('aborted') for _ in range(3)]
+        client.connection._commit.extend(errors)
+
+        with self.assertRaises(Conflict) as raised:
+            self._runInTransaction(client, lambda transaction: None,
+                                   retries=2, initial_backoff=4.0,
+                                   max_backoff=5.0)
+        self.assertTrue(raised.exception is errors[2])
+        self.assertEqual(client.contention_stats.aborts, 3)
+        self.assertTrue(client.current_transaction is None)
+
+    def test_run_in_transaction_other_error_not_retried(self):
+        client = self._makeOne(credentials=object())
+
+        def _func(transaction):
+            raise ValueError()
+
+        self.assertRaises(ValueError, self._runInTransaction, client, _func)
+        self.assertEqual(client.connection._rolled_back, ['TXN1'])
+        self.assertEqual(client.contention_stats.aborts, 0)
+
+    def test_run_in_transaction_read_only(self):
+        client = self._makeOne(credentials=object())
+        result, _ = self._runInTransaction(
+            client, lambda transaction: transaction.read_only,
+            read_only=True)
+        self.assertTrue(result)
+        self.assertEqual(client.connection._commit_cw, [])
+        self.assertEqual(client.connection._rolled_back, ['TXN1'])
+
+    def test_run_in_transaction_nested(self):
+        client = self._makeOne(credentials=object())
+        with _NoCommitTransaction(client):
+            self.assertRaises(ValueError, client.run_in_transaction,
+                              lambda transaction: None)
+
     def test_query_w_client(self):
         KIND = 'KIND'
 
@@ -946,12 +1366,15 @@ class _MockConnection(object):
     def __init__(self, credentials=None, http=None):
         self.credentials = credentials
         self.http = http
+        self.http_is_shared = http is not None
         self._lookup_cw = []
         self._lookup = []
         self._commit_cw = []
         self._commit = []
         self._alloc_cw = []
         self._alloc = []
+        self._begun = []
+        self._rolled_back = []
         self._index_updates = 0
 
     def _add_lookup_result(self, results=(), missing=(), deferred=()):
@@ -963,11 +1386,23 @@ class _MockConnection(object):
         results, missing, deferred = triple
         return results, missing, deferred
 
+    def release_http(self):
+        pass
+
     def commit(self, project, commit_request, transaction_id):
         self._commit_cw.append((project, commit_request, transaction_id))
         response, self._commit = self._commit[0], self._commit[1:]
+        if isinstance(response, Exception):
+            raise response
         return self._index_updates, response
 
+    def begin_transaction(self, project):
+        self._begun.append(project)
+        return 'TXN%d' % (len(self._begun),)
+
+    def rollback(self, project, transaction_id):
+        self._rolled_back.append(transaction_id)
+
     def allocate_ids(self, project, key_pbs):
         from gcloud.datastore.test_connection import _KeyProto
         self._alloc_cw.append((project, key_pbs))
@@ -975,6 +1410,42 @@ class _MockConnection(object):
         return [_KeyProto(i) for i in list(range(num_pbs))]
 
 
+class _LookupConnection(object):
+    """Thread-safe lookup backend deferring keys it has not seen before."""
+
+    def __init__(self, entity_pbs, http_is_shared=False):
+        import threading
+        self._entity_pbs = entity_pbs
+        self.http_is_shared = http_is_shared
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._shard_sizes = []
+        self._threads = set()
+        self._released = 0
+
+    def lookup(self, project, key_pbs, eventual=False, transaction_id=None):
+        import threading
+        found, missing, deferred = [], [], []
+        with self._lock:
+            self._shard_sizes.append(len(key_pbs))
+            self._threads.add(threading.current_thread())
+            for key_pb in key_pbs:
+                key_id = key_pb.path[0].id
+                # Defer every tenth key the first time it is requested.
+                if key_id % 10 == 0 and key_id not in self._seen:
+                    self._seen.add(key_id)
+                    deferred.append(key_pb)
+                elif key_id in self._entity_pbs:
+                    found.append(self._entity_pbs[key_id])
+                else:
+                    missing.append(_make_entity_pb(project, 'Kind', key_id))
+        return found, missing, deferred
+
+    def release_http(self):
+        with self._lock:
+            self._released += 1
+
+
 class _NoCommitBatch(object):
 
     def __init__(self, client):
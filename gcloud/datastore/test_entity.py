@@ -195,6 +195,135 @@ class TestEntity(unittest2.TestCase):
         self.assertEqual(repr(entity), "<Entity/bar/baz {'foo': 'Foo'}>")
 
 
+class TestLazyEntity(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.entity import LazyEntity
+        return LazyEntity
+
+    def _makeOne(self, key=None, **values):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import entity as MUT
+        from gcloud.datastore._generated import entity_pb2
+        value_pbs = {}
+        for name, value in values.items():
+            value_pb = value_pbs[name] = entity_pb2.Value()
+            if isinstance(value, list):
+                for item in value:
+                    value_pb.array_value.values.add(integer_value=item)
+            else:
+                value_pb.integer_value = value
+        with _Monkey(MUT, _LAZY=True):
+            return self._getTargetClass()(key=key, value_pbs=value_pbs)
+
+    def test_ctor_defaults(self):
+        entity = self._getTargetClass()()
+        self.assertEqual(entity.key, None)
+        self.assertEqual(len(entity), 0)
+        self.assertEqual(entity._value_pbs, {})
+
+    def test_keys_without_decoding(self):
+        entity = self._makeOne(a=1, b=2)
+        self.assertEqual(sorted(entity), ['a', 'b'])
+        self.assertEqual(len(entity), 2)
+        self.assertTrue('a' in entity)
+        self.assertFalse('c' in entity)
+        self.assertEqual(sorted(entity._value_pbs), ['a', 'b'])
+
+    def test_getitem_decodes_once(self):
+        entity = self._makeOne(a=1, b=[2, 3])
+        self.assertEqual(entity['b'], [2, 3])
+        self.assertTrue(entity['b'] is entity['b'])
+        self.assertEqual(sorted(entity._value_pbs), ['a'])
+        self.assertRaises(KeyError, entity.__getitem__, 'c')
+
+    def test_dict_copies_decode(self):
+        entity = self._makeOne(a=1, b=[2, 3])
+        self.assertEqual(dict(entity), {'a': 1, 'b': [2, 3]})
+        entity = self._makeOne(a=1, b=[2, 3])
+        copied = {}
+        copied.update(entity)
+        self.assertEqual(copied, {'a': 1, 'b': [2, 3]})
+        entity = self._makeOne(a=1, b=[2, 3])
+        self.assertEqual((lambda **kwargs: kwargs)(**entity),
+                         {'a': 1, 'b': [2, 3]})
+
+    def test_eager_without_lazy_support(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import entity as MUT
+        from gcloud.datastore._generated import entity_pb2
+        value_pb = entity_pb2.Value(integer_value=1)
+        with _Monkey(MUT, _LAZY=False):
+            entity = self._getTargetClass()(value_pbs={'a': value_pb})
+        self.assertEqual(entity._value_pbs, {})
+        self.assertEqual(dict.__getitem__(entity, 'a'), 1)
+        self.assertEqual(dict(entity), {'a': 1})
+
+    def test_get_and_setdefault(self):
+        entity = self._makeOne(a=1)
+        self.assertEqual(entity.get('a'), 1)
+        self.assertEqual(entity.get('b', 5), 5)
+        self.assertEqual(entity.setdefault('b', 6), 6)
+        self.assertEqual(entity.setdefault('b', 7), 6)
+
+    def test_setitem_and_delitem_replace_value_pb(self):
+        entity = self._makeOne(a=1, b=2)
+        entity['a'] = 10
+        del entity['b']
+        self.assertEqual(entity._value_pbs, {})
+        self.assertEqual(dict(entity), {'a': 10})
+
+    def test_pop(self):
+        entity = self._makeOne(a=1)
+        self.assertEqual(entity.pop('a'), 1)
+        self.assertEqual(entity.pop('a', None), None)
+        self.assertRaises(KeyError, entity.pop, 'a')
+
+    def test_update_and_clear(self):
+        entity = self._makeOne(a=1, b=2)
+        entity.update({'a': 10}, c=3)
+        self.assertEqual(sorted(entity._value_pbs), ['b'])
+        self.assertEqual(dict(entity), {'a': 10, 'b': 2, 'c': 3})
+        entity.clear()
+        self.assertEqual(dict(entity), {})
+
+    def test_bulk_reads_decode_all(self):
+        entity = self._makeOne(a=1, b=2)
+        self.assertEqual(sorted(entity.items()), [('a', 1), ('b', 2)])
+        self.assertEqual(entity._value_pbs, {})
+        entity = self._makeOne(a=1, b=2)
+        self.assertEqual(sorted(entity.values()), [1, 2])
+        entity = self._makeOne(a=1)
+        self.assertEqual(entity.copy(), {'a': 1})
+        entity = self._makeOne(a=1)
+        self.assertEqual(dict(**entity), {'a': 1})
+
+    def test_exclude_from_indexes(self):
+        entity = self._makeOne(a=1, b=[2])
+        entity._value_pbs['a'].exclude_from_indexes = True
+        for value_pb in entity._value_pbs['b'].array_value.values:
+            value_pb.exclude_from_indexes = True
+        self.assertEqual(entity.exclude_from_indexes, frozenset(['a', 'b']))
+        # Replacing a value keeps its index exclusion.
+        entity['a'] = 3
+        self.assertEqual(entity.exclude_from_indexes, frozenset(['a', 'b']))
+
+    def test___eq__(self):
+        from gcloud.datastore.entity import Entity
+        key = _Key()
+        entity = Entity(key=key)
+        entity['a'] = 1
+        self.assertTrue(self._makeOne(key=key, a=1) == entity)
+        self.assertTrue(entity == self._makeOne(key=key, a=1))
+        self.assertTrue(self._makeOne(key=key, a=1) ==
+                        self._makeOne(key=key, a=1))
+        self.assertTrue(self._makeOne(key=key, a=2) != entity)
+
+    def test___repr__(self):
+        entity = self._makeOne(a=1)
+        self.assertEqual(repr(entity), "<Entity {'a': 1}>")
+
+
 class _Key(object):
     _MARKER = object()
     _key = 'KEY'
@@ -0,0 +1,258 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+_PROJECT = 'PROJECT'
+
+
+class Test_varint(unittest2.TestCase):
+
+    def test_round_trip(self):
+        import io
+        from gcloud.datastore.export import _encode_varint
+        from gcloud.datastore.export import _read_varint
+        values = [0, 1, 127, 128, 300, 2 ** 32]
+        stream = io.BytesIO(b''.join(_encode_varint(value)
+                                     for value in values))
+        self.assertEqual(_encode_varint(300), b'\xac\x02')
+        self.assertEqual([_read_varint(stream) for _ in values], values)
+        self.assertEqual(_read_varint(stream), None)
+
+    def test_truncated(self):
+        import io
+        from gcloud.datastore.export import _read_varint
+        self.assertRaises(ValueError, _read_varint, io.BytesIO(b'\xac'))
+
+
+class _ServerMixin(object):
+
+    def _makeClient(self, project=_PROJECT, batch_size=300):
+        from gcloud.datastore.client import Client
+        from gcloud.testing import DatastoreBackend
+        from gcloud.testing import LocalServer
+        server = LocalServer([DatastoreBackend(batch_size=batch_size)])
+        server.start()
+        self.addCleanup(server.stop)
+        return Client(project=project, http=server.http())
+
+    def _populate(self, client, count):
+        import datetime
+        from gcloud._helpers import UTC
+        from gcloud.datastore.entity import Entity
+        entities = []
+        for index in range(count):
+            entity = Entity(key=client.key('Kind', index + 1, 'Child', u'c'),
+                            exclude_from_indexes=('blob',))
+            entity.update({
+                'index': index,
+                'name': u'entity-%d' % (index,),
+                'blob': b'\x00\xff' * 10,
+                'when': datetime.datetime(2016, 1, 1, tzinfo=UTC),
+                'tags': [u'a', 1.5],
+            })
+            entities.append(entity)
+        client.put_multi(entities)
+        return entities
+
+    def _fetchAll(self, client):
+        entities = list(client.query(kind='Child').fetch())
+        return sorted(entities, key=lambda entity: entity['index'])
+
+
+class Test_export_import(_ServerMixin, unittest2.TestCase):
+
+    def _export(self, *args, **kw):
+        from gcloud.datastore.export import export_entities
+        return export_entities(*args, **kw)
+
+    def _import(self, *args, **kw):
+        from gcloud.datastore.export import import_entities
+        return import_entities(*args, **kw)
+
+    def _roundTrip(self, destination, **kw):
+        source = self._makeClient(batch_size=7)
+        entities = self._populate(source, 30)
+        count = self._export(source.query(kind='Child'), destination, **kw)
+        self.assertEqual(count, 30)
+        if hasattr(destination, 'seek'):
+            destination.seek(0)
+
+        target = self._makeClient(project='OTHER')
+        result = self._import(target, destination, batch_size=4,
+                              max_workers=3, **kw)
+        self.assertEqual(result.imported, 30)
+        self.assertEqual(result.errors, [])
+
+        imported = self._fetchAll(target)
+        self.assertEqual(len(imported), 30)
+        for original, copy in zip(entities, imported):
+            self.assertEqual(copy.key.project, 'OTHER')
+            self.assertEqual(copy.key.flat_path, original.key.flat_path)
+            self.assertEqual(dict(copy), dict(original))
+            self.assertEqual(copy.exclude_from_indexes, set(['blob']))
+
+    def test_protobuf_file_object(self):
+        import io
+        self._roundTrip(io.BytesIO())
+
+    def test_jsonl_file_object(self):
+        import io
+        from gcloud.datastore.export import JSONL
+        stream = io.BytesIO()
+        self._roundTrip(stream, file_format=JSONL)
+        self.assertEqual(stream.getvalue().count(b'\n'), 30)
+
+    def test_gzip_path(self):
+        import os
+        import tempfile
+        handle, path = tempfile.mkstemp(suffix='.pb.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self._roundTrip(path, compression='gzip')
+
+    def test_bz2_jsonl_path(self):
+        import os
+        import tempfile
+        from gcloud.datastore.export import JSONL
+        handle, path = tempfile.mkstemp(suffix='.jsonl.bz2')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self._roundTrip(path, file_format=JSONL, compression='bz2')
+
+    def test_gzip_file_object_left_open(self):
+        import io
+        stream = io.BytesIO()
+        self._roundTrip(stream, compression='gzip')
+        self.assertFalse(stream.closed)
+        self.assertEqual(stream.getvalue()[:2], b'\x1f\x8b')
+
+    def test_serial_import(self):
+        import io
+        source = self._makeClient()
+        self._populate(source, 5)
+        stream = io.BytesIO()
+        self._export(source.query(kind='Child'), stream, prefetch=0)
+        stream.seek(0)
+        target = self._makeClient()
+        result = self._import(target, stream, batch_size=2, max_workers=1)
+        self.assertEqual(result.imported, 5)
+        self.assertEqual(len(self._fetchAll(target)), 5)
+
+    def test_invalid_arguments(self):
+        import io
+        client = self._makeClient()
+        query = client.query(kind='Child')
+        self.assertRaises(ValueError, self._export, query, io.BytesIO(),
+                          file_format='xml')
+        self.assertRaises(ValueError, self._export, query, io.BytesIO(),
+                          compression='zip')
+        self.assertRaises(ValueError, self._import, client, io.BytesIO(),
+                          file_format='xml')
+
+    def test_import_in_batch(self):
+        import io
+        client = self._makeClient()
+        with client.batch():
+            self.assertRaises(ValueError, self._import, client, io.BytesIO())
+
+    def test_import_truncated(self):
+        import io
+        source = self._makeClient()
+        self._populate(source, 3)
+        stream = io.BytesIO()
+        self._export(source.query(kind='Child'), stream)
+        target = self._makeClient()
+        truncated = io.BytesIO(stream.getvalue()[:-5])
+        self.assertRaises(ValueError, self._import, target, truncated,
+                          batch_size=1, max_workers=2)
+        # The complete entities before the truncated one were imported.
+        self.assertEqual(len(self._fetchAll(target)), 2)
+
+    def test_import_failed_chunk(self):
+        import io
+        from gcloud.datastore.export import _write_entities
+        from gcloud.datastore.export import PROTOBUF
+        from gcloud.datastore.key import Key
+        from gcloud.datastore.test_bulk import _Connection
+        from gcloud.exceptions import BadRequest
+        error = BadRequest('bad')
+        client = _Client(_Connection(error))
+        keys = [Key('Kind', index, project=_PROJECT)
+                for index in range(1, 4)]
+        stream = io.BytesIO()
+        _write_entities([_entity_pb(key) for key in keys], stream, PROTOBUF)
+        stream.seek(0)
+        result = self._import(client, stream, batch_size=2, max_workers=1)
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.errors, [(keys[:2], error)])
+        self.assertEqual(result.failed, keys[:2])
+
+
+class Test__move_keys(unittest2.TestCase):
+
+    def _callFUT(self, entity_pb, source_project, project):
+        from gcloud.datastore.export import _move_keys
+        return _move_keys(entity_pb, source_project, project)
+
+    def test_nested_keys(self):
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.helpers import entity_from_protobuf
+        from gcloud.datastore.helpers import entity_to_protobuf
+        from gcloud.datastore.key import Key
+
+        def _key(id_, project=_PROJECT):
+            return Key('Kind', id_, project=project, namespace='NS')
+
+        inner = Entity(key=_key(2))
+        inner.update({'ref': _key(3), 'other': _key(4, project='THIRD')})
+        entity = Entity(key=_key(1))
+        entity.update({'ref': _key(5), 'refs': [_key(6), _key(7)],
+                       'inner': inner, 'name': u'name'})
+        entity_pb = entity_to_protobuf(entity)
+
+        self._callFUT(entity_pb, _PROJECT, 'OTHER')
+        moved = entity_from_protobuf(entity_pb)
+
+        self.assertEqual(moved.key, _key(1, 'OTHER'))
+        self.assertEqual(moved['ref'], _key(5, 'OTHER'))
+        self.assertEqual(moved['refs'], [_key(6, 'OTHER'), _key(7, 'OTHER')])
+        self.assertEqual(moved['inner'].key, _key(2, 'OTHER'))
+        self.assertEqual(moved['inner']['ref'], _key(3, 'OTHER'))
+        # Keys of other projects are left as they are.
+        self.assertEqual(moved['inner']['other'], _key(4, 'THIRD'))
+        self.assertEqual(moved['name'], u'name')
+
+
+def _entity_pb(key):
+    from gcloud.datastore._generated import entity_pb2
+    entity_pb = entity_pb2.Entity()
+    entity_pb.key.CopyFrom(key.to_protobuf())
+    return entity_pb
+
+
+class _Client(object):
+
+    namespace = None
+    cache = None
+    current_batch = None
+
+    def __init__(self, connection, project=_PROJECT):
+        self.connection = connection
+        self.project = project
+
+    def bulk_writer(self, **kwargs):
+        from gcloud.datastore.bulk import BulkWriter
+        return BulkWriter(self, **kwargs)
@@ -0,0 +1,265 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+try:
+    # pylint: disable=unused-import
+    import gcloud.datastore.grpc_connection
+    # pylint: enable=unused-import
+except ImportError:  # pragma: NO COVER
+    _HAVE_GRPC = False
+else:
+    _HAVE_GRPC = True
+
+
+_PROJECT = 'PROJECT'
+
+
+@unittest2.skipUnless(_HAVE_GRPC, 'No grpcio')
+class Test__parse_emulator_host(unittest2.TestCase):
+
+    def _callFUT(self, emulator_host):
+        from gcloud.datastore.grpc_connection import _parse_emulator_host
+        return _parse_emulator_host(emulator_host)
+
+    def test_url(self):
+        self.assertEqual(self._callFUT('http://localhost:8471'),
+                         ('localhost', 8471))
+
+    def test_host_port(self):
+        self.assertEqual(self._callFUT('127.0.0.1:8080'), ('127.0.0.1', 8080))
+
+    def test_no_port(self):
+        self.assertRaises(ValueError, self._callFUT, 'http://localhost')
+
+
+@unittest2.skipUnless(_HAVE_GRPC, 'No grpcio')
+class Test__make_exception(unittest2.TestCase):
+
+    def _callFUT(self, error):
+        from gcloud.datastore.grpc_connection import _make_exception
+        return _make_exception(error)
+
+    def test_aborted(self):
+        import grpc
+        from gcloud.exceptions import Conflict
+        exc = self._callFUT(_RpcError(grpc.StatusCode.ABORTED, 'contention'))
+        self.assertTrue(isinstance(exc, Conflict))
+        self.assertEqual(exc.message, 'contention')
+
+    def test_unavailable(self):
+        import grpc
+        from gcloud.exceptions import ServiceUnavailable
+        exc = self._callFUT(_RpcError(grpc.StatusCode.UNAVAILABLE, None))
+        self.assertTrue(isinstance(exc, ServiceUnavailable))
+
+    def test_unmapped(self):
+        from gcloud.exceptions import InternalServerError
+        exc = self._callFUT(_RpcError(object(), 'odd'))
+        self.assertTrue(isinstance(exc, InternalServerError))
+
+
+@unittest2.skipUnless(_HAVE_GRPC, 'No grpcio')
+class TestGrpcConnection(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.grpc_connection import GrpcConnection
+        return GrpcConnection
+
+    def _makeOne(self, *args, **kw):
+        import os
+        from gcloud._testing import _Monkey
+        environ = kw.pop('environ', {})
+        with _Monkey(os, environ=environ):
+            return self._getTargetClass()(*args, **kw)
+
+    def _startServer(self, **kw):
+        from gcloud.testing.datastore_server import DatastoreServer
+        server = DatastoreServer(**kw)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def _makeConnection(self, server, **kw):
+        from gcloud.environment_vars import GCD_HOST
+        connection = self._makeOne(
+            environ={GCD_HOST: 'http://' + server.emulator_host}, **kw)
+        self.addCleanup(connection.close)
+        return connection
+
+    def test_ctor_defaults(self):
+        from gcloud.datastore.grpc_connection import DATASTORE_API_HOST
+        from gcloud.datastore.grpc_connection import DATASTORE_API_PORT
+        from gcloud.datastore.grpc_connection import DEFAULT_POOL_SIZE
+        from gcloud.datastore.grpc_connection import DEFAULT_TIMEOUT_SECONDS
+        connection = self._makeOne()
+        self.assertEqual(connection.host, DATASTORE_API_HOST)
+        self.assertEqual(connection.port, DATASTORE_API_PORT)
+        self.assertTrue(connection.secure)
+        self.assertEqual(connection.pool_size, DEFAULT_POOL_SIZE)
+        self.assertEqual(connection.timeout, DEFAULT_TIMEOUT_SECONDS)
+        self.assertEqual(connection.timeouts, {})
+        self.assertEqual(connection.metadata, ())
+
+    def test_http_is_shared(self):
+        connection = self._makeOne(http=object())
+        self.assertFalse(connection.http_is_shared)
+
+    def test_ctor_emulator(self):
+        from gcloud.environment_vars import GCD_HOST
+        connection = self._makeOne(environ={GCD_HOST: 'http://emu:8471'})
+        self.assertEqual((connection.host, connection.port), ('emu', 8471))
+        self.assertFalse(connection.secure)
+
+    def test_ctor_explicit_host_ignores_emulator(self):
+        from gcloud.environment_vars import GCD_HOST
+        connection = self._makeOne(host='example.com', port=1234,
+                                   environ={GCD_HOST: 'http://emu:8471'})
+        self.assertEqual((connection.host, connection.port),
+                         ('example.com', 1234))
+        self.assertTrue(connection.secure)
+
+    def test_ctor_explicit_insecure(self):
+        connection = self._makeOne(host='localhost', port=1234, secure=False)
+        self.assertFalse(connection.secure)
+
+    def test_ctor_invalid(self):
+        self.assertRaises(ValueError, self._makeOne, pool_size=0)
+        self.assertRaises(ValueError, self._makeOne,
+                          timeouts={'runquery': 1})
+
+    def test_rpc_deadline_and_metadata(self):
+        from gcloud.datastore._generated import datastore_pb2
+        connection = self._makeOne(
+            pool_size=2, timeout=5, timeouts={'runQuery': 30},
+            metadata=[('x-extra', 'value')])
+        stubs = connection._stubs = [_Stub(), _Stub()]
+
+        connection.begin_transaction(_PROJECT)
+        connection.run_query(_PROJECT, datastore_pb2.RunQueryRequest().query)
+        connection.begin_transaction(_PROJECT)
+
+        # Requests are spread round-robin over the pool.
+        self.assertEqual([method for method, _, _ in stubs[0].calls],
+                         ['BeginTransaction', 'BeginTransaction'])
+        self.assertEqual([method for method, _, _ in stubs[1].calls],
+                         ['RunQuery'])
+        _, request_pb, kw = stubs[1].calls[0]
+        self.assertEqual(request_pb.project_id, _PROJECT)
+        self.assertEqual(kw['timeout'], 30)
+        self.assertEqual(stubs[0].calls[0][2]['timeout'], 5)
+        self.assertEqual(kw['metadata'],
+                         (('google-cloud-resource-prefix',
+                           'projects/' + _PROJECT),
+                          ('x-extra', 'value')))
+
+    def test_flow_control(self):
+        from gcloud.flow_control import GuardedStub
+        connection = self._makeOne()
+        connection._stubs = [_Stub()] * connection.pool_size
+        connection.flow_control = object()
+        stub = connection._stub()
+        self.assertTrue(isinstance(stub, GuardedStub))
+        self.assertEqual(stub.endpoint, connection.host)
+
+    def test_round_trip(self):
+        from gcloud.datastore.client import Client
+        from gcloud.datastore.entity import Entity
+        server = self._startServer()
+        client = Client(project=_PROJECT, http=object())
+        client.connection = self._makeConnection(server)
+
+        key = client.key('Kind')
+        with client.transaction():
+            entity = Entity(key=key)
+            entity['name'] = u'grpc'
+            client.put(entity)
+        self.assertFalse(entity.key.is_partial)
+        self.assertEqual(client.get(entity.key)['name'], u'grpc')
+        self.assertEqual(list(client.query(kind='Kind').fetch()), [entity])
+        ids = client.allocate_ids(key, 2)
+        self.assertEqual(len(ids), 2)
+        client.delete(entity.key)
+        self.assertEqual(client.get(entity.key), None)
+
+    def test_channel_pool(self):
+        server = self._startServer()
+        connection = self._makeConnection(server, pool_size=3,
+                                          metadata=[('x-extra', 'value')])
+        for _ in range(6):
+            connection.begin_transaction(_PROJECT)
+        # Each channel of the pool has its own connection.
+        self.assertEqual(len(server.peers), 3)
+        self.assertEqual(server.metadata[0]['x-extra'], 'value')
+        self.assertEqual(server.metadata[0]['google-cloud-resource-prefix'],
+                         'projects/' + _PROJECT)
+
+        connection.close()
+        self.assertEqual(connection._stubs, [])
+        connection.begin_transaction(_PROJECT)
+        self.assertEqual(len(connection._stubs), 3)
+
+    def test_error(self):
+        from gcloud.datastore._generated import datastore_pb2
+        from gcloud.exceptions import Conflict
+        server = self._startServer()
+        connection = self._makeConnection(server)
+        request = datastore_pb2.CommitRequest()
+        request.mode = datastore_pb2.CommitRequest.NON_TRANSACTIONAL
+        insert = request.mutations.add().insert
+        insert.key.partition_id.project_id = _PROJECT
+        insert.key.path.add(kind='Kind', id=1)
+        connection.commit(_PROJECT, request, None)
+        with self.assertRaises(Conflict):
+            connection.commit(_PROJECT, request, None)
+
+    def test_deadline_exceeded(self):
+        from gcloud.exceptions import GCloudError
+        server = self._startServer(latency=0.5)
+        connection = self._makeConnection(server, timeout=0.05)
+        with self.assertRaises(GCloudError) as context:
+            connection.begin_transaction(_PROJECT)
+        self.assertEqual(context.exception.code, 504)
+
+
+class _RpcError(Exception):
+
+    def __init__(self, code, details):
+        super(_RpcError, self).__init__()
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+
+class _Stub(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        from gcloud.datastore.grpc_connection import _METHODS
+
+        def call(request_pb, **kw):
+            self.calls.append((name, request_pb, kw))
+            for grpc_name, _, response_class in _METHODS.values():
+                if grpc_name == name:
+                    return response_class()
+        return call
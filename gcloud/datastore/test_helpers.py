@@ -58,9 +58,9 @@ class Test__property_tuples(unittest2.TestCase):
 
 class Test_entity_from_protobuf(unittest2.TestCase):
 
-    def _callFUT(self, val):
+    def _callFUT(self, val, **kw):
         from gcloud.datastore.helpers import entity_from_protobuf
-        return entity_from_protobuf(val)
+        return entity_from_protobuf(val, **kw)
 
     def test_it(self):
         from gcloud.datastore._generated import entity_pb2
@@ -108,6 +108,35 @@ class Test_entity_from_protobuf(unittest2.TestCase):
         self.assertEqual(key.kind, _KIND)
         self.assertEqual(key.id, _ID)
 
+    def test_lazy(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import entity as entity_mod
+        from gcloud.datastore._generated import entity_pb2
+        from gcloud.datastore.entity import LazyEntity
+        from gcloud.datastore.helpers import _new_value_pb
+
+        entity_pb = entity_pb2.Entity()
+        entity_pb.key.partition_id.project_id = 'PROJECT'
+        entity_pb.key.path.add(kind='KIND', id=1234)
+        _new_value_pb(entity_pb, 'foo').string_value = u'Foo'
+        bar_pb = _new_value_pb(entity_pb, 'bar')
+        bar_pb.integer_value = 10
+        bar_pb.exclude_from_indexes = True
+        bar_pb.meaning = 9
+
+        with _Monkey(entity_mod, _LAZY=True):
+            entity = self._callFUT(entity_pb, lazy=True)
+        self.assertTrue(isinstance(entity, LazyEntity))
+        self.assertEqual(entity.key.id, 1234)
+        self.assertEqual(sorted(entity), ['bar', 'foo'])
+        self.assertEqual(sorted(entity._value_pbs), ['bar', 'foo'])
+        self.assertEqual(entity.exclude_from_indexes, frozenset(['bar']))
+
+        self.assertEqual(entity['bar'], 10)
+        self.assertEqual(sorted(entity._value_pbs), ['foo'])
+        self.assertEqual(entity._meanings, {'bar': (9, 10)})
+        self.assertEqual(entity, self._callFUT(entity_pb))
+
     def test_mismatched_value_indexed(self):
         from gcloud.datastore._generated import entity_pb2
         from gcloud.datastore.helpers import _new_value_pb
@@ -367,6 +396,53 @@ class Test_entity_to_protobuf(unittest2.TestCase):
 
         self._compareEntityProto(entity_pb, expected_pb)
 
+    def _makeLazyEntity(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import entity as entity_mod
+        from gcloud.datastore._generated import entity_pb2
+        from gcloud.datastore.helpers import _new_value_pb
+        from gcloud.datastore.helpers import entity_from_protobuf
+
+        entity_pb = entity_pb2.Entity()
+        entity_pb.key.partition_id.project_id = 'PROJECT'
+        entity_pb.key.path.add(kind='KIND', id=1234)
+        foo_pb = _new_value_pb(entity_pb, 'foo')
+        foo_pb.string_value = u'Foo'
+        foo_pb.meaning = 15
+        foo_pb.exclude_from_indexes = True
+        values_pb = _new_value_pb(entity_pb, 'values').array_value.values
+        for index in range(3):
+            sub_value_pb = values_pb.add()
+            sub_value_pb.integer_value = index
+            sub_value_pb.exclude_from_indexes = True
+        _new_value_pb(entity_pb, 'empty').array_value.SetInParent()
+        with _Monkey(entity_mod, _LAZY=True):
+            return entity_pb, entity_from_protobuf(entity_pb, lazy=True)
+
+    def test_lazy_entity_untouched(self):
+        entity_pb, entity = self._makeLazyEntity()
+        del entity_pb.properties['empty']
+        self._compareEntityProto(self._callFUT(entity), entity_pb)
+        # Nothing was converted.
+        self.assertEqual(sorted(entity._value_pbs),
+                         ['empty', 'foo', 'values'])
+
+    def test_lazy_entity_read_and_modified(self):
+        entity_pb, entity = self._makeLazyEntity()
+        self.assertEqual(entity['foo'], u'Foo')
+        entity['values'] = [7]
+        result_pb = self._callFUT(entity)
+
+        # The converted value keeps its meaning and index exclusion.
+        self.assertEqual(result_pb.properties['foo'],
+                         entity_pb.properties['foo'])
+        values_pb = result_pb.properties['values'].array_value.values
+        self.assertEqual([value_pb.integer_value for value_pb in values_pb],
+                         [7])
+        self.assertTrue(values_pb[0].exclude_from_indexes)
+        # Empty arrays are skipped, as for other entities.
+        self.assertEqual(sorted(result_pb.properties), ['foo', 'values'])
+
 
 class Test_key_from_protobuf(unittest2.TestCase):
 
@@ -365,7 +365,7 @@ class TestKey(unittest2.TestCase):
         key = self._makeOne('KIND', project=self._DEFAULT_PROJECT)
         # Force the 'kind' to be unset. Maybe `to_protobuf` should fail
         # on this? The backend certainly will.
-        key._path[-1].pop('kind')
+        key._flat_path = ('',)
         pb = key.to_protobuf()
         # Unset values are False-y.
         self.assertEqual(pb.path[0].kind, '')
@@ -429,3 +429,97 @@ class TestKey(unittest2.TestCase):
         self.assertEqual(parent.path, _PARENT_PATH)
         new_parent = key.parent
         self.assertTrue(parent is new_parent)
+
+    def test_slots(self):
+        key = self._makeOne('KIND', 1234, project=self._DEFAULT_PROJECT)
+        self.assertFalse(hasattr(key, '__dict__'))
+        self.assertRaises(AttributeError, setattr, key, 'foo', 'bar')
+
+    def test_path_built_on_access(self):
+        key = self._makeOne('KIND', 1234, project=self._DEFAULT_PROJECT)
+        path = key.path
+        path[0]['id'] = 5678
+        self.assertEqual(key.path, [{'kind': 'KIND', 'id': 1234}])
+        self.assertFalse(key.path is path)
+
+    def test_interned_strings_bounded(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import key as MUT
+        first = ''.join(['FIR', 'ST'])
+        second = ''.join(['SEC', 'OND'])
+        with _Monkey(MUT, _INTERNED={}, _MAX_INTERNED=1):
+            self.assertTrue(MUT._intern(first) is first)
+            self.assertTrue(MUT._intern(''.join(['FIR', 'ST'])) is first)
+            # The table is full: new strings are returned as is.
+            self.assertTrue(MUT._intern(second) is second)
+            self.assertFalse(
+                MUT._intern(''.join(['SEC', 'OND'])) is second)
+            self.assertEqual(MUT._INTERNED, {first: first})
+
+    def test_strings_interned(self):
+        kind = ''.join(['KI', 'ND'])
+        project = ''.join(['PRO', 'JECT'])
+        namespace = ''.join(['NAME', 'SPACE'])
+        key1 = self._makeOne('KIND', 1, project='PROJECT',
+                             namespace='NAMESPACE')
+        key2 = self._makeOne(kind, 2, project=project, namespace=namespace)
+        self.assertFalse(kind is key1.kind)
+        self.assertTrue(key2.kind is key1.kind)
+        self.assertTrue(key2.project is key1.project)
+        self.assertTrue(key2.namespace is key1.namespace)
+
+    def test_hash_cached(self):
+        key = self._makeOne('KIND', 1234, project=self._DEFAULT_PROJECT)
+        self.assertEqual(key._hash, None)
+        value = hash(key)
+        self.assertEqual(key._hash, value)
+        self.assertEqual(hash(key), value)
+
+    def test_completed_key_hash(self):
+        key = self._makeOne('KIND', project=self._DEFAULT_PROJECT)
+        completed = key.completed_key(1234)
+        self.assertEqual(
+            hash(completed),
+            hash(self._makeOne('KIND', 1234, project=self._DEFAULT_PROJECT)))
+
+    def test_pickle(self):
+        import pickle
+        parent = self._makeOne('PARENT', 'name',
+                               project=self._DEFAULT_PROJECT)
+        key = self._makeOne('KIND', 1234, parent=parent)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            restored = pickle.loads(pickle.dumps(key, protocol))
+            self.assertEqual(restored, key)
+            self.assertEqual(restored.parent, parent)
+
+    def test_pickle_drops_hash(self):
+        import pickle
+        key = self._makeOne('KIND', 1234, project=self._DEFAULT_PROJECT)
+        hash(key)
+        restored = pickle.loads(pickle.dumps(key))
+        self.assertEqual(restored._hash, None)
+        self.assertTrue(restored.kind is key.kind)
+
+    def test_pickle_across_processes(self):
+        import base64
+        import os
+        import pickle
+        import subprocess
+        import sys
+        script = (
+            'import base64, pickle, sys\n'
+            'from gcloud.datastore.key import Key\n'
+            'key = Key("KIND", "name", project="PROJECT", namespace="NS")\n'
+            'hash(key)\n'
+            'data = base64.b64encode(pickle.dumps(key, 2))\n'
+            'sys.stdout.write(data.decode("ascii"))\n')
+        env = dict(os.environ, PYTHONHASHSEED='12345')
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         env=env)
+        restored = pickle.loads(base64.b64decode(output))
+        key = self._makeOne('KIND', 'name', project='PROJECT',
+                            namespace='NS')
+        self.assertEqual(restored, key)
+        self.assertEqual(hash(restored), hash(key))
+        self.assertTrue(restored in set([key]))
+        self.assertEqual({key: 'value'}.get(restored), 'value')
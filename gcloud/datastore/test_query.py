@@ -328,6 +328,28 @@ class TestQuery(unittest2.TestCase):
         self.assertTrue(iterator._client is other_client)
         self.assertEqual(iterator._limit, 7)
         self.assertEqual(iterator._offset, 8)
+        self.assertEqual(iterator._prefetch, 0)
+
+    def test_fetch_w_prefetch(self):
+        client = self._makeClient()
+        query = self._makeOne(client)
+        iterator = query.fetch(prefetch=3)
+        self.assertEqual(iterator._prefetch, 3)
+        self.assertFalse(iterator._lazy)
+
+    def test_fetch_w_lazy(self):
+        client = self._makeClient()
+        query = self._makeOne(client)
+        iterator = query.fetch(lazy=True)
+        self.assertTrue(iterator._lazy)
+
+    def test_fetch_w_result_type(self):
+        from gcloud.datastore.query import ENTITIES
+        from gcloud.datastore.query import KEYS
+        client = self._makeClient()
+        query = self._makeOne(client)
+        self.assertEqual(query.fetch()._result_type, ENTITIES)
+        self.assertEqual(query.fetch(result_type=KEYS)._result_type, KEYS)
 
 
 class TestIterator(unittest2.TestCase):
@@ -384,6 +406,7 @@ class TestIterator(unittest2.TestCase):
         self.assertEqual(iterator._limit, None)
         self.assertEqual(iterator._offset, None)
         self.assertEqual(iterator._skipped_results, None)
+        self.assertEqual(iterator._prefetch, 0)
 
     def test_ctor_explicit(self):
         client = self._makeClient()
@@ -420,6 +443,29 @@ class TestIterator(unittest2.TestCase):
         }
         self.assertEqual(connection._called_with, [EXPECTED])
 
+    def test_next_page_reuses_compiled_pb(self):
+        from gcloud.datastore.query import _compiled_pb_from_query
+        from gcloud.datastore.query import _pb_from_query
+        connection = _Connection()
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        self._addQueryResults(connection, more=True)
+        self._addQueryResults(connection)
+        iterator = self._makeOne(query, client, limit=5)
+        list(iterator)
+        first, second = [kw['query_pb'] for kw in connection._called_with]
+        compiled = _compiled_pb_from_query(query)
+        self.assertFalse(first is compiled)
+        self.assertFalse(second is compiled)
+        self.assertEqual(second.start_cursor, self._END)
+        self.assertEqual(second.limit.value, 4)
+        # Patching the pages left the shared protobuf untouched.
+        self.assertEqual(compiled, _pb_from_query(query))
+
+        self._addQueryResults(connection)
+        self._makeOne(query, client).next_page()
+        self.assertTrue(connection._called_with[2]['query_pb'] is compiled)
+
     def test_next_page_no_cursors_no_more_w_offset_and_limit(self):
         from gcloud.datastore.query import _pb_from_query
         connection = _Connection()
@@ -610,6 +656,138 @@ class TestIterator(unittest2.TestCase):
         self.assertEqual(connection._called_with[1], EXPECTED2)
         self.assertEqual(connection._called_with[2], EXPECTED3)
 
+    def test___iter___w_lazy(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import entity as entity_mod
+        from gcloud.datastore.entity import LazyEntity
+        connection = _Connection()
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        self._addQueryResults(connection)
+        with _Monkey(entity_mod, _LAZY=True):
+            entity, = list(self._makeOne(query, client, lazy=True))
+        self.assertTrue(isinstance(entity, LazyEntity))
+        self.assertEqual(list(entity._value_pbs), ['foo'])
+        self.assertEqual(entity['foo'], u'Foo')
+
+    def test_ctor_w_invalid_result_type(self):
+        from gcloud.datastore.query import TUPLES
+        client = self._makeClient()
+        self.assertRaises(ValueError, self._makeOne, _Query(client), client,
+                          result_type='dicts')
+        # Tuples need a projection to order their values.
+        self.assertRaises(ValueError, self._makeOne, _Query(client), client,
+                          result_type=TUPLES)
+
+    def test___iter___w_keys(self):
+        from gcloud.datastore.key import Key
+        from gcloud.datastore.query import KEYS
+        connection = _Connection()
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE,
+                       projection=['__key__'])
+        self._addQueryResults(connection)
+        key, = list(self._makeOne(query, client, result_type=KEYS))
+        self.assertTrue(isinstance(key, Key))
+        self.assertEqual(key, Key(self._KIND, self._ID,
+                                  project=self._PROJECT))
+
+    def test___iter___w_tuples(self):
+        from gcloud.datastore.key import Key
+        from gcloud.datastore.query import TUPLES
+        connection = _Connection()
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE,
+                       projection=['foo', 'bar', '__key__'])
+        self._addQueryResults(connection)
+        values, = list(self._makeOne(query, client, result_type=TUPLES))
+        self.assertEqual(values, (
+            u'Foo', None, Key(self._KIND, self._ID, project=self._PROJECT)))
+
+    def test___iter___w_prefetch(self):
+        from gcloud.datastore.query import _pb_from_query
+        connection = _Connection()
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        self._addQueryResults(connection, cursor=b'\x01', more=True)
+        self._addQueryResults(connection, cursor=b'\x02', more=True)
+        self._addQueryResults(connection)
+        iterator = self._makeOne(query, client, prefetch=2)
+        entities = list(iterator)
+
+        self.assertFalse(iterator._more_results)
+        self.assertEqual(len(entities), 3)
+        cursors = [pb.start_cursor for pb in (
+            call['query_pb'] for call in connection._called_with)]
+        self.assertEqual(cursors, [b'', b'\x01', b'\x02'])
+        qpb = _pb_from_query(query)
+        qpb.start_cursor = b'\x02'
+        self.assertEqual(connection._called_with[2], {
+            'project': self._PROJECT,
+            'query_pb': qpb,
+            'namespace': self._NAMESPACE,
+            'transaction_id': None,
+        })
+
+    def test___iter___w_prefetch_fetches_ahead(self):
+        connection = _BlockingConnection(2)
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        for _ in range(5):
+            self._addQueryResults(connection, more=True)
+        self._addQueryResults(connection)
+        iterator = iter(self._makeOne(query, client, prefetch=1))
+
+        next(iterator)
+        # One page is consumed, one waits and the third is being fetched.
+        self.assertTrue(connection._blocked.wait(5))
+        self.assertEqual(len(connection._called_with), 2)
+        connection._release.set()
+        self.assertEqual(len(list(iterator)), 5)
+        self.assertEqual(len(connection._called_with), 6)
+
+    def test___iter___w_prefetch_shared_http(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import query as MUT
+
+        def _read_ahead(*args):  # pragma: NO COVER
+            self.fail('Pages fetched in the background')
+
+        connection = _Connection()
+        connection.http_is_shared = True
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        self._addQueryResults(connection, more=True)
+        self._addQueryResults(connection)
+        with _Monkey(MUT, _read_ahead=_read_ahead):
+            entities = list(self._makeOne(query, client, prefetch=1))
+        self.assertEqual(len(entities), 2)
+
+    def test___iter___w_prefetch_in_transaction(self):
+        connection = _Connection()
+        client = _ThreadLocalTransactionClient(
+            self._PROJECT, connection, transaction_id=b'TXN')
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        self._addQueryResults(connection, more=True)
+        self._addQueryResults(connection)
+        entities = list(self._makeOne(query, client, prefetch=1))
+
+        self.assertEqual(len(entities), 2)
+        # Pages fetched in the background still use the transaction.
+        self.assertEqual([call['transaction_id']
+                          for call in connection._called_with],
+                         [b'TXN', b'TXN'])
+
+    def test___iter___w_prefetch_error(self):
+        connection = _Connection()
+        client = self._makeClient(connection)
+        query = _Query(client, self._KIND, self._PROJECT, self._NAMESPACE)
+        self._addQueryResults(connection, more=True)
+        iterator = iter(self._makeOne(query, client, prefetch=1))
+        next(iterator)
+        # The connection has no further results.
+        self.assertRaises(IndexError, next, iterator)
+
 
 class Test__pb_from_query(unittest2.TestCase):
 
@@ -708,6 +886,94 @@ class Test__pb_from_query(unittest2.TestCase):
                          ['a', 'b', 'c'])
 
 
+class Test__compiled_pb_from_query(unittest2.TestCase):
+
+    def _callFUT(self, query):
+        from gcloud.datastore.query import _compiled_pb_from_query
+        return _compiled_pb_from_query(query)
+
+    def _makeQuery(self, filters=()):
+        from gcloud.datastore.query import Query
+        return Query(_Client('PROJECT', None), kind='KIND',
+                     filters=filters, order=['-a'])
+
+    def _monkey(self, size=10):
+        from collections import OrderedDict
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import query as MUT
+        compiled = OrderedDict()
+        return _Monkey(MUT, _COMPILED=compiled,
+                       _COMPILED_CACHE_SIZE=size), compiled
+
+    def test_cached(self):
+        from gcloud.datastore.query import _pb_from_query
+        query = self._makeQuery([('a', '>', 1)])
+        monkey, compiled = self._monkey()
+        with monkey:
+            pb1 = self._callFUT(query)
+            pb2 = self._callFUT(query)
+        self.assertEqual(len(compiled), 1)
+        self.assertTrue(pb1 is pb2)
+        self.assertEqual(pb1, _pb_from_query(query))
+
+    def test_shared_between_equal_queries(self):
+        monkey, compiled = self._monkey()
+        with monkey:
+            self._callFUT(self._makeQuery([('a', '=', u'x')]))
+            self._callFUT(self._makeQuery([('a', '=', u'x')]))
+            self.assertEqual(len(compiled), 1)
+            self._callFUT(self._makeQuery([('a', '=', u'y')]))
+        self.assertEqual(len(compiled), 2)
+
+    def test_value_types_distinct(self):
+        monkey, compiled = self._monkey()
+        with monkey:
+            pb_int = self._callFUT(self._makeQuery([('a', '=', 1)]))
+            pb_bool = self._callFUT(self._makeQuery([('a', '=', True)]))
+        self.assertEqual(len(compiled), 2)
+        value_int = pb_int.filter.composite_filter.filters[0]
+        value_bool = pb_bool.filter.composite_filter.filters[0]
+        self.assertEqual(
+            value_int.property_filter.value.WhichOneof('value_type'),
+            'integer_value')
+        self.assertEqual(
+            value_bool.property_filter.value.WhichOneof('value_type'),
+            'boolean_value')
+
+    def test_query_changed(self):
+        query = self._makeQuery()
+        monkey, compiled = self._monkey()
+        with monkey:
+            self._callFUT(query)
+            query.add_filter('a', '<', 3)
+            pb = self._callFUT(query)
+        self.assertEqual(len(compiled), 2)
+        self.assertEqual(len(pb.filter.composite_filter.filters), 1)
+
+    def test_unhashable_not_cached(self):
+        from gcloud.datastore.query import _pb_from_query
+        query = self._makeQuery([('a', '=', [1, 2])])
+        monkey, compiled = self._monkey()
+        with monkey:
+            pb = self._callFUT(query)
+        self.assertEqual(len(compiled), 0)
+        self.assertEqual(pb, _pb_from_query(query))
+
+    def test_lru_eviction(self):
+        first = self._makeQuery([('a', '=', 1)])
+        second = self._makeQuery([('a', '=', 2)])
+        third = self._makeQuery([('a', '=', 3)])
+        monkey, compiled = self._monkey(size=2)
+        with monkey:
+            self._callFUT(first)
+            self._callFUT(second)
+            # Using the first query makes the second least recently used.
+            self._callFUT(first)
+            self._callFUT(third)
+        values = [state[2][0][3] for state in compiled]
+        self.assertEqual(values, [1, 3])
+
+
 class _Query(object):
 
     def __init__(self,
@@ -736,6 +1002,7 @@ class _Connection(object):
     _called_with = None
     _cursor = b'\x00'
     _skipped = 0
+    http_is_shared = False
 
     def __init__(self):
         self._results = []
@@ -747,6 +1014,22 @@ class _Connection(object):
         return result
 
 
+class _BlockingConnection(_Connection):
+
+    def __init__(self, block_after):
+        import threading
+        super(_BlockingConnection, self).__init__()
+        self._block_after = block_after
+        self._blocked = threading.Event()
+        self._release = threading.Event()
+
+    def run_query(self, **kw):
+        if len(self._called_with) == self._block_after:
+            self._blocked.set()
+            self._release.wait(5)
+        return super(_BlockingConnection, self).run_query(**kw)
+
+
 class _Client(object):
 
     def __init__(self, project, connection, namespace=None):
@@ -757,3 +1040,25 @@ class _Client(object):
     @property
     def current_transaction(self):
         pass
+
+
+class _Transaction(object):
+
+    def __init__(self, id_):
+        self.id = id_
+
+
+class _ThreadLocalTransactionClient(_Client):
+
+    def __init__(self, project, connection, transaction_id):
+        import threading
+        super(_ThreadLocalTransactionClient, self).__init__(
+            project, connection)
+        self._transaction = _Transaction(transaction_id)
+        self._thread = threading.current_thread()
+
+    @property
+    def current_transaction(self):
+        import threading
+        if threading.current_thread() is self._thread:
+            return self._transaction
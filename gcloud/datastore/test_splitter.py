@@ -0,0 +1,260 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+_PROJECT = 'PROJECT'
+
+
+class _ServerMixin(object):
+
+    def _makeClient(self, num_entities, batch_size=300, thread_safe=True):
+        from gcloud.datastore.client import Client
+        from gcloud.datastore.entity import Entity
+        from gcloud.testing import DatastoreBackend
+        from gcloud.testing import LocalServer
+        backend = DatastoreBackend(batch_size=batch_size)
+        server = LocalServer([backend])
+        server.start()
+        self.addCleanup(server.stop)
+        http = server.http()
+        http.thread_safe = thread_safe
+        client = Client(project=_PROJECT, http=http)
+        entities = []
+        for index in range(num_entities):
+            entity = Entity(key=client.key('Kind', index + 1))
+            entity['parity'] = index % 2
+            entities.append(entity)
+        client.put_multi(entities)
+        client.put(Entity(key=client.key('Other', 1)))
+        return client
+
+
+class Test__key_order(unittest2.TestCase):
+
+    def _callFUT(self, key):
+        from gcloud.datastore.splitter import _key_order
+        return _key_order(key)
+
+    def test_ids_before_names(self):
+        from gcloud.datastore.key import Key
+        keys = [
+            Key('B', 1, project=_PROJECT),
+            Key('A', 'b', project=_PROJECT),
+            Key('A', 2, 'Child', 1, project=_PROJECT),
+            Key('A', 'a', project=_PROJECT),
+            Key('A', 10, project=_PROJECT),
+            Key('A', 2, project=_PROJECT),
+        ]
+        ordered = sorted(keys, key=self._callFUT)
+        self.assertEqual([key.flat_path for key in ordered], [
+            ('A', 2),
+            ('A', 2, 'Child', 1),
+            ('A', 10),
+            ('A', 'a'),
+            ('A', 'b'),
+            ('B', 1),
+        ])
+
+
+class TestQuerySplit(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.splitter import QuerySplit
+        return QuerySplit
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def _makeQuery(self, **kw):
+        from gcloud.datastore.query import Query
+        return Query(_Client(), **kw)
+
+    def test_ctor_defaults(self):
+        split = self._makeOne()
+        self.assertEqual(split.start_key, None)
+        self.assertEqual(split.end_key, None)
+        self.assertEqual(split.cursor, None)
+        self.assertFalse(split.done)
+
+    def test_apply_unbounded(self):
+        query = self._makeQuery(kind='Kind', filters=[('a', '=', 1)],
+                                projection=['a'])
+        split_query = self._makeOne().apply(query)
+        self.assertFalse(split_query is query)
+        self.assertTrue(split_query._client is query._client)
+        self.assertEqual(split_query.kind, 'Kind')
+        self.assertEqual(split_query.project, _PROJECT)
+        self.assertEqual(split_query.filters, [('a', '=', 1)])
+        self.assertEqual(split_query.projection, ['a'])
+
+    def test_apply_bounded(self):
+        from gcloud.datastore.key import Key
+        ancestor = Key('Parent', 1, project=_PROJECT)
+        start = Key('Parent', 1, 'Kind', 5, project=_PROJECT)
+        end = Key('Parent', 1, 'Kind', 9, project=_PROJECT)
+        query = self._makeQuery(kind='Kind', namespace='NS',
+                                ancestor=ancestor, filters=[('a', '=', 1)])
+        split_query = self._makeOne(start, end).apply(query)
+        self.assertEqual(split_query.namespace, 'NS')
+        self.assertTrue(split_query.ancestor is ancestor)
+        self.assertEqual(split_query.filters, [
+            ('a', '=', 1), ('__key__', '>=', start), ('__key__', '<', end)])
+        # The original query is left alone.
+        self.assertEqual(query.filters, [('a', '=', 1)])
+
+
+class Test_split_query(_ServerMixin, unittest2.TestCase):
+
+    def _callFUT(self, *args, **kw):
+        from gcloud.datastore.splitter import split_query
+        return split_query(*args, **kw)
+
+    def test_invalid(self):
+        from gcloud.datastore.key import Key
+        from gcloud.datastore.query import Query
+        client = _Client()
+        self.assertRaises(ValueError, self._callFUT,
+                          Query(client, kind='Kind'), 0)
+        self.assertRaises(ValueError, self._callFUT, Query(client), 2)
+        self.assertRaises(ValueError, self._callFUT,
+                          Query(client, kind='Kind', order=['a']), 2)
+        self.assertRaises(ValueError, self._callFUT,
+                          Query(client, kind='Kind', filters=[('a', '>', 1)]),
+                          2)
+        key = Key('Kind', 1, project=_PROJECT)
+        self.assertRaises(ValueError, self._callFUT,
+                          Query(client, kind='Kind',
+                                filters=[('__key__', '=', key)]),
+                          2)
+
+    def test_single_split(self):
+        from gcloud.datastore.query import Query
+        split, = self._callFUT(Query(_Client(), kind='Kind'), 1)
+        self.assertEqual(split.start_key, None)
+        self.assertEqual(split.end_key, None)
+
+    def test_splits_cover_keys(self):
+        from gcloud.datastore.splitter import _key_order
+        client = self._makeClient(200)
+        query = client.query(kind='Kind')
+        splits = self._callFUT(query, 4)
+        self.assertEqual(len(splits), 4)
+        self.assertEqual(splits[0].start_key, None)
+        self.assertEqual(splits[-1].end_key, None)
+        for before, after in zip(splits, splits[1:]):
+            self.assertTrue(before.end_key is after.start_key)
+            if before.start_key is not None:
+                self.assertTrue(_key_order(before.start_key) <
+                                _key_order(before.end_key))
+        sizes = [len(list(split.apply(query).fetch())) for split in splits]
+        self.assertEqual(sum(sizes), 200)
+        self.assertTrue(min(sizes) > 0)
+
+    def test_fewer_entities_than_splits(self):
+        client = self._makeClient(2)
+        query = client.query(kind='Kind')
+        splits = self._callFUT(query, 5)
+        self.assertEqual(len(splits), 3)
+        ids = [[entity.key.id for entity in split.apply(query).fetch()]
+               for split in splits]
+        self.assertEqual(ids, [[], [1], [2]])
+
+    def test_empty_kind(self):
+        client = self._makeClient(0)
+        splits = self._callFUT(client.query(kind='Kind'), 5)
+        self.assertEqual(len(splits), 1)
+
+
+class TestParallelScan(_ServerMixin, unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.splitter import ParallelScan
+        return ParallelScan
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def _splits(self, query, num_splits):
+        from gcloud.datastore.splitter import split_query
+        return split_query(query, num_splits)
+
+    def test_concurrent(self):
+        client = self._makeClient(100, batch_size=7)
+        query = client.query(kind='Kind', filters=[('parity', '=', 0)])
+        splits = self._splits(query, 4)
+        scan = self._makeOne(query, splits, max_workers=4)
+        ids = [entity.key.id for entity in scan]
+        self.assertEqual(sorted(ids), list(range(1, 101, 2)))
+        for split in splits:
+            self.assertTrue(split.done)
+        # Finished splits are not read again.
+        self.assertEqual(list(scan), [])
+
+    def test_serial(self):
+        client = self._makeClient(20, batch_size=3)
+        query = client.query(kind='Kind')
+        scan = self._makeOne(query, self._splits(query, 3), max_workers=1)
+        self.assertEqual([entity.key.id for entity in scan],
+                         list(range(1, 21)))
+
+    def test_shared_http_serial(self):
+        from gcloud._testing import _Monkey
+        from gcloud.datastore import splitter as MUT
+
+        def _merge_concurrently(*args, **kwargs):  # pragma: NO COVER
+            self.fail('Splits read concurrently')
+
+        client = self._makeClient(20, batch_size=3, thread_safe=False)
+        query = client.query(kind='Kind')
+        scan = self._makeOne(query, self._splits(query, 3), max_workers=4)
+        with _Monkey(MUT, _merge_concurrently=_merge_concurrently):
+            ids = [entity.key.id for entity in scan]
+        self.assertEqual(ids, list(range(1, 21)))
+
+    def test_resume_from_checkpoint(self):
+        import pickle
+        client = self._makeClient(50, batch_size=5)
+        query = client.query(kind='Kind')
+        splits = self._splits(query, 3)
+        scan = self._makeOne(query, splits, max_workers=3)
+        iterator = iter(scan)
+        seen = [next(iterator).key.id for _ in range(23)]
+        iterator.close()
+        self.assertTrue(any(split.cursor is not None for split in splits))
+
+        restored = pickle.loads(pickle.dumps(splits))
+        scan = self._makeOne(query, restored, max_workers=3)
+        rest = [entity.key.id for entity in scan]
+        # Pages are checkpointed once fully consumed, so the partially
+        # consumed ones are read again, but nothing is lost.
+        self.assertEqual(set(seen) | set(rest), set(range(1, 51)))
+        self.assertTrue(len(seen) + len(rest) - 50 < 3 * 5)
+
+    def test_error_propagates(self):
+        from gcloud.datastore.splitter import QuerySplit
+        client = self._makeClient(10)
+        query = client.query(kind='Kind')
+        splits = [QuerySplit(), QuerySplit(cursor=b'not base64!')]
+        scan = self._makeOne(query, splits, max_workers=2)
+        # Decoding the invalid cursor fails in a worker thread.
+        with self.assertRaises(ValueError):
+            list(scan)
+
+
+class _Client(object):
+
+    project = _PROJECT
+    namespace = None
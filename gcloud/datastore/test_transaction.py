@@ -163,6 +163,78 @@ class TestTransaction(unittest2.TestCase):
         self.assertEqual(connection._committed, None)
         self.assertEqual(xact.id, None)
 
+    def test_read_only(self):
+        from gcloud.datastore.key import Key
+        _PROJECT = 'PROJECT'
+        connection = _Connection(234)
+        client = _Client(_PROJECT, connection)
+        xact = self._makeOne(client, read_only=True)
+        self.assertTrue(xact.read_only)
+        with xact:
+            self.assertRaises(ValueError, xact.put, _Entity())
+            self.assertRaises(ValueError, xact.delete,
+                              Key('KIND', 1, project=_PROJECT))
+        # Ended by a rollback, rather than a commit.
+        self.assertEqual(connection._rolled_back, (_PROJECT, 234))
+        self.assertEqual(connection._committed, None)
+        self.assertEqual(xact._status, xact._FINISHED)
+        self.assertEqual(xact.id, None)
+
+
+class Test__entity_group(unittest2.TestCase):
+
+    def _callFUT(self, key_pb):
+        from gcloud.datastore.transaction import _entity_group
+        return _entity_group(key_pb)
+
+    def test_child(self):
+        from gcloud.datastore.key import Key
+        key = Key('Parent', 1, 'Child', 'a', project='PROJECT',
+                  namespace='NS')
+        self.assertEqual(self._callFUT(key.to_protobuf()),
+                         Key('Parent', 1, project='PROJECT', namespace='NS'))
+
+    def test_partial_root(self):
+        from gcloud.datastore.key import Key
+        key = Key('Kind', project='PROJECT')
+        self.assertEqual(self._callFUT(key.to_protobuf()), None)
+
+
+class TestContentionStats(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.datastore.transaction import ContentionStats
+        return ContentionStats
+
+    def _makeOne(self):
+        return self._getTargetClass()()
+
+    def _makeTransaction(self, *keys):
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.transaction import Transaction
+        xact = Transaction(_Client('PROJECT', _Connection()))
+        for key in keys[:-1]:
+            xact.put(Entity(key=key))
+        xact.delete(keys[-1])
+        return xact
+
+    def test_record(self):
+        from gcloud.datastore.key import Key
+        hot = Key('Hot', 1, project='PROJECT')
+        cold = Key('Cold', 1, project='PROJECT')
+        stats = self._makeOne()
+        stats.record_commit()
+        stats.record_abort(self._makeTransaction(
+            Key('Child', 1, parent=hot), Key('Child', parent=hot),
+            Key('New', project='PROJECT'), hot))
+        stats.record_abort(self._makeTransaction(hot, cold))
+        self.assertEqual(stats.commits, 1)
+        self.assertEqual(stats.aborts, 2)
+        self.assertEqual(stats.aborts_by_entity_group, {hot: 2, cold: 1})
+        self.assertEqual(stats.most_contended(), [(hot, 2), (cold, 1)])
+        self.assertEqual(stats.most_contended(1), [(hot, 2)])
+        self.assertEqual(repr(stats), '<ContentionStats commits=1 aborts=2>')
+
 
 def _make_key(kind, id_, project):
     from gcloud.datastore._generated import entity_pb2
@@ -210,6 +282,7 @@ class _Client(object):
         self.project = project
         self.connection = connection
         self.namespace = namespace
+        self.cache = None
         self._batches = []
 
     def _push_batch(self, batch):
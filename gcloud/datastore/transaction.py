@@ -14,7 +14,11 @@
 
 """Create / interact with gcloud datastore transactions."""
 
+import threading
+
+from gcloud.datastore import helpers
 from gcloud.datastore.batch import Batch
+from gcloud.datastore.key import Key
 
 
 class Transaction(Batch):
@@ -86,13 +90,24 @@ class Transaction(Batch):
       ... else:
       ...     transaction.commit()
 
+    A read-only transaction only reads;  rather than being committed, it
+    is ended with a rollback, which cannot fail with contention::
+
+      >>> with client.transaction(read_only=True):
+      ...     entity1, entity2 = client.get_multi([key1, key2])
+
     :type client: :class:`gcloud.datastore.client.Client`
     :param client: the client used to connect to datastore.
+
+    :type read_only: bool
+    :param read_only: (Optional) If true, :meth:`put` and :meth:`delete`
+                      are refused.
     """
 
-    def __init__(self, client):
+    def __init__(self, client, read_only=False):
         super(Transaction, self).__init__(client)
         self._id = None
+        self._read_only = read_only
 
     @property
     def id(self):
@@ -103,6 +118,43 @@ class Transaction(Batch):
         """
         return self._id
 
+    @property
+    def read_only(self):
+        """Whether the transaction refuses writes.
+
+        :rtype: bool
+        :returns: True for a read-only transaction.
+        """
+        return self._read_only
+
+    def put(self, entity):
+        """Remember an entity's state to be saved during :meth:`commit`.
+
+        See :meth:`gcloud.datastore.batch.Batch.put`.
+
+        :type entity: :class:`gcloud.datastore.entity.Entity`
+        :param entity: the entity to be saved.
+
+        :raises: :class:`ValueError` if the transaction is read-only.
+        """
+        if self._read_only:
+            raise ValueError('Cannot put in a read-only transaction')
+        super(Transaction, self).put(entity)
+
+    def delete(self, key):
+        """Remember a key to be deleted during :meth:`commit`.
+
+        See :meth:`gcloud.datastore.batch.Batch.delete`.
+
+        :type key: :class:`gcloud.datastore.key.Key`
+        :param key: the key to be deleted.
+
+        :raises: :class:`ValueError` if the transaction is read-only.
+        """
+        if self._read_only:
+            raise ValueError('Cannot delete in a read-only transaction')
+        super(Transaction, self).delete(key)
+
     def current(self):
         """Return the topmost transaction.
 
@@ -144,6 +196,17 @@ class Transaction(Batch):
             # Clear our own ID in case this gets accidentally reused.
             self._id = None
 
+    def _commit(self):
+        """Commits the transaction.
+
+        This is called by :meth:`commit`.  A read-only transaction, having
+        nothing to write, is rolled back instead.
+        """
+        if self._read_only:
+            self.connection.rollback(self.project, self._id)
+        else:
+            super(Transaction, self)._commit()
+
     def commit(self):
         """Commits the transaction.
 
@@ -160,3 +223,81 @@ class Transaction(Batch):
         finally:
             # Clear our own ID in case this gets accidentally reused.
             self._id = None
+
+
+def _entity_group(key_pb):
+    """Root key of the entity group of a key.
+
+    :type key_pb: :class:`gcloud.datastore._generated.entity_pb2.Key`
+    :param key_pb: A key, possibly partial.
+
+    :rtype: :class:`gcloud.datastore.key.Key` or ``NoneType``
+    :returns: The key of the root entity, or ``None`` if it is partial (a
+              new entity group).
+    """
+    key = helpers.key_from_protobuf(key_pb)
+    if len(key.flat_path) < 2:
+        return None
+    return Key(*key.flat_path[:2], project=key.project,
+               namespace=key.namespace)
+
+
+class ContentionStats(object):
+    """Counts of committed and aborted transactions.
+
+    Kept by :meth:`gcloud.datastore.client.Client.run_in_transaction`.
+    Aborted commits are counted against the entity groups the transaction
+    was writing to.
+    """
+
+    def __init__(self):
+        self.commits = 0
+        self.aborts = 0
+        self.aborts_by_entity_group = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<ContentionStats commits=%d aborts=%d>' % (
+            self.commits, self.aborts)
+
+    def record_commit(self):
+        """Count a successful transaction."""
+        with self._lock:
+            self.commits += 1
+
+    def record_abort(self, transaction):
+        """Count an aborted transaction, and the entity groups it wrote.
+
+        :type transaction: :class:`Transaction`
+        :param transaction: The aborted transaction.
+        """
+        groups = set()
+        for mutation_pb in transaction.mutations:
+            op_type = mutation_pb.WhichOneof('operation')
+            if op_type == 'delete':
+                key_pb = mutation_pb.delete
+            else:
+                key_pb = getattr(mutation_pb, op_type).key
+            group = _entity_group(key_pb)
+            if group is not None:
+                groups.add(group)
+
+        with self._lock:
+            self.aborts += 1
+            for group in groups:
+                self.aborts_by_entity_group[group] = (
+                    self.aborts_by_entity_group.get(group, 0) + 1)
+
+    def most_contended(self, count=10):
+        """Entity groups with the most aborted transactions.
+
+        :type count: int
+        :param count: (Optional) Maximum number of groups returned.
+
+        :rtype: list of tuple
+        :returns: ``(root_key, aborts)`` pairs, most aborts first.
+        """
+        with self._lock:
+            items = list(self.aborts_by_entity_group.items())
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items[:count]
@@ -0,0 +1,589 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Client-side load shedding for API endpoints.
+
+A :class:`FlowControl` keeps one :class:`CircuitBreaker` and one
+:class:`AIMDLimiter` per endpoint (``scheme://host`` for HTTP APIs, the
+``host:port`` of a gRPC service).  When a backend degrades, calls to it
+fail fast with :class:`CircuitOpen` or :class:`ConcurrencyLimitExceeded`
+instead of piling up on timeouts, and traffic is let back in
+automatically once the backend recovers.
+
+.. code:: python
+
+    >>> from gcloud import storage
+    >>> from gcloud.flow_control import FlowControl
+    >>> client = storage.Client()
+    >>> client.flow_control = FlowControl()
+"""
+
+import contextlib
+import copy
+import threading
+import time
+
+from google.rpc import code_pb2
+import six
+from six.moves.urllib.parse import urlsplit
+
+from gcloud.exceptions import ServiceUnavailable
+
+
+CLOSED = 'closed'
+"""Circuit state: calls flow normally."""
+
+OPEN = 'open'
+"""Circuit state: calls are rejected until the reset timeout elapses."""
+
+HALF_OPEN = 'half-open'
+"""Circuit state: a limited number of trial calls probe the endpoint."""
+
+_TIME = time.time
+
+
+class CircuitOpen(ServiceUnavailable):
+    """Call rejected because the endpoint's circuit is open."""
+
+
+class ConcurrencyLimitExceeded(ServiceUnavailable):
+    """Call rejected because the endpoint's concurrency limit is reached."""
+
+
+class CircuitBreaker(object):
+    """Per-endpoint circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every call is rejected.  Once ``reset_timeout`` seconds have passed the
+    circuit is half-open: up to ``half_open_max_calls`` trial calls are
+    let through.  A successful trial closes the circuit, a failed one opens
+    it again.
+
+    :type failure_threshold: int
+    :param failure_threshold: (Optional) Consecutive failures which open
+                              the circuit.
+
+    :type reset_timeout: float
+    :param reset_timeout: (Optional) Seconds to wait before probing an open
+                          circuit.
+
+    :type half_open_max_calls: int
+    :param half_open_max_calls: (Optional) Concurrent trial calls allowed
+                                while half-open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0,
+                 half_open_max_calls=1):
+        if failure_threshold < 1:
+            raise ValueError('failure_threshold must be positive')
+        if half_open_max_calls < 1:
+            raise ValueError('half_open_max_calls must be positive')
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_calls = 0
+
+    def _current_state(self):
+        """Current state, moving an expired open circuit to half-open.
+
+        Must be called with the lock held.
+        """
+        if (self._state == OPEN and
+                _TIME() - self._opened_at >= self.reset_timeout):
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    @property
+    def state(self):
+        """The state of the circuit.
+
+        :rtype: str
+        :returns: One of :data:`CLOSED`, :data:`OPEN` or :data:`HALF_OPEN`.
+        """
+        with self._lock:
+            return self._current_state()
+
+    def before_call(self):
+        """Admit a call, or reject it.
+
+        :rtype: bool
+        :returns: Whether the call is a trial call of a half-open circuit.
+        :raises: :class:`CircuitOpen` if the circuit is open, or half-open
+                 with all trial calls already in flight.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if (state == HALF_OPEN and
+                    self._trial_calls < self.half_open_max_calls):
+                self._trial_calls += 1
+                return True
+        raise CircuitOpen('Circuit open; call rejected')
+
+    def cancel_trial(self):
+        """Give back the slot of a trial call abandoned without outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trial_calls > 0:
+                self._trial_calls -= 1
+
+    def record_success(self):
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_calls = 0
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if needed."""
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = _TIME()
+                self._trial_calls = 0
+
+
+class AIMDLimiter(object):
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    Calls beyond the current limit are rejected rather than queued.  Each
+    successful call grows the limit by ``1 / limit`` (roughly one slot per
+    "round" of calls) while the limit is being used; each failed or slow
+    call shrinks it by ``backoff_ratio``.
+
+    :type initial_limit: int
+    :param initial_limit: (Optional) Starting concurrency limit.
+
+    :type min_limit: int
+    :param min_limit: (Optional) The limit never drops below this.
+
+    :type max_limit: int
+    :param max_limit: (Optional) The limit never grows beyond this.
+
+    :type backoff_ratio: float
+    :param backoff_ratio: (Optional) Factor applied to the limit on failure.
+
+    :type latency_threshold: float
+    :param latency_threshold: (Optional) Successful calls slower than this
+                              many seconds are treated as failures.
+    """
+
+    def __init__(self, initial_limit=20, min_limit=1, max_limit=200,
+                 backoff_ratio=0.5, latency_threshold=None):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError(
+                'Limits must satisfy 1 <= min_limit <= initial_limit '
+                '<= max_limit')
+        if not 0 < backoff_ratio < 1:
+            raise ValueError('backoff_ratio must be between 0 and 1')
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+        self._lock = threading.Lock()
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+
+    @property
+    def limit(self):
+        """The current concurrency limit.
+
+        :rtype: int
+        :returns: Maximum number of calls admitted at once.
+        """
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        """The number of admitted calls not yet released.
+
+        :rtype: int
+        :returns: Calls in flight.
+        """
+        return self._in_flight
+
+    def acquire(self):
+        """Admit a call, or reject it.
+
+        :raises: :class:`ConcurrencyLimitExceeded` if the limit is reached.
+        """
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                raise ConcurrencyLimitExceeded(
+                    'Concurrency limit of %d reached' % (int(self._limit),))
+            self._in_flight += 1
+
+    def release(self, latency, dropped=False):
+        """Release an admitted call and adjust the limit.
+
+        :type latency: float
+        :param latency: Duration of the call, in seconds.
+
+        :type dropped: bool
+        :param dropped: (Optional) Whether the call failed due to overload.
+        """
+        with self._lock:
+            utilized = self._in_flight * 2 >= self._limit
+            self._in_flight -= 1
+            if self.latency_threshold is not None:
+                dropped = dropped or latency > self.latency_threshold
+            if dropped:
+                self._limit = max(self.min_limit,
+                                  self._limit * self.backoff_ratio)
+            elif utilized:
+                self._limit = min(self.max_limit,
+                                  self._limit + 1.0 / self._limit)
+
+    def cancel(self):
+        """Release an admitted call without adjusting the limit."""
+        with self._lock:
+            self._in_flight -= 1
+
+
+class _Permit(object):
+    """An admitted call, to be released exactly once.
+
+    :type breaker: :class:`CircuitBreaker`
+    :param breaker: The endpoint's circuit breaker.
+
+    :type limiter: :class:`AIMDLimiter`
+    :param limiter: The endpoint's concurrency limiter.
+
+    :type trial: bool
+    :param trial: (Optional) Whether the call is a trial call of a
+                  half-open circuit.
+    """
+
+    def __init__(self, breaker, limiter, trial=False):
+        self._breaker = breaker
+        self._limiter = limiter
+        self._trial = trial
+        self._started = _TIME()
+        self.released = False
+
+    def release(self, failed=False):
+        """Report the outcome of the call.
+
+        :type failed: bool
+        :param failed: (Optional) Whether the endpoint failed to serve it.
+        """
+        if self.released:
+            return
+        self.released = True
+        self._limiter.release(_TIME() - self._started, dropped=failed)
+        if failed:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+    def cancel(self):
+        """Give up the call without reporting an outcome."""
+        if self.released:
+            return
+        self.released = True
+        self._limiter.cancel()
+        if self._trial:
+            self._breaker.cancel_trial()
+
+
+class FlowControl(object):
+    """Circuit breakers and concurrency limiters, keyed by endpoint.
+
+    :type breaker_factory: callable
+    :param breaker_factory: (Optional) Creates the :class:`CircuitBreaker`
+                            for a newly seen endpoint.
+
+    :type limiter_factory: callable
+    :param limiter_factory: (Optional) Creates the :class:`AIMDLimiter`
+                            for a newly seen endpoint.
+    """
+
+    def __init__(self, breaker_factory=CircuitBreaker,
+                 limiter_factory=AIMDLimiter):
+        self._breaker_factory = breaker_factory
+        self._limiter_factory = limiter_factory
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _get(self, endpoint):
+        """Get (creating if needed) the breaker / limiter pair."""
+        with self._lock:
+            pair = self._endpoints.get(endpoint)
+            if pair is None:
+                pair = self._endpoints[endpoint] = (
+                    self._breaker_factory(), self._limiter_factory())
+            return pair
+
+    def breaker(self, endpoint):
+        """The circuit breaker for an endpoint.
+
+        :type endpoint: str
+        :param endpoint: The endpoint.
+
+        :rtype: :class:`CircuitBreaker`
+        :returns: The endpoint's breaker.
+        """
+        return self._get(endpoint)[0]
+
+    def limiter(self, endpoint):
+        """The concurrency limiter for an endpoint.
+
+        :type endpoint: str
+        :param endpoint: The endpoint.
+
+        :rtype: :class:`AIMDLimiter`
+        :returns: The endpoint's limiter.
+        """
+        return self._get(endpoint)[1]
+
+    def acquire(self, endpoint):
+        """Admit a call to an endpoint.
+
+        :type endpoint: str
+        :param endpoint: The endpoint to be called.
+
+        :rtype: :class:`_Permit`
+        :returns: A permit whose ``release(failed)`` must be called once
+                  the call completes.
+        :raises: :class:`CircuitOpen` or :class:`ConcurrencyLimitExceeded`
+                 if the call is shed.
+        """
+        breaker, limiter = self._get(endpoint)
+        limiter.acquire()
+        try:
+            trial = breaker.before_call()
+        except CircuitOpen:
+            limiter.cancel()
+            raise
+        return _Permit(breaker, limiter, trial=trial)
+
+    @contextlib.contextmanager
+    def guard(self, endpoint):
+        """Run a block of code as a guarded call to an endpoint.
+
+        Any exception raised by the block counts as a failure.
+
+        :type endpoint: str
+        :param endpoint: The endpoint to be called.
+
+        :raises: :class:`CircuitOpen` or :class:`ConcurrencyLimitExceeded`
+                 if the call is shed.
+        """
+        permit = self.acquire(endpoint)
+        try:
+            yield
+        except Exception:
+            permit.release(failed=True)
+            raise
+        permit.release()
+
+
+def _is_overload_status(status):
+    """Whether an HTTP status signals a struggling backend."""
+    return status == 429 or status >= 500
+
+
+_OVERLOAD_CODES = frozenset([
+    code_pb2.DEADLINE_EXCEEDED,
+    code_pb2.RESOURCE_EXHAUSTED,
+    code_pb2.INTERNAL,
+    code_pb2.UNAVAILABLE,
+])
+"""gRPC status codes which signal a struggling backend."""
+
+
+def _is_overload_error(error):
+    """Whether an exception raised by a gRPC call signals overload.
+
+    Errors carrying a status code (from the ``grpc`` or ``grpc.beta``
+    APIs) count only if the code is in :data:`_OVERLOAD_CODES`: a
+    ``NOT_FOUND`` or an ``ABORTED`` transaction says nothing about the
+    health of the endpoint.  Other errors, e.g. transport errors, count.
+
+    :type error: :class:`Exception <exceptions.Exception>`
+    :param error: The exception raised.
+
+    :rtype: bool
+    :returns: Whether the call failed due to overload.
+    """
+    code = getattr(error, 'code', None)
+    if callable(code):
+        code = code()
+    value = getattr(code, 'value', None)
+    if not isinstance(value, tuple):
+        return True
+    return value[0] in _OVERLOAD_CODES
+
+
+class GuardedHttp(object):
+    """HTTP object which sheds requests through a :class:`FlowControl`.
+
+    Requests are keyed by the ``scheme://host`` of their URI.  Transport
+    errors and ``429`` / ``5xx`` responses count as failures; the
+    responses are still returned to the caller unchanged.
+
+    :type http: :class:`httplib2.Http` or class that defines ``request()``.
+    :param http: The HTTP object to wrap.
+
+    :type flow_control: :class:`FlowControl`
+    :param flow_control: The breakers and limiters to apply.
+    """
+
+    def __init__(self, http, flow_control):
+        self.http = http
+        self.flow_control = flow_control
+
+    def request(self, uri, *args, **kwargs):
+        """Send a request unless its endpoint is shedding load.
+
+        Arguments match :meth:`httplib2.Http.request`.
+
+        :rtype: tuple
+        :returns: Pair of the response headers and content.
+        :raises: :class:`CircuitOpen` or :class:`ConcurrencyLimitExceeded`
+                 if the request is shed.
+        """
+        scheme, netloc = urlsplit(uri)[:2]
+        permit = self.flow_control.acquire('%s://%s' % (scheme, netloc))
+        try:
+            response, content = self.http.request(uri, *args, **kwargs)
+        except Exception:
+            permit.release(failed=True)
+            raise
+        permit.release(failed=_is_overload_status(int(response.status)))
+        return response, content
+
+    def __deepcopy__(self, memo):
+        """Copy the wrapped transport;  the flow control stays shared.
+
+        :rtype: :class:`GuardedHttp`
+        :returns: A guarded copy of the wrapped HTTP object.
+        """
+        return self.__class__(copy.deepcopy(self.http, memo),
+                              self.flow_control)
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+
+class _GuardedResponseIterator(six.Iterator):
+    """Streaming gRPC response whose first message releases the permit.
+
+    The concurrency slot is held only until the stream starts; errors
+    later in the stream are still reported to the circuit breaker.
+    """
+
+    def __init__(self, responses, permit, breaker):
+        self._responses = responses
+        self._permit = permit
+        self._breaker = breaker
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            result = six.next(self._responses)
+        except StopIteration:
+            self._permit.release()
+            raise
+        except Exception as exc:
+            failed = _is_overload_error(exc)
+            if not self._permit.released:
+                self._permit.release(failed=failed)
+            elif failed:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+            raise
+        self._permit.release()
+        return result
+
+    def cancel(self):
+        """Cancel the stream, releasing the permit without penalty."""
+        self._permit.cancel()
+        return self._responses.cancel()
+
+    def __getattr__(self, name):
+        return getattr(self._responses, name)
+
+
+class _GuardedMethod(object):
+    """A gRPC stub method guarded by a :class:`FlowControl`."""
+
+    def __init__(self, method, flow_control, endpoint):
+        self._method = method
+        self._flow_control = flow_control
+        self._endpoint = endpoint
+
+    def __call__(self, *args, **kwargs):
+        permit = self._flow_control.acquire(self._endpoint)
+        try:
+            result = self._method(*args, **kwargs)
+        except Exception as exc:
+            permit.release(failed=_is_overload_error(exc))
+            raise
+        if hasattr(result, 'cancel') and hasattr(result, '__iter__'):
+            return _GuardedResponseIterator(
+                result, permit, self._flow_control.breaker(self._endpoint))
+        permit.release()
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._method, name)
+
+
+class GuardedStub(object):
+    """gRPC stub whose RPC methods are guarded by a :class:`FlowControl`.
+
+    Unary calls are guarded like HTTP requests: only errors with an
+    overload status (``UNAVAILABLE``, ``DEADLINE_EXCEEDED``,
+    ``RESOURCE_EXHAUSTED`` or ``INTERNAL``) or no status at all count as
+    failures.  For streaming calls the concurrency slot is released once
+    the first response arrives.
+
+    :type stub: :class:`grpc.beta._stub._AutoIntermediary`
+    :param stub: The stub to wrap.
+
+    :type flow_control: :class:`FlowControl`
+    :param flow_control: The breakers and limiters to apply.
+
+    :type endpoint: str
+    :param endpoint: The endpoint the stub connects to.
+    """
+
+    def __init__(self, stub, flow_control, endpoint):
+        self.stub = stub
+        self.flow_control = flow_control
+        self.endpoint = endpoint
+
+    def __enter__(self):
+        self.stub.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self.stub.__exit__(exc_type, exc_val, exc_tb)
+
+    def __getattr__(self, name):
+        attr = getattr(self.stub, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        return _GuardedMethod(attr, self.flow_control, self.endpoint)
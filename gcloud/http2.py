@@ -0,0 +1,445 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""HTTP/2 transport for the JSON APIs.
+
+:class:`HTTP2Http` is a drop-in replacement for :class:`httplib2.Http`:
+it can be passed as the ``http`` argument of any client (or of any
+:class:`gcloud.connection.Connection`).  All requests to a given host,
+from any number of threads, are multiplexed as concurrent streams over a
+single HTTP/2 connection, and headers are HPACK-compressed.
+
+.. code:: python
+
+    >>> from gcloud import pubsub
+    >>> from gcloud.credentials import get_credentials
+    >>> from gcloud.http2 import HTTP2Http
+    >>> http = get_credentials().authorize(HTTP2Http())
+    >>> client = pubsub.Client(http=http)
+
+Requires the ``h2`` package, installed with ``pip install gcloud[http2]``.
+
+.. note::
+
+    Unlike :class:`httplib2.Http`, redirects are not followed and
+    responses are not cached.
+"""
+
+import socket
+import ssl
+import threading
+import time
+
+import httplib2
+import six
+from six.moves.urllib.parse import urlsplit
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError as exc:  # pragma: NO COVER
+    raise ImportError('The HTTP/2 transport requires the h2 package; '
+                      'install it with "pip install gcloud[http2]".', exc)
+
+
+_READ_SIZE = 65535
+_TIME = getattr(time, 'monotonic', time.time)
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Connection-specific headers are not allowed in HTTP/2 (RFC 7540, 8.1.2.2).
+_CONNECTION_HEADERS = frozenset([
+    'connection', 'host', 'keep-alive', 'proxy-connection', 'te',
+    'transfer-encoding', 'upgrade',
+])
+
+
+class ConnectionClosed(IOError):
+    """The HTTP/2 connection was closed while a request was in flight."""
+
+
+class _Stream(object):
+    """Response state of a single request."""
+
+    def __init__(self):
+        self.headers = None
+        self.chunks = []
+        self.done = False
+        self.error = None
+
+
+def _request_headers(method, scheme, authority, path, headers, body):
+    """Build the header block of a request.
+
+    :type method: str
+    :param method: The HTTP method.
+
+    :type scheme: str
+    :param scheme: ``http`` or ``https``.
+
+    :type authority: str
+    :param authority: The ``host[:port]`` of the request URI.
+
+    :type path: str
+    :param path: The path and query of the request URI.
+
+    :type headers: dict
+    :param headers: The request headers.
+
+    :type body: bytes
+    :param body: The request payload.
+
+    :rtype: list
+    :returns: ``(name, value)`` pairs, pseudo-headers first.
+    """
+    result = [
+        (':method', method),
+        (':scheme', scheme),
+        (':authority', authority),
+        (':path', path),
+    ]
+    for name, value in six.iteritems(headers):
+        name = name.lower()
+        if name in _CONNECTION_HEADERS or name == 'content-length':
+            continue
+        if not isinstance(value, (six.binary_type, six.text_type)):
+            value = str(value)
+        result.append((name, value))
+    if body or method in ('POST', 'PUT', 'PATCH'):
+        result.append(('content-length', str(len(body))))
+    return result
+
+
+def _make_response(headers, content):
+    """Convert a response header block to an :class:`httplib2.Response`.
+
+    :type headers: list
+    :param headers: ``(name, value)`` pairs received from the server.
+
+    :type content: bytes
+    :param content: The response payload.
+
+    :rtype: :class:`httplib2.Response`
+    :returns: The response, with ``status`` set from ``:status``.
+    """
+    info = {}
+    for name, value in headers:
+        if name == ':status':
+            name = 'status'
+        elif name.startswith(':'):
+            continue
+        if name in info:
+            info[name] = '%s, %s' % (info[name], value)
+        else:
+            info[name] = value
+    response = httplib2.Response(info)
+    response['content-length'] = str(len(content))
+    return response
+
+
+class _HTTP2Connection(object):
+    """A single HTTP/2 connection shared by concurrent requests.
+
+    A daemon thread reads from the socket and feeds the protocol state;
+    requesting threads wait on a condition until their stream completes.
+
+    :type sock: :class:`socket.socket`
+    :param sock: A connected socket, with TLS already negotiated if
+                 needed.
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._cond = threading.Condition()
+        self._streams = {}
+        self.error = None
+        config = h2.config.H2Configuration(
+            client_side=True, header_encoding='utf-8')
+        self._conn = h2.connection.H2Connection(config=config)
+        with self._cond:
+            self._conn.initiate_connection()
+            self._flush()
+        self._reader = threading.Thread(target=self._read_loop)
+        self._reader.daemon = True
+        self._reader.start()
+
+    @property
+    def closed(self):
+        """Whether the connection can no longer carry new requests.
+
+        :rtype: bool
+        :returns: Boolean indicating the connection has failed or closed.
+        """
+        return self.error is not None
+
+    def _flush(self):
+        """Send pending protocol output.  Call with the lock held.
+
+        Outbound ``DATA`` is bounded by the peer's flow control windows,
+        so writing under the lock cannot stall the reader indefinitely.
+        """
+        data = self._conn.data_to_send()
+        if data:
+            self._sock.sendall(data)
+
+    def _read_loop(self):
+        """Receive frames and dispatch their events until disconnected."""
+        try:
+            while True:
+                data = self._sock.recv(_READ_SIZE)
+                if not data:
+                    raise ConnectionClosed('Connection closed by server')
+                with self._cond:
+                    for event in self._conn.receive_data(data):
+                        self._handle_event(event)
+                    self._flush()
+                    self._cond.notify_all()
+        except Exception as exc:  # pylint: disable=broad-except
+            with self._cond:
+                self._fail(exc)
+
+    def _fail(self, exc):
+        """Mark the connection and all its streams as failed."""
+        if self.error is None:
+            self.error = exc
+        for stream in six.itervalues(self._streams):
+            if not stream.done:
+                stream.error = self.error
+                stream.done = True
+        self._cond.notify_all()
+
+    def _handle_event(self, event):
+        """Apply a protocol event to the matching stream."""
+        stream = self._streams.get(getattr(event, 'stream_id', None))
+        if isinstance(event, h2.events.ResponseReceived):
+            if stream is not None:
+                stream.headers = event.headers
+        elif isinstance(event, h2.events.DataReceived):
+            self._conn.acknowledge_received_data(
+                event.flow_controlled_length, event.stream_id)
+            if stream is not None:
+                stream.chunks.append(event.data)
+        elif isinstance(event, h2.events.StreamEnded):
+            if stream is not None:
+                stream.done = True
+        elif isinstance(event, h2.events.StreamReset):
+            if stream is not None and not stream.done:
+                stream.error = ConnectionClosed(
+                    'Stream reset by server (error code %s)' % (
+                        event.error_code,))
+                stream.done = True
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            self._fail(ConnectionClosed(
+                'Connection terminated by server (error code %s)' % (
+                    event.error_code,)))
+
+    def _wait(self, predicate, deadline):
+        """Wait on the condition until ``predicate()`` holds.
+
+        :raises: :class:`socket.timeout` if ``deadline`` passes first.
+        """
+        while not predicate():
+            if deadline is None:
+                self._cond.wait()
+                continue
+            remaining = deadline - _TIME()
+            if remaining <= 0:
+                raise socket.timeout('timed out')
+            self._cond.wait(remaining)
+
+    def request(self, headers, body, timeout=None):
+        """Send a request and wait for its complete response.
+
+        :type headers: list
+        :param headers: The request header block.
+
+        :type body: bytes
+        :param body: The request payload.
+
+        :type timeout: float
+        :param timeout: (Optional) Seconds to wait for the response.
+
+        :rtype: tuple
+        :returns: Pair of the response header block and payload.
+        :raises: :class:`ConnectionClosed` if the connection or stream
+                 fails, :class:`socket.timeout` on timeout.
+        """
+        deadline = None if timeout is None else _TIME() + timeout
+        conn = self._conn
+        with self._cond:
+            self._wait(lambda: self.closed or (
+                conn.open_outbound_streams <
+                conn.remote_settings.max_concurrent_streams), deadline)
+            if self.closed:
+                raise ConnectionClosed(self.error)
+            stream_id = conn.get_next_available_stream_id()
+            stream = self._streams[stream_id] = _Stream()
+            try:
+                conn.send_headers(stream_id, headers, end_stream=not body)
+                self._flush()
+                offset = 0
+                while offset < len(body):
+                    self._wait(lambda: stream.done or (
+                        conn.local_flow_control_window(stream_id) > 0),
+                        deadline)
+                    if stream.done:
+                        break
+                    size = min(conn.local_flow_control_window(stream_id),
+                               conn.max_outbound_frame_size)
+                    chunk = body[offset:offset + size]
+                    offset += len(chunk)
+                    conn.send_data(stream_id, chunk,
+                                   end_stream=offset >= len(body))
+                    self._flush()
+                self._wait(lambda: stream.done, deadline)
+            except socket.timeout:
+                self._reset(stream_id)
+                raise
+            finally:
+                del self._streams[stream_id]
+        if stream.error is not None:
+            raise stream.error
+        return stream.headers, b''.join(stream.chunks)
+
+    def _reset(self, stream_id):
+        """Cancel a stream.  Call with the lock held."""
+        try:
+            self._conn.reset_stream(stream_id)
+            self._flush()
+        except (h2.exceptions.ProtocolError, socket.error):
+            pass
+
+    def close(self):
+        """Send ``GOAWAY`` and close the socket."""
+        with self._cond:
+            if self.error is None:
+                try:
+                    self._conn.close_connection()
+                    self._flush()
+                except (h2.exceptions.ProtocolError, socket.error):
+                    pass
+            self._fail(ConnectionClosed('Connection closed'))
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self._sock.close()
+
+
+class HTTP2Http(object):
+    """HTTP object sending requests over multiplexed HTTP/2 connections.
+
+    Implements the ``request`` signature of :class:`httplib2.Http`, so it
+    can be authorized with ``credentials.authorize(http)`` and passed as
+    the ``http`` argument of any client.  One connection is kept per
+    ``scheme://host:port`` and shared by all threads using this object.
+
+    ``https`` URLs negotiate HTTP/2 via ALPN; plain ``http`` URLs (e.g. a
+    local emulator) use HTTP/2 with prior knowledge.
+
+    :type timeout: float
+    :param timeout: (Optional) Seconds to wait for connecting and for each
+                    response.
+
+    :type ca_certs: str
+    :param ca_certs: (Optional) Path to a CA bundle used to verify servers;
+                     defaults to the system's trusted CAs.
+    """
+
+    def __init__(self, timeout=None, ca_certs=None):
+        self.timeout = timeout
+        self.ca_certs = ca_certs
+        # Kept for helpers which inspect ``httplib2.Http.connections``.
+        self.connections = {}
+        self._pool = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, scheme, host, port):
+        """Open a socket and negotiate HTTP/2 on it.
+
+        :rtype: :class:`_HTTP2Connection`
+        :returns: The new connection.
+        :raises: :class:`ConnectionClosed` if the server does not accept
+                 HTTP/2.
+        """
+        sock = socket.create_connection((host, port), self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if scheme == 'https':
+            context = ssl.create_default_context(cafile=self.ca_certs)
+            context.set_alpn_protocols(['h2'])
+            sock = context.wrap_socket(sock, server_hostname=host)
+            if sock.selected_alpn_protocol() != 'h2':
+                sock.close()
+                raise ConnectionClosed(
+                    'Server %s:%d does not support HTTP/2' % (host, port))
+        # Per-request timeouts are enforced while waiting on responses.
+        sock.settimeout(None)
+        return _HTTP2Connection(sock)
+
+    def _get_connection(self, scheme, host, port):
+        """Get the pooled connection for an origin, reconnecting if needed.
+
+        :rtype: :class:`_HTTP2Connection`
+        :returns: An open connection.
+        """
+        key = (scheme, host, port)
+        with self._lock:
+            connection = self._pool.get(key)
+            if connection is None or connection.closed:
+                connection = self._pool[key] = self._connect(
+                    scheme, host, port)
+            return connection
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS,
+                connection_type=None):
+        """Send a request and wait for the response.
+
+        Arguments match :meth:`httplib2.Http.request`; ``redirections``
+        and ``connection_type`` are accepted for compatibility and
+        ignored.
+
+        :rtype: tuple
+        :returns: Pair of the response (an :class:`httplib2.Response`) and
+                  its content.
+        :raises: :class:`ValueError` for URIs which are not ``http`` or
+                 ``https``.
+        """
+        # pylint: disable=unused-argument
+        parts = urlsplit(uri)
+        scheme = parts.scheme.lower()
+        if scheme not in _DEFAULT_PORTS:
+            raise ValueError('Unsupported URI scheme: %r' % (uri,))
+        port = parts.port or _DEFAULT_PORTS[scheme]
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        if body is None:
+            body = b''
+        elif isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        header_block = _request_headers(
+            method, scheme, parts.netloc.rpartition('@')[2], path,
+            headers or {}, body)
+        connection = self._get_connection(scheme, parts.hostname, port)
+        response_headers, content = connection.request(
+            header_block, body, self.timeout)
+        return _make_response(response_headers, content), content
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            connections, self._pool = list(self._pool.values()), {}
+        for connection in connections:
+            connection.close()
@@ -36,6 +36,20 @@ class TestBackgroundThreadHandler(unittest2.TestCase):
         transport = self._makeOne(client, NAME)
         self.assertEquals(transport.worker.logger.name, NAME)
 
+    def test_ctor_with_flow_control(self):
+        from gcloud.flow_control import FlowControl
+        from gcloud.flow_control import GuardedHttp
+        client = _Client(self.PROJECT)
+        flow_control = FlowControl()
+        http = client.connection.http = GuardedHttp(_Http(), flow_control)
+        NAME = "python_logger"
+        transport = self._makeOne(client, NAME)
+        copied = transport.client.connection.http
+        self.assertTrue(isinstance(copied, GuardedHttp))
+        self.assertFalse(copied is http)
+        self.assertFalse(copied.http is http.http)
+        self.assertTrue(copied.flow_control is flow_control)
+
     def test_send(self):
         client = _Client(self.PROJECT)
         NAME = "python_logger"
@@ -163,8 +177,14 @@ class _Batch(object):
 
 class _Credentials(object):
 
-    def authorize(self, _):
-        pass
+    def authorize(self, http):
+        return http
+
+
+class _Http(object):
+
+    def request(self, *args, **kwargs):  # pragma: NO COVER
+        raise NotImplementedError
 
 
 class _Connection(object):
@@ -804,6 +804,257 @@ class Test__name_from_project_path(unittest2.TestCase):
         self.assertEqual(name, self.THING_NAME)
 
 
+class Test__close_at_exit(unittest2.TestCase):
+
+    def _callFUT(self, obj):
+        from gcloud._helpers import _close_at_exit
+        return _close_at_exit(obj)
+
+    def _closeAll(self):
+        from gcloud._helpers import _close_all_at_exit
+        return _close_all_at_exit()
+
+    def _monkey(self):
+        import weakref
+        from gcloud._testing import _Monkey
+        from gcloud import _helpers as MUT
+        return _Monkey(MUT, _CLOSE_AT_EXIT=weakref.WeakSet())
+
+    def test_close(self):
+        first, second = _Closeable(), _Closeable()
+        with self._monkey():
+            self._callFUT(first)
+            self._callFUT(second)
+            self._closeAll()
+        self.assertEqual((first.closed, second.closed), (1, 1))
+
+    def test_weak_reference(self):
+        import gc
+        import weakref
+        obj = _Closeable()
+        ref = weakref.ref(obj)
+        with self._monkey():
+            self._callFUT(obj)
+            del obj
+            gc.collect()
+            self.assertTrue(ref() is None)
+            self._closeAll()
+
+    def test_error(self):
+        error = RuntimeError('boom')
+        failing, other = _Closeable(error), _Closeable()
+        with self._monkey():
+            self._callFUT(failing)
+            self._callFUT(other)
+            with self.assertRaises(RuntimeError):
+                self._closeAll()
+        self.assertEqual((failing.closed, other.closed), (1, 1))
+
+
+class Test__map_concurrently(unittest2.TestCase):
+
+    def _callFUT(self, func, items, max_workers):
+        from gcloud._helpers import _map_concurrently
+        return _map_concurrently(func, items, max_workers)
+
+    def test_empty(self):
+        self.assertEqual(self._callFUT(None, [], 4), [])
+
+    def test_single_worker_uses_current_thread(self):
+        import threading
+        threads = []
+
+        def _func(item):
+            threads.append(threading.current_thread())
+            return item * 2
+
+        self.assertEqual(self._callFUT(_func, [1, 2, 3], 1), [2, 4, 6])
+        self.assertEqual(set(threads), set([threading.current_thread()]))
+
+    def test_preserves_order(self):
+        import time
+
+        def _func(item):
+            time.sleep(0.001 * (5 - item))
+            return item * 2
+
+        self.assertEqual(self._callFUT(_func, range(5), 3),
+                         [0, 2, 4, 6, 8])
+
+    def test_runs_concurrently(self):
+        import threading
+        barrier = threading.Event()
+        started = []
+        lock = threading.Lock()
+
+        def _func(item):
+            with lock:
+                started.append(item)
+                if len(started) == 3:
+                    barrier.set()
+            # Would time out if the calls were made one at a time.
+            self.assertTrue(barrier.wait(5))
+            return item
+
+        self.assertEqual(self._callFUT(_func, [1, 2, 3], 3), [1, 2, 3])
+
+    def test_reraises_earliest_failure(self):
+        calls = []
+
+        def _func(item):
+            calls.append(item)
+            if item in (2, 3):
+                raise ValueError(item)
+            return item
+
+        with self.assertRaises(ValueError) as exc_info:
+            self._callFUT(_func, [1, 2, 3, 4, 5, 6, 7, 8], 2)
+        self.assertEqual(exc_info.exception.args, (2,))
+        self.assertTrue(len(calls) < 8)
+
+
+class Test__read_ahead(unittest2.TestCase):
+
+    def _callFUT(self, iterable, max_pending):
+        from gcloud._helpers import _read_ahead
+        return _read_ahead(iterable, max_pending)
+
+    def test_empty(self):
+        self.assertEqual(list(self._callFUT([], 2)), [])
+
+    def test_yields_in_order(self):
+        self.assertEqual(list(self._callFUT(range(10), 3)), list(range(10)))
+
+    def test_produces_ahead_within_bound(self):
+        import threading
+        produced = []
+        blocked = threading.Event()
+
+        def _items():
+            for item in range(10):
+                produced.append(item)
+                if len(produced) == 4:
+                    blocked.set()
+                yield item
+
+        iterator = self._callFUT(_items(), 2)
+        self.assertEqual(next(iterator), 0)
+        # Two items wait in the queue and one more is being produced.
+        self.assertTrue(blocked.wait(5))
+        self.assertEqual(len(produced), 4)
+        self.assertEqual(list(iterator), list(range(1, 10)))
+
+    def test_reraises_after_preceding_items(self):
+
+        def _items():
+            yield 1
+            yield 2
+            raise ValueError('boom')
+
+        iterator = self._callFUT(_items(), 5)
+        self.assertEqual(next(iterator), 1)
+        self.assertEqual(next(iterator), 2)
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_close_stops_producer(self):
+        import threading
+        stopped = threading.Event()
+
+        def _items():
+            try:
+                for item in range(1000):
+                    yield item
+            finally:
+                stopped.set()
+
+        iterator = self._callFUT(_items(), 1)
+        self.assertEqual(next(iterator), 0)
+        iterator.close()
+        self.assertTrue(stopped.wait(5))
+
+
+class Test__merge_concurrently(unittest2.TestCase):
+
+    def _callFUT(self, factories, max_workers, max_pending=2, ordered=True):
+        from gcloud._helpers import _merge_concurrently
+        return _merge_concurrently(factories, max_workers, max_pending,
+                                   ordered=ordered)
+
+    def _factories(self, *ranges):
+        return [lambda bounds=bounds: iter(range(*bounds))
+                for bounds in ranges]
+
+    def test_empty(self):
+        self.assertEqual(list(self._callFUT([], 4)), [])
+
+    def test_ordered(self):
+        factories = self._factories((0, 10), (10, 12), (12, 12), (12, 30))
+        self.assertEqual(list(self._callFUT(factories, 3)), list(range(30)))
+
+    def test_unordered(self):
+        factories = self._factories((0, 10), (10, 12), (12, 30))
+        result = list(self._callFUT(factories, 2, ordered=False))
+        self.assertEqual(sorted(result), list(range(30)))
+
+    def test_iterables_consumed_concurrently(self):
+        import threading
+        started = []
+        both_started = threading.Event()
+
+        def _factory(name):
+            def _items():
+                started.append(name)
+                if len(started) == 2:
+                    both_started.set()
+                # Neither iterable finishes before the other one starts.
+                self.assertTrue(both_started.wait(5))
+                yield name
+            return _items
+
+        result = self._callFUT([_factory('a'), _factory('b')], 2)
+        self.assertEqual(list(result), ['a', 'b'])
+
+    def test_reraises(self):
+
+        def _failing():
+            yield 1
+            raise ValueError('boom')
+
+        iterator = self._callFUT([_failing] + self._factories((5, 7)), 1)
+        self.assertEqual(next(iterator), 1)
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_close_stops_workers(self):
+        import threading
+        closed = threading.Event()
+
+        def _items():
+            try:
+                for item in range(1000):
+                    yield item
+            finally:
+                closed.set()
+
+        iterator = self._callFUT([_items], 1, max_pending=1)
+        self.assertEqual(next(iterator), 0)
+        iterator.close()
+        self.assertTrue(closed.wait(5))
+
+
+class _Closeable(object):
+
+    def __init__(self, error=None):
+        self.error = error
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+        if self.error is not None:
+            raise self.error
+
+
 class _AppIdentity(object):
 
     def __init__(self, app_id):
@@ -114,6 +114,35 @@ class TestClient(unittest2.TestCase):
         self.assertRaises(TypeError, KLASS.from_service_account_p12, None,
                           None, credentials=CREDENTIALS)
 
+    def test_flow_control_default(self):
+        from gcloud.connection import Connection
+        client_obj = self._makeOne(credentials=object(), http=object())
+        client_obj.connection = Connection(http=object())
+        self.assertEqual(client_obj.flow_control, None)
+
+    def test_flow_control_setter(self):
+        from gcloud.connection import Connection
+        from gcloud.flow_control import GuardedHttp
+        HTTP = object()
+        FLOW_CONTROL = object()
+        client_obj = self._makeOne(credentials=object(), http=HTTP)
+        client_obj.connection = Connection(http=HTTP)
+        client_obj.flow_control = FLOW_CONTROL
+        self.assertTrue(client_obj.flow_control is FLOW_CONTROL)
+        guarded = client_obj.connection.http
+        self.assertTrue(isinstance(guarded, GuardedHttp))
+        self.assertTrue(guarded.http is HTTP)
+
+        # Replacing the flow control does not nest the wrappers.
+        OTHER = object()
+        client_obj.flow_control = OTHER
+        self.assertTrue(client_obj.flow_control is OTHER)
+        self.assertTrue(client_obj.connection.http.http is HTTP)
+
+        client_obj.flow_control = None
+        self.assertEqual(client_obj.flow_control, None)
+        self.assertTrue(client_obj.connection.http is HTTP)
+
 
 class TestJSONClient(unittest2.TestCase):
 
@@ -67,6 +67,60 @@ class TestConnection(unittest2.TestCase):
         self.assertTrue(conn.http is authorized)
         self.assertTrue(isinstance(credentials._called_with, httplib2.Http))
 
+    def test_http_per_thread(self):
+        import threading
+        conn = self._makeOne()
+        http = conn.http
+        self.assertTrue(conn.http is http)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(conn.http))
+        thread.start()
+        thread.join()
+        self.assertFalse(other[0] is http)
+        self.assertFalse(conn.http_is_shared)
+
+    def test_release_http(self):
+        import threading
+        conn = self._makeOne()
+        used = []
+
+        def _use_http():
+            used.append(conn.http)
+            conn.release_http()
+
+        for _ in range(2):
+            thread = threading.Thread(target=_use_http)
+            thread.start()
+            thread.join()
+        # The second thread gets the transport (and the open connections)
+        # of the first one.
+        self.assertTrue(used[0] is used[1])
+
+    def test_release_http_without_http(self):
+        conn = self._makeOne()
+        conn.release_http()
+        self.assertEqual(conn._idle_http, [])
+
+    def test_http_is_shared(self):
+        conn = self._makeOne(http=object())
+        self.assertTrue(conn.http_is_shared)
+
+    def test_http_is_shared_w_thread_safe_http(self):
+        http = _Http({}, b'')
+        http.thread_safe = True
+        conn = self._makeOne(http=http)
+        self.assertFalse(conn.http_is_shared)
+
+    def test_http_w_flow_control(self):
+        from gcloud.flow_control import GuardedHttp
+        conn = self._makeOne()
+        conn._http = http = object()
+        conn.flow_control = flow_control = object()
+        guarded = conn.http
+        self.assertTrue(isinstance(guarded, GuardedHttp))
+        self.assertTrue(guarded.http is http)
+        self.assertTrue(guarded.flow_control is flow_control)
+
     def test_user_agent_format(self):
         from pkg_resources import get_distribution
         expected_ua = 'gcloud-python/{0}'.format(
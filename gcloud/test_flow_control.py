@@ -0,0 +1,602 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+class TestCircuitBreaker(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.flow_control import CircuitBreaker
+        return CircuitBreaker
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_ctor_defaults(self):
+        from gcloud.flow_control import CLOSED
+        breaker = self._makeOne()
+        self.assertEqual(breaker.failure_threshold, 5)
+        self.assertEqual(breaker.reset_timeout, 30.0)
+        self.assertEqual(breaker.half_open_max_calls, 1)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_ctor_invalid(self):
+        with self.assertRaises(ValueError):
+            self._makeOne(failure_threshold=0)
+        with self.assertRaises(ValueError):
+            self._makeOne(half_open_max_calls=0)
+
+    def test_opens_after_threshold(self):
+        from gcloud._testing import _Monkey
+        from gcloud import flow_control as MUT
+        from gcloud.flow_control import CircuitOpen
+        from gcloud.flow_control import CLOSED
+        from gcloud.flow_control import OPEN
+        breaker = self._makeOne(failure_threshold=2)
+        with _Monkey(MUT, _TIME=lambda: 100.0):
+            breaker.before_call()
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CLOSED)
+            breaker.before_call()
+            breaker.record_failure()
+            self.assertEqual(breaker.state, OPEN)
+            with self.assertRaises(CircuitOpen):
+                breaker.before_call()
+
+    def test_success_resets_failure_count(self):
+        from gcloud.flow_control import CLOSED
+        breaker = self._makeOne(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_half_open_trial_success(self):
+        from gcloud._testing import _Monkey
+        from gcloud import flow_control as MUT
+        from gcloud.flow_control import CircuitOpen
+        from gcloud.flow_control import CLOSED
+        from gcloud.flow_control import HALF_OPEN
+        breaker = self._makeOne(failure_threshold=1, reset_timeout=10.0)
+        with _Monkey(MUT, _TIME=lambda: 100.0):
+            breaker.record_failure()
+        with _Monkey(MUT, _TIME=lambda: 110.0):
+            self.assertEqual(breaker.state, HALF_OPEN)
+            self.assertTrue(breaker.before_call())
+            # Only one trial call at a time.
+            with self.assertRaises(CircuitOpen):
+                breaker.before_call()
+            breaker.record_success()
+            self.assertEqual(breaker.state, CLOSED)
+            self.assertFalse(breaker.before_call())
+
+    def test_half_open_trial_failure(self):
+        from gcloud._testing import _Monkey
+        from gcloud import flow_control as MUT
+        from gcloud.flow_control import OPEN
+        breaker = self._makeOne(failure_threshold=3, reset_timeout=10.0)
+        with _Monkey(MUT, _TIME=lambda: 100.0):
+            for _ in range(3):
+                breaker.record_failure()
+        with _Monkey(MUT, _TIME=lambda: 110.0):
+            breaker.before_call()
+            breaker.record_failure()
+            self.assertEqual(breaker.state, OPEN)
+        with _Monkey(MUT, _TIME=lambda: 119.0):
+            self.assertEqual(breaker.state, OPEN)
+
+
+class TestAIMDLimiter(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.flow_control import AIMDLimiter
+        return AIMDLimiter
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_ctor_defaults(self):
+        limiter = self._makeOne()
+        self.assertEqual(limiter.limit, 20)
+        self.assertEqual(limiter.min_limit, 1)
+        self.assertEqual(limiter.max_limit, 200)
+        self.assertEqual(limiter.backoff_ratio, 0.5)
+        self.assertEqual(limiter.latency_threshold, None)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_ctor_invalid(self):
+        with self.assertRaises(ValueError):
+            self._makeOne(initial_limit=0, min_limit=0)
+        with self.assertRaises(ValueError):
+            self._makeOne(initial_limit=300)
+        with self.assertRaises(ValueError):
+            self._makeOne(backoff_ratio=1)
+
+    def test_acquire_sheds_over_limit(self):
+        from gcloud.flow_control import ConcurrencyLimitExceeded
+        limiter = self._makeOne(initial_limit=2)
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual(limiter.in_flight, 2)
+        with self.assertRaises(ConcurrencyLimitExceeded):
+            limiter.acquire()
+        limiter.cancel()
+        self.assertEqual(limiter.in_flight, 1)
+        self.assertEqual(limiter.limit, 2)
+        limiter.acquire()
+
+    def test_additive_increase(self):
+        limiter = self._makeOne(initial_limit=2, max_limit=3)
+        for _ in range(4):
+            limiter.acquire()
+            limiter.acquire()
+            limiter.release(0.1)
+            limiter.release(0.1)
+        self.assertEqual(limiter.limit, 3)
+
+    def test_no_increase_when_underused(self):
+        limiter = self._makeOne(initial_limit=4)
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release(0.1)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_multiplicative_decrease(self):
+        limiter = self._makeOne(initial_limit=8, min_limit=3)
+        limiter.acquire()
+        limiter.release(0.1, dropped=True)
+        self.assertEqual(limiter.limit, 4)
+        limiter.acquire()
+        limiter.release(0.1, dropped=True)
+        self.assertEqual(limiter.limit, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_slow_call_counts_as_dropped(self):
+        limiter = self._makeOne(initial_limit=8, latency_threshold=1.0)
+        limiter.acquire()
+        limiter.release(0.5)
+        self.assertEqual(limiter.limit, 8)
+        limiter.acquire()
+        limiter.release(2.0)
+        self.assertEqual(limiter.limit, 4)
+
+
+class TestFlowControl(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.flow_control import FlowControl
+        return FlowControl
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_per_endpoint_state(self):
+        from gcloud.flow_control import AIMDLimiter
+        from gcloud.flow_control import CircuitBreaker
+        flow_control = self._makeOne()
+        breaker = flow_control.breaker('a')
+        self.assertTrue(isinstance(breaker, CircuitBreaker))
+        self.assertTrue(flow_control.breaker('a') is breaker)
+        self.assertFalse(flow_control.breaker('b') is breaker)
+        limiter = flow_control.limiter('a')
+        self.assertTrue(isinstance(limiter, AIMDLimiter))
+        self.assertTrue(flow_control.limiter('a') is limiter)
+
+    def test_custom_factories(self):
+        from gcloud.flow_control import AIMDLimiter
+        from gcloud.flow_control import CircuitBreaker
+        flow_control = self._makeOne(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1),
+            limiter_factory=lambda: AIMDLimiter(initial_limit=1))
+        self.assertEqual(flow_control.breaker('a').failure_threshold, 1)
+        self.assertEqual(flow_control.limiter('a').limit, 1)
+
+    def test_acquire_release(self):
+        flow_control = self._makeOne()
+        permit = flow_control.acquire('a')
+        self.assertEqual(flow_control.limiter('a').in_flight, 1)
+        permit.release()
+        permit.release()  # Idempotent.
+        self.assertEqual(flow_control.limiter('a').in_flight, 0)
+
+    def test_acquire_w_open_circuit_frees_slot(self):
+        from gcloud.flow_control import CircuitOpen
+        flow_control = self._makeOne()
+        breaker = flow_control.breaker('a')
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        with self.assertRaises(CircuitOpen):
+            flow_control.acquire('a')
+        self.assertEqual(flow_control.limiter('a').in_flight, 0)
+
+    def test_permit_cancel(self):
+        flow_control = self._makeOne()
+        permit = flow_control.acquire('a')
+        permit.cancel()
+        permit.release(failed=True)
+        self.assertEqual(flow_control.limiter('a').in_flight, 0)
+        self.assertEqual(flow_control.limiter('a').limit, 20)
+
+    def test_permit_cancel_half_open_trial(self):
+        from gcloud._testing import _Monkey
+        from gcloud import flow_control as MUT
+        from gcloud.flow_control import CircuitBreaker
+        from gcloud.flow_control import HALF_OPEN
+        flow_control = self._makeOne(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1,
+                                                   reset_timeout=10.0))
+        with _Monkey(MUT, _TIME=lambda: 100.0):
+            flow_control.breaker('a').record_failure()
+        with _Monkey(MUT, _TIME=lambda: 110.0):
+            flow_control.acquire('a').cancel()
+            # The trial slot was given back: the next call is let through.
+            self.assertEqual(flow_control.breaker('a').state, HALF_OPEN)
+            permit = flow_control.acquire('a')
+            permit.release()
+            flow_control.acquire('a').release()
+
+    def test_guard(self):
+        from gcloud.flow_control import OPEN
+        from gcloud.flow_control import AIMDLimiter
+        from gcloud.flow_control import CircuitBreaker
+        flow_control = self._makeOne(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=2),
+            limiter_factory=lambda: AIMDLimiter(initial_limit=4))
+        with flow_control.guard('a'):
+            pass
+        for _ in range(2):
+            with self.assertRaises(KeyError):
+                with flow_control.guard('a'):
+                    raise KeyError('a')
+        self.assertEqual(flow_control.breaker('a').state, OPEN)
+        self.assertEqual(flow_control.limiter('a').limit, 1)
+        self.assertEqual(flow_control.limiter('a').in_flight, 0)
+
+
+class TestGuardedHttp(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.flow_control import GuardedHttp
+        return GuardedHttp
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_request_success(self):
+        from gcloud.flow_control import FlowControl
+        http = _Http({'status': '200'}, b'CONTENT')
+        flow_control = FlowControl()
+        guarded = self._makeOne(http, flow_control)
+        response, content = guarded.request(
+            'https://www.googleapis.com/storage/v1/b', 'POST', b'BODY',
+            {'X': 'Y'}, redirections=3)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(content, b'CONTENT')
+        self.assertEqual(http._called_with, (
+            ('https://www.googleapis.com/storage/v1/b', 'POST', b'BODY',
+             {'X': 'Y'}), {'redirections': 3}))
+        limiter = flow_control.limiter('https://www.googleapis.com')
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_request_overload_status_is_failure(self):
+        from gcloud.flow_control import AIMDLimiter
+        from gcloud.flow_control import FlowControl
+        http = _Http({'status': '503'}, b'')
+        flow_control = FlowControl(
+            limiter_factory=lambda: AIMDLimiter(initial_limit=8))
+        guarded = self._makeOne(http, flow_control)
+        response, _ = guarded.request('http://example.com/path')
+        self.assertEqual(response.status, 503)
+        self.assertEqual(flow_control.limiter('http://example.com').limit, 4)
+
+    def test_request_client_error_is_success(self):
+        from gcloud.flow_control import FlowControl
+        http = _Http({'status': '404'}, b'')
+        flow_control = FlowControl()
+        guarded = self._makeOne(http, flow_control)
+        for _ in range(10):
+            guarded.request('http://example.com/path')
+        self.assertEqual(flow_control.limiter('http://example.com').limit, 20)
+
+    def test_request_transport_error_opens_circuit(self):
+        from gcloud.flow_control import CircuitBreaker
+        from gcloud.flow_control import CircuitOpen
+        from gcloud.flow_control import FlowControl
+        http = _Http(exception=IOError('timed out'))
+        flow_control = FlowControl(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1))
+        guarded = self._makeOne(http, flow_control)
+        with self.assertRaises(IOError):
+            guarded.request('http://example.com/path')
+        with self.assertRaises(CircuitOpen) as exc_info:
+            guarded.request('http://example.com/other')
+        self.assertEqual(exc_info.exception.code, 503)
+        # Other endpoints are unaffected.
+        http._exception = None
+        http._response = {'status': '200'}
+        guarded.request('http://other.example.com/path')
+
+    def test_attribute_passthrough(self):
+        http = _Http({'status': '200'}, b'')
+        http.connections = {}
+        guarded = self._makeOne(http, object())
+        self.assertTrue(guarded.connections is http.connections)
+
+    def test_deepcopy_shares_flow_control(self):
+        import copy
+        from gcloud.flow_control import FlowControl
+        http = _Http({'status': '200'}, b'')
+        flow_control = FlowControl()
+        guarded = self._makeOne(http, flow_control)
+        copied = copy.deepcopy(guarded)
+        self.assertTrue(isinstance(copied, self._getTargetClass()))
+        self.assertFalse(copied.http is http)
+        self.assertTrue(copied.flow_control is flow_control)
+        copied.request('http://example.com/path')
+        self.assertEqual(http._called_with, None)
+        self.assertEqual(copied.http._called_with,
+                         (('http://example.com/path',), {}))
+
+
+class TestGuardedStub(unittest2.TestCase):
+
+    ENDPOINT = 'bigtable.googleapis.com'
+
+    def _getTargetClass(self):
+        from gcloud.flow_control import GuardedStub
+        return GuardedStub
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_context_manager(self):
+        stub = _Stub()
+        guarded = self._makeOne(stub, object(), self.ENDPOINT)
+        with guarded as entered:
+            self.assertTrue(entered is guarded)
+            self.assertTrue(stub._entered)
+        self.assertEqual(stub._exited, (None, None, None))
+
+    def test_non_callable_passthrough(self):
+        stub = _Stub()
+        guarded = self._makeOne(stub, object(), self.ENDPOINT)
+        self.assertEqual(guarded.value, 'VALUE')
+
+    def test_unary_call(self):
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl()
+        stub = _Stub(result='RESPONSE')
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        self.assertEqual(guarded.MutateRow('REQUEST', 10), 'RESPONSE')
+        self.assertEqual(stub._called_with, (('REQUEST', 10), {}))
+        self.assertEqual(flow_control.limiter(self.ENDPOINT).in_flight, 0)
+
+    def test_unary_call_failure(self):
+        from gcloud.flow_control import AIMDLimiter
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl(
+            limiter_factory=lambda: AIMDLimiter(initial_limit=8))
+        stub = _Stub(exception=ValueError('deadline exceeded'))
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        with self.assertRaises(ValueError):
+            guarded.MutateRow('REQUEST', 10)
+        self.assertEqual(flow_control.limiter(self.ENDPOINT).limit, 4)
+        self.assertEqual(flow_control.limiter(self.ENDPOINT).in_flight, 0)
+
+    def test_unary_call_client_error_is_success(self):
+        from gcloud.flow_control import CircuitBreaker
+        from gcloud.flow_control import CLOSED
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1))
+        for code in (_StatusCode.NOT_FOUND, _StatusCode.ABORTED,
+                     _StatusCode.INVALID_ARGUMENT):
+            stub = _Stub(exception=_BetaError(code))
+            guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+            with self.assertRaises(_BetaError):
+                guarded.MutateRow('REQUEST', 10)
+        self.assertEqual(flow_control.breaker(self.ENDPOINT).state, CLOSED)
+        self.assertEqual(flow_control.limiter(self.ENDPOINT).limit, 20)
+
+    def test_unary_call_overload_error(self):
+        from gcloud.flow_control import CircuitBreaker
+        from gcloud.flow_control import FlowControl
+        from gcloud.flow_control import OPEN
+        flow_control = FlowControl(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1))
+        stub = _Stub(exception=_RpcError(_StatusCode.UNAVAILABLE))
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        with self.assertRaises(_RpcError):
+            guarded.MutateRow('REQUEST', 10)
+        self.assertEqual(flow_control.breaker(self.ENDPOINT).state, OPEN)
+
+    def test_streaming_call_client_error_mid_stream(self):
+        from gcloud.flow_control import CircuitBreaker
+        from gcloud.flow_control import CLOSED
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1))
+        responses = _Responses(['A'], exception=_RpcError(
+            _StatusCode.FAILED_PRECONDITION))
+        guarded = self._makeOne(_Stub(result=responses), flow_control,
+                                self.ENDPOINT)
+        iterator = guarded.ReadRows('REQUEST', 10)
+        self.assertEqual(next(iterator), 'A')
+        with self.assertRaises(_RpcError):
+            next(iterator)
+        self.assertEqual(flow_control.breaker(self.ENDPOINT).state, CLOSED)
+
+    def test_streaming_call(self):
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl()
+        responses = _Responses(['A', 'B'])
+        stub = _Stub(result=responses)
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        iterator = guarded.ReadRows('REQUEST', 10)
+        limiter = flow_control.limiter(self.ENDPOINT)
+        self.assertEqual(limiter.in_flight, 1)
+        self.assertEqual(next(iterator), 'A')
+        # The slot is released as soon as the stream starts.
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(list(iterator), ['B'])
+        self.assertEqual(iterator.code, 'OK')
+
+    def test_streaming_call_failure_mid_stream(self):
+        from gcloud.flow_control import CircuitBreaker
+        from gcloud.flow_control import FlowControl
+        from gcloud.flow_control import OPEN
+        flow_control = FlowControl(
+            breaker_factory=lambda: CircuitBreaker(failure_threshold=1))
+        responses = _Responses(['A'], exception=ValueError('reset'))
+        stub = _Stub(result=responses)
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        iterator = guarded.ReadRows('REQUEST', 10)
+        self.assertEqual(next(iterator), 'A')
+        with self.assertRaises(ValueError):
+            next(iterator)
+        self.assertEqual(flow_control.breaker(self.ENDPOINT).state, OPEN)
+
+    def test_streaming_call_failure_before_first_response(self):
+        from gcloud.flow_control import AIMDLimiter
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl(
+            limiter_factory=lambda: AIMDLimiter(initial_limit=8))
+        responses = _Responses([], exception=ValueError('unavailable'))
+        stub = _Stub(result=responses)
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        iterator = guarded.ReadRows('REQUEST', 10)
+        with self.assertRaises(ValueError):
+            next(iterator)
+        limiter = flow_control.limiter(self.ENDPOINT)
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_streaming_call_cancel(self):
+        from gcloud.flow_control import FlowControl
+        flow_control = FlowControl()
+        responses = _Responses(['A'])
+        stub = _Stub(result=responses)
+        guarded = self._makeOne(stub, flow_control, self.ENDPOINT)
+        iterator = guarded.ReadRows('REQUEST', 10)
+        iterator.cancel()
+        self.assertTrue(responses._cancelled)
+        self.assertEqual(flow_control.limiter(self.ENDPOINT).in_flight, 0)
+
+
+class _Response(dict):
+
+    @property
+    def status(self):
+        return int(self['status'])
+
+
+class _Http(object):
+
+    _called_with = None
+
+    def __init__(self, response=None, content=b'', exception=None):
+        self._response = response
+        self._content = content
+        self._exception = exception
+
+    def request(self, *args, **kwargs):
+        self._called_with = (args, kwargs)
+        if self._exception is not None:
+            raise self._exception
+        return _Response(self._response), self._content
+
+
+class _Stub(object):
+
+    value = 'VALUE'
+    _called_with = None
+    _entered = False
+    _exited = None
+
+    def __init__(self, result=None, exception=None):
+        self._result = result
+        self._exception = exception
+
+    def __enter__(self):
+        self._entered = True
+        return self
+
+    def __exit__(self, *args):
+        self._exited = args
+
+    def _call(self, *args, **kwargs):
+        self._called_with = (args, kwargs)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    MutateRow = ReadRows = _call
+
+
+class _Responses(object):
+
+    code = 'OK'
+    _cancelled = False
+
+    def __init__(self, values, exception=None):
+        self._values = iter(values)
+        self._exception = exception
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._values)
+        except StopIteration:
+            if self._exception is not None:
+                raise self._exception
+            raise
+
+    next = __next__
+
+    def cancel(self):
+        self._cancelled = True
+
+
+class _StatusCode(object):
+
+    class _Code(object):
+
+        def __init__(self, value):
+            self.value = value
+
+    ABORTED = _Code((10, 'aborted'))
+    FAILED_PRECONDITION = _Code((9, 'failed precondition'))
+    INVALID_ARGUMENT = _Code((3, 'invalid argument'))
+    NOT_FOUND = _Code((5, 'not found'))
+    UNAVAILABLE = _Code((14, 'unavailable'))
+
+
+class _BetaError(Exception):
+
+    def __init__(self, code):
+        super(_BetaError, self).__init__()
+        self.code = code
+
+
+class _RpcError(Exception):
+
+    def __init__(self, code):
+        super(_RpcError, self).__init__()
+        self._code = code
+
+    def code(self):
+        return self._code
@@ -0,0 +1,344 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import socket
+import threading
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.settings
+except ImportError:  # pragma: NO COVER
+    _HAVE_H2 = False
+else:
+    _HAVE_H2 = True
+
+import unittest2
+
+
+LARGE_SIZE = 200000
+
+
+@unittest2.skipUnless(_HAVE_H2, 'No h2')
+class Test__request_headers(unittest2.TestCase):
+
+    def _callFUT(self, *args, **kwargs):
+        from gcloud.http2 import _request_headers
+        return _request_headers(*args, **kwargs)
+
+    def test_get(self):
+        headers = self._callFUT(
+            'GET', 'https', 'www.googleapis.com', '/path?q=1',
+            {'Accept-Encoding': 'gzip', 'Connection': 'keep-alive',
+             'Host': 'www.googleapis.com', 'X-Count': 3}, b'')
+        self.assertEqual(headers[:4], [
+            (':method', 'GET'),
+            (':scheme', 'https'),
+            (':authority', 'www.googleapis.com'),
+            (':path', '/path?q=1'),
+        ])
+        self.assertEqual(sorted(headers[4:]),
+                         [('accept-encoding', 'gzip'), ('x-count', '3')])
+
+    def test_post_sets_content_length(self):
+        headers = self._callFUT(
+            'POST', 'http', 'localhost:8080', '/', {'Content-Length': 99},
+            b'')
+        self.assertEqual(headers[4:], [('content-length', '0')])
+        headers = self._callFUT(
+            'DELETE', 'http', 'localhost:8080', '/', {}, b'abc')
+        self.assertEqual(headers[4:], [('content-length', '3')])
+
+
+@unittest2.skipUnless(_HAVE_H2, 'No h2')
+class Test__make_response(unittest2.TestCase):
+
+    def _callFUT(self, *args, **kwargs):
+        from gcloud.http2 import _make_response
+        return _make_response(*args, **kwargs)
+
+    def test_it(self):
+        response = self._callFUT(
+            [(':status', '404'), ('Content-Type', 'text/plain'),
+             ('x-multi', 'a'), ('x-multi', 'b')], b'missing')
+        self.assertEqual(response.status, 404)
+        self.assertEqual(response['status'], '404')
+        self.assertEqual(response['content-type'], 'text/plain')
+        self.assertEqual(response['x-multi'], 'a, b')
+        self.assertEqual(response['content-length'], '7')
+
+
+@unittest2.skipUnless(_HAVE_H2, 'No h2')
+class TestHTTP2Http(unittest2.TestCase):
+
+    def setUp(self):
+        self.server = _H2Server()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _getTargetClass(self):
+        from gcloud.http2 import HTTP2Http
+        return HTTP2Http
+
+    def _makeOne(self, *args, **kw):
+        http = self._getTargetClass()(*args, **kw)
+        self.addCleanup(http.close)
+        return http
+
+    def _url(self, path):
+        return 'http://127.0.0.1:%d%s' % (self.server.port, path)
+
+    def test_unsupported_scheme(self):
+        http = self._makeOne()
+        with self.assertRaises(ValueError):
+            http.request('ftp://example.com/')
+
+    def test_get(self):
+        http = self._makeOne()
+        response, content = http.request(
+            self._url('/echo?a=b'), headers={'X-Test': 'value'})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response['content-type'], 'application/json')
+        payload = json.loads(content.decode('utf-8'))
+        self.assertEqual(payload['method'], 'GET')
+        self.assertEqual(payload['path'], '/echo?a=b')
+        self.assertEqual(payload['headers']['x-test'], 'value')
+        self.assertEqual(payload['headers'][':authority'],
+                         '127.0.0.1:%d' % (self.server.port,))
+        self.assertEqual(payload['body_length'], 0)
+
+    def test_large_request_and_response(self):
+        http = self._makeOne()
+        body = u'x' * LARGE_SIZE
+        response, content = http.request(
+            self._url('/large'), 'PUT', body=body)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(content), LARGE_SIZE)
+        self.assertEqual(self.server.body_lengths, [LARGE_SIZE])
+
+    def test_concurrent_requests_share_one_connection(self):
+        self.server.barrier = 5
+        http = self._makeOne(timeout=10)
+        statuses = []
+
+        def _request():
+            response, _ = http.request(self._url('/barrier'))
+            statuses.append(response.status)
+
+        threads = [threading.Thread(target=_request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # All five streams were open at once over a single socket.
+        self.assertEqual(statuses, [200] * 5)
+        self.assertEqual(self.server.accepted, 1)
+        self.assertEqual(self.server.max_open, 5)
+
+    def test_respects_max_concurrent_streams(self):
+        self.server.max_concurrent_streams = 2
+        self.server.barrier = 2
+        http = self._makeOne(timeout=10)
+        # The first response guarantees the server settings were applied.
+        http.request(self._url('/echo'))
+        statuses = []
+
+        def _request():
+            response, _ = http.request(self._url('/barrier'))
+            statuses.append(response.status)
+
+        threads = [threading.Thread(target=_request) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [200] * 6)
+        self.assertEqual(self.server.max_open, 2)
+
+    def test_timeout(self):
+        http = self._makeOne(timeout=0.2)
+        with self.assertRaises(socket.timeout):
+            http.request(self._url('/hang'))
+        # The connection remains usable for other streams.
+        response, _ = http.request(self._url('/echo'))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.server.accepted, 1)
+
+    def test_server_reset_stream(self):
+        from gcloud.http2 import ConnectionClosed
+        http = self._makeOne(timeout=10)
+        with self.assertRaises(ConnectionClosed):
+            http.request(self._url('/reset'))
+
+    def test_reconnects_after_goaway(self):
+        from gcloud.http2 import ConnectionClosed
+        http = self._makeOne(timeout=10)
+        with self.assertRaises(ConnectionClosed):
+            http.request(self._url('/goaway'))
+        response, _ = http.request(self._url('/echo'))
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.server.accepted, 2)
+
+    def test_with_json_connection(self):
+        from gcloud.connection import JSONConnection
+
+        class _Connection(JSONConnection):
+            API_BASE_URL = self._url('')
+            API_VERSION = 'v1'
+            API_URL_TEMPLATE = '{api_base_url}/{api_version}{path}'
+
+        connection = _Connection(http=self._makeOne(timeout=10))
+        payload = connection.api_request('POST', '/things',
+                                         data={'name': 'thing'})
+        self.assertEqual(payload['method'], 'POST')
+        self.assertEqual(payload['path'], '/v1/things')
+        self.assertEqual(payload['headers']['content-type'],
+                         'application/json')
+        self.assertTrue('user-agent' in payload['headers'])
+
+
+class _H2Server(object):
+    """Plaintext HTTP/2 server whose behavior is chosen by request path.
+
+    * ``/barrier`` waits until ``barrier`` such streams are open.
+    * ``/large`` answers with ``LARGE_SIZE`` bytes.
+    * ``/hang`` never answers.
+    * ``/reset`` resets the stream, ``/goaway`` closes the connection.
+    * Anything else echoes the request as JSON.
+    """
+
+    barrier = 1
+    max_concurrent_streams = 100
+
+    def __init__(self):
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen(5)
+        self.port = self._listener.getsockname()[1]
+        self._sockets = []
+        self.accepted = 0
+        self.max_open = 0
+        self.body_lengths = []
+
+    def start(self):
+        thread = threading.Thread(target=self._accept_loop)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._listener.close()
+        for sock in self._sockets:
+            sock.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except socket.error:
+                return
+            self.accepted += 1
+            self._sockets.append(sock)
+            thread = threading.Thread(target=self._serve, args=(sock,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, sock):
+        config = h2.config.H2Configuration(
+            client_side=False, header_encoding='utf-8')
+        conn = h2.connection.H2Connection(config=config)
+        conn.local_settings = h2.settings.Settings(
+            client=False, initial_values={
+                h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS:
+                    self.max_concurrent_streams})
+        conn.initiate_connection()
+        sock.sendall(conn.data_to_send())
+        requests = {}
+        barrier = []
+        pending = {}
+        while True:
+            try:
+                data = sock.recv(65535)
+            except socket.error:
+                return
+            if not data:
+                return
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.RequestReceived):
+                    requests[event.stream_id] = (dict(event.headers), [])
+                    self.max_open = max(self.max_open,
+                                        conn.open_inbound_streams)
+                elif isinstance(event, h2.events.DataReceived):
+                    requests[event.stream_id][1].append(event.data)
+                    conn.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    headers, chunks = requests.pop(event.stream_id)
+                    self._respond(conn, event.stream_id, headers,
+                                  b''.join(chunks), barrier, pending)
+            for stream_id in list(pending):
+                body = pending[stream_id]
+                while body:
+                    size = min(conn.local_flow_control_window(stream_id),
+                               conn.max_outbound_frame_size, len(body))
+                    if not size:
+                        break
+                    conn.send_data(stream_id, body[:size],
+                                   end_stream=size == len(body))
+                    body = body[size:]
+                if body:
+                    pending[stream_id] = body
+                else:
+                    del pending[stream_id]
+            try:
+                sock.sendall(conn.data_to_send())
+            except socket.error:
+                return
+
+    def _respond(self, conn, stream_id, headers, body, barrier, pending):
+        path = headers[':path']
+        if path == '/hang':
+            return
+        if path == '/reset':
+            conn.reset_stream(stream_id)
+            return
+        if path == '/goaway':
+            conn.close_connection()
+            return
+        if path == '/barrier':
+            barrier.append(stream_id)
+            if len(barrier) < self.barrier:
+                return
+            stream_ids, barrier[:] = list(barrier), []
+        else:
+            stream_ids = [stream_id]
+        if path == '/large':
+            self.body_lengths.append(len(body))
+            payload = b'y' * LARGE_SIZE
+        else:
+            payload = json.dumps({
+                'method': headers[':method'],
+                'path': path,
+                'headers': headers,
+                'body_length': len(body),
+            }).encode('utf-8')
+        for response_id in stream_ids:
+            conn.send_headers(response_id, [
+                (':status', '200'),
+                ('content-type', 'application/json'),
+            ])
+            pending[response_id] = payload
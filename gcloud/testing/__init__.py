@@ -0,0 +1,30 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Local, in-process fakes of Google Cloud services.
+
+The HTTP fakes run in a :class:`LocalServer`; the gRPC fakes live in
+:mod:`gcloud.testing.bigtable_server` and
+:mod:`gcloud.testing.datastore_server`, which require ``grpc``.
+"""
+
+from gcloud.testing.http_server import LocalHttp
+from gcloud.testing.http_server import LocalServer
+from gcloud.testing.http_server import Request
+from gcloud.testing.http_server import Response
+from gcloud.testing.services import BigQueryBackend
+from gcloud.testing.services import DatastoreBackend
+from gcloud.testing.services import LoggingBackend
+from gcloud.testing.services import PubsubBackend
+from gcloud.testing.services import StorageBackend
@@ -0,0 +1,506 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process gRPC server standing in for the Cloud Bigtable data API.
+
+Start a :class:`BigtableServer` and export its :attr:`emulator_host` as
+``BIGTABLE_EMULATOR_HOST``; a :class:`gcloud.bigtable.client.Client`
+started afterwards talks to it over a plaintext channel.
+
+.. code:: python
+
+    >>> import os
+    >>> from gcloud.environment_vars import BIGTABLE_EMULATOR
+    >>> from gcloud.testing.bigtable_server import BigtableServer
+    >>> server = BigtableServer()
+    >>> server.start()
+    >>> os.environ[BIGTABLE_EMULATOR] = server.emulator_host
+
+Only the data API is served; the table and instance admin APIs are not,
+so tables spring into existence on first write.
+"""
+
+import re
+import struct
+import threading
+import time
+
+from grpc.beta.interfaces import StatusCode
+
+from gcloud.bigtable._generated_v2 import bigtable_pb2 as data_messages_v2_pb2
+from gcloud.bigtable._generated_v2 import data_pb2 as data_v2_pb2
+from gcloud.testing.http_server import LOCALHOST
+
+
+_PACK_I64 = struct.Struct('>q')
+
+
+def _now_micros():
+    """Current time in microseconds, at Bigtable's millisecond granularity.
+
+    :rtype: int
+    :returns: The timestamp.
+    """
+    return int(time.time() * 1000) * 1000
+
+
+def _key_in_range(row_key, range_pb):
+    """Check whether a row key falls in a ``RowRange``."""
+    start_type = range_pb.WhichOneof('start_key')
+    if start_type == 'start_key_closed':
+        if row_key < range_pb.start_key_closed:
+            return False
+    elif start_type == 'start_key_open':
+        if row_key <= range_pb.start_key_open:
+            return False
+    end_type = range_pb.WhichOneof('end_key')
+    if end_type == 'end_key_open':
+        return row_key < range_pb.end_key_open
+    if end_type == 'end_key_closed':
+        return row_key <= range_pb.end_key_closed
+    return True
+
+
+def _key_in_row_set(row_key, row_set_pb):
+    """Check whether a row key is selected by a ``RowSet``.
+
+    An empty row set selects every row.
+    """
+    if not row_set_pb.row_keys and not row_set_pb.row_ranges:
+        return True
+    if row_key in row_set_pb.row_keys:
+        return True
+    return any(_key_in_range(row_key, range_pb)
+               for range_pb in row_set_pb.row_ranges)
+
+
+def _regex_match(pattern, value):
+    """Full-match a (RE2-compatible) bytes pattern."""
+    return re.match(pattern + b'\\Z', value, re.DOTALL) is not None
+
+
+def _apply_filter(filter_pb, row_key, cells):
+    """Apply a row filter to the cells of one row.
+
+    Supports the filters the library builds most often; anything else
+    passes the cells through unchanged.
+
+    :type filter_pb: :class:`.data_v2_pb2.RowFilter`
+    :param filter_pb: The filter to apply.
+
+    :type row_key: bytes
+    :param row_key: The key of the row.
+
+    :type cells: list
+    :param cells: ``(family, qualifier, timestamp, value)`` tuples, in
+                  the order they would be returned.
+
+    :rtype: list
+    :returns: The cells which pass the filter.
+    """
+    filter_type = filter_pb.WhichOneof('filter')
+    if filter_type == 'chain':
+        for sub_filter in filter_pb.chain.filters:
+            cells = _apply_filter(sub_filter, row_key, cells)
+        return cells
+    if filter_type == 'interleave':
+        kept = set()
+        for sub_filter in filter_pb.interleave.filters:
+            kept.update(_apply_filter(sub_filter, row_key, cells))
+        return [cell for cell in cells if cell in kept]
+    if filter_type == 'block_all_filter':
+        return []
+    if filter_type == 'row_key_regex_filter':
+        if _regex_match(filter_pb.row_key_regex_filter, row_key):
+            return cells
+        return []
+    if filter_type == 'family_name_regex_filter':
+        pattern = filter_pb.family_name_regex_filter.encode('utf-8')
+        return [cell for cell in cells
+                if _regex_match(pattern, cell[0].encode('utf-8'))]
+    if filter_type == 'column_qualifier_regex_filter':
+        pattern = filter_pb.column_qualifier_regex_filter
+        return [cell for cell in cells if _regex_match(pattern, cell[1])]
+    if filter_type == 'value_regex_filter':
+        pattern = filter_pb.value_regex_filter
+        return [cell for cell in cells if _regex_match(pattern, cell[3])]
+    if filter_type == 'timestamp_range_filter':
+        range_pb = filter_pb.timestamp_range_filter
+        end = range_pb.end_timestamp_micros or float('inf')
+        return [cell for cell in cells
+                if range_pb.start_timestamp_micros <= cell[2] < end]
+    if filter_type == 'cells_per_row_limit_filter':
+        return cells[:filter_pb.cells_per_row_limit_filter]
+    if filter_type == 'cells_per_row_offset_filter':
+        return cells[filter_pb.cells_per_row_offset_filter:]
+    if filter_type == 'cells_per_column_limit_filter':
+        limit = filter_pb.cells_per_column_limit_filter
+        counts = {}
+        kept = []
+        for cell in cells:
+            column = cell[:2]
+            counts[column] = counts.get(column, 0) + 1
+            if counts[column] <= limit:
+                kept.append(cell)
+        return kept
+    if filter_type == 'strip_value_transformer':
+        return [cell[:3] + (b'',) for cell in cells]
+    return cells
+
+
+class _Table(object):
+    """In-memory contents of a single table.
+
+    Rows map family names to qualifiers to ``{timestamp: value}``.
+    """
+
+    def __init__(self):
+        self.rows = {}
+
+    def cells(self, row_key):
+        """Cells of a row in read order (timestamps newest first)."""
+        cells = []
+        families = self.rows.get(row_key, {})
+        for family in sorted(families):
+            for qualifier in sorted(families[family]):
+                versions = families[family][qualifier]
+                for timestamp in sorted(versions, reverse=True):
+                    cells.append((family, qualifier, timestamp,
+                                  versions[timestamp]))
+        return cells
+
+    def mutate(self, row_key, mutations):
+        """Apply ``Mutation`` protobufs to a row."""
+        row = self.rows.setdefault(row_key, {})
+        for mutation in mutations:
+            mutation_type = mutation.WhichOneof('mutation')
+            if mutation_type == 'set_cell':
+                set_cell = mutation.set_cell
+                timestamp = set_cell.timestamp_micros
+                if timestamp == -1:
+                    timestamp = _now_micros()
+                column = row.setdefault(set_cell.family_name, {}).setdefault(
+                    set_cell.column_qualifier, {})
+                column[timestamp] = set_cell.value
+            elif mutation_type == 'delete_from_column':
+                delete = mutation.delete_from_column
+                column = row.get(delete.family_name, {}).get(
+                    delete.column_qualifier, {})
+                start = delete.time_range.start_timestamp_micros
+                end = delete.time_range.end_timestamp_micros or float('inf')
+                for timestamp in list(column):
+                    if start <= timestamp < end:
+                        del column[timestamp]
+            elif mutation_type == 'delete_from_family':
+                row.pop(mutation.delete_from_family.family_name, None)
+            elif mutation_type == 'delete_from_row':
+                row.clear()
+        self._prune(row_key)
+
+    def _prune(self, row_key):
+        """Drop empty columns, families and rows."""
+        row = self.rows.get(row_key, {})
+        for family in list(row):
+            for qualifier in list(row[family]):
+                if not row[family][qualifier]:
+                    del row[family][qualifier]
+            if not row[family]:
+                del row[family]
+        if not row:
+            self.rows.pop(row_key, None)
+
+
+def _abort(context):
+    """End the current call with ``UNAVAILABLE``, as a reset stream would.
+    """
+    context.code(StatusCode.UNAVAILABLE)
+    context.details('Injected stream failure.')
+
+
+class _BigtableServicer(data_messages_v2_pb2.BetaBigtableServicer):
+    """Implements the data API methods against :class:`_Table` objects.
+
+    :type server: :class:`BigtableServer`
+    :param server: The server owning the tables and settings.
+    """
+
+    def __init__(self, server):
+        self._server = server
+
+    def _table(self, table_name):
+        """Fetch (creating if needed) a table by its full name."""
+        return self._server.tables.setdefault(table_name, _Table())
+
+    def ReadRows(self, request, context):
+        """Stream the selected rows as chunks."""
+        server = self._server
+        with server.lock:
+            table = self._table(request.table_name)
+            rows = []
+            for row_key in sorted(table.rows):
+                if not _key_in_row_set(row_key, request.rows):
+                    continue
+                cells = table.cells(row_key)
+                if request.HasField('filter'):
+                    cells = _apply_filter(request.filter, row_key, cells)
+                if cells:
+                    rows.append((row_key, cells))
+                if request.rows_limit and len(rows) >= request.rows_limit:
+                    break
+
+            fail_after = None
+            if server.read_failures:
+                fail_after = server.read_failures.pop(0)
+
+        sent = 0
+        response = data_messages_v2_pb2.ReadRowsResponse()
+        for row_key, cells in rows:
+            for index, cell in enumerate(cells):
+                for chunk in self._cell_chunks(row_key if index == 0
+                                               else None, cell):
+                    response.chunks.add().CopyFrom(chunk)
+            response.chunks[-1].commit_row = True
+            if len(response.chunks) >= server.chunks_per_response:
+                if sent == fail_after:
+                    _abort(context)
+                    return
+                yield response
+                sent += 1
+                response = data_messages_v2_pb2.ReadRowsResponse()
+        if sent == fail_after:
+            _abort(context)
+            return
+        if response.chunks:
+            yield response
+
+    def _cell_chunks(self, row_key, cell):
+        """Split a cell into chunks of at most ``value_chunk_size`` bytes."""
+        family, qualifier, timestamp, value = cell
+        size = self._server.value_chunk_size or len(value) or 1
+        pieces = [value[start:start + size]
+                  for start in range(0, len(value), size)] or [b'']
+        chunks = []
+        for index, piece in enumerate(pieces):
+            chunk = data_messages_v2_pb2.ReadRowsResponse.CellChunk(
+                value=piece)
+            if index == 0:
+                if row_key is not None:
+                    chunk.row_key = row_key
+                chunk.family_name.value = family
+                chunk.qualifier.value = qualifier
+                chunk.timestamp_micros = timestamp
+            if index < len(pieces) - 1:
+                chunk.value_size = len(value)
+            chunks.append(chunk)
+        return chunks
+
+    def SampleRowKeys(self, request, context):
+        """Stream every ``sample_every``-th row key."""
+        server = self._server
+        with server.lock:
+            row_keys = sorted(self._table(request.table_name).rows)
+        offset = 0
+        for index, row_key in enumerate(row_keys):
+            offset += len(row_key)
+            if (index + 1) % server.sample_every == 0:
+                yield data_messages_v2_pb2.SampleRowKeysResponse(
+                    row_key=row_key, offset_bytes=offset)
+        # The final (empty) key marks the end of the table.
+        yield data_messages_v2_pb2.SampleRowKeysResponse(
+            row_key=b'', offset_bytes=offset)
+
+    def MutateRow(self, request, context):
+        """Apply mutations to one row."""
+        with self._server.lock:
+            self._table(request.table_name).mutate(
+                request.row_key, request.mutations)
+        return data_messages_v2_pb2.MutateRowResponse()
+
+    def MutateRows(self, request, context):
+        """Apply mutations to many rows, reporting a status per entry."""
+        server = self._server
+        response = data_messages_v2_pb2.MutateRowsResponse()
+        with server.lock:
+            table = self._table(request.table_name)
+            for index, entry in enumerate(request.entries):
+                entry_pb = response.entries.add(index=index)
+                failures = server.entry_failures.get(entry.row_key)
+                if failures:
+                    entry_pb.status.code = failures.pop(0)
+                    continue
+                table.mutate(entry.row_key, entry.mutations)
+        yield response
+
+    def CheckAndMutateRow(self, request, context):
+        """Apply true / false mutations depending on a predicate."""
+        with self._server.lock:
+            table = self._table(request.table_name)
+            cells = table.cells(request.row_key)
+            if request.HasField('predicate_filter'):
+                cells = _apply_filter(request.predicate_filter,
+                                      request.row_key, cells)
+            matched = bool(cells)
+            mutations = (request.true_mutations if matched
+                         else request.false_mutations)
+            table.mutate(request.row_key, mutations)
+        return data_messages_v2_pb2.CheckAndMutateRowResponse(
+            predicate_matched=matched)
+
+    def ReadModifyWriteRow(self, request, context):
+        """Atomically append to / increment cells, returning new values."""
+        row_pb = data_v2_pb2.Row(key=request.row_key)
+        # Like the service, group the new cells by column family.
+        family_pbs = {}
+        with self._server.lock:
+            table = self._table(request.table_name)
+            row = table.rows.setdefault(request.row_key, {})
+            timestamp = _now_micros()
+            for rule in request.rules:
+                column = row.setdefault(rule.family_name, {}).setdefault(
+                    rule.column_qualifier, {})
+                current = column[max(column)] if column else None
+                if rule.WhichOneof('rule') == 'append_value':
+                    value = (current or b'') + rule.append_value
+                else:
+                    previous = 0
+                    if current is not None:
+                        previous = _PACK_I64.unpack(current)[0]
+                    value = _PACK_I64.pack(previous + rule.increment_amount)
+                # Never write behind the latest version of the cell.
+                cell_timestamp = max([timestamp] + list(column))
+                column[cell_timestamp] = value
+
+                family_pb = family_pbs.get(rule.family_name)
+                if family_pb is None:
+                    family_pb = family_pbs[rule.family_name] = (
+                        row_pb.families.add(name=rule.family_name))
+                column_pb = family_pb.columns.add(
+                    qualifier=rule.column_qualifier)
+                column_pb.cells.add(timestamp_micros=cell_timestamp,
+                                    value=value)
+        return data_messages_v2_pb2.ReadModifyWriteRowResponse(row=row_pb)
+
+
+class EmulatorCredentials(object):
+    """Credentials stand-in for clients talking to :class:`BigtableServer`.
+
+    The emulator channel is unauthenticated, so no token is ever fetched.
+    """
+
+    scopes = None
+
+    def create_scoped(self, scopes):
+        """Record the requested scopes.
+
+        :type scopes: list
+        :param scopes: The scopes requested by the client.
+
+        :rtype: :class:`EmulatorCredentials`
+        :returns: A scoped copy of these credentials.
+        """
+        result = EmulatorCredentials()
+        result.scopes = scopes
+        return result
+
+
+class BigtableServer(object):
+    """In-process Bigtable data API server.
+
+    :type host: str
+    :param host: (Optional) Interface to bind.
+
+    :type port: int
+    :param port: (Optional) Port to bind; the default of ``0`` picks a
+                 free port.
+
+    :type value_chunk_size: int
+    :param value_chunk_size: (Optional) Split cell values into chunks of
+                             at most this many bytes in ``ReadRows``
+                             responses, to exercise chunk reassembly.
+
+    :type chunks_per_response: int
+    :param chunks_per_response: (Optional) Number of chunks to accumulate
+                                before sending a ``ReadRows`` response.
+
+    :type sample_every: int
+    :param sample_every: (Optional) Return every ``sample_every``-th row key
+                         from ``SampleRowKeys``.
+
+    :type read_failures: list
+    :param read_failures: (Optional) Numbers of responses after which
+                          ``ReadRows`` calls fail with ``UNAVAILABLE``,
+                          one consumed by each call.
+
+    :type entry_failures: dict
+    :param entry_failures: (Optional) Status codes to fail ``MutateRows``
+                           entries with, without applying them: a list of
+                           codes per row key, one consumed by each entry
+                           for that row.
+    """
+
+    def __init__(self, host=LOCALHOST, port=0, value_chunk_size=None,
+                 chunks_per_response=100, sample_every=100,
+                 read_failures=None, entry_failures=None):
+        self.host = host
+        self._port = port
+        self.value_chunk_size = value_chunk_size
+        self.chunks_per_response = chunks_per_response
+        self.sample_every = sample_every
+        self.read_failures = list(read_failures or ())
+        self.entry_failures = dict(entry_failures or {})
+        self.tables = {}
+        self.lock = threading.RLock()
+        self._server = None
+
+    @property
+    def port(self):
+        """The port the server is bound to.
+
+        :rtype: int
+        :returns: The port, only known once the server is started.
+        """
+        return self._port
+
+    @property
+    def emulator_host(self):
+        """Value to export as ``BIGTABLE_EMULATOR_HOST``.
+
+        :rtype: str
+        :returns: String of the form ``host:port``.
+        """
+        return '%s:%d' % (self.host, self.port)
+
+    def start(self):
+        """Bind the port and start serving."""
+        if self._server is not None:
+            raise ValueError('Server already started.')
+        self._server = data_messages_v2_pb2.beta_create_Bigtable_server(
+            _BigtableServicer(self))
+        self._port = self._server.add_insecure_port(
+            '%s:%d' % (self.host, self._port))
+        self._server.start()
+
+    def stop(self):
+        """Stop serving immediately, cancelling in-flight calls."""
+        if self._server is None:
+            return
+        self._server.stop(0)
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,171 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process gRPC server standing in for the Cloud Datastore API.
+
+Serves a :class:`gcloud.testing.services.DatastoreBackend` over gRPC.
+Start a :class:`DatastoreServer` and export its :attr:`emulator_host` as
+``DATASTORE_HOST``; a :class:`.grpc_connection.GrpcConnection` created
+afterwards talks to it over plaintext channels.
+
+.. code:: python
+
+    >>> import os
+    >>> from gcloud.environment_vars import GCD_HOST
+    >>> from gcloud.testing.datastore_server import DatastoreServer
+    >>> server = DatastoreServer()
+    >>> server.start()
+    >>> os.environ[GCD_HOST] = server.emulator_host
+"""
+
+import threading
+import time
+
+from concurrent import futures
+import grpc
+from google.rpc import status_pb2
+
+from gcloud.datastore.grpc_connection import SERVICE_NAME
+from gcloud.datastore.grpc_connection import _METHODS
+from gcloud.testing.http_server import LOCALHOST
+from gcloud.testing.http_server import Response
+from gcloud.testing.services import DatastoreBackend
+
+
+_HANDLER_NAMES = {
+    'lookup': 'lookup',
+    'runQuery': 'run_query',
+    'beginTransaction': 'begin_transaction',
+    'commit': 'commit',
+    'rollback': 'rollback',
+    'allocateIds': 'allocate_ids',
+}
+
+
+class DatastoreServer(object):
+    """In-process Cloud Datastore gRPC server.
+
+    :type backend: :class:`gcloud.testing.services.DatastoreBackend`
+    :param backend: (Optional) The backend holding the entities.  Defaults
+                    to a new one.
+
+    :type host: str
+    :param host: (Optional) Interface to bind.
+
+    :type port: int
+    :param port: (Optional) Port to bind; the default of ``0`` picks a
+                 free port.
+
+    :type max_workers: int
+    :param max_workers: (Optional) Number of threads serving RPCs.
+
+    :type latency: float
+    :param latency: (Optional) Seconds to wait before handling each RPC.
+    """
+
+    def __init__(self, backend=None, host=LOCALHOST, port=0, max_workers=10,
+                 latency=0):
+        if backend is None:
+            backend = DatastoreBackend()
+        self.backend = backend
+        self.host = host
+        self._port = port
+        self.max_workers = max_workers
+        self.latency = latency
+        self.peers = set()
+        self.metadata = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def port(self):
+        """The port the server is bound to.
+
+        :rtype: int
+        :returns: The port, only known once the server is started.
+        """
+        return self._port
+
+    @property
+    def emulator_host(self):
+        """Value to export as ``DATASTORE_HOST``.
+
+        :rtype: str
+        :returns: String of the form ``host:port``.
+        """
+        return '%s:%d' % (self.host, self.port)
+
+    def _handler(self, method):
+        """Build the gRPC handler of one method, calling the backend."""
+        backend_method = getattr(self.backend, _HANDLER_NAMES[method])
+
+        def handle(request_pb, context):
+            with self._lock:
+                self.peers.add(context.peer())
+                self.metadata.append(dict(context.invocation_metadata()))
+            if self.latency:
+                time.sleep(self.latency)
+            response = backend_method(request_pb.project_id, request_pb)
+            if isinstance(response, Response):
+                status_pb = status_pb2.Status.FromString(response.body)
+                context.abort(_status_code(status_pb.code), status_pb.message)
+            return response
+
+        _, request_class, response_class = _METHODS[method]
+        return grpc.unary_unary_rpc_method_handler(
+            handle, request_deserializer=request_class.FromString,
+            response_serializer=response_class.SerializeToString)
+
+    def start(self):
+        """Bind the port and start serving."""
+        if self._server is not None:
+            raise ValueError('Server already started.')
+        handlers = dict((grpc_name, self._handler(method))
+                        for method, (grpc_name, _, _) in _METHODS.items())
+        self._server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=self.max_workers))
+        self._server.add_generic_rpc_handlers(
+            (grpc.method_handlers_generic_handler(SERVICE_NAME, handlers),))
+        self._port = self._server.add_insecure_port(
+            '%s:%d' % (self.host, self._port))
+        self._server.start()
+
+    def stop(self):
+        """Stop serving immediately, cancelling in-flight calls."""
+        if self._server is None:
+            return
+        self._server.stop(0)
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _status_code(code):
+    """Find the :class:`grpc.StatusCode` with a numeric value.
+
+    :type code: int
+    :param code: A ``google.rpc.Code`` value.
+
+    :rtype: :class:`grpc.StatusCode`
+    :returns: The matching status code, or ``UNKNOWN``.
+    """
+    for status_code in grpc.StatusCode:
+        if status_code.value[0] == code:
+            return status_code
+    return grpc.StatusCode.UNKNOWN
@@ -0,0 +1,415 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process HTTP server standing in for the Google Cloud HTTP APIs.
+
+A :class:`LocalServer` listens on a loopback port and dispatches each
+request to the routes exposed by one or more service backends (see
+:mod:`gcloud.testing.services`).  Clients are pointed at it by passing
+``http=server.http()``, which rewrites the ``https://*.googleapis.com``
+prefix of every request so the library code under test is unchanged.
+"""
+
+import json
+import re
+import threading
+
+import httplib2
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib.parse import parse_qsl
+from six.moves.urllib.parse import urlsplit
+
+
+LOCALHOST = '127.0.0.1'
+"""Interface the local servers bind to."""
+
+_GOOGLE_API_PREFIX = re.compile(
+    r'^https?://[A-Za-z0-9.-]+\.googleapis\.com(:\d+)?')
+
+
+class Request(object):
+    """A request received by :class:`LocalServer`.
+
+    :type method: str
+    :param method: The HTTP method, e.g. ``GET``.
+
+    :type path: str
+    :param path: The (still percent-encoded) request path.
+
+    :type query: dict
+    :param query: The parsed query string parameters.
+
+    :type headers: dict
+    :param headers: Request headers, keyed by lower-cased name.
+
+    :type body: bytes
+    :param body: The (de-chunked) request payload.
+
+    :type base_url: str
+    :param base_url: The scheme and host the request was sent to.
+
+    :type dispatch: callable
+    :param dispatch: Callable taking a :class:`Request` and returning a
+                     :class:`Response`; lets backends re-enter the server
+                     (e.g. to serve the parts of a batch request).
+    """
+
+    def __init__(self, method, path, query, headers, body,
+                 base_url='', dispatch=None):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.base_url = base_url
+        self.dispatch = dispatch
+
+    def json(self):
+        """Decode the payload as JSON.
+
+        :rtype: dict
+        :returns: The decoded payload, or an empty dict if there is none.
+        """
+        if not self.body:
+            return {}
+        return json.loads(self.body.decode('utf-8'))
+
+
+class Response(object):
+    """A response returned by a backend route.
+
+    :type status: int
+    :param status: The HTTP status code.
+
+    :type body: bytes
+    :param body: The response payload.
+
+    :type content_type: str
+    :param content_type: (Optional) The ``Content-Type`` of the payload.
+
+    :type headers: dict
+    :param headers: (Optional) Extra response headers.
+    """
+
+    def __init__(self, status=200, body=b'', content_type=None,
+                 headers=None):
+        self.status = status
+        self.body = body
+        self.headers = dict(headers or {})
+        if content_type is not None:
+            self.headers['Content-Type'] = content_type
+
+    @classmethod
+    def from_json(cls, payload, status=200, headers=None):
+        """Build a JSON response.
+
+        :type payload: dict
+        :param payload: The object to serialize.
+
+        :type status: int
+        :param status: The HTTP status code.
+
+        :type headers: dict
+        :param headers: (Optional) Extra response headers.
+
+        :rtype: :class:`Response`
+        :returns: The response wrapping the serialized payload.
+        """
+        body = json.dumps(payload).encode('utf-8')
+        return cls(status, body, 'application/json', headers)
+
+    @classmethod
+    def error(cls, status, message):
+        """Build a JSON error response in the Google API error format.
+
+        :type status: int
+        :param status: The HTTP status code.
+
+        :type message: str
+        :param message: Human readable description of the error.
+
+        :rtype: :class:`Response`
+        :returns: The error response.
+        """
+        payload = {'error': {'code': status, 'message': message,
+                             'errors': [{'message': message}]}}
+        return cls.from_json(payload, status=status)
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    """HTTP server which handles each connection in its own thread."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Adapts :mod:`BaseHTTPServer` requests to :class:`LocalServer`."""
+
+    protocol_version = 'HTTP/1.1'
+    # Small responses must not wait on the peer's delayed ACK.
+    disable_nagle_algorithm = True
+    local_server = None  # Set on a per-server subclass.
+
+    def _read_body(self):
+        """Read the request payload, honoring chunked transfer encoding."""
+        encoding = self.headers.get('Transfer-Encoding', '')
+        if encoding.lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length)
+
+    def _handle(self):
+        parts = urlsplit(self.path)
+        headers = dict((key.lower(), value)
+                       for key, value in self.headers.items())
+        request = Request(
+            self.command, parts.path,
+            dict(parse_qsl(parts.query, keep_blank_values=True)),
+            headers, self._read_body(),
+            base_url='http://%s' % (headers.get('host'),),
+            dispatch=self.local_server.dispatch)
+        response = self.local_server.dispatch(request)
+
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(response.body)
+
+    do_DELETE = do_GET = do_HEAD = do_PATCH = do_POST = do_PUT = _handle
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Silence the per-request logging to stderr."""
+
+
+class LocalServer(object):
+    """Threaded HTTP server dispatching to in-memory service backends.
+
+    Each backend exposes ``routes()``, returning a sequence of
+    ``(method, pattern, handler)`` triples.  ``pattern`` is a regular
+    expression matched against the request path; its named groups are
+    passed to ``handler`` as keyword arguments, after the
+    :class:`Request`.  The handler returns a :class:`Response`.
+
+    .. code:: python
+
+        >>> from gcloud import storage
+        >>> from gcloud.testing import LocalServer, StorageBackend
+        >>> with LocalServer([StorageBackend()]) as server:
+        ...     client = storage.Client(project='PROJECT',
+        ...                             http=server.http())
+        ...     bucket = client.create_bucket('my-bucket')
+
+    :type backends: sequence
+    :param backends: (Optional) Backends to serve.
+
+    :type host: str
+    :param host: (Optional) Interface to bind.
+
+    :type port: int
+    :param port: (Optional) Port to bind; the default of ``0`` picks a
+                 free port.
+    """
+
+    def __init__(self, backends=(), host=LOCALHOST, port=0):
+        self._routes = []
+        self._host = host
+        self._port = port
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.request_count = 0
+        for backend in backends:
+            self.add_backend(backend)
+
+    def add_backend(self, backend):
+        """Register the routes of a service backend.
+
+        :type backend: object
+        :param backend: An object with a ``routes()`` method.
+        """
+        for method, pattern, handler in backend.routes():
+            self._routes.append((method, re.compile(pattern), handler))
+
+    @property
+    def host(self):
+        """The interface the server is bound to.
+
+        :rtype: str
+        :returns: The host.
+        """
+        return self._host
+
+    @property
+    def port(self):
+        """The port the server is bound to.
+
+        :rtype: int
+        :returns: The port, only known once the server is started.
+        """
+        if self._server is not None:
+            return self._server.server_address[1]
+        return self._port
+
+    @property
+    def base_url(self):
+        """The URL prefix of the running server.
+
+        :rtype: str
+        :returns: URL of the form ``http://host:port``.
+        """
+        return 'http://%s:%d' % (self.host, self.port)
+
+    def start(self):
+        """Bind the socket and serve requests in a daemon thread."""
+        if self._server is not None:
+            raise ValueError('Server already started.')
+        handler = type('_BoundRequestHandler', (_RequestHandler,),
+                       {'local_server': self})
+        self._server = _ThreadingHTTPServer((self._host, self._port),
+                                            handler)
+        # Poll often, so that ``stop`` does not wait long for the thread.
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def http(self, **kwargs):
+        """Create an HTTP object which sends requests to this server.
+
+        :type kwargs: dict
+        :param kwargs: Passed through to :class:`LocalHttp`.
+
+        :rtype: :class:`LocalHttp`
+        :returns: The HTTP object, suitable as the ``http`` argument of
+                  any client.
+        """
+        return LocalHttp(self.base_url, **kwargs)
+
+    def dispatch(self, request):
+        """Route a request to the matching backend handler.
+
+        :type request: :class:`Request`
+        :param request: The request to serve.
+
+        :rtype: :class:`Response`
+        :returns: The handler's response, or a 404 / 405 error response.
+        """
+        with self._lock:
+            self.request_count += 1
+        path_matched = False
+        for method, pattern, handler in self._routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            path_matched = True
+            if method == request.method:
+                return handler(request, **match.groupdict())
+        if path_matched:
+            return Response.error(405, 'Method not allowed: %s %s' % (
+                request.method, request.path))
+        return Response.error(404, 'Not found: %s' % (request.path,))
+
+
+class LocalHttp(httplib2.Http):
+    """HTTP object which redirects Google API requests to a local server.
+
+    Any ``https://<service>.googleapis.com`` prefix is replaced by
+    ``base_url``; other URLs (e.g. links returned by the local server
+    itself) are sent unchanged.
+
+    :type base_url: str
+    :param base_url: URL prefix of the local server.
+
+    Unlike :class:`httplib2.Http`, an instance may be shared by threads:
+    each thread gets its own pool of connections.
+
+    :type kwargs: dict
+    :param kwargs: Passed through to :class:`httplib2.Http`.
+    """
+
+    thread_safe = True
+    """Connection pools are per thread, see :attr:`connections`."""
+
+    def __init__(self, base_url, **kwargs):
+        self._local = threading.local()
+        super(LocalHttp, self).__init__(**kwargs)
+        self.base_url = base_url
+        # Resumable uploads signal "incomplete" with a 308 that has no
+        # ``Location``; it must be returned to the caller, not followed.
+        redirect_codes = getattr(self, 'redirect_codes', None)
+        if redirect_codes is not None:
+            self.redirect_codes = frozenset(redirect_codes) - set([308])
+
+    @property
+    def connections(self):
+        """The calling thread's pool of connections.
+
+        :rtype: dict
+        :returns: Connections keyed as by :class:`httplib2.Http`.
+        """
+        pool = getattr(self._local, 'connections', None)
+        if pool is None:
+            pool = self._local.connections = {}
+        return pool
+
+    @connections.setter
+    def connections(self, value):
+        """Replace the calling thread's pool of connections."""
+        self._local.connections = value
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                *args, **kwargs):
+        """Send the request to the local server.
+
+        Arguments match :meth:`httplib2.Http.request`.
+
+        :rtype: tuple
+        :returns: Pair of the response headers and content.
+        """
+        uri = _GOOGLE_API_PREFIX.sub(self.base_url, uri, count=1)
+        if isinstance(body, six.text_type):
+            body = body.encode('utf-8')
+        return super(LocalHttp, self).request(
+            uri, method, body, headers, *args, **kwargs)
@@ -0,0 +1,998 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-memory backends for the HTTP APIs served by :class:`.LocalServer`.
+
+Each backend keeps its state in plain Python containers and implements
+just enough of its API for the library's clients to run end-to-end:
+they are meant for functional tests and benchmarks, not as faithful
+emulators.
+"""
+
+import base64
+import email.parser
+import hashlib
+import itertools
+import json
+import threading
+
+from google.rpc import status_pb2
+import six
+from six.moves import http_client
+from six.moves.urllib.parse import parse_qsl
+from six.moves.urllib.parse import quote
+from six.moves.urllib.parse import unquote
+from six.moves.urllib.parse import urlsplit
+
+from gcloud.datastore._generated import datastore_pb2 as _datastore_pb2
+from gcloud.datastore._generated import entity_pb2 as _entity_pb2
+from gcloud.datastore._generated import query_pb2 as _query_pb2
+from gcloud.testing.http_server import Request
+from gcloud.testing.http_server import Response
+
+
+def _page(items, query, max_key='maxResults', default_size=None):
+    """Slice a list according to ``pageToken`` / page size parameters.
+
+    :rtype: tuple
+    :returns: Pair of the items in the page and the next page token
+              (or :data:`None`).
+    """
+    start = int(query.get('pageToken') or 0)
+    size = int(query.get(max_key) or default_size or len(items) or 1)
+    end = start + size
+    next_token = str(end) if end < len(items) else None
+    return items[start:end], next_token
+
+
+class StorageBackend(object):
+    """In-memory Cloud Storage JSON API.
+
+    Supports buckets, object metadata, simple / multipart / resumable
+    uploads, ranged media downloads and ``multipart/mixed`` batches.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self._uploads = {}
+        self._upload_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def routes(self):
+        """The routes served by this backend.
+
+        :rtype: list
+        :returns: ``(method, pattern, handler)`` triples.
+        """
+        bucket = r'^/storage/v1/b/(?P<bucket>[^/]+)'
+        obj = bucket + r'/o/(?P<name>[^/]+)$'
+        upload = r'^/upload/storage/v1/b/(?P<bucket>[^/]+)/o$'
+        return [
+            ('POST', r'^/storage/v1/b$', self.insert_bucket),
+            ('GET', bucket + '$', self.get_bucket),
+            ('DELETE', bucket + '$', self.delete_bucket),
+            ('GET', bucket + '/o$', self.list_objects),
+            ('GET', obj, self.get_object),
+            ('PATCH', obj, self.patch_object),
+            ('DELETE', obj, self.delete_object),
+            ('GET', r'^/download/storage/v1/b/(?P<bucket>[^/]+)'
+                    r'/o/(?P<name>[^/]+)$', self.download_object),
+            ('POST', upload, self.start_upload),
+            ('PUT', upload, self.resumable_upload),
+            ('POST', r'^/batch$', self.batch),
+        ]
+
+    def _object_resource(self, request, bucket, name):
+        """Resource for a stored object, with links to this server."""
+        resource = dict(self.buckets[bucket]['objects'][name][0])
+        resource['mediaLink'] = '%s/download/storage/v1/b/%s/o/%s' % (
+            request.base_url, bucket, quote(name, safe=''))
+        return resource
+
+    def _store(self, bucket, name, data, metadata=None):
+        """Save an object's data and compute its metadata."""
+        objects = self.buckets[bucket]['objects']
+        resource = dict(metadata or {})
+        generation = 1
+        if name in objects:
+            generation += objects[name][0]['generation']
+        resource.update({
+            'kind': 'storage#object',
+            'id': '%s/%s' % (bucket, name),
+            'bucket': bucket,
+            'name': name,
+            'size': str(len(data)),
+            'generation': generation,
+            'md5Hash': base64.b64encode(
+                hashlib.md5(data).digest()).decode('ascii'),
+        })
+        resource.setdefault('contentType', 'application/octet-stream')
+        objects[name] = (resource, data)
+
+    def insert_bucket(self, request):
+        """Create a bucket."""
+        resource = request.json()
+        name = resource['name']
+        with self._lock:
+            if name in self.buckets:
+                return Response.error(http_client.CONFLICT,
+                                      'Bucket exists: %s' % (name,))
+            resource.update({'kind': 'storage#bucket', 'id': name})
+            self.buckets[name] = {'resource': resource, 'objects': {}}
+        return Response.from_json(resource)
+
+    def get_bucket(self, request, bucket):
+        """Fetch bucket metadata."""
+        if bucket not in self.buckets:
+            return Response.error(http_client.NOT_FOUND, bucket)
+        return Response.from_json(self.buckets[bucket]['resource'])
+
+    def delete_bucket(self, request, bucket):
+        """Delete an empty bucket."""
+        with self._lock:
+            if bucket not in self.buckets:
+                return Response.error(http_client.NOT_FOUND, bucket)
+            if self.buckets[bucket]['objects']:
+                return Response.error(http_client.CONFLICT,
+                                      'Bucket not empty: %s' % (bucket,))
+            del self.buckets[bucket]
+        return Response(http_client.NO_CONTENT)
+
+    def list_objects(self, request, bucket):
+        """List the objects in a bucket, in name order."""
+        if bucket not in self.buckets:
+            return Response.error(http_client.NOT_FOUND, bucket)
+        prefix = request.query.get('prefix', '')
+        names = sorted(name for name in self.buckets[bucket]['objects']
+                       if name.startswith(prefix))
+        names, token = _page(names, request.query)
+        payload = {
+            'kind': 'storage#objects',
+            'items': [self._object_resource(request, bucket, name)
+                      for name in names],
+        }
+        if token is not None:
+            payload['nextPageToken'] = token
+        return Response.from_json(payload)
+
+    def _lookup(self, bucket, name):
+        """Find a stored object, or return an error response."""
+        if bucket not in self.buckets:
+            return None, Response.error(http_client.NOT_FOUND, bucket)
+        name = unquote(name)
+        if name not in self.buckets[bucket]['objects']:
+            return None, Response.error(http_client.NOT_FOUND, name)
+        return name, None
+
+    def get_object(self, request, bucket, name):
+        """Fetch object metadata, or its data when ``alt=media``."""
+        name, error = self._lookup(bucket, name)
+        if error is not None:
+            return error
+        if request.query.get('alt') == 'media':
+            return self.download_object(request, bucket,
+                                        quote(name, safe=''))
+        return Response.from_json(
+            self._object_resource(request, bucket, name))
+
+    def patch_object(self, request, bucket, name):
+        """Update object metadata."""
+        name, error = self._lookup(bucket, name)
+        if error is not None:
+            return error
+        with self._lock:
+            resource, data = self.buckets[bucket]['objects'][name]
+            resource = dict(resource)
+            resource.update(request.json())
+            self.buckets[bucket]['objects'][name] = (resource, data)
+        return Response.from_json(
+            self._object_resource(request, bucket, name))
+
+    def delete_object(self, request, bucket, name):
+        """Delete an object."""
+        name, error = self._lookup(bucket, name)
+        if error is not None:
+            return error
+        with self._lock:
+            self.buckets[bucket]['objects'].pop(name, None)
+        return Response(http_client.NO_CONTENT)
+
+    def download_object(self, request, bucket, name):
+        """Serve object data, honoring a ``Range`` header."""
+        name, error = self._lookup(bucket, name)
+        if error is not None:
+            return error
+        resource, data = self.buckets[bucket]['objects'][name]
+        content_type = resource['contentType']
+        range_header = request.headers.get('range')
+        if not range_header or not data:
+            return Response(http_client.OK, data, content_type)
+
+        start, _, end = range_header.split('=', 1)[1].partition('-')
+        if not start:
+            start, end = max(len(data) - int(end), 0), len(data) - 1
+        else:
+            start = int(start)
+            end = min(int(end), len(data) - 1) if end else len(data) - 1
+        headers = {'Content-Range': 'bytes %d-%d/%d' % (
+            start, end, len(data))}
+        return Response(http_client.PARTIAL_CONTENT, data[start:end + 1],
+                        content_type, headers)
+
+    def start_upload(self, request, bucket):
+        """Handle a media or multipart upload, or start a resumable one."""
+        if bucket not in self.buckets:
+            return Response.error(http_client.NOT_FOUND, bucket)
+        upload_type = request.query.get('uploadType')
+        metadata = {'contentType': request.headers.get('content-type')}
+
+        if upload_type == 'resumable':
+            metadata['contentType'] = request.headers.get(
+                'x-upload-content-type', 'application/octet-stream')
+            metadata.update(request.json())
+            upload_id = str(next(self._upload_ids))
+            with self._lock:
+                self._uploads[upload_id] = (
+                    request.query.get('name') or metadata.get('name'),
+                    metadata, [])
+            location = '%s/upload/storage/v1/b/%s/o?%s' % (
+                request.base_url, bucket,
+                'uploadType=resumable&upload_id=' + upload_id)
+            return Response(http_client.OK, headers={'Location': location})
+
+        data = request.body
+        if upload_type == 'multipart':
+            parser = email.parser.Parser()
+            message = parser.parsestr(
+                'Content-Type: %s\n\n%s' % (
+                    request.headers['content-type'],
+                    request.body.decode('latin-1')))
+            meta_part, data_part = message.get_payload()
+            metadata = json.loads(meta_part.get_payload())
+            metadata.setdefault('contentType',
+                                data_part.get_content_type())
+            data = data_part.get_payload().encode('latin-1')
+
+        name = request.query.get('name') or metadata.get('name')
+        with self._lock:
+            self._store(bucket, name, data, metadata)
+        return Response.from_json(
+            self._object_resource(request, bucket, name))
+
+    def resumable_upload(self, request, bucket):
+        """Receive one chunk of a resumable upload."""
+        upload_id = request.query.get('upload_id')
+        if upload_id not in self._uploads:
+            return Response.error(http_client.NOT_FOUND, upload_id)
+        name, metadata, chunks = self._uploads[upload_id]
+        received = sum(len(chunk) for chunk in chunks)
+
+        content_range = request.headers.get('content-range', 'bytes */*')
+        span, _, total = content_range.split(' ', 1)[1].partition('/')
+        if span != '*':
+            start = int(span.split('-')[0])
+            if start != received:
+                return Response.error(http_client.BAD_REQUEST,
+                                      'Unexpected chunk offset.')
+            chunks.append(request.body)
+            received += len(request.body)
+
+        if total != '*' and received >= int(total):
+            with self._lock:
+                self._uploads.pop(upload_id, None)
+                self._store(bucket, name, b''.join(chunks), metadata)
+            return Response.from_json(
+                self._object_resource(request, bucket, name))
+        headers = {}
+        if received:
+            headers['Range'] = 'bytes=0-%d' % (received - 1,)
+        return Response(308, headers=headers)
+
+    def batch(self, request):
+        """Serve each part of a ``multipart/mixed`` batch request."""
+        parser = email.parser.Parser()
+        message = parser.parsestr('Content-Type: %s\n\n%s' % (
+            request.headers['content-type'],
+            request.body.decode('utf-8')))
+        boundary = '==batch-response=='
+        lines = []
+        for index, part in enumerate(message.get_payload()):
+            request_line, rest = part.get_payload().split('\n', 1)
+            method, uri, _ = request_line.strip().split(' ', 2)
+            sub_message = parser.parsestr(rest)
+            uri = urlsplit(uri)
+            sub_request = Request(
+                method, uri.path,
+                dict(parse_qsl(uri.query)),
+                dict((key.lower(), value)
+                     for key, value in sub_message.items()),
+                six.b(sub_message.get_payload() or ''),
+                base_url=request.base_url, dispatch=request.dispatch)
+            sub_response = request.dispatch(sub_request)
+            lines.extend([
+                '--' + boundary,
+                'Content-Type: application/http',
+                'Content-ID: <response-%d>' % (index,),
+                '',
+                'HTTP/1.1 %d %s' % (
+                    sub_response.status,
+                    http_client.responses.get(sub_response.status, '')),
+            ])
+            lines.extend('%s: %s' % item
+                         for item in sorted(sub_response.headers.items()))
+            lines.extend(['', sub_response.body.decode('utf-8')])
+        lines.append('--%s--' % (boundary,))
+        return Response(http_client.OK, '\r\n'.join(lines).encode('utf-8'),
+                        'multipart/mixed; boundary="%s"' % (boundary,))
+
+
+class PubsubBackend(object):
+    """In-memory Cloud Pub/Sub JSON API.
+
+    Supports topics, pull subscriptions, publishing, pulling and
+    acknowledging messages.  Push configuration is accepted but unused.
+    """
+
+    def __init__(self):
+        self.topics = {}
+        self.subscriptions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def routes(self):
+        """The routes served by this backend.
+
+        :rtype: list
+        :returns: ``(method, pattern, handler)`` triples.
+        """
+        topic = r'^/v1/(?P<topic>projects/[^/]+/topics/[^/:]+)'
+        subscription = (r'^/v1/(?P<subscription>projects/[^/]+'
+                        r'/subscriptions/[^/:]+)')
+        return [
+            ('PUT', topic + '$', self.create_topic),
+            ('GET', topic + '$', self.get_topic),
+            ('DELETE', topic + '$', self.delete_topic),
+            ('POST', topic + ':publish$', self.publish),
+            ('PUT', subscription + '$', self.create_subscription),
+            ('GET', subscription + '$', self.get_subscription),
+            ('DELETE', subscription + '$', self.delete_subscription),
+            ('POST', subscription + ':pull$', self.pull),
+            ('POST', subscription + ':acknowledge$', self.acknowledge),
+            ('POST', subscription + ':modifyAckDeadline$',
+             self.modify_ack_deadline),
+            ('POST', subscription + ':modifyPushConfig$',
+             self.modify_push_config),
+        ]
+
+    def create_topic(self, request, topic):
+        """Create a topic."""
+        with self._lock:
+            if topic in self.topics:
+                return Response.error(http_client.CONFLICT, topic)
+            self.topics[topic] = {'name': topic}
+        return Response.from_json(self.topics[topic])
+
+    def get_topic(self, request, topic):
+        """Fetch a topic."""
+        if topic not in self.topics:
+            return Response.error(http_client.NOT_FOUND, topic)
+        return Response.from_json(self.topics[topic])
+
+    def delete_topic(self, request, topic):
+        """Delete a topic."""
+        with self._lock:
+            if self.topics.pop(topic, None) is None:
+                return Response.error(http_client.NOT_FOUND, topic)
+        return Response.from_json({})
+
+    def publish(self, request, topic):
+        """Publish messages to every subscription of a topic."""
+        if topic not in self.topics:
+            return Response.error(http_client.NOT_FOUND, topic)
+        message_ids = []
+        with self._lock:
+            for message in request.json().get('messages', ()):
+                message = dict(message, messageId=str(next(self._ids)))
+                message_ids.append(message['messageId'])
+                for subscription in self.subscriptions.values():
+                    if subscription['resource']['topic'] == topic:
+                        subscription['pending'].append(message)
+        return Response.from_json({'messageIds': message_ids})
+
+    def create_subscription(self, request, subscription):
+        """Create a subscription."""
+        resource = request.json()
+        resource['name'] = subscription
+        resource.setdefault('ackDeadlineSeconds', 10)
+        with self._lock:
+            if subscription in self.subscriptions:
+                return Response.error(http_client.CONFLICT, subscription)
+            if resource.get('topic') not in self.topics:
+                return Response.error(http_client.NOT_FOUND,
+                                      resource.get('topic'))
+            self.subscriptions[subscription] = {
+                'resource': resource, 'pending': [], 'outstanding': {}}
+        return Response.from_json(resource)
+
+    def get_subscription(self, request, subscription):
+        """Fetch a subscription."""
+        if subscription not in self.subscriptions:
+            return Response.error(http_client.NOT_FOUND, subscription)
+        return Response.from_json(
+            self.subscriptions[subscription]['resource'])
+
+    def delete_subscription(self, request, subscription):
+        """Delete a subscription."""
+        with self._lock:
+            if self.subscriptions.pop(subscription, None) is None:
+                return Response.error(http_client.NOT_FOUND, subscription)
+        return Response.from_json({})
+
+    def pull(self, request, subscription):
+        """Deliver pending messages, holding them until acknowledged."""
+        if subscription not in self.subscriptions:
+            return Response.error(http_client.NOT_FOUND, subscription)
+        max_messages = int(request.json().get('maxMessages', 1))
+        received = []
+        with self._lock:
+            state = self.subscriptions[subscription]
+            messages = state['pending'][:max_messages]
+            del state['pending'][:max_messages]
+            for message in messages:
+                ack_id = str(next(self._ids))
+                state['outstanding'][ack_id] = message
+                received.append({'ackId': ack_id, 'message': message})
+        return Response.from_json({'receivedMessages': received})
+
+    def acknowledge(self, request, subscription):
+        """Drop acknowledged messages."""
+        if subscription not in self.subscriptions:
+            return Response.error(http_client.NOT_FOUND, subscription)
+        with self._lock:
+            outstanding = self.subscriptions[subscription]['outstanding']
+            for ack_id in request.json().get('ackIds', ()):
+                outstanding.pop(ack_id, None)
+        return Response.from_json({})
+
+    def modify_ack_deadline(self, request, subscription):
+        """Redeliver messages whose ack deadline is set to zero."""
+        if subscription not in self.subscriptions:
+            return Response.error(http_client.NOT_FOUND, subscription)
+        payload = request.json()
+        if int(payload.get('ackDeadlineSeconds', 0)) == 0:
+            with self._lock:
+                state = self.subscriptions[subscription]
+                for ack_id in payload.get('ackIds', ()):
+                    message = state['outstanding'].pop(ack_id, None)
+                    if message is not None:
+                        state['pending'].append(message)
+        return Response.from_json({})
+
+    def modify_push_config(self, request, subscription):
+        """Record a subscription's push configuration."""
+        if subscription not in self.subscriptions:
+            return Response.error(http_client.NOT_FOUND, subscription)
+        with self._lock:
+            resource = self.subscriptions[subscription]['resource']
+            resource['pushConfig'] = request.json().get('pushConfig', {})
+        return Response.from_json({})
+
+
+class LoggingBackend(object):
+    """In-memory Stackdriver Logging JSON API (log entries only).
+
+    Entry filters are not evaluated; listing returns the entries of the
+    requested projects in the order they were written.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def routes(self):
+        """The routes served by this backend.
+
+        :rtype: list
+        :returns: ``(method, pattern, handler)`` triples.
+        """
+        return [
+            ('POST', r'^/v2beta1/entries:write$', self.write_entries),
+            ('POST', r'^/v2beta1/entries:list$', self.list_entries),
+            ('DELETE', r'^/v2beta1/projects/(?P<project>[^/]+)'
+                       r'/logs/(?P<log>[^/]+)$', self.delete_log),
+        ]
+
+    def write_entries(self, request):
+        """Store entries, applying the request-level defaults."""
+        payload = request.json()
+        defaults = dict((key, payload[key])
+                        for key in ('logName', 'resource', 'labels')
+                        if key in payload)
+        with self._lock:
+            for entry in payload.get('entries', ()):
+                full_entry = dict(defaults)
+                full_entry.update(entry)
+                self.entries.append(full_entry)
+        return Response.from_json({})
+
+    def list_entries(self, request):
+        """List the stored entries of the requested projects."""
+        payload = request.json()
+        prefixes = tuple('projects/%s/' % (project,)
+                         for project in payload.get('projectIds', ()))
+        entries = [entry for entry in self.entries
+                   if entry.get('logName', '').startswith(prefixes)]
+        entries, token = _page(entries, payload, max_key='pageSize')
+        result = {'entries': entries}
+        if token is not None:
+            result['nextPageToken'] = token
+        return Response.from_json(result)
+
+    def delete_log(self, request, project, log):
+        """Delete every entry of a log."""
+        log_name = 'projects/%s/logs/%s' % (project, log)
+        with self._lock:
+            self.entries = [entry for entry in self.entries
+                            if entry.get('logName') != log_name]
+        return Response.from_json({})
+
+
+def _bigquery_cell(value, field):
+    """Render a row value in the ``tabledata.list`` wire format."""
+    if value is None:
+        return None
+    if field.get('mode') == 'REPEATED':
+        item_field = dict(field, mode='NULLABLE')
+        return [_bigquery_cell(item, item_field) for item in value]
+    if field['type'] == 'RECORD':
+        return {'f': [{'v': _bigquery_cell(value.get(sub['name']), sub)}
+                      for sub in field['fields']]}
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return repr(value)
+    return six.text_type(value)
+
+
+class BigQueryBackend(object):
+    """In-memory BigQuery JSON API (datasets, tables and table data).
+
+    Jobs and queries are not supported.
+    """
+
+    def __init__(self):
+        self.datasets = {}
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def routes(self):
+        """The routes served by this backend.
+
+        :rtype: list
+        :returns: ``(method, pattern, handler)`` triples.
+        """
+        datasets = r'^/bigquery/v2/projects/(?P<project>[^/]+)/datasets'
+        dataset = datasets + r'/(?P<dataset>[^/]+)'
+        table = dataset + r'/tables/(?P<table>[^/]+)'
+        return [
+            ('POST', datasets + '$', self.insert_dataset),
+            ('GET', dataset + '$', self.get_dataset),
+            ('POST', dataset + '/tables$', self.insert_table),
+            ('GET', table + '$', self.get_table),
+            ('DELETE', table + '$', self.delete_table),
+            ('POST', table + '/insertAll$', self.insert_all),
+            ('GET', table + '/data$', self.list_data),
+        ]
+
+    def create_table(self, project, dataset, table, schema):
+        """Seed a table directly, bypassing the API.
+
+        :type project: str
+        :param project: The project owning the dataset.
+
+        :type dataset: str
+        :param dataset: The dataset ID.
+
+        :type table: str
+        :param table: The table ID.
+
+        :type schema: list
+        :param schema: Field resources, e.g.
+                       ``[{'name': 'age', 'type': 'INTEGER'}]``.
+        """
+        resource = {
+            'tableReference': {'projectId': project, 'datasetId': dataset,
+                               'tableId': table},
+            'schema': {'fields': schema},
+        }
+        with self._lock:
+            self.datasets.setdefault((project, dataset), {
+                'datasetReference': {'projectId': project,
+                                     'datasetId': dataset}})
+            self.tables[(project, dataset, table)] = {
+                'resource': resource, 'rows': []}
+
+    def insert_dataset(self, request, project):
+        """Create a dataset."""
+        resource = request.json()
+        key = (project, resource['datasetReference']['datasetId'])
+        with self._lock:
+            if key in self.datasets:
+                return Response.error(http_client.CONFLICT, key[1])
+            resource['id'] = '%s:%s' % key
+            self.datasets[key] = resource
+        return Response.from_json(resource)
+
+    def get_dataset(self, request, project, dataset):
+        """Fetch a dataset."""
+        if (project, dataset) not in self.datasets:
+            return Response.error(http_client.NOT_FOUND, dataset)
+        return Response.from_json(self.datasets[(project, dataset)])
+
+    def insert_table(self, request, project, dataset):
+        """Create a table."""
+        resource = request.json()
+        table = resource['tableReference']['tableId']
+        if (project, dataset) not in self.datasets:
+            return Response.error(http_client.NOT_FOUND, dataset)
+        if (project, dataset, table) in self.tables:
+            return Response.error(http_client.CONFLICT, table)
+        self.create_table(project, dataset, table,
+                          resource.get('schema', {}).get('fields', []))
+        return self.get_table(request, project, dataset, table)
+
+    def get_table(self, request, project, dataset, table):
+        """Fetch a table, including its current row count."""
+        state = self.tables.get((project, dataset, table))
+        if state is None:
+            return Response.error(http_client.NOT_FOUND, table)
+        resource = dict(state['resource'],
+                        id='%s:%s.%s' % (project, dataset, table),
+                        numRows=str(len(state['rows'])))
+        return Response.from_json(resource)
+
+    def delete_table(self, request, project, dataset, table):
+        """Delete a table."""
+        with self._lock:
+            if self.tables.pop((project, dataset, table), None) is None:
+                return Response.error(http_client.NOT_FOUND, table)
+        return Response(http_client.NO_CONTENT)
+
+    def insert_all(self, request, project, dataset, table):
+        """Append streamed rows, rejecting columns not in the schema."""
+        state = self.tables.get((project, dataset, table))
+        if state is None:
+            return Response.error(http_client.NOT_FOUND, table)
+        fields = set(field['name'] for field in
+                     state['resource']['schema']['fields'])
+        payload = request.json()
+        errors = []
+        accepted = []
+        for index, row in enumerate(payload.get('rows', ())):
+            unknown = set(row['json']) - fields
+            if unknown and not payload.get('ignoreUnknownValues'):
+                errors.append({'index': index, 'errors': [{
+                    'reason': 'invalid',
+                    'message': 'no such field: %s' % (
+                        ', '.join(sorted(unknown)),)}]})
+            else:
+                accepted.append(row['json'])
+        if not errors or payload.get('skipInvalidRows'):
+            with self._lock:
+                state['rows'].extend(accepted)
+        result = {'kind': 'bigquery#tableDataInsertAllResponse'}
+        if errors:
+            result['insertErrors'] = errors
+        return Response.from_json(result)
+
+    def list_data(self, request, project, dataset, table):
+        """Page through a table's rows."""
+        state = self.tables.get((project, dataset, table))
+        if state is None:
+            return Response.error(http_client.NOT_FOUND, table)
+        schema = state['resource']['schema']['fields']
+        rows, token = _page(state['rows'], request.query)
+        result = {
+            'totalRows': str(len(state['rows'])),
+            'rows': [{'f': [{'v': _bigquery_cell(row.get(field['name']),
+                                                 field)}
+                            for field in schema]}
+                     for row in rows],
+        }
+        if token is not None:
+            result['pageToken'] = token
+        return Response.from_json(result)
+
+
+def _path_key(key_pb):
+    """Hashable, sortable identity of a datastore key.
+
+    Numeric IDs sort before names, as in Cloud Datastore.
+    """
+    path = []
+    for element in key_pb.path:
+        if element.WhichOneof('id_type') == 'name':
+            path.append((element.kind, 1, element.name))
+        else:
+            path.append((element.kind, 0, element.id))
+    return tuple(path)
+
+
+def _entity_path_key(entity_pb):
+    """Sort key ordering entities by key."""
+    return _path_key(entity_pb.key)
+
+
+def _scatter_key(entity_pb):
+    """Sort key standing for the pseudo-random ``__scatter__`` property."""
+    return hashlib.md5(entity_pb.key.SerializeToString()).digest()
+
+
+def _value_key(value_pb):
+    """Sortable representation of a datastore value."""
+    value_type = value_pb.WhichOneof('value_type')
+    if value_type == 'key_value':
+        return (value_type, _path_key(value_pb.key_value))
+    if value_type == 'timestamp_value':
+        return (value_type, (value_pb.timestamp_value.seconds,
+                             value_pb.timestamp_value.nanos))
+    if value_type in ('integer_value', 'double_value'):
+        return ('number', getattr(value_pb, value_type))
+    if value_type in ('entity_value', 'array_value', 'geo_point_value'):
+        return (value_type, value_pb.SerializeToString())
+    return (value_type, getattr(value_pb, value_type, None))
+
+
+def _matches(entity_pb, filter_pb):
+    """Check whether an entity satisfies a query filter."""
+    filter_type = filter_pb.WhichOneof('filter_type')
+    if filter_type is None:
+        return True
+    if filter_type == 'composite_filter':
+        return all(_matches(entity_pb, sub_filter)
+                   for sub_filter in filter_pb.composite_filter.filters)
+
+    property_filter = filter_pb.property_filter
+    name = property_filter.property.name
+    operator = property_filter.op
+    if operator == _query_pb2.PropertyFilter.HAS_ANCESTOR:
+        ancestor = _path_key(property_filter.value.key_value)
+        return _path_key(entity_pb.key)[:len(ancestor)] == ancestor
+    if name == '__key__':
+        actual = _value_key(_entity_pb2.Value(key_value=entity_pb.key))
+    elif name in entity_pb.properties:
+        actual = _value_key(entity_pb.properties[name])
+    else:
+        return False
+    expected = _value_key(property_filter.value)
+    if actual[0] != expected[0]:
+        return False
+    return {
+        _query_pb2.PropertyFilter.LESS_THAN: actual < expected,
+        _query_pb2.PropertyFilter.LESS_THAN_OR_EQUAL: actual <= expected,
+        _query_pb2.PropertyFilter.GREATER_THAN: actual > expected,
+        _query_pb2.PropertyFilter.GREATER_THAN_OR_EQUAL: actual >= expected,
+        _query_pb2.PropertyFilter.EQUAL: actual == expected,
+    }[operator]
+
+
+class DatastoreBackend(object):
+    """In-memory Cloud Datastore protobuf-over-HTTP API.
+
+    Serves both the production URL layout and the emulator layout used
+    when ``DATASTORE_HOST`` is set.  Transactions are accepted but not
+    isolated, and ``distinct_on`` is ignored.  Ordering on ``__scatter__``
+    shuffles every entity, rather than sampling a fraction of them.
+
+    :type batch_size: int
+    :param batch_size: Maximum number of results returned per
+                       ``runQuery`` call.
+    """
+
+    def __init__(self, batch_size=300):
+        self.batch_size = batch_size
+        self.entities = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def routes(self):
+        """The routes served by this backend.
+
+        :rtype: list
+        :returns: ``(method, pattern, handler)`` triples.
+        """
+        return [
+            ('POST', r'^(?:/datastore)?/v1beta3/projects/'
+                     r'(?P<project>[^/:]+):(?P<method>\w+)$', self.rpc),
+        ]
+
+    def rpc(self, request, project, method):
+        """Decode the request protobuf and dispatch to a method."""
+        handler, request_class = {
+            'lookup': (self.lookup, _datastore_pb2.LookupRequest),
+            'runQuery': (self.run_query, _datastore_pb2.RunQueryRequest),
+            'beginTransaction': (self.begin_transaction,
+                                 _datastore_pb2.BeginTransactionRequest),
+            'commit': (self.commit, _datastore_pb2.CommitRequest),
+            'rollback': (self.rollback, _datastore_pb2.RollbackRequest),
+            'allocateIds': (self.allocate_ids,
+                            _datastore_pb2.AllocateIdsRequest),
+        }.get(method, (None, None))
+        if handler is None:
+            return self._error(http_client.NOT_FOUND, 5,
+                               'Unknown method: %s' % (method,))
+        response_pb = handler(project, request_class.FromString(request.body))
+        if isinstance(response_pb, Response):
+            return response_pb
+        return Response(http_client.OK, response_pb.SerializeToString(),
+                        'application/x-protobuf')
+
+    @staticmethod
+    def _error(status, code, message):
+        """Build an error response carrying a ``google.rpc.Status``."""
+        status_pb = status_pb2.Status(code=code, message=message)
+        return Response(status, status_pb.SerializeToString(),
+                        'application/x-protobuf')
+
+    def _entity_key(self, project, key_pb):
+        """Storage key of an entity."""
+        return (project, key_pb.partition_id.namespace_id, _path_key(key_pb))
+
+    def _complete_key(self, key_pb):
+        """Assign an ID to the last path element of a partial key."""
+        last = key_pb.path[-1]
+        if last.WhichOneof('id_type') is None:
+            last.id = next(self._ids)
+            return True
+        return False
+
+    def lookup(self, project, request_pb):
+        """Fetch entities by key."""
+        response = _datastore_pb2.LookupResponse()
+        for key_pb in request_pb.keys:
+            entity_pb = self.entities.get(self._entity_key(project, key_pb))
+            if entity_pb is None:
+                response.missing.add().entity.key.CopyFrom(key_pb)
+            else:
+                response.found.add().entity.CopyFrom(entity_pb)
+        return response
+
+    def _query_results(self, project, request_pb):
+        """Evaluate a query, returning matching entities in order."""
+        query_pb = request_pb.query
+        namespace = request_pb.partition_id.namespace_id
+        kinds = set(kind.name for kind in query_pb.kind)
+        results = [
+            entity_pb for (entity_project, entity_namespace, _), entity_pb
+            in sorted(self.entities.items(), key=lambda item: item[0])
+            if entity_project == project and entity_namespace == namespace and
+            (not kinds or entity_pb.key.path[-1].kind in kinds) and
+            _matches(entity_pb, query_pb.filter)]
+
+        for order in reversed(query_pb.order):
+            name = order.property.name
+            if name == '__key__':
+                sort_key = _entity_path_key
+            elif name == '__scatter__':
+                sort_key = _scatter_key
+            else:
+                results = [entity_pb for entity_pb in results
+                           if name in entity_pb.properties]
+                sort_key = (lambda entity_pb, name=name:
+                            _value_key(entity_pb.properties[name]))
+            descending = (order.direction ==
+                          _query_pb2.PropertyOrder.DESCENDING)
+            results.sort(key=sort_key, reverse=descending)
+        return results
+
+    def run_query(self, project, request_pb):
+        """Run a query, returning at most ``batch_size`` results."""
+        if request_pb.HasField('gql_query'):
+            return self._error(http_client.BAD_REQUEST, 3,
+                               'GQL queries are not supported.')
+        query_pb = request_pb.query
+        with self._lock:
+            results = self._query_results(project, request_pb)
+
+        start = int(query_pb.start_cursor or 0)
+        stop = len(results)
+        more_results = _query_pb2.QueryResultBatch.NO_MORE_RESULTS
+        if query_pb.end_cursor:
+            stop = min(stop, int(query_pb.end_cursor))
+            more_results = (
+                _query_pb2.QueryResultBatch.MORE_RESULTS_AFTER_CURSOR)
+        skipped = min(query_pb.offset, max(stop - start, 0))
+        position = start + skipped
+        end = min(stop, position + self.batch_size)
+        if query_pb.HasField('limit'):
+            if position + query_pb.limit.value <= end:
+                end = position + query_pb.limit.value
+                more_results = (
+                    _query_pb2.QueryResultBatch.MORE_RESULTS_AFTER_LIMIT)
+        if end < stop and more_results != (
+                _query_pb2.QueryResultBatch.MORE_RESULTS_AFTER_LIMIT):
+            more_results = _query_pb2.QueryResultBatch.NOT_FINISHED
+
+        projection = [prop.property.name for prop in query_pb.projection]
+        if projection == ['__key__']:
+            result_type = _query_pb2.EntityResult.KEY_ONLY
+        elif projection:
+            result_type = _query_pb2.EntityResult.PROJECTION
+        else:
+            result_type = _query_pb2.EntityResult.FULL
+
+        response = _datastore_pb2.RunQueryResponse()
+        batch = response.batch
+        batch.skipped_results = skipped
+        batch.entity_result_type = result_type
+        batch.more_results = more_results
+        batch.end_cursor = str(end).encode('ascii')
+        for index in range(position, end):
+            entity_pb = results[index]
+            result = batch.entity_results.add()
+            result.cursor = str(index + 1).encode('ascii')
+            if result_type == _query_pb2.EntityResult.FULL:
+                result.entity.CopyFrom(entity_pb)
+                continue
+            result.entity.key.CopyFrom(entity_pb.key)
+            for name in projection:
+                if name in entity_pb.properties:
+                    result.entity.properties[name].CopyFrom(
+                        entity_pb.properties[name])
+        return response
+
+    def begin_transaction(self, project, request_pb):
+        """Start a (non-isolated) transaction."""
+        response = _datastore_pb2.BeginTransactionResponse()
+        response.transaction = str(next(self._ids)).encode('ascii')
+        return response
+
+    def commit(self, project, request_pb):
+        """Apply mutations, completing any partial keys."""
+        response = _datastore_pb2.CommitResponse()
+        with self._lock:
+            for mutation in request_pb.mutations:
+                operation = mutation.WhichOneof('operation')
+                result = response.mutation_results.add()
+                if operation == 'delete':
+                    self.entities.pop(
+                        self._entity_key(project, mutation.delete), None)
+                    continue
+                entity_pb = _entity_pb2.Entity()
+                entity_pb.CopyFrom(getattr(mutation, operation))
+                if self._complete_key(entity_pb.key):
+                    result.key.CopyFrom(entity_pb.key)
+                key = self._entity_key(project, entity_pb.key)
+                if operation == 'insert' and key in self.entities:
+                    return self._error(http_client.CONFLICT, 6,
+                                       'Entity already exists.')
+                if operation == 'update' and key not in self.entities:
+                    return self._error(http_client.NOT_FOUND, 5,
+                                       'No entity to update.')
+                self.entities[key] = entity_pb
+                response.index_updates += 1
+        return response
+
+    def rollback(self, project, request_pb):
+        """Abandon a transaction."""
+        return _datastore_pb2.RollbackResponse()
+
+    def allocate_ids(self, project, request_pb):
+        """Complete partial keys."""
+        response = _datastore_pb2.AllocateIdsResponse()
+        for key_pb in request_pb.keys:
+            completed = response.keys.add()
+            completed.CopyFrom(key_pb)
+            self._complete_key(completed)
+        return response
@@ -0,0 +1,677 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+TABLE_NAME = 'projects/P/instances/I/tables/T'
+
+
+def _set_cell(family, qualifier, value, timestamp=1000):
+    from gcloud.bigtable._generated_v2 import data_pb2
+    return data_pb2.Mutation(set_cell=data_pb2.Mutation.SetCell(
+        family_name=family, column_qualifier=qualifier, value=value,
+        timestamp_micros=timestamp))
+
+
+def _filter(**kwargs):
+    from gcloud.bigtable._generated_v2 import data_pb2
+    return data_pb2.RowFilter(**kwargs)
+
+
+class Test__key_in_row_set(unittest2.TestCase):
+
+    def _callFUT(self, *args, **kwargs):
+        from gcloud.testing.bigtable_server import _key_in_row_set
+        return _key_in_row_set(*args, **kwargs)
+
+    def test_empty(self):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        self.assertTrue(self._callFUT(b'a', data_pb2.RowSet()))
+
+    def test_keys_and_ranges(self):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        row_set = data_pb2.RowSet(row_keys=[b'a'], row_ranges=[
+            data_pb2.RowRange(start_key_open=b'c', end_key_closed=b'e'),
+            data_pb2.RowRange(start_key_closed=b'x', end_key_open=b'z'),
+            data_pb2.RowRange(start_key_closed=b'zz'),
+        ])
+        results = dict((key, self._callFUT(key, row_set))
+                       for key in (b'a', b'b', b'c', b'd', b'e', b'f',
+                                   b'x', b'z', b'zz', b'zzz'))
+        self.assertEqual(results, {
+            b'a': True, b'b': False, b'c': False, b'd': True, b'e': True,
+            b'f': False, b'x': True, b'z': False, b'zz': True, b'zzz': True,
+        })
+
+
+class Test__apply_filter(unittest2.TestCase):
+
+    CELLS = [
+        ('cf1', b'a', 3000, b'new'),
+        ('cf1', b'a', 1000, b'old'),
+        ('cf1', b'b', 2000, b'bee'),
+        ('cf2', b'a', 1000, b'two'),
+    ]
+
+    def _callFUT(self, filter_pb, row_key=b'row', cells=None):
+        from gcloud.testing.bigtable_server import _apply_filter
+        if cells is None:
+            cells = self.CELLS
+        return _apply_filter(filter_pb, row_key, cells)
+
+    def test_none(self):
+        self.assertEqual(self._callFUT(_filter()), self.CELLS)
+
+    def test_row_key_regex(self):
+        self.assertEqual(self._callFUT(_filter(row_key_regex_filter=b'r.w')),
+                         self.CELLS)
+        self.assertEqual(self._callFUT(_filter(row_key_regex_filter=b'r')),
+                         [])
+
+    def test_family_qualifier_value(self):
+        self.assertEqual(
+            self._callFUT(_filter(family_name_regex_filter='cf2')),
+            self.CELLS[3:])
+        self.assertEqual(
+            self._callFUT(_filter(column_qualifier_regex_filter=b'b')),
+            self.CELLS[2:3])
+        self.assertEqual(
+            self._callFUT(_filter(value_regex_filter=b't.*')),
+            self.CELLS[3:])
+
+    def test_timestamp_range(self):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        range_pb = data_pb2.TimestampRange(start_timestamp_micros=2000)
+        self.assertEqual(
+            self._callFUT(_filter(timestamp_range_filter=range_pb)),
+            [self.CELLS[0], self.CELLS[2]])
+
+    def test_cell_limits(self):
+        self.assertEqual(
+            self._callFUT(_filter(cells_per_column_limit_filter=1)),
+            [self.CELLS[0], self.CELLS[2], self.CELLS[3]])
+        self.assertEqual(
+            self._callFUT(_filter(cells_per_row_limit_filter=2)),
+            self.CELLS[:2])
+        self.assertEqual(
+            self._callFUT(_filter(cells_per_row_offset_filter=3)),
+            self.CELLS[3:])
+
+    def test_strip_value_and_block_all(self):
+        self.assertEqual(
+            self._callFUT(_filter(strip_value_transformer=True))[0],
+            ('cf1', b'a', 3000, b''))
+        self.assertEqual(self._callFUT(_filter(block_all_filter=True)), [])
+
+    def test_chain_and_interleave(self):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        chain = data_pb2.RowFilter.Chain(filters=[
+            _filter(family_name_regex_filter='cf1'),
+            _filter(cells_per_column_limit_filter=1)])
+        self.assertEqual(self._callFUT(_filter(chain=chain)),
+                         [self.CELLS[0], self.CELLS[2]])
+        interleave = data_pb2.RowFilter.Interleave(filters=[
+            _filter(column_qualifier_regex_filter=b'b'),
+            _filter(family_name_regex_filter='cf2')])
+        self.assertEqual(self._callFUT(_filter(interleave=interleave)),
+                         self.CELLS[2:])
+
+    def test_unsupported_passes_through(self):
+        self.assertEqual(self._callFUT(_filter(pass_all_filter=True)),
+                         self.CELLS)
+
+
+class Test_BigtableServicer(unittest2.TestCase):
+
+    def _makeServer(self, **kwargs):
+        from gcloud.testing.bigtable_server import BigtableServer
+        return BigtableServer(**kwargs)
+
+    def _makeOne(self, server):
+        from gcloud.testing.bigtable_server import _BigtableServicer
+        return _BigtableServicer(server)
+
+    def _mutate(self, servicer, row_key, *mutations):
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        servicer.MutateRow(bigtable_pb2.MutateRowRequest(
+            table_name=TABLE_NAME, row_key=row_key, mutations=mutations),
+            None)
+
+    def _read_rows(self, servicer, **kwargs):
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        from gcloud.bigtable.row_data import PartialRowsData
+        request = bigtable_pb2.ReadRowsRequest(table_name=TABLE_NAME,
+                                               **kwargs)
+        responses = list(servicer.ReadRows(request, None))
+        rows_data = PartialRowsData(iter(responses))
+        rows_data.consume_all()
+        return responses, rows_data.rows
+
+    def test_mutate_and_read_rows(self):
+        server = self._makeServer(value_chunk_size=2, chunks_per_response=3)
+        servicer = self._makeOne(server)
+        self._mutate(servicer, b'row1', _set_cell('cf', b'q', b'hello'),
+                     _set_cell('cf', b'q', b'older', timestamp=500))
+        self._mutate(servicer, b'row2', _set_cell('cf', b'q', b''))
+        responses, rows = self._read_rows(servicer)
+
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(sorted(rows), [b'row1', b'row2'])
+        cells = rows[b'row1'].cells['cf'][b'q']
+        self.assertEqual([cell.value for cell in cells], [b'hello', b'older'])
+        self.assertEqual(rows[b'row2'].cells['cf'][b'q'][0].value, b'')
+
+    def test_read_rows_w_row_set_filter_and_limit(self):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        servicer = self._makeOne(self._makeServer())
+        for row_key in (b'a', b'b', b'c', b'd'):
+            self._mutate(servicer, row_key, _set_cell('cf', b'q', row_key))
+        row_set = data_pb2.RowSet(row_keys=[b'a', b'c', b'd'])
+        _, rows = self._read_rows(
+            servicer, rows=row_set, rows_limit=2,
+            filter=_filter(row_key_regex_filter=b'[cd]'))
+        self.assertEqual(sorted(rows), [b'c', b'd'])
+        _, rows = self._read_rows(servicer, rows=row_set, rows_limit=2)
+        self.assertEqual(sorted(rows), [b'a', b'c'])
+
+    def test_read_rows_failure(self):
+        from grpc.beta.interfaces import StatusCode
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        server = self._makeServer(chunks_per_response=1, read_failures=[1])
+        servicer = self._makeOne(server)
+        for row_key in (b'row1', b'row2'):
+            self._mutate(servicer, row_key, _set_cell('cf', b'q', b'v'))
+        context = _Context()
+        request = bigtable_pb2.ReadRowsRequest(table_name=TABLE_NAME)
+        responses = list(servicer.ReadRows(request, context))
+        self.assertEqual([response.chunks[0].row_key
+                          for response in responses], [b'row1'])
+        self.assertEqual(context.code_value, StatusCode.UNAVAILABLE)
+        # Each failure is used once.
+        self.assertEqual(len(list(servicer.ReadRows(request, None))), 2)
+
+    def test_deletes(self):
+        from gcloud.bigtable._generated_v2 import data_pb2
+        server = self._makeServer()
+        servicer = self._makeOne(server)
+        self._mutate(servicer, b'row',
+                     _set_cell('cf1', b'a', b'1', timestamp=1000),
+                     _set_cell('cf1', b'a', b'2', timestamp=2000),
+                     _set_cell('cf1', b'b', b'3'),
+                     _set_cell('cf2', b'c', b'4'))
+        delete_column = data_pb2.Mutation.DeleteFromColumn(
+            family_name='cf1', column_qualifier=b'a',
+            time_range=data_pb2.TimestampRange(start_timestamp_micros=1500))
+        self._mutate(servicer, b'row',
+                     data_pb2.Mutation(delete_from_column=delete_column))
+        delete_family = data_pb2.Mutation.DeleteFromFamily(family_name='cf2')
+        self._mutate(servicer, b'row',
+                     data_pb2.Mutation(delete_from_family=delete_family))
+        table = server.tables[TABLE_NAME]
+        self.assertEqual(table.rows[b'row'],
+                         {'cf1': {b'a': {1000: b'1'}, b'b': {1000: b'3'}}})
+
+        delete_row = data_pb2.Mutation.DeleteFromRow()
+        self._mutate(servicer, b'row',
+                     data_pb2.Mutation(delete_from_row=delete_row))
+        self.assertEqual(table.rows, {})
+
+    def test_set_cell_server_timestamp(self):
+        from gcloud._testing import _Monkey
+        from gcloud.testing import bigtable_server as MUT
+        server = self._makeServer()
+        servicer = self._makeOne(server)
+        with _Monkey(MUT, _now_micros=lambda: 5000):
+            self._mutate(servicer, b'row',
+                         _set_cell('cf', b'q', b'v', timestamp=-1))
+        self.assertEqual(server.tables[TABLE_NAME].rows[b'row'],
+                         {'cf': {b'q': {5000: b'v'}}})
+
+    def test_mutate_rows(self):
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        server = self._makeServer()
+        servicer = self._makeOne(server)
+        request = bigtable_pb2.MutateRowsRequest(table_name=TABLE_NAME)
+        for row_key in (b'a', b'b'):
+            entry = request.entries.add(row_key=row_key)
+            entry.mutations.add().CopyFrom(_set_cell('cf', b'q', b'v'))
+        response, = servicer.MutateRows(request, None)
+        self.assertEqual([entry.index for entry in response.entries], [0, 1])
+        self.assertEqual(sorted(server.tables[TABLE_NAME].rows), [b'a', b'b'])
+
+    def test_mutate_rows_entry_failures(self):
+        from google.rpc import code_pb2
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        server = self._makeServer(
+            entry_failures={b'b': [code_pb2.UNAVAILABLE]})
+        servicer = self._makeOne(server)
+        request = bigtable_pb2.MutateRowsRequest(table_name=TABLE_NAME)
+        for row_key in (b'a', b'b'):
+            entry = request.entries.add(row_key=row_key)
+            entry.mutations.add().CopyFrom(_set_cell('cf', b'q', b'v'))
+        response, = servicer.MutateRows(request, None)
+        self.assertEqual([entry.status.code for entry in response.entries],
+                         [code_pb2.OK, code_pb2.UNAVAILABLE])
+        self.assertEqual(sorted(server.tables[TABLE_NAME].rows), [b'a'])
+        # Each failure is used once.
+        response, = servicer.MutateRows(request, None)
+        self.assertEqual([entry.status.code for entry in response.entries],
+                         [code_pb2.OK, code_pb2.OK])
+        self.assertEqual(sorted(server.tables[TABLE_NAME].rows), [b'a', b'b'])
+
+    def test_sample_row_keys(self):
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        servicer = self._makeOne(self._makeServer(sample_every=2))
+        for row_key in (b'a', b'b', b'c'):
+            self._mutate(servicer, row_key, _set_cell('cf', b'q', b'v'))
+        request = bigtable_pb2.SampleRowKeysRequest(table_name=TABLE_NAME)
+        responses = list(servicer.SampleRowKeys(request, None))
+        self.assertEqual([(response.row_key, response.offset_bytes)
+                          for response in responses],
+                         [(b'b', 2), (b'', 3)])
+
+    def test_check_and_mutate_row(self):
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        server = self._makeServer()
+        servicer = self._makeOne(server)
+        self._mutate(servicer, b'row', _set_cell('cf', b'q', b'v'))
+        request = bigtable_pb2.CheckAndMutateRowRequest(
+            table_name=TABLE_NAME, row_key=b'row',
+            predicate_filter=_filter(value_regex_filter=b'x'),
+            true_mutations=[_set_cell('cf', b't', b'yes')],
+            false_mutations=[_set_cell('cf', b'f', b'no')])
+        response = servicer.CheckAndMutateRow(request, None)
+        self.assertFalse(response.predicate_matched)
+        self.assertEqual(sorted(server.tables[TABLE_NAME].rows[b'row']['cf']),
+                         [b'f', b'q'])
+
+    def test_read_modify_write_row(self):
+        import struct
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable._generated_v2 import bigtable_pb2
+        from gcloud.bigtable._generated_v2 import data_pb2
+        from gcloud.testing import bigtable_server as MUT
+        server = self._makeServer()
+        servicer = self._makeOne(server)
+        self._mutate(servicer, b'row', _set_cell('cf', b's', b'abc'))
+        request = bigtable_pb2.ReadModifyWriteRowRequest(
+            table_name=TABLE_NAME, row_key=b'row', rules=[
+                data_pb2.ReadModifyWriteRule(
+                    family_name='cf', column_qualifier=b's',
+                    append_value=b'def'),
+                data_pb2.ReadModifyWriteRule(
+                    family_name='cf', column_qualifier=b'n',
+                    increment_amount=3),
+                data_pb2.ReadModifyWriteRule(
+                    family_name='cf', column_qualifier=b'n',
+                    increment_amount=4),
+            ])
+        with _Monkey(MUT, _now_micros=lambda: 500):
+            response = servicer.ReadModifyWriteRow(request, None)
+        cells = [(column.qualifier, cell.value)
+                 for family in response.row.families
+                 for column in family.columns for cell in column.cells]
+        self.assertEqual(cells, [
+            (b's', b'abcdef'),
+            (b'n', struct.pack('>q', 3)),
+            (b'n', struct.pack('>q', 7)),
+        ])
+        row = server.tables[TABLE_NAME].rows[b'row']
+        self.assertEqual(row['cf'][b's'], {1000: b'abcdef'})
+        self.assertEqual(row['cf'][b'n'], {500: struct.pack('>q', 7)})
+
+
+class TestEmulatorCredentials(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+        return EmulatorCredentials
+
+    def test_create_scoped(self):
+        credentials = self._getTargetClass()()
+        scoped = credentials.create_scoped(['scope'])
+        self.assertEqual(credentials.scopes, None)
+        self.assertEqual(scoped.scopes, ['scope'])
+
+
+class TestBigtableServer(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.bigtable_server import BigtableServer
+        return BigtableServer
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_constructor_defaults(self):
+        from gcloud.testing.http_server import LOCALHOST
+        server = self._makeOne()
+        self.assertEqual(server.host, LOCALHOST)
+        self.assertEqual(server.port, 0)
+        self.assertEqual(server.value_chunk_size, None)
+        self.assertEqual(server.chunks_per_response, 100)
+        self.assertEqual(server.sample_every, 100)
+        self.assertEqual(server.read_failures, [])
+        self.assertEqual(server.entry_failures, {})
+        self.assertEqual(server.tables, {})
+
+    def test_start_stop(self):
+        with self._makeOne() as server:
+            self.assertNotEqual(server.port, 0)
+            self.assertEqual(server.emulator_host,
+                             '%s:%d' % (server.host, server.port))
+            with self.assertRaises(ValueError):
+                server.start()
+        server.stop()  # Already stopped: no-op.
+
+    def test_client_round_trip(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        with self._makeOne() as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                row = table.row(b'row')
+                row.set_cell('cf', b'q', b'value')
+                row.commit()
+                partial_row = table.read_row(b'row')
+            finally:
+                client.stop()
+
+        self.assertEqual(partial_row.cells['cf'][b'q'][0].value, b'value')
+
+    def test_client_read_rows_resumes(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.bigtable import table as table_mod
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        with self._makeOne(chunks_per_response=1,
+                           read_failures=[2, 0, 1]) as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                for index in range(6):
+                    row = table.row(('row-%d' % (index,)).encode('ascii'))
+                    row.set_cell('cf', b'q', b'value')
+                    row.commit()
+                with _Monkey(table_mod, _SLEEP=lambda _: None):
+                    row_keys = [row.row_key
+                                for row in table.read_rows(limit=5)]
+            finally:
+                client.stop()
+
+        self.assertEqual(row_keys, [('row-%d' % (index,)).encode('ascii')
+                                    for index in range(5)])
+        self.assertEqual(server.read_failures, [])
+
+    def test_client_mutate_rows(self):
+        import datetime
+        from google.rpc import code_pb2
+        from gcloud._helpers import UTC
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.bigtable import table as table_mod
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        failures = {
+            b'row-1': [code_pb2.ABORTED],
+            b'row-3': [code_pb2.INVALID_ARGUMENT],
+        }
+        with self._makeOne(entry_failures=failures) as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                # An explicit timestamp makes the rows safe to retry.
+                timestamp = datetime.datetime(2016, 1, 1, tzinfo=UTC)
+                rows = []
+                for index in range(5):
+                    row = table.row(('row-%d' % (index,)).encode('ascii'))
+                    row.set_cell('cf', b'q', b'value', timestamp=timestamp)
+                    rows.append(row)
+                with _Monkey(table_mod, _SLEEP=lambda _: None):
+                    statuses = table.mutate_rows(rows, max_entries=2)
+                rows_data = table.read_rows()
+                rows_data.consume_all()
+            finally:
+                client.stop()
+
+        self.assertEqual([status.code for status in statuses], [
+            code_pb2.OK, code_pb2.OK, code_pb2.OK,
+            code_pb2.INVALID_ARGUMENT, code_pb2.OK])
+        self.assertEqual(sorted(rows_data.rows), [
+            b'row-0', b'row-1', b'row-2', b'row-4'])
+
+    def test_client_read_rows_parallel(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        row_keys = [('row-%d' % (index,)).encode('ascii')
+                    for index in range(10)]
+        with self._makeOne(sample_every=3) as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                for row_key in row_keys:
+                    row = table.row(row_key)
+                    row.set_cell('cf', b'q', b'value')
+                    row.commit()
+                ordered = [row.row_key
+                           for row in table.read_rows_parallel(max_workers=3)]
+                unordered = [row.row_key for row in table.read_rows_parallel(
+                    start_key=b'row-1', max_workers=3, ordered=False)]
+            finally:
+                client.stop()
+
+        self.assertEqual(ordered, row_keys)
+        self.assertEqual(sorted(unordered), row_keys[1:])
+
+    def test_client_read_row_set(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.bigtable import table as table_mod
+        from gcloud.bigtable.happybase.table import Table as HappyTable
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        row_keys = [('row-%d' % (index,)).encode('ascii')
+                    for index in range(10)]
+        with self._makeOne() as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                for row_key in row_keys:
+                    row = table.row(row_key)
+                    row.set_cell('cf', b'q', row_key)
+                    row.commit()
+                row_set = [row.row_key for row in table.read_rows(
+                    row_keys=[b'row-7', b'row-1'],
+                    row_ranges=[(b'row-3', b'row-5')])]
+                happy_table = HappyTable('T', None)
+                happy_table._low_level_table = table
+                with _Monkey(table_mod, ROW_KEYS_PER_REQUEST=2):
+                    happy_rows = happy_table.rows(
+                        [b'row-8', b'missing', b'row-2', b'row-8'],
+                        max_workers=2)
+            finally:
+                client.stop()
+
+        self.assertEqual(row_set, [b'row-1', b'row-3', b'row-4', b'row-7'])
+        self.assertEqual(happy_rows, [
+            (b'row-8', {b'cf:q': b'row-8'}),
+            (b'row-2', {b'cf:q': b'row-2'}),
+            (b'row-8', {b'cf:q': b'row-8'}),
+        ])
+
+    def test_client_happybase_batch(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.bigtable.happybase.table import Table as HappyTable
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        with self._makeOne() as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                happy_table = HappyTable('T', None)
+                happy_table._low_level_table = table
+                with happy_table.batch(max_workers=2) as batch:
+                    for index in range(5):
+                        batch.put(('row-%d' % (index,)).encode('ascii'),
+                                  {'cf:q': b'value'})
+                    batch.delete(b'row-3')
+                row_keys = [row.row_key for row in table.read_rows()]
+            finally:
+                client.stop()
+
+        self.assertEqual(row_keys, [b'row-0', b'row-1', b'row-2', b'row-4'])
+
+    def test_client_happybase_counters(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.bigtable.happybase.table import Table as HappyTable
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        with self._makeOne() as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                happy_table = HappyTable('T', None)
+                happy_table._low_level_table = client.instance(
+                    'I').table('T')
+                counters = happy_table.counter_buffer(flush_interval=None)
+                with counters:
+                    for _ in range(10):
+                        counters.counter_inc(b'page', 'cf:views')
+                    counters.counter_dec(b'page', 'cf:quota', 3)
+                    values = counters.flush()
+                    counters.counter_inc(b'page', 'cf:views', 5)
+                views = happy_table.counter_get(b'page', 'cf:views')
+                quota = happy_table.counter_dec(b'page', 'cf:quota')
+            finally:
+                client.stop()
+
+        self.assertEqual(values, {(b'page', u'cf:views'): 10,
+                                  (b'page', u'cf:quota'): -3})
+        self.assertEqual((views, quota), (15, -4))
+
+    def test_client_read_columns(self):
+        from gcloud._testing import _Monkey
+        from gcloud.bigtable import client as client_mod
+        from gcloud.environment_vars import BIGTABLE_EMULATOR
+        from gcloud.testing.bigtable_server import EmulatorCredentials
+
+        name, visits = ('cf', b'name'), ('cf', b'visits.total')
+        with self._makeOne() as server:
+            environ = {BIGTABLE_EMULATOR: server.emulator_host}
+            fake_os = _FakeOS(environ)
+            with _Monkey(client_mod, os=fake_os):
+                client = client_mod.Client(
+                    project='P', credentials=EmulatorCredentials())
+                client.start()
+            try:
+                table = client.instance('I').table('T')
+                for index in range(3):
+                    row_key = ('row-%d' % (index,)).encode('ascii')
+                    row = table.row(row_key)
+                    row.set_cell('cf', b'name', row_key + b'-old',
+                                 timestamp=_datetime(1))
+                    row.set_cell('cf', b'name', row_key,
+                                 timestamp=_datetime(2))
+                    row.set_cell('cf', b'visitsXtotal', b'ignored')
+                    row.commit()
+                    if index != 1:
+                        row = table.row(row_key, append=True)
+                        row.increment_cell_value('cf', b'visits.total', index)
+                        row.commit()
+                rows_data = table.read_columns([name, visits],
+                                               formats={visits: '>q'})
+                rows_data.consume_all()
+            finally:
+                client.stop()
+
+        self.assertEqual(rows_data.to_columns(), {
+            name: [b'row-0', b'row-1', b'row-2'],
+            visits: [0, None, 2],
+        })
+
+
+class _Context(object):
+
+    code_value = None
+
+    def code(self, code):
+        self.code_value = code
+
+    def details(self, details):
+        self.details_value = details
+
+
+class _FakeOS(object):
+
+    def __init__(self, environ):
+        self._environ = environ
+
+    def getenv(self, name, default=None):
+        return self._environ.get(name, default)
+
+
+def _datetime(seconds):
+    import datetime
+    from gcloud._helpers import _EPOCH
+    return _EPOCH + datetime.timedelta(seconds=seconds)
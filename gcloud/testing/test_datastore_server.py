@@ -0,0 +1,80 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+try:
+    # pylint: disable=unused-import
+    import gcloud.testing.datastore_server
+    # pylint: enable=unused-import
+except ImportError:  # pragma: NO COVER
+    _HAVE_GRPC = False
+else:
+    _HAVE_GRPC = True
+
+
+@unittest2.skipUnless(_HAVE_GRPC, 'No grpcio')
+class Test__status_code(unittest2.TestCase):
+
+    def _callFUT(self, code):
+        from gcloud.testing.datastore_server import _status_code
+        return _status_code(code)
+
+    def test_known(self):
+        import grpc
+        self.assertEqual(self._callFUT(10), grpc.StatusCode.ABORTED)
+
+    def test_unknown(self):
+        import grpc
+        self.assertEqual(self._callFUT(1234), grpc.StatusCode.UNKNOWN)
+
+
+@unittest2.skipUnless(_HAVE_GRPC, 'No grpcio')
+class TestDatastoreServer(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.datastore_server import DatastoreServer
+        return DatastoreServer
+
+    def _makeOne(self, *args, **kw):
+        return self._getTargetClass()(*args, **kw)
+
+    def test_start_stop(self):
+        with self._makeOne() as server:
+            self.assertNotEqual(server.port, 0)
+            self.assertEqual(server.emulator_host,
+                             '%s:%d' % (server.host, server.port))
+            with self.assertRaises(ValueError):
+                server.start()
+        server.stop()  # Already stopped: no-op.
+
+    def test_shared_backend(self):
+        import grpc
+        from gcloud.datastore._generated import datastore_pb2
+        from gcloud.testing import DatastoreBackend
+        backend = DatastoreBackend()
+        with self._makeOne(backend=backend) as server:
+            channel = grpc.insecure_channel(server.emulator_host)
+            self.addCleanup(channel.close)
+            allocate_ids = channel.unary_unary(
+                '/google.datastore.v1beta3.Datastore/AllocateIds',
+                datastore_pb2.AllocateIdsRequest.SerializeToString,
+                datastore_pb2.AllocateIdsResponse.FromString)
+            request = datastore_pb2.AllocateIdsRequest(project_id='P')
+            request.keys.add().path.add(kind='Kind')
+            response = allocate_ids(request, timeout=10)
+        self.assertEqual(response.keys[0].path[0].id, 1)
+        # The backend hands out the next ID.
+        self.assertEqual(next(backend._ids), 2)
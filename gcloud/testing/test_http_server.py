@@ -0,0 +1,224 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+class TestRequest(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.http_server import Request
+        return Request
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_json(self):
+        request = self._makeOne('POST', '/path', {}, {}, b'{"a": 1}')
+        self.assertEqual(request.json(), {'a': 1})
+
+    def test_json_empty(self):
+        request = self._makeOne('GET', '/path', {}, {}, b'')
+        self.assertEqual(request.json(), {})
+
+
+class TestResponse(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.http_server import Response
+        return Response
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_constructor_defaults(self):
+        response = self._makeOne()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, b'')
+        self.assertEqual(response.headers, {})
+
+    def test_constructor_w_content_type(self):
+        response = self._makeOne(201, b'abc', 'text/plain', {'X-Y': 'z'})
+        self.assertEqual(response.headers,
+                         {'X-Y': 'z', 'Content-Type': 'text/plain'})
+
+    def test_from_json(self):
+        import json
+        response = self._getTargetClass().from_json({'a': 1}, status=202)
+        self.assertEqual(response.status, 202)
+        self.assertEqual(json.loads(response.body.decode('utf-8')),
+                         {'a': 1})
+        self.assertEqual(response.headers['Content-Type'],
+                         'application/json')
+
+    def test_error(self):
+        import json
+        response = self._getTargetClass().error(404, 'nope')
+        self.assertEqual(response.status, 404)
+        payload = json.loads(response.body.decode('utf-8'))
+        self.assertEqual(payload['error']['code'], 404)
+        self.assertEqual(payload['error']['message'], 'nope')
+
+
+class TestLocalServer(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.http_server import LocalServer
+        return LocalServer
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_constructor_defaults(self):
+        from gcloud.testing.http_server import LOCALHOST
+        server = self._makeOne()
+        self.assertEqual(server.host, LOCALHOST)
+        self.assertEqual(server.port, 0)
+        self.assertEqual(server.request_count, 0)
+
+    def test_dispatch(self):
+        from gcloud.testing.http_server import Request
+        from gcloud.testing.http_server import Response
+        backend = _Backend()
+        server = self._makeOne([backend])
+        request = Request('GET', '/things/abc', {}, {}, b'')
+        response = server.dispatch(request)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(backend._requested, [(request, {'name': 'abc'})])
+        self.assertEqual(server.request_count, 1)
+        self.assertTrue(isinstance(response, Response))
+
+    def test_dispatch_method_not_allowed(self):
+        from gcloud.testing.http_server import Request
+        server = self._makeOne([_Backend()])
+        response = server.dispatch(
+            Request('DELETE', '/things/abc', {}, {}, b''))
+        self.assertEqual(response.status, 405)
+
+    def test_dispatch_not_found(self):
+        from gcloud.testing.http_server import Request
+        server = self._makeOne([_Backend()])
+        response = server.dispatch(Request('GET', '/other', {}, {}, b''))
+        self.assertEqual(response.status, 404)
+
+    def test_start_twice(self):
+        with self._makeOne() as server:
+            with self.assertRaises(ValueError):
+                server.start()
+
+    def test_stop_not_started(self):
+        server = self._makeOne()
+        server.stop()  # No-op.
+
+    def test_round_trip(self):
+        backend = _Backend()
+        with self._makeOne([backend]) as server:
+            self.assertNotEqual(server.port, 0)
+            base_url = server.base_url
+            http = server.http()
+            response, content = http.request(
+                'https://www.googleapis.com/things/abc?x=1', 'POST',
+                body=u'payload', headers={'X-Test': 'yes'})
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(content, b'abc')
+        (request, kwargs), = backend._requested
+        self.assertEqual(request.method, 'POST')
+        self.assertEqual(request.path, '/things/abc')
+        self.assertEqual(request.query, {'x': '1'})
+        self.assertEqual(request.headers['x-test'], 'yes')
+        self.assertEqual(request.body, b'payload')
+        self.assertEqual(request.base_url, base_url)
+        self.assertEqual(kwargs, {'name': 'abc'})
+
+    def test_round_trip_chunked_body(self):
+        import io
+        backend = _Backend()
+        with self._makeOne([backend]) as server:
+            http = server.http()
+            response, _ = http.request(
+                'https://www.googleapis.com/things/abc', 'POST',
+                body=io.BytesIO(b'chunked payload'))
+
+        self.assertEqual(response.status, 200)
+        (request, _), = backend._requested
+        self.assertEqual(request.body, b'chunked payload')
+
+
+class TestLocalHttp(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.http_server import LocalHttp
+        return LocalHttp
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_constructor(self):
+        http = self._makeOne('http://127.0.0.1:1234')
+        self.assertEqual(http.base_url, 'http://127.0.0.1:1234')
+        if hasattr(http, 'redirect_codes'):
+            self.assertFalse(308 in http.redirect_codes)
+
+    def test_connections_per_thread(self):
+        import threading
+        http = self._makeOne('http://127.0.0.1:1234')
+        http.connections['http:127.0.0.1:1234'] = 'CONNECTION'
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(dict(http.connections)))
+        thread.start()
+        thread.join()
+        self.assertEqual(other, [{}])
+        self.assertEqual(http.connections,
+                         {'http:127.0.0.1:1234': 'CONNECTION'})
+
+    def test_request_rewrites_google_hosts(self):
+        import httplib2
+        from gcloud._testing import _Monkey
+
+        requested = []
+
+        def _request(self, uri, *args, **kwargs):
+            requested.append(uri)
+            return 'response', 'content'
+
+        http = self._makeOne('http://127.0.0.1:1234')
+        with _Monkey(httplib2.Http, request=_request):
+            http.request('https://pubsub.googleapis.com/v1/topics')
+            http.request('http://127.0.0.1:1234/download/x')
+            http.request('https://example.com/googleapis.com/x')
+
+        self.assertEqual(requested, [
+            'http://127.0.0.1:1234/v1/topics',
+            'http://127.0.0.1:1234/download/x',
+            'https://example.com/googleapis.com/x',
+        ])
+
+
+class _Backend(object):
+
+    def __init__(self):
+        self._requested = []
+
+    def routes(self):
+        return [
+            ('GET', r'^/things/(?P<name>\w+)$', self.handle),
+            ('POST', r'^/things/(?P<name>\w+)$', self.handle),
+        ]
+
+    def handle(self, request, **kwargs):
+        from gcloud.testing.http_server import Response
+        self._requested.append((request, kwargs))
+        return Response(200, kwargs['name'].encode('ascii'), 'text/plain')
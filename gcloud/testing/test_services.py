@@ -0,0 +1,714 @@
+# Copyright 2016 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest2
+
+
+BASE_URL = 'http://127.0.0.1:1234'
+
+
+def _make_request(method, path, body=b'', query=None, headers=None,
+                  dispatch=None):
+    import json
+    from gcloud.testing.http_server import Request
+    if isinstance(body, dict):
+        body = json.dumps(body).encode('utf-8')
+    return Request(method, path, query or {}, headers or {}, body,
+                   base_url=BASE_URL, dispatch=dispatch)
+
+
+def _json(response):
+    import json
+    return json.loads(response.body.decode('utf-8'))
+
+
+class Test__page(unittest2.TestCase):
+
+    def _callFUT(self, *args, **kwargs):
+        from gcloud.testing.services import _page
+        return _page(*args, **kwargs)
+
+    def test_all(self):
+        self.assertEqual(self._callFUT([1, 2, 3], {}), ([1, 2, 3], None))
+
+    def test_first_page(self):
+        self.assertEqual(self._callFUT([1, 2, 3], {'maxResults': '2'}),
+                         ([1, 2], '2'))
+
+    def test_last_page(self):
+        query = {'pageSize': 2, 'pageToken': '2'}
+        self.assertEqual(self._callFUT([1, 2, 3], query, max_key='pageSize'),
+                         ([3], None))
+
+
+class TestStorageBackend(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.services import StorageBackend
+        return StorageBackend
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def _makeWithBucket(self, name='bucket'):
+        backend = self._makeOne()
+        response = backend.insert_bucket(
+            _make_request('POST', '/storage/v1/b', {'name': name}))
+        self.assertEqual(response.status, 200)
+        return backend
+
+    def _upload(self, backend, name, data, bucket='bucket'):
+        return backend.start_upload(
+            _make_request('POST', '', data,
+                          query={'uploadType': 'media', 'name': name},
+                          headers={'content-type': 'text/plain'}),
+            bucket)
+
+    def test_insert_bucket_conflict(self):
+        backend = self._makeWithBucket()
+        response = backend.insert_bucket(
+            _make_request('POST', '/storage/v1/b', {'name': 'bucket'}))
+        self.assertEqual(response.status, 409)
+
+    def test_get_and_delete_bucket(self):
+        backend = self._makeWithBucket()
+        response = backend.get_bucket(_make_request('GET', ''), 'bucket')
+        self.assertEqual(_json(response)['name'], 'bucket')
+        response = backend.delete_bucket(_make_request('DELETE', ''),
+                                         'bucket')
+        self.assertEqual(response.status, 204)
+        response = backend.get_bucket(_make_request('GET', ''), 'bucket')
+        self.assertEqual(response.status, 404)
+
+    def test_delete_bucket_not_empty(self):
+        backend = self._makeWithBucket()
+        self._upload(backend, 'name', b'data')
+        response = backend.delete_bucket(_make_request('DELETE', ''),
+                                         'bucket')
+        self.assertEqual(response.status, 409)
+
+    def test_media_upload_and_get(self):
+        backend = self._makeWithBucket()
+        response = self._upload(backend, 'dir/name', b'data')
+        resource = _json(response)
+        self.assertEqual(resource['size'], '4')
+        self.assertEqual(resource['contentType'], 'text/plain')
+        self.assertEqual(resource['generation'], 1)
+        self.assertEqual(resource['mediaLink'],
+                         BASE_URL + '/download/storage/v1/b/bucket/o/'
+                         'dir%2Fname')
+
+        response = self._upload(backend, 'dir/name', b'other')
+        self.assertEqual(_json(response)['generation'], 2)
+
+        response = backend.get_object(_make_request('GET', ''), 'bucket',
+                                      'dir%2Fname')
+        self.assertEqual(_json(response)['size'], '5')
+        response = backend.get_object(
+            _make_request('GET', '', query={'alt': 'media'}), 'bucket',
+            'dir%2Fname')
+        self.assertEqual(response.body, b'other')
+
+    def test_get_object_missing(self):
+        backend = self._makeWithBucket()
+        response = backend.get_object(_make_request('GET', ''), 'bucket',
+                                      'nope')
+        self.assertEqual(response.status, 404)
+        response = backend.get_object(_make_request('GET', ''), 'other',
+                                      'nope')
+        self.assertEqual(response.status, 404)
+
+    def test_multipart_upload(self):
+        backend = self._makeWithBucket()
+        body = (b'--BOUNDARY\r\nContent-Type: application/json\r\n\r\n'
+                b'{"name": "name", "metadata": {"a": "b"}}\r\n'
+                b'--BOUNDARY\r\nContent-Type: image/png\r\n\r\n'
+                b'DATA\r\n--BOUNDARY--')
+        response = backend.start_upload(
+            _make_request(
+                'POST', '', body, query={'uploadType': 'multipart'},
+                headers={'content-type':
+                         'multipart/related; boundary="BOUNDARY"'}),
+            'bucket')
+        resource = _json(response)
+        self.assertEqual(resource['name'], 'name')
+        self.assertEqual(resource['metadata'], {'a': 'b'})
+        self.assertEqual(resource['contentType'], 'image/png')
+        self.assertEqual(backend.buckets['bucket']['objects']['name'][1],
+                         b'DATA')
+
+    def test_resumable_upload(self):
+        backend = self._makeWithBucket()
+        response = backend.start_upload(
+            _make_request('POST', '', b'',
+                          query={'uploadType': 'resumable', 'name': 'name'},
+                          headers={'x-upload-content-type': 'text/plain'}),
+            'bucket')
+        location = response.headers['Location']
+        self.assertTrue(location.startswith(BASE_URL + '/upload/'))
+        query = {'uploadType': 'resumable',
+                 'upload_id': location.rsplit('=', 1)[1]}
+
+        response = backend.resumable_upload(
+            _make_request('PUT', '', b'', query=query,
+                          headers={'content-range': 'bytes */*'}),
+            'bucket')
+        self.assertEqual(response.status, 308)
+        self.assertFalse('Range' in response.headers)
+
+        response = backend.resumable_upload(
+            _make_request('PUT', '', b'abc', query=query,
+                          headers={'content-range': 'bytes 0-2/*'}),
+            'bucket')
+        self.assertEqual(response.status, 308)
+        self.assertEqual(response.headers['Range'], 'bytes=0-2')
+
+        response = backend.resumable_upload(
+            _make_request('PUT', '', b'xyz', query=query,
+                          headers={'content-range': 'bytes 0-2/6'}),
+            'bucket')
+        self.assertEqual(response.status, 400)
+
+        response = backend.resumable_upload(
+            _make_request('PUT', '', b'def', query=query,
+                          headers={'content-range': 'bytes 3-5/6'}),
+            'bucket')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(_json(response)['contentType'], 'text/plain')
+        self.assertEqual(backend.buckets['bucket']['objects']['name'][1],
+                         b'abcdef')
+
+        response = backend.resumable_upload(
+            _make_request('PUT', '', b'', query=query), 'bucket')
+        self.assertEqual(response.status, 404)
+
+    def test_download_ranges(self):
+        backend = self._makeWithBucket()
+        self._upload(backend, 'name', b'0123456789')
+
+        def _download(range_header):
+            return backend.download_object(
+                _make_request('GET', '', headers={'range': range_header}),
+                'bucket', 'name')
+
+        response = _download('bytes=2-4')
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.body, b'234')
+        self.assertEqual(response.headers['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(_download('bytes=8-').body, b'89')
+        self.assertEqual(_download('bytes=-3').body, b'789')
+        self.assertEqual(_download('bytes=5-100').body, b'56789')
+        response = _download('')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, b'0123456789')
+
+    def test_list_and_patch_and_delete(self):
+        backend = self._makeWithBucket()
+        for name in ('b', 'a', 'c', 'x/a'):
+            self._upload(backend, name, b'data')
+        response = backend.list_objects(
+            _make_request('GET', '', query={'maxResults': '2'}), 'bucket')
+        payload = _json(response)
+        self.assertEqual([item['name'] for item in payload['items']],
+                         ['a', 'b'])
+        self.assertEqual(payload['nextPageToken'], '2')
+        response = backend.list_objects(
+            _make_request('GET', '', query={'prefix': 'x/'}), 'bucket')
+        self.assertEqual([item['name'] for item in _json(response)['items']],
+                         ['x/a'])
+
+        response = backend.patch_object(
+            _make_request('PATCH', '', {'metadata': {'k': 'v'}}),
+            'bucket', 'a')
+        self.assertEqual(_json(response)['metadata'], {'k': 'v'})
+
+        response = backend.delete_object(_make_request('DELETE', ''),
+                                         'bucket', 'a')
+        self.assertEqual(response.status, 204)
+        self.assertFalse('a' in backend.buckets['bucket']['objects'])
+
+    def test_batch(self):
+        from gcloud.storage.batch import _unpack_batch_response
+        from gcloud.testing.http_server import LocalServer
+        import httplib2
+
+        backend = self._makeWithBucket()
+        self._upload(backend, 'name', b'data')
+        server = LocalServer([backend])
+        body = (
+            '--XXX\r\nContent-Type: application/http\r\n\r\n'
+            'PATCH https://www.googleapis.com/storage/v1/b/bucket/o/name'
+            ' HTTP/1.1\r\nContent-Type: application/json\r\n\r\n'
+            '{"metadata": {"k": "v"}}\r\n'
+            '--XXX\r\nContent-Type: application/http\r\n\r\n'
+            'DELETE https://www.googleapis.com/storage/v1/b/bucket/o/nope'
+            ' HTTP/1.1\r\n\r\n\r\n'
+            '--XXX--')
+        response = backend.batch(_make_request(
+            'POST', '/batch', body.encode('utf-8'),
+            headers={'content-type': 'multipart/mixed; boundary="XXX"'},
+            dispatch=server.dispatch))
+
+        self.assertEqual(response.status, 200)
+        headers = httplib2.Response(
+            {'content-type': response.headers['Content-Type']})
+        (first, payload), (second, _) = _unpack_batch_response(
+            headers, response.body)
+        self.assertEqual(first.status, 200)
+        self.assertEqual(payload['metadata'], {'k': 'v'})
+        self.assertEqual(second.status, 404)
+
+
+class TestPubsubBackend(unittest2.TestCase):
+
+    TOPIC = 'projects/PROJECT/topics/TOPIC'
+    SUBSCRIPTION = 'projects/PROJECT/subscriptions/SUB'
+
+    def _getTargetClass(self):
+        from gcloud.testing.services import PubsubBackend
+        return PubsubBackend
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def _makeWithSubscription(self):
+        backend = self._makeOne()
+        backend.create_topic(_make_request('PUT', ''), self.TOPIC)
+        response = backend.create_subscription(
+            _make_request('PUT', '', {'topic': self.TOPIC}),
+            self.SUBSCRIPTION)
+        self.assertEqual(_json(response)['ackDeadlineSeconds'], 10)
+        return backend
+
+    def test_topic_lifecycle(self):
+        backend = self._makeOne()
+        response = backend.create_topic(_make_request('PUT', ''), self.TOPIC)
+        self.assertEqual(_json(response), {'name': self.TOPIC})
+        response = backend.create_topic(_make_request('PUT', ''), self.TOPIC)
+        self.assertEqual(response.status, 409)
+        response = backend.get_topic(_make_request('GET', ''), self.TOPIC)
+        self.assertEqual(response.status, 200)
+        backend.delete_topic(_make_request('DELETE', ''), self.TOPIC)
+        response = backend.get_topic(_make_request('GET', ''), self.TOPIC)
+        self.assertEqual(response.status, 404)
+        response = backend.delete_topic(_make_request('DELETE', ''),
+                                        self.TOPIC)
+        self.assertEqual(response.status, 404)
+
+    def test_create_subscription_missing_topic(self):
+        backend = self._makeOne()
+        response = backend.create_subscription(
+            _make_request('PUT', '', {'topic': self.TOPIC}),
+            self.SUBSCRIPTION)
+        self.assertEqual(response.status, 404)
+
+    def test_publish_pull_acknowledge(self):
+        backend = self._makeWithSubscription()
+        response = backend.publish(
+            _make_request('POST', '', {'messages': [
+                {'data': 'YQ=='}, {'data': 'Yg=='}, {'data': 'Yw=='}]}),
+            self.TOPIC)
+        self.assertEqual(len(_json(response)['messageIds']), 3)
+
+        response = backend.pull(
+            _make_request('POST', '', {'maxMessages': 2}), self.SUBSCRIPTION)
+        received = _json(response)['receivedMessages']
+        self.assertEqual([item['message']['data'] for item in received],
+                         ['YQ==', 'Yg=='])
+
+        ack_ids = [item['ackId'] for item in received]
+        backend.modify_ack_deadline(
+            _make_request('POST', '', {'ackIds': ack_ids[:1],
+                                       'ackDeadlineSeconds': 0}),
+            self.SUBSCRIPTION)
+        backend.acknowledge(
+            _make_request('POST', '', {'ackIds': ack_ids[1:]}),
+            self.SUBSCRIPTION)
+        state = backend.subscriptions[self.SUBSCRIPTION]
+        self.assertEqual(state['outstanding'], {})
+        self.assertEqual([message['data'] for message in state['pending']],
+                         ['Yw==', 'YQ=='])
+
+    def test_modify_push_config(self):
+        backend = self._makeWithSubscription()
+        config = {'pushEndpoint': 'https://example.com/push'}
+        backend.modify_push_config(
+            _make_request('POST', '', {'pushConfig': config}),
+            self.SUBSCRIPTION)
+        response = backend.get_subscription(_make_request('GET', ''),
+                                            self.SUBSCRIPTION)
+        self.assertEqual(_json(response)['pushConfig'], config)
+
+    def test_missing_subscription(self):
+        backend = self._makeOne()
+        for method in (backend.get_subscription, backend.delete_subscription,
+                       backend.pull, backend.acknowledge,
+                       backend.modify_ack_deadline,
+                       backend.modify_push_config):
+            response = method(_make_request('POST', '', {}),
+                              self.SUBSCRIPTION)
+            self.assertEqual(response.status, 404)
+
+
+class TestLoggingBackend(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.services import LoggingBackend
+        return LoggingBackend
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_write_list_delete(self):
+        backend = self._makeOne()
+        backend.write_entries(_make_request('POST', '', {
+            'logName': 'projects/P1/logs/LOG',
+            'labels': {'a': 'b'},
+            'entries': [{'textPayload': 'one'},
+                        {'textPayload': 'two', 'labels': {'c': 'd'}},
+                        {'textPayload': 'three',
+                         'logName': 'projects/P2/logs/LOG'}],
+        }))
+        response = backend.list_entries(_make_request('POST', '', {
+            'projectIds': ['P1'], 'pageSize': 1}))
+        payload = _json(response)
+        self.assertEqual(payload['entries'], [{
+            'logName': 'projects/P1/logs/LOG', 'labels': {'a': 'b'},
+            'textPayload': 'one'}])
+        self.assertEqual(payload['nextPageToken'], '1')
+
+        backend.delete_log(_make_request('DELETE', ''), 'P1', 'LOG')
+        response = backend.list_entries(_make_request('POST', '', {
+            'projectIds': ['P1', 'P2']}))
+        self.assertEqual([entry['textPayload']
+                          for entry in _json(response)['entries']],
+                         ['three'])
+
+
+class Test__bigquery_cell(unittest2.TestCase):
+
+    def _callFUT(self, *args, **kwargs):
+        from gcloud.testing.services import _bigquery_cell
+        return _bigquery_cell(*args, **kwargs)
+
+    def test_scalars(self):
+        self.assertEqual(self._callFUT(None, {'type': 'STRING'}), None)
+        self.assertEqual(self._callFUT(True, {'type': 'BOOLEAN'}), 'true')
+        self.assertEqual(self._callFUT(False, {'type': 'BOOLEAN'}), 'false')
+        self.assertEqual(self._callFUT(1.25, {'type': 'FLOAT'}), '1.25')
+        self.assertEqual(self._callFUT(7, {'type': 'INTEGER'}), '7')
+
+    def test_repeated_and_record(self):
+        field = {'type': 'RECORD', 'mode': 'REPEATED', 'fields': [
+            {'name': 'a', 'type': 'INTEGER'}]}
+        self.assertEqual(self._callFUT([{'a': 1}, {}], field),
+                         [{'f': [{'v': '1'}]}, {'f': [{'v': None}]}])
+
+
+class TestBigQueryBackend(unittest2.TestCase):
+
+    def _getTargetClass(self):
+        from gcloud.testing.services import BigQueryBackend
+        return BigQueryBackend
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def test_dataset_and_table_lifecycle(self):
+        backend = self._makeOne()
+        resource = {'datasetReference': {'projectId': 'P',
+                                         'datasetId': 'D'}}
+        response = backend.insert_dataset(
+            _make_request('POST', '', resource), 'P')
+        self.assertEqual(_json(response)['id'], 'P:D')
+        response = backend.insert_dataset(
+            _make_request('POST', '', resource), 'P')
+        self.assertEqual(response.status, 409)
+        response = backend.get_dataset(_make_request('GET', ''), 'P', 'D')
+        self.assertEqual(response.status, 200)
+
+        table = {'tableReference': {'projectId': 'P', 'datasetId': 'D',
+                                    'tableId': 'T'},
+                 'schema': {'fields': [{'name': 'a', 'type': 'STRING'}]}}
+        response = backend.insert_table(_make_request('POST', '', table),
+                                        'P', 'D')
+        self.assertEqual(_json(response)['numRows'], '0')
+        response = backend.insert_table(_make_request('POST', '', table),
+                                        'P', 'D')
+        self.assertEqual(response.status, 409)
+        response = backend.delete_table(_make_request('DELETE', ''),
+                                        'P', 'D', 'T')
+        self.assertEqual(response.status, 204)
+        response = backend.get_table(_make_request('GET', ''), 'P', 'D', 'T')
+        self.assertEqual(response.status, 404)
+
+    def test_insert_all_and_list_data(self):
+        backend = self._makeOne()
+        backend.create_table('P', 'D', 'T', [
+            {'name': 'name', 'type': 'STRING'},
+            {'name': 'age', 'type': 'INTEGER'}])
+        response = backend.insert_all(_make_request('POST', '', {'rows': [
+            {'json': {'name': 'a', 'age': 1}},
+            {'json': {'name': 'b', 'bogus': 2}},
+        ]}), 'P', 'D', 'T')
+        self.assertEqual(_json(response)['insertErrors'][0]['index'], 1)
+        self.assertEqual(backend.tables[('P', 'D', 'T')]['rows'], [])
+
+        backend.insert_all(_make_request('POST', '', {
+            'rows': [{'json': {'name': 'a', 'age': 1}},
+                     {'json': {'name': 'b', 'bogus': 2}}],
+            'skipInvalidRows': True}), 'P', 'D', 'T')
+        backend.insert_all(_make_request('POST', '', {
+            'rows': [{'json': {'name': 'c', 'bogus': 3}}],
+            'ignoreUnknownValues': True}), 'P', 'D', 'T')
+
+        response = backend.list_data(
+            _make_request('GET', '', query={'maxResults': '1'}),
+            'P', 'D', 'T')
+        payload = _json(response)
+        self.assertEqual(payload['totalRows'], '2')
+        self.assertEqual(payload['rows'], [{'f': [{'v': 'a'}, {'v': '1'}]}])
+        self.assertEqual(payload['pageToken'], '1')
+
+    def test_missing_table(self):
+        backend = self._makeOne()
+        for method in (backend.insert_all, backend.list_data,
+                       backend.delete_table):
+            response = method(_make_request('POST', '', {}), 'P', 'D', 'T')
+            self.assertEqual(response.status, 404)
+
+
+class TestDatastoreBackend(unittest2.TestCase):
+
+    PROJECT = 'PROJECT'
+
+    def _getTargetClass(self):
+        from gcloud.testing.services import DatastoreBackend
+        return DatastoreBackend
+
+    def _makeOne(self, *args, **kwargs):
+        return self._getTargetClass()(*args, **kwargs)
+
+    def _rpc(self, backend, method, request_pb, response_class=None):
+        response = backend.rpc(
+            _make_request('POST', '', request_pb.SerializeToString()),
+            self.PROJECT, method)
+        if response_class is None:
+            return response
+        self.assertEqual(response.status, 200)
+        return response_class.FromString(response.body)
+
+    def _key(self, *flat_path):
+        from gcloud.datastore.key import Key
+        return Key(*flat_path, project=self.PROJECT).to_protobuf()
+
+    def _entity(self, key_pb, **properties):
+        from gcloud.datastore.entity import Entity
+        from gcloud.datastore.helpers import entity_to_protobuf
+        from gcloud.datastore.helpers import key_from_protobuf
+        entity = Entity(key=key_from_protobuf(key_pb))
+        entity.update(properties)
+        return entity_to_protobuf(entity)
+
+    def _commit(self, backend, *entity_pbs, **kwargs):
+        from gcloud.datastore._generated import datastore_pb2
+        request = datastore_pb2.CommitRequest()
+        operation = kwargs.pop('operation', 'upsert')
+        for entity_pb in entity_pbs:
+            getattr(request.mutations.add(), operation).CopyFrom(entity_pb)
+        return self._rpc(backend, 'commit', request,
+                         kwargs.pop('response_class',
+                                    datastore_pb2.CommitResponse))
+
+    def _run_query(self, backend, query_pb):
+        from gcloud.datastore._generated import datastore_pb2
+        request = datastore_pb2.RunQueryRequest()
+        request.query.CopyFrom(query_pb)
+        return self._rpc(backend, 'runQuery', request,
+                         datastore_pb2.RunQueryResponse).batch
+
+    def _query(self, backend, **kwargs):
+        from gcloud.datastore.client import Client
+        from gcloud.datastore.query import Query
+        from gcloud.datastore.query import _pb_from_query
+        client = Client(project=self.PROJECT, http=object())
+        query = Query(client, **kwargs)
+        return query, _pb_from_query(query)
+
+    def test_unknown_method(self):
+        from gcloud.datastore._generated import datastore_pb2
+        from google.rpc import status_pb2
+        backend = self._makeOne()
+        response = self._rpc(backend, 'nope', datastore_pb2.LookupRequest())
+        self.assertEqual(response.status, 404)
+        status = status_pb2.Status.FromString(response.body)
+        self.assertEqual(status.message, 'Unknown method: nope')
+
+    def test_commit_and_lookup(self):
+        from gcloud.datastore._generated import datastore_pb2
+        backend = self._makeOne()
+        partial = self._entity(self._key('Kind'), value=1)
+        complete = self._entity(self._key('Kind', 'name'), value=2)
+        response = self._commit(backend, partial, complete)
+        self.assertEqual(response.index_updates, 2)
+        allocated = response.mutation_results[0].key
+        self.assertEqual(allocated.path[0].id, 1)
+        self.assertFalse(response.mutation_results[1].HasField('key'))
+
+        request = datastore_pb2.LookupRequest()
+        request.keys.add().CopyFrom(allocated)
+        request.keys.add().CopyFrom(self._key('Kind', 'missing'))
+        response = self._rpc(backend, 'lookup', request,
+                             datastore_pb2.LookupResponse)
+        self.assertEqual(len(response.found), 1)
+        self.assertEqual(
+            response.found[0].entity.properties['value'].integer_value, 1)
+        self.assertEqual(response.missing[0].entity.key.path[0].name,
+                         'missing')
+
+    def test_commit_insert_conflict_and_update_missing(self):
+        backend = self._makeOne()
+        entity_pb = self._entity(self._key('Kind', 1))
+        self._commit(backend, entity_pb, operation='insert')
+        response = self._commit(backend, entity_pb, operation='insert',
+                                response_class=None)
+        self.assertEqual(response.status, 409)
+        response = self._commit(backend,
+                                self._entity(self._key('Kind', 2)),
+                                operation='update', response_class=None)
+        self.assertEqual(response.status, 404)
+
+    def test_commit_delete(self):
+        from gcloud.datastore._generated import datastore_pb2
+        backend = self._makeOne()
+        self._commit(backend, self._entity(self._key('Kind', 1)))
+        request = datastore_pb2.CommitRequest()
+        request.mutations.add().delete.CopyFrom(self._key('Kind', 1))
+        self._rpc(backend, 'commit', request, datastore_pb2.CommitResponse)
+        self.assertEqual(backend.entities, {})
+
+    def test_run_query_filter_order_limit(self):
+        from gcloud.datastore._generated import query_pb2
+        backend = self._makeOne()
+        self._commit(backend, *[
+            self._entity(self._key('Kind', index), value=index % 4)
+            for index in range(1, 9)])
+        self._commit(backend, self._entity(self._key('Other', 1), value=2))
+        query, query_pb = self._query(backend, kind='Kind',
+                                      filters=[('value', '>=', 2)],
+                                      order=['-value'])
+        query_pb.limit.value = 3
+        query_pb.offset = 1
+        batch = self._run_query(backend, query_pb)
+        self.assertEqual(batch.skipped_results, 1)
+        self.assertEqual(batch.more_results,
+                         query_pb2.QueryResultBatch.MORE_RESULTS_AFTER_LIMIT)
+        self.assertEqual(
+            [(result.entity.key.path[0].id,
+              result.entity.properties['value'].integer_value)
+             for result in batch.entity_results],
+            [(7, 3), (2, 2), (6, 2)])
+
+    def test_run_query_batches_and_cursors(self):
+        from gcloud.datastore._generated import query_pb2
+        backend = self._makeOne(batch_size=2)
+        self._commit(backend, *[self._entity(self._key('Kind', index))
+                                for index in range(1, 6)])
+        _, query_pb = self._query(backend, kind='Kind')
+        batch = self._run_query(backend, query_pb)
+        self.assertEqual(batch.more_results,
+                         query_pb2.QueryResultBatch.NOT_FINISHED)
+        self.assertEqual(len(batch.entity_results), 2)
+
+        query_pb.start_cursor = batch.end_cursor
+        query_pb.end_cursor = b'3'
+        batch = self._run_query(backend, query_pb)
+        self.assertEqual(
+            batch.more_results,
+            query_pb2.QueryResultBatch.MORE_RESULTS_AFTER_CURSOR)
+        self.assertEqual([result.entity.key.path[0].id
+                          for result in batch.entity_results], [3])
+
+    def test_run_query_ancestor_and_keys_only(self):
+        from gcloud.datastore._generated import query_pb2
+        from gcloud.datastore.key import Key
+        backend = self._makeOne()
+        self._commit(
+            backend,
+            self._entity(self._key('Parent', 1, 'Kind', 1), value=1),
+            self._entity(self._key('Parent', 2, 'Kind', 2), value=2))
+        query, _ = self._query(backend, kind='Kind')
+        query.ancestor = Key('Parent', 1, project=self.PROJECT)
+        query.keys_only()
+        from gcloud.datastore.query import _pb_from_query
+        batch = self._run_query(backend, _pb_from_query(query))
+        self.assertEqual(batch.entity_result_type,
+                         query_pb2.EntityResult.KEY_ONLY)
+        result, = batch.entity_results
+        self.assertEqual(result.entity.key.path[0].id, 1)
+        self.assertEqual(len(result.entity.properties), 0)
+
+    def test_run_query_projection(self):
+        from gcloud.datastore._generated import query_pb2
+        backend = self._makeOne()
+        self._commit(backend,
+                     self._entity(self._key('Kind', 1), a=1, b=2))
+        _, query_pb = self._query(backend, kind='Kind', projection=['a'])
+        batch = self._run_query(backend, query_pb)
+        self.assertEqual(batch.entity_result_type,
+                         query_pb2.EntityResult.PROJECTION)
+        self.assertEqual(list(batch.entity_results[0].entity.properties),
+                         ['a'])
+
+    def test_run_query_scatter_order(self):
+        backend = self._makeOne()
+        self._commit(backend, *[self._entity(self._key('Kind', index))
+                                for index in range(1, 21)])
+        _, query_pb = self._query(backend, kind='Kind', order=['__scatter__'])
+        batch = self._run_query(backend, query_pb)
+        ids = [result.entity.key.path[0].id
+               for result in batch.entity_results]
+        self.assertEqual(sorted(ids), list(range(1, 21)))
+        self.assertNotEqual(ids, list(range(1, 21)))
+        # The order is stable across queries.
+        batch = self._run_query(backend, query_pb)
+        self.assertEqual([result.entity.key.path[0].id
+                          for result in batch.entity_results], ids)
+
+    def test_run_query_gql(self):
+        from gcloud.datastore._generated import datastore_pb2
+        backend = self._makeOne()
+        request = datastore_pb2.RunQueryRequest()
+        request.gql_query.query_string = 'SELECT *'
+        response = self._rpc(backend, 'runQuery', request)
+        self.assertEqual(response.status, 400)
+
+    def test_transaction_and_allocate_ids(self):
+        from gcloud.datastore._generated import datastore_pb2
+        backend = self._makeOne()
+        response = self._rpc(backend, 'beginTransaction',
+                             datastore_pb2.BeginTransactionRequest(),
+                             datastore_pb2.BeginTransactionResponse)
+        self.assertTrue(response.transaction)
+        self._rpc(backend, 'rollback',
+                  datastore_pb2.RollbackRequest(
+                      transaction=response.transaction),
+                  datastore_pb2.RollbackResponse)
+
+        request = datastore_pb2.AllocateIdsRequest()
+        request.keys.add().CopyFrom(self._key('Kind'))
+        request.keys.add().CopyFrom(self._key('Kind'))
+        response = self._rpc(backend, 'allocateIds', request,
+                             datastore_pb2.AllocateIdsResponse)
+        self.assertEqual([key.path[0].id for key in response.keys], [2, 3])
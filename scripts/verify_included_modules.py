@@ -50,6 +50,7 @@ IGNORED_MODULES = frozenset([
     'gcloud.streaming.stream_slice',
     'gcloud.streaming.transfer',
     'gcloud.streaming.util',
+    'gcloud.testing.__init__',
     'gcloud.translate.__init__',
 ])
 
@@ -20,12 +20,16 @@ REQUIREMENTS = [
 ]
 
 GRPC_EXTRAS = [
-    'grpcio >= 0.14.0',
+    'grpcio >= 1.19.0',
     'google-gax >= 0.12.1',
     'gax-google-pubsub-v1 >= 0.7.10',
     'gax-google-logging-v2 >= 0.7.10',
 ]
 
+HTTP2_EXTRAS = [
+    'h2 >= 3.0.0',
+]
+
 if sys.version_info[:2] == (2, 7) and 'READTHEDOCS' not in os.environ:
     REQUIREMENTS.extend(GRPC_EXTRAS)
 
@@ -44,7 +48,10 @@ setup(
     include_package_data=True,
     zip_safe=False,
     install_requires=REQUIREMENTS,
-    extras_require={'grpc': GRPC_EXTRAS},
+    extras_require={
+        'grpc': GRPC_EXTRAS,
+        'http2': HTTP2_EXTRAS,
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',